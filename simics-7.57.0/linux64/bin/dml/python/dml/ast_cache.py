@@ -0,0 +1,166 @@
+# © 2026 Intel Corporation
+# SPDX-License-Identifier: MPL-2.0
+
+# User-level cache of parsed DML files.
+#
+# The cache is a flat directory of pickled (file_info, ast) pairs,
+# similar to .dmlast files. Each entry is keyed by a hash of the file
+# contents, together with everything else that can affect the result
+# of parsing: the set of enabled compatibility features and a
+# fingerprint of the compiler itself. The file name is not part of the
+# key; like for .dmlast files, FileInfo.name is cleared when storing
+# and restored when loading.
+#
+# The cache location is taken from the DMLC_CACHE_DIR environment
+# variable, defaulting to $XDG_CACHE_HOME/dmlc (or ~/.cache/dmlc).
+# Setting DMLC_CACHE_DIR to the empty string disables the cache. The
+# total size is bounded by DMLC_CACHE_SIZE (in megabytes); when
+# exceeded, the least recently used entries are removed.
+#
+# All cache operations are best effort: any I/O or unpickling problem
+# is treated as a cache miss, so a read-only or corrupt cache can never
+# break compilation. Entries are written atomically, so concurrent
+# dmlc processes may safely share the same cache directory.
+
+import os
+import sys
+import hashlib
+import pickle
+import tempfile
+
+from . import logging
+import dml.globals
+
+__all__ = ('lookup', 'store')
+
+suffix = '.dmlast'
+default_size_limit = 256  # megabytes
+
+def cache_dir():
+    '''Return the cache directory, or None if caching is disabled'''
+    path = os.environ.get('DMLC_CACHE_DIR')
+    if path is not None:
+        return path or None
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'dmlc')
+
+def size_limit():
+    try:
+        return int(os.environ.get('DMLC_CACHE_SIZE',
+                                  default_size_limit)) * 1024 * 1024
+    except ValueError:
+        return default_size_limit * 1024 * 1024
+
+_fingerprint = None
+def compiler_fingerprint():
+    '''A digest that changes whenever the compiler is modified. Based on the
+    size and timestamp of all modules in the dml package, which covers
+    both the grammar and the pickled AST classes.'''
+    global _fingerprint
+    if _fingerprint is None:
+        h = hashlib.sha256(repr(sys.version_info[:2]).encode())
+        pkgdir = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(pkgdir)):
+            if name.endswith('.py'):
+                st = os.stat(os.path.join(pkgdir, name))
+                h.update(f'{name}:{st.st_size}:{st.st_mtime_ns};'.encode())
+        _fingerprint = h.hexdigest()
+    return _fingerprint
+
+def enabled():
+    # Porting messages depend on extra position information which is
+    # not preserved in cached ASTs
+    return not logging.show_porting and cache_dir() is not None
+
+def key(contents):
+    '''Return the cache key of a DML file with the given contents (a bytes
+    object), or None if caching is disabled.'''
+    if not enabled():
+        return None
+    h = hashlib.sha256(compiler_fingerprint().encode())
+    h.update(repr(sorted(feature.tag()
+                         for feature in dml.globals.enabled_compat)).encode())
+    h.update(b'T' if dml.globals.enable_testing_features else b'F')
+    h.update(contents)
+    return h.hexdigest()
+
+def lookup(cache_key):
+    '''Return a cached (file_info, ast) pair, or None on a cache
+    miss. The name of the returned file_info is None.'''
+    if cache_key is None:
+        return None
+    path = os.path.join(cache_dir(), cache_key + suffix)
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)  # nosec
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Truncated or stale entry; drop it so it can be rewritten
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    try:
+        # Mark as recently used, for eviction
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+def store(cache_key, file_info, ast):
+    '''Save a parse result in the cache. The name of file_info is
+    temporarily cleared while pickling.'''
+    if cache_key is None:
+        return
+    directory = cache_dir()
+    name = file_info.name
+    file_info.set_name(None)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        (fd, tmpname) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((file_info, ast), f,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpname, os.path.join(directory, cache_key + suffix))
+        except BaseException:
+            os.remove(tmpname)
+            raise
+    except (OSError, pickle.PicklingError, RecursionError):
+        return
+    finally:
+        file_info.set_name(name)
+    evict(directory, size_limit())
+
+def evict(directory, limit):
+    '''Remove least recently used entries until the total cache size is
+    within limit bytes'''
+    entries = []
+    total = 0
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(suffix):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+    except OSError:
+        return
+    if total <= limit:
+        return
+    entries.sort()
+    for (_, size, path) in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            # possibly removed concurrently by another dmlc process
+            pass
+        total -= size
+        if total <= limit:
+            break
@@ -10,6 +10,7 @@ from functools import reduce
 from abc import ABC, abstractmethod
 import dataclasses
 import json
+import zlib
 from pathlib import Path
 
 from . import objects, logging, crep, output, ctree, serialize, structure
@@ -28,7 +29,15 @@ from .types import *
 from .set import Set
 
 prototypes = []
+# With --split-c-file, start a new C file whenever the current one
+# grows beyond this many bytes
 c_split_threshold = None
+# With --split-c-file-count, distribute functions over this many C
+# files using a stable hash
+c_split_count = None
+
+def splitting_c_file():
+    return bool(c_split_threshold or c_split_count)
 
 log_object_t = TNamed("log_object_t")
 conf_object_t = TNamed("conf_object_t")
@@ -372,7 +381,7 @@ def generate_hfile(device, headers, filename):
     emit_guard_end(filename)
 
 def generate_protofile(device):
-    linkage = 'extern' if c_split_threshold else 'static'
+    linkage = 'extern' if splitting_c_file() else 'static'
     out('\n/* generated function prototypes */\n')
     for proto in prototypes:
         out("%s %s UNUSED;\n" % (linkage, proto))
@@ -2108,6 +2117,7 @@ def generate_each_in_tables():
         by_trait.setdefault(trait, []).append((node, subobjs))
     for t in by_trait:
         generate_each_in_table(t, by_trait[t])
+        splitting_point()
     for t in Set(dml.globals.traits.values()).difference(by_trait):
         # Need by shared methods that belong to unused templates;
         # when dereferencing sequence params, these methods reference
@@ -2754,10 +2764,9 @@ def generate_trait_trampoline(method, vtable_trait):
 
     # guaranteed to exist; created by ObjTraits.mark_referenced
     func = method.funcs[None]
-    out('static %s\n{\n' % (
-        rettype.declaration('%s(%s)' % (
-            trait_trampoline_name(method, vtable_trait), inparams))),
-        postindent=1)
+    start_function_definition(rettype.declaration('%s(%s)' % (
+        trait_trampoline_name(method, vtable_trait), inparams)))
+    out('{\n', postindent=1)
     with (crep.DeviceInstanceContext() if not method.independent
           else nullcontext()):
         [(tname, ttype)] = implicit_inargs
@@ -2785,10 +2794,12 @@ def generate_trait_trampolines(node):
         for name in overridden.intersection(trait.vtable_methods):
             generate_trait_trampoline(
                 node.traits.method_overrides[name], trait)
+            splitting_point()
         for name in overridden.intersection(trait.ancestor_vtables):
             generate_trait_trampoline(
                 node.traits.method_overrides[name],
                 trait.ancestor_vtables[name])
+            splitting_point()
 
 def generate_vtable_instances(devnode):
     for subnode in flatten_object_subtree(devnode):
@@ -3238,7 +3249,7 @@ class MultiFileOutput(FileOutput):
         self.stem = stem
         self.header = header
         self.index = 0
-        self.write(self.header)
+        self.out(self.header)
     def advance(self):
         '''Finish this C file and start writing the next one'''
         self.close()
@@ -3248,31 +3259,124 @@ class MultiFileOutput(FileOutput):
         self.set_file(open(new_filename + '.tmp', 'w'), new_filename)
         self.out(self.header)
 
+class StableMultiFileOutput(output.Output):
+    '''Distributes C code over a fixed number of files STEM-0.c,
+    STEM-1.c, ... The code between two splitting points is buffered,
+    and then appended to a file selected by a hash of the first
+    function it defines. Thus, the file a function is placed in does
+    not depend on what was generated before it, and a change in one
+    function only affects the contents of one file. Files whose contents
+    did not change are not rewritten, so the C compiler does not need to
+    rebuild them.'''
+    def __init__(self, stem, header, count):
+        super().__init__()
+        self.stem = stem
+        self.count = count
+        self.filenames = [str(Path('%s-%d.c' % (stem, i)).resolve())
+                          for i in range(count)]
+        self.filename = self.filenames[0]
+        # Per file: list of strings, next line number, and whether
+        # code is currently attributed to a DML file
+        self.contents = [[header] for _ in range(count)]
+        self.file_linenos = [1 + header.count('\n')] * count
+        self.file_redirected = [False] * count
+        self.start_chunk()
+
+    def start_chunk(self):
+        self.key = None
+        # strings, and (indent, lineno) pairs representing #line
+        # directives that reset to the C file
+        self.pieces = []
+        self.write = self.pieces.append
+        self.lineno = 1
+        self.redirected_filename = None
+        self.redirected_lineno = None
+
+    def set_key(self, key):
+        if self.key is None:
+            self.key = key
+
+    def reset_line_directive(self):
+        if self.redirected_filename is not None:
+            self.redirected_filename = None
+            self.redirected_lineno = None
+            # The line number is known only when the chunk has been
+            # placed in a file
+            self.pieces.append((' ' * self.indent if self.bol else '',
+                                self.lineno))
+            self.lineno += 1
+            self.bol = True
+
+    def split(self):
+        '''Move the code generated since the last splitting point to its
+        file'''
+        index = (zlib.crc32(self.key.encode('utf-8')) % self.count
+                 if self.key else 0)
+        contents = self.contents[index]
+        filename = quote_filename(self.filenames[index])
+        base = self.file_linenos[index]
+        if self.file_redirected[index]:
+            contents.append('#line %d "%s"\n' % (base + 1, filename))
+            base += 1
+        for piece in self.pieces:
+            if isinstance(piece, str):
+                contents.append(piece)
+            else:
+                (indent, lineno) = piece
+                contents.append('%s#line %d "%s"\n'
+                                % (indent, base + lineno, filename))
+        self.file_linenos[index] = base + self.lineno - 1
+        self.file_redirected[index] = self.redirected_filename is not None
+        self.start_chunk()
+
+    def close(self):
+        self.split()
+
+    def commit(self):
+        if self.indent:
+            raise ICE(SimpleSite(f"{self.filename}:0"), 'Unbalanced indent')
+        for (filename, contents) in zip(self.filenames, self.contents):
+            f = FileOutput(filename, keep_unchanged=True)
+            f.write(''.join(contents))
+            f.close()
+            f.commit()
+        # Remove files left over from a compilation with a higher count
+        index = self.count
+        while os.path.exists('%s-%d.c' % (self.stem, index)):
+            os.remove('%s-%d.c' % (self.stem, index))
+            index += 1
+
 def assert_global_c_scope():
     assert output.current().indent == 0 or logging.failure
 
 def add_variable_declaration(decl, init=None):
     assert_global_c_scope()
+    if c_split_count and c_file:
+        c_file.set_key(decl)
     prototypes.append(decl)
     if init:
-        linkage = '' if c_split_threshold else 'static '
+        linkage = '' if splitting_c_file() else 'static '
         out('%s%s UNUSED = %s;\n' % (linkage, decl, init))
-    elif c_split_threshold:
+    elif splitting_c_file():
         out(decl + ' UNUSED;\n')
 
 def start_function_definition(decl):
     assert_global_c_scope()
-    linkage = '' if c_split_threshold else 'static '
+    if c_split_count and c_file:
+        c_file.set_key(decl)
+    linkage = '' if splitting_c_file() else 'static '
     out("%s%s\n" % (linkage, decl))
     prototypes.append(decl)
 
 def splitting_point():
     '''Called after generating the definition of a function or
-    variable. When --split-c-file is used, this is a place where the
-    .c file can be split.'''
+    variable. When --split-c-file or --split-c-file-count is used,
+    this is a place where the .c file can be split.'''
     assert output.current() == c_file
     assert_global_c_scope()
-    if c_split_threshold and c_file.tell() > c_split_threshold:
+    if c_split_count:
+        c_file.split()
+    elif c_split_threshold and c_file.tell() > c_split_threshold:
         c_file.advance()
 
 c_file = None
@@ -3299,7 +3403,9 @@ def generate_cfile(device, footers,
         '#include "%s"' % (os.path.basename(protofilename),),
         ''])
 
-    if c_split_threshold:
+    if c_split_count:
+        c_file = StableMultiFileOutput(filename_prefix, c_top, c_split_count)
+    elif c_split_threshold:
         c_file = MultiFileOutput(filename_prefix, c_top)
     else:
         c_file = FileOutput(filename_prefix + '.c')
@@ -3374,6 +3480,7 @@ def generate_cfile_body(device, footers, full_module, filename_prefix):
                 out(ctx.buf)
             else:
                 generate_trait_method(m)
+            splitting_point()
     # Note: methods may be added to method_queue while doing this,
     # so don't try to be too smart
     generated_funcs = set()
@@ -3457,6 +3564,7 @@ def generate_cfile_body(device, footers, full_module, filename_prefix):
 
     for func in statically_exported_methods:
         generate_static_trampoline(func)
+        splitting_point()
 
     for (name, (func, export_site)) in list(exported_methods.items()):
         if export_site.dml_version() == (1, 2):
@@ -3529,21 +3637,21 @@ def generate(device, headers, footers, prefix, source_files, full_module):
     generate_cfile(device, footers, prefix, hfilename,
                    protofilename, source_files, full_module)
 
-    outfile = FileOutput(structfilename)
+    outfile = FileOutput(structfilename, keep_unchanged=bool(c_split_count))
     with outfile:
         generate_structfile(device, structfilename, prefix)
     outfile.close()
     if not logging.failure:
         outfile.commit()
 
-    outfile = FileOutput(hfilename)
+    outfile = FileOutput(hfilename, keep_unchanged=bool(c_split_count))
     with outfile:
         generate_hfile(device, headers, hfilename)
     outfile.close()
     if not logging.failure:
         outfile.commit()
 
-    outfile = FileOutput(protofilename)
+    outfile = FileOutput(protofilename, keep_unchanged=bool(c_split_count))
     with outfile:
         generate_protofile(device)
     outfile.close()
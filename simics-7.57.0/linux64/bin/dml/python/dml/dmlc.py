@@ -17,6 +17,7 @@ from . import compat
 import dml.c_backend
 import dml.info_backend
 import dml.g_backend
+import dml.incremental
 import dml.globals
 import dml.dmlparse
 from .logging import *
@@ -341,6 +342,26 @@ def main(argv):
         default=[],
         help='set compile time constant NAME to VALUE')
 
+    # <dt>-j <i>N</i>, --jobs=<i>N</i></dt>
+    # <dd>Parse imported files using up to <i>N</i> parallel
+    # processes. The generated code is identical to that of a serial
+    # compilation.</dd>
+    parser.add_argument(
+        '-j', '--jobs', action='store',
+        metavar='N',
+        default="1",
+        help='parse imported files using N parallel processes')
+
+    # <dt>--incremental</dt>
+    # <dd>Record the resolved input files and compilation settings in
+    # a manifest next to the generated files, and skip code generation,
+    # leaving generated files untouched, when a later compilation
+    # finds that nothing has changed.</dd>
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='skip code generation when no inputs have changed since the'
+        ' last successful compilation')
+
     # <dt>--dep</dt>
     # <dd>Output makefile rules describing dependencies.</dd>
     parser.add_argument(
@@ -454,6 +475,29 @@ def main(argv):
         default="0",
         help=('Limit the number of error messages to N'))
 
+    # <dt>--split-c-file=<i>N</i></dt>
+    # <dd>Generate multiple C files <i>output_base</i><tt>-0.c</tt>,
+    # <i>output_base</i><tt>-1.c</tt>, ..., instead of one, starting a new
+    # file whenever the current one exceeds <i>N</i> bytes.</dd>
+    parser.add_argument(
+        '--split-c-file', action='store', default='0',
+        metavar='N',
+        help='split generated C code in files of about N bytes')
+
+    # <dt>--split-c-file-count=<i>N</i></dt>
+    # <dd>Generate exactly <i>N</i> C files <i>output_base</i><tt>-0.c</tt>,
+    # ..., <i>output_base</i><tt>-</tt><i>N-1</i><tt>.c</tt>. Each
+    # function or variable definition is placed in a file selected by a
+    # hash of its name, so a change in the device only affects the files
+    # that contain changed functions. Files whose contents are unchanged
+    # are not rewritten, so they need not be recompiled. A count of 0, the
+    # default, generates a single C file.</dd>
+    parser.add_argument(
+        '--split-c-file-count', action='store', default='0',
+        metavar='N',
+        help='distribute generated C code over N files, placing each'
+        ' function in a stable location')
+
     # </dl>
     # </add>
 
@@ -485,11 +529,6 @@ def main(argv):
         '--state-change-dml12', action='store_true',
         help=argparse.SUPPRESS)
 
-    # Generate multiple C files, splitting at the specified file size
-    parser.add_argument(
-        '--split-c-file', action='store', default='0',
-        help=argparse.SUPPRESS)
-
     # Enable features for internal testing
     parser.add_argument(
         '--enable-features-for-internal-testing-dont-use-this',
@@ -543,6 +582,15 @@ def main(argv):
               % (options.max_errors))
         sys.exit(1)
 
+    try:
+        jobs = int(options.jobs)
+        if jobs < 1:
+            raise ValueError()
+    except ValueError:
+        prerr("dmlc: Expected positive integer for --jobs, got %r"
+              % (options.jobs,))
+        sys.exit(1)
+
     try:
         size = int(options.split_c_file)
         if size < 0:
@@ -553,6 +601,21 @@ def main(argv):
               % (options.split_c_file,))
         sys.exit(1)
 
+    try:
+        count = int(options.split_c_file_count)
+        if count < 0:
+            raise ValueError()
+        dml.c_backend.c_split_count = count
+    except ValueError:
+        prerr("dmlc: Expected non-negative integer for --split-c-file-count,"
+              " got %r" % (options.split_c_file_count,))
+        sys.exit(1)
+
+    if dml.c_backend.c_split_threshold and dml.c_backend.c_split_count:
+        prerr("dmlc: the --split-c-file flag cannot be used together with"
+              " --split-c-file-count")
+        sys.exit(1)
+
     dml.globals.coverity = options.coverity
 
     dml.globals.linemarks_enabled = not options.noline
@@ -655,7 +718,7 @@ def main(argv):
         dml.globals.serialized_traits = serialize.SerializedTraits()
         (dml_version, devname, headers, footers, global_defs,
          top_tpl, imported) = toplevel.parse_main_file(
-             inputfilename, options.import_path)
+             inputfilename, options.import_path, jobs)
         logtime("parsing")
 
         if dml_version != (1, 2):
@@ -703,11 +766,25 @@ def main(argv):
                     f.write('%s :\n' % (deps,))
             sys.exit(0)
 
+        if (options.incremental and not logging.failure
+            and not options.porting_filename):
+            manifest = dml.incremental.Manifest(
+                outputbase, argv[1:], options.defines)
+            input_files = [inputfilename] + list(imported.keys())
+            if manifest.up_to_date(input_files):
+                logtime("incremental")
+                return 0
+            manifest.invalidate()
+        else:
+            manifest = None
+
         dev = process(devname, global_defs, top_tpl, defs)
         logtime("process")
 
+        generated_files = output.FileOutput.committed_files
         if options.info:
             dml.info_backend.generate(dev, outputbase + '.xml')
+            generated_files.append(outputbase + '.xml')
             logtime("info")
 
         if output_c:
@@ -719,6 +796,7 @@ def main(argv):
             if dml.globals.debuggable:
                 dml.g_backend.generate(expr_util.param_str(dev, 'classname'),
                                        dev, dml_version, outputbase + '.g')
+                generated_files.append(outputbase + '.g')
                 logtime("g")
 
         if not logging.failure:
@@ -729,6 +807,11 @@ def main(argv):
             for wref in messages.WREF.instances:
                 report(wref)
 
+        if manifest and not logging.failure and not logging.messages_logged:
+            # Only silent compilations are recorded, since a skipped
+            # compilation would not repeat any warnings
+            manifest.write(input_files, generated_files)
+
         logtime("total")
 
         return 2 if logging.failure else 0
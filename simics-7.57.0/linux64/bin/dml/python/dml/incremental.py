@@ -0,0 +1,95 @@
+# © 2026 Intel Corporation
+# SPDX-License-Identifier: MPL-2.0
+
+# Support for incremental compilation (--incremental).
+#
+# After a successful compilation that reported no messages, a manifest
+# is written next to the generated files. It records the command line,
+# derived settings (defines, compat features, API version), a
+# fingerprint of the compiler, a content hash of every DML file that
+# was imported, and the size and timestamp of every generated file.
+#
+# When dmlc is invoked again with the same settings, the manifest is
+# compared after parsing. If all inputs resolve to the same files with
+# the same contents and the generated files are untouched, code
+# generation is skipped and the generated files are left as they are,
+# so timestamps are preserved and the C compiler has nothing to
+# rebuild.
+
+import os
+import json
+import hashlib
+
+from . import ast_cache
+import dml.globals
+
+__all__ = ('Manifest',)
+
+format_version = 1
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def output_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+class Manifest(object):
+    '''The manifest of one compilation, stored in
+    <outputbase>-manifest.json'''
+    def __init__(self, outputbase, argv, defines):
+        self.filename = outputbase + '-manifest.json'
+        self.settings = {
+            'format': format_version,
+            'compiler': ast_cache.compiler_fingerprint(),
+            'argv': list(argv),
+            'defines': list(defines),
+            'api_version': dml.globals.api_version.str,
+            'compat': sorted(feature.tag()
+                             for feature in dml.globals.enabled_compat),
+            'pathsubst': os.environ.get('DMLC_PATHSUBST'),
+        }
+
+    def up_to_date(self, input_files):
+        '''Return True if the outputs recorded by a previous compilation
+        are valid for the given input files.'''
+        try:
+            with open(self.filename) as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(old, dict) or old.get('settings') != self.settings:
+            return False
+        inputs = old.get('inputs', {})
+        if sorted(inputs) != sorted(os.path.abspath(p) for p in input_files):
+            return False
+        try:
+            for (path, digest) in inputs.items():
+                if file_digest(path) != digest:
+                    return False
+            for (path, stamp) in old.get('outputs', {}).items():
+                if output_stamp(path) != stamp:
+                    return False
+        except OSError:
+            return False
+        return bool(old.get('outputs'))
+
+    def invalidate(self):
+        '''Remove any previous manifest, before generating new outputs'''
+        try:
+            os.remove(self.filename)
+        except FileNotFoundError:
+            pass
+
+    def write(self, input_files, output_files):
+        manifest = {
+            'settings': self.settings,
+            'inputs': {os.path.abspath(p): file_digest(p)
+                       for p in input_files},
+            'outputs': {os.path.abspath(p): output_stamp(p)
+                        for p in output_files},
+        }
+        with open(self.filename + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(self.filename + '.tmp', self.filename)
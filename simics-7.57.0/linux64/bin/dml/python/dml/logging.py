@@ -39,6 +39,9 @@ show_porting = False
 # Signal translation failure
 failure = 0
 
+# Number of messages that have been printed
+messages_logged = 0
+
 # Stop compilation after this number of errors (0 means inf)
 max_errors = 0
 
@@ -431,12 +434,14 @@ class TemplateSite(Site):
 store_errors = None
 
 def report(logmessage):
+    global messages_logged
     if store_errors is not None and isinstance(logmessage,
                                                (DMLError, DMLWarning)):
         store_errors.append(logmessage)
         return
 
     if logmessage.preprocess():
+        messages_logged += 1
         logmessage.log()
         logmessage.postprocess()
 
@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: MPL-2.0
 
 import os
+import filecmp
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -97,8 +98,14 @@ class NoOutput(Output):
         pass
 
 class FileOutput(Output):
-    def __init__(self, filename):
+    # Names of all files written so far
+    committed_files = []
+
+    def __init__(self, filename, keep_unchanged=False):
         super(FileOutput, self).__init__()
+        # If true, an existing file with identical contents is not
+        # replaced, so its timestamp is preserved
+        self.keep_unchanged = keep_unchanged
         self.set_file(open(filename + ".tmp", "w"), filename)
 
     def set_file(self, f, filename):
@@ -118,6 +125,12 @@ class FileOutput(Output):
     def commit(self):
         if self.indent:
             raise ICE(SimpleSite(f"{self.filename}:0"), 'Unbalanced indent')
+        FileOutput.committed_files.append(self.filename)
+        if (self.keep_unchanged and os.path.exists(self.filename)
+            and filecmp.cmp(self.filename + '.tmp', self.filename,
+                            shallow=False)):
+            os.remove(self.filename + '.tmp')
+            return
         try:
             os.remove(self.filename)
         except OSError:
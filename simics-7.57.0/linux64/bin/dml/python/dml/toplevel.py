@@ -16,6 +16,7 @@ from ply import lex, yacc
 
 from . import objects, logging, codegen, ctree, ast
 from . import compat
+from . import ast_cache
 from . import symtab
 from .messages import *
 from .logging import *
@@ -242,10 +243,10 @@ def process_pragma(t):
         raise ICE(f'unknown pragma: {pragma}')
 
 
-def parse_file(dml_filename):
+def read_dml_file(dml_filename):
     try:
         with open(dml_filename, 'r') as f:
-            filestr = f.read()
+            return f.read()
     except IOError as msg:
         raise EIMPORT(SimpleSite(f"{dml_filename}:0"), f"{dml_filename}: {msg}")
     except UnicodeDecodeError:
@@ -261,10 +262,13 @@ def parse_file(dml_filename):
                         'utf-8 decoding error: ' + e.reason)
         # should not happen
         raise
+
+def parse_contents(dml_filename, filestr):
+    '''Parse the contents of a DML file. Return (file_info, pragmas, ast);
+    pragmas are returned unprocessed.'''
     # Plug "Trojan Source" attack by completely disallowing BiDi characters
     check_bidi(dml_filename, filestr)
-    for pragma in parse_pragmas(dml_filename, filestr):
-        process_pragma(pragma)
+    pragmas = parse_pragmas(dml_filename, filestr)
 
     version, contents = determine_version(filestr, dml_filename)
     file_info = logging.FileInfo(dml_filename, version, None)
@@ -273,8 +277,112 @@ def parse_file(dml_filename):
             sha1 = hashlib.sha1(f.read()).hexdigest()  # nosec
         report(PSHA1(SimpleSite(f'{dml_filename}:1:0'), sha1))
     ast = parse(contents, file_info, dml_filename, version)
+    return (file_info, pragmas, ast)
+
+def parse_file(dml_filename):
+    filestr = read_dml_file(dml_filename)
+
+    cache_key = ast_cache.key(filestr.encode('utf-8'))
+    cached = ast_cache.lookup(cache_key)
+    if cached is not None:
+        (file_info, ast) = cached
+        file_info.set_name(dml_filename)
+        # Pragmas refer to the file by name, so they are not cached
+        for pragma in parse_pragmas(dml_filename, filestr):
+            process_pragma(pragma)
+        return ast
+
+    # Messages are deferred while parsing, so we can tell whether the
+    # result is clean enough to be cached; a cache hit would not
+    # reproduce them.
+    orig_store_errors = logging.store_errors
+    deferred = logging.store_errors = []
+    try:
+        (file_info, pragmas, ast) = parse_contents(dml_filename, filestr)
+        for pragma in pragmas:
+            process_pragma(pragma)
+    finally:
+        logging.store_errors = orig_store_errors
+        for msg in deferred:
+            report(msg)
+    if not deferred:
+        ast_cache.store(cache_key, file_info, ast)
     return ast
 
+def init_parse_worker(compat_tags, enable_testing_features):
+    '''Initialize the global state that parsing depends on, in a worker
+    process of a parallel parse'''
+    dml.globals.enabled_compat = {compat.features[tag]
+                                  for tag in compat_tags}
+    dml.globals.enable_testing_features = enable_testing_features
+
+def parse_in_worker(dml_filename):
+    '''Parse a DML file in a worker process. Return a
+    (file_info, pragmas, ast) tuple, or None if parsing reported a
+    message or failed; in this case the file is parsed again by the main
+    process, which reports the messages in the same order as a serial
+    parse would.'''
+    logging.store_errors = []
+    try:
+        filestr = read_dml_file(dml_filename)
+        cache_key = ast_cache.key(filestr.encode('utf-8'))
+        if ast_cache.lookup(cache_key) is not None:
+            # Cheaper to load from cache in the main process
+            return None
+        (file_info, pragmas, ast) = parse_contents(dml_filename, filestr)
+    except DMLError:
+        return None
+    if logging.store_errors:
+        return None
+    ast_cache.store(cache_key, file_info, ast)
+    return (file_info, pragmas, ast)
+
+class ParallelParser(object):
+    '''Parses imported files in a pool of worker processes, ahead of the
+    serial import loop. Files are submitted as soon as their import
+    statements have been seen, and each result is collected when the
+    serial loop reaches the corresponding import, so the order in which
+    ASTs are merged does not depend on the number of workers.'''
+    def __init__(self, jobs):
+        import concurrent.futures
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_parse_worker,
+            initargs=(sorted(feature.tag()
+                             for feature in dml.globals.enabled_compat),
+                      dml.globals.enable_testing_features))
+        # normalized path -> Future
+        self.pending = {}
+        self.submitted = set()
+
+    def submit(self, path):
+        normalized = os.path.normcase(path)
+        if normalized in self.submitted:
+            return
+        self.submitted.add(normalized)
+        if not os.path.exists(path + 'ast'):
+            self.pending[normalized] = self.pool.submit(parse_in_worker, path)
+
+    def result(self, path):
+        '''Return the parsed AST of a previously submitted file, or None
+        if the file needs to be parsed serially'''
+        future = self.pending.pop(os.path.normcase(path), None)
+        if future is None:
+            return None
+        try:
+            result = future.result()
+        except Exception:
+            # e.g., a worker process died
+            return None
+        if result is None:
+            return None
+        (file_info, pragmas, ast) = result
+        for pragma in pragmas:
+            process_pragma(pragma)
+        return ast
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
 def load_dmlast(ast_filename):
     '''Return a previously compiled AST, or None'''
     try:
@@ -331,8 +439,11 @@ def find_file_in_dirs(file, dirs):
             return path
     return None
 
-def import_file(importsite, path):
-    tag, site, name, stmts = parse_dmlast_or_dml(path)
+def import_file(importsite, path, parallel_parser=None):
+    parsed = parallel_parser and parallel_parser.result(path)
+    if parsed is None:
+        parsed = parse_dmlast_or_dml(path)
+    tag, site, name, stmts = parsed
 
     version = site.dml_version()
     if (version != dml.globals.dml_version
@@ -356,7 +467,21 @@ def exists(filename):
         return True
     return os.path.exists(filename)
 
-def parse_main_file(inputfilename, explicit_import_path):
+def resolve_import(importfile, importsite, import_path):
+    '''Return the path of the file imported by an import statement,
+    or None if it cannot be found'''
+    if (importfile.startswith('./')
+        or (importfile.startswith('../')
+            and importsite.dml_version() != (1, 2))):
+        path = importsite.filename()
+        if not os.path.isfile(path):
+            # I don't think this can happen
+            raise ICE(importsite, 'relative import from non-file?')
+        return os.path.join(os.path.dirname(path), importfile)
+    else:
+        return find_file_in_dirs(importfile, import_path)
+
+def parse_main_file(inputfilename, explicit_import_path, jobs=1):
     if not exists(inputfilename):
         raise ENOFILE(SimpleSite(f"{inputfilename}:0"))
     (kind, site, name, stmts) = parse_dmlast_or_dml(
@@ -403,56 +528,68 @@ def parse_main_file(inputfilename, explicit_import_path):
     # imported file -> list of spellings
     deps = {}
 
-    while unimported:
-        (importfile, importsite) = unimported.pop()
-
-        if (importfile.startswith('./')
-            or (importfile.startswith('../')
-                and importsite.dml_version() != (1, 2))):
-            path = importsite.filename()
-            if not os.path.isfile(path):
-                # I don't think this can happen
-                raise ICE(importsite, 'relative import from non-file?')
-            path = os.path.join(os.path.dirname(path), importfile)
-        else:
-            path = find_file_in_dirs(importfile, import_path)
-        try:
-            if path is None:
-                raise EIMPORT(importsite, importfile)
-
-            deps.setdefault(path, set()).add(importfile)
-
-            path = str(Path(path).resolve())
-            normalized = os.path.normcase(path)
-            if normalized in imported:
-                # Already imported
-                if importfile not in imported[normalized]:
-                    global_defs.append(ast.template_dml12(
-                        importsite, '@' + importfile,
-                        [ast.is_(
-                            importsite,
-                            [(importsite, '@' + imported[normalized][0])])]))
-                    imported[normalized].append(importfile)
-                continue
+    # Porting messages depend on state which is not propagated to workers
+    if jobs > 1 and not logging.show_porting:
+        parallel_parser = ParallelParser(jobs)
+    else:
+        parallel_parser = None
+
+    def prefetch(imports):
+        if parallel_parser:
+            for (importfile, importsite) in imports:
+                path = resolve_import(importfile, importsite, import_path)
+                if path is not None:
+                    parallel_parser.submit(str(Path(path).resolve()))
 
-            imported[normalized] = [importfile]
-
-            (i_site, i_stmts) = import_file(importsite, path)
-        except DMLError as e:
-            report(e)
-            global_defs.append(ast.template_dml12(
-                importsite, '@' + importfile, []))
-            continue
-        (i_imports, i_headers, i_footers, i_global_defs,
-         spec_asts) = scan_statements(importfile, i_site, i_stmts)
-        # Transform object specifications into an (automatically
-        # instantiated) template, to handle multiple overrides smoothly
-        global_defs.append(ast.template_dml12(i_site, '@' + importfile,
-                                              spec_asts))
-        unimported.extend(i_imports)
-        headers[0:0] = i_headers
-        footers[0:0] = i_footers
-        global_defs.extend(i_global_defs)
+    try:
+        prefetch(unimported)
+        while unimported:
+            (importfile, importsite) = unimported.pop()
+
+            path = resolve_import(importfile, importsite, import_path)
+            try:
+                if path is None:
+                    raise EIMPORT(importsite, importfile)
+
+                deps.setdefault(path, set()).add(importfile)
+
+                path = str(Path(path).resolve())
+                normalized = os.path.normcase(path)
+                if normalized in imported:
+                    # Already imported
+                    if importfile not in imported[normalized]:
+                        global_defs.append(ast.template_dml12(
+                            importsite, '@' + importfile,
+                            [ast.is_(
+                                importsite,
+                                [(importsite,
+                                  '@' + imported[normalized][0])])]))
+                        imported[normalized].append(importfile)
+                    continue
+
+                imported[normalized] = [importfile]
+
+                (i_site, i_stmts) = import_file(importsite, path,
+                                                 parallel_parser)
+            except DMLError as e:
+                report(e)
+                global_defs.append(ast.template_dml12(
+                    importsite, '@' + importfile, []))
+                continue
+            (i_imports, i_headers, i_footers, i_global_defs,
+             spec_asts) = scan_statements(importfile, i_site, i_stmts)
+            # Transform object specifications into an (automatically
+            # instantiated) template, to handle multiple overrides smoothly
+            global_defs.append(ast.template_dml12(i_site, '@' + importfile,
+                                                  spec_asts))
+            unimported.extend(i_imports)
+            prefetch(i_imports)
+            headers[0:0] = i_headers
+            footers[0:0] = i_footers
+            global_defs.extend(i_global_defs)
+    finally:
+        if parallel_parser:
+            parallel_parser.shutdown()
 
     return (version, name, headers, footers, global_defs, '@' + inputfilename,
             deps)
@@ -25,6 +25,8 @@
 # SOFTWARE.
 #-----------------------------------------------------------------------------
 
+import struct
+
 def _crc8(data, crc, table):
     crc = crc & 0xFF
     for x in data:
@@ -73,3 +75,48 @@ def _crc64r(data, crc, table):
         crc = table[x ^ int(crc & 0xFF)] ^ (crc >> 8)
     return crc
 
+
+#-----------------------------------------------------------------------------
+# Slicing-by-8 versions of the functions above, for any of the CRC sizes.
+# Eight bytes are processed per loop iteration, using eight tables where
+# tables[k][x] is the CRC of the byte x followed by k zero bytes.  Trailing
+# bytes are processed one at a time using tables[0], the ordinary table.
+
+_blockWords = 8192
+
+def _crcSliced(data, crc, tables, width):
+    mask = (1 << width) - 1
+    crc = crc & mask
+    t0, t1, t2, t3, t4, t5, t6, t7 = tables
+    align = 64 - width
+    top = width - 8
+    n = len(data) & ~7
+    for start in range(0, n, 8 * _blockWords):
+        end = min(start + 8 * _blockWords, n)
+        for w in struct.unpack('>%dQ' % ((end - start) >> 3),
+                               data[start:end]):
+            x = (crc << align) ^ w
+            crc = (t7[x >> 56] ^ t6[(x >> 48) & 0xFF] ^ t5[(x >> 40) & 0xFF]
+                   ^ t4[(x >> 32) & 0xFF] ^ t3[(x >> 24) & 0xFF]
+                   ^ t2[(x >> 16) & 0xFF] ^ t1[(x >> 8) & 0xFF]
+                   ^ t0[x & 0xFF])
+    for x in data[n:]:
+        crc = t0[x ^ (crc >> top)] ^ ((crc << 8) & mask)
+    return crc
+
+def _crcSliced_r(data, crc, tables, width):
+    crc = crc & ((1 << width) - 1)
+    t0, t1, t2, t3, t4, t5, t6, t7 = tables
+    n = len(data) & ~7
+    for start in range(0, n, 8 * _blockWords):
+        end = min(start + 8 * _blockWords, n)
+        for w in struct.unpack('<%dQ' % ((end - start) >> 3),
+                               data[start:end]):
+            x = crc ^ w
+            crc = (t7[x & 0xFF] ^ t6[(x >> 8) & 0xFF] ^ t5[(x >> 16) & 0xFF]
+                   ^ t4[(x >> 24) & 0xFF] ^ t3[(x >> 32) & 0xFF]
+                   ^ t2[(x >> 40) & 0xFF] ^ t1[(x >> 48) & 0xFF]
+                   ^ t0[x >> 56])
+    for x in data[n:]:
+        crc = t0[x ^ (crc & 0xFF)] ^ (crc >> 8)
+    return crc
@@ -11,46 +11,74 @@
 
 'This module contains code to load some documentation for the Simics API.'
 
-# Let's introduce two data files:
-# - api-help-text.json: documentation text for python api entities
+# The help comes from two data files, which are loaded on first use since
+# they are only needed when help is asked for:
+# - api_help_py.idx: documentation text for python api entities, as a help
+#   index (see help_index.py) generated from the api_help_py module. The
+#   module itself is only used if the index is missing or out of date.
 # - api-help.json: prototypes for C api entities (from gulp)
 
 import simicsutils.internal
 import simicsutils.host
 import pathlib
 import json
-
-try:
-    from simmod.dml_api_info import dml_api_info
-    try:
-        _supported_dml_apis = dml_api_info.supported_dml_apis
-    except AttributeError:
-        # may happen during build
-        pass
-    # TODO: This should just be loaded as data
-    from api_help_py import api_help_py
-except ImportError:
-    # may happen during build
-    api_help_py = {}
+import help_index
 
 def find_datafile():
     host = simicsutils.host.host_type()
     base = simicsutils.internal.simics_base()
     return pathlib.Path(base) / host / "api-help.json"
 
+def find_py_datafile():
+    return pathlib.Path(__file__).parent / "api_help_py.idx"
+
 def load_data(datafile):
     with open(datafile) as f:
         return json.load(f)
 
-_api_help = load_data(find_datafile())
-
-_topics = set(api_help_py.keys())
-_topics.update(_api_help.keys())
+_api_help = None
+def _c_api_help():
+    global _api_help
+    if _api_help is None:
+        _api_help = load_data(find_datafile())
+    return _api_help
+
+_api_help_py = None
+def _py_api_help():
+    global _api_help_py
+    if _api_help_py is None:
+        datafile = find_py_datafile()
+        source = datafile.with_suffix(".py")
+        index = help_index.HelpIndex(datafile)
+        # the index is stamped with a hash of the module it was
+        # generated from
+        if datafile.exists() and (
+                not source.exists()
+                or index.stamp() == help_index.file_stamp(source)):
+            _api_help_py = index
+        else:
+            try:
+                from api_help_py import api_help_py
+            except ImportError:
+                # may happen during build
+                api_help_py = {}
+            _api_help_py = api_help_py
+    return _api_help_py
+
+_topics = None
 def topics():
     """Returns a set with the API help topics."""
-
+    global _topics
+    if _topics is None:
+        _topics = set(_py_api_help().keys())
+        _topics.update(_c_api_help().keys())
     return _topics
 
+def python_api_help(topic):
+    """Returns API information about the Python API object 'topic' as
+    tuple(markup, plaintext), or None if there is no such topic."""
+    return _py_api_help().get(topic, None)
+
 def api_help(topic):
     """Returns API information about 'topic' as a tuple:
         ( defined_in_file,
@@ -71,12 +99,13 @@ def api_help(topic):
     The (apis, ...) tuples are sorted by the 'apis' tuples.
 
     Returns None if there is no such topic."""
-    return _api_help.get(topic, None) or api_help_py.get(topic, None)
+    return _c_api_help().get(topic, None) or python_api_help(topic)
 
 def api_dml_available(api):
     """Returns True if the API 'api' is available from DML.
     Will raise an exception for unknown APIs."""
-    return api in _supported_dml_apis
+    from simmod.dml_api_info import dml_api_info
+    return api in dml_api_info.supported_dml_apis
 
 def api_cxx_available(api):
     """Returns True if the API 'api' is available from C++"""
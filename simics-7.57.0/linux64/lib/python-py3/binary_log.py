@@ -0,0 +1,348 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+'''Binary log files, as written by log-setup binary-file=<file>.
+
+Log messages are stored unformatted, so that they can be filtered and
+rendered later, with any log format, using the BinaryLogReader class or by
+running this module as a script. The module does not depend on Simics.
+
+A binary log file starts with an 8 byte magic string, followed by frames.
+Each frame has a 5 byte header, with a kind byte and a 32-bit little-endian
+payload length, followed by the payload:
+
+  object    32-bit id, UTF-8 name and log group names, NUL separated
+  log type  32-bit id, UTF-8 name
+  message   fixed size header (see message_header) followed by the UTF-8
+            message text
+
+Objects and log types are defined by a frame the first time they are used
+in a file; messages refer to them by id, where 0 means none. Besides the
+logging object, messages refer to the clock that was current when the
+message was logged, with its cycle count, picosecond time and, if the clock
+is a processor, program counter. The host time of the message is stored in
+nanoseconds since the epoch.'''
+
+import re
+import struct
+import sys
+import threading
+
+__all__ = ['BinaryLogWriter', 'BinaryLogReader', 'LogRecord',
+           'format_record', 'BinaryLogError']
+
+magic = b'SIMBLOG1'
+
+frame_header = struct.Struct('<BI')
+kind_object = 1
+kind_log_type = 2
+kind_message = 3
+
+# object, clock, log type, level, flags, group mask, cycles, program
+# counter, picoseconds, host time in ns
+message_header = struct.Struct('<IIIBBQqQqQ')
+flag_trace = 1
+flag_has_level = 2
+flag_has_pc = 4
+
+id_struct = struct.Struct('<I')
+
+class BinaryLogError(Exception): pass
+
+class BinaryLogWriter:
+    '''Writes log messages to a binary log file. The file is buffered, and
+    only flushed when flush() is called. Messages may be written from
+    several threads; an id is only returned once the frame defining it has
+    been written.'''
+    buffer_size = 1 << 20
+
+    def __init__(self, filename):
+        self.file = open(filename, 'wb', buffering=self.buffer_size)
+        self.file.write(magic)
+        self.objects = {}       # key -> id
+        self.log_types = {}     # name -> id
+        # Serializes the definition of new ids
+        self.lock = threading.Lock()
+
+    def __write_frame(self, kind, payload):
+        self.file.write(frame_header.pack(kind, len(payload)) + payload)
+
+    def object_id(self, key, get_name_and_groups):
+        '''Return the id of an object identified by key. The first time a
+        key is seen, get_name_and_groups() is called to get the object name
+        and a list of log group names to record.'''
+        obj_id = self.objects.get(key)
+        if obj_id is None:
+            with self.lock:
+                obj_id = self.objects.get(key)
+                if obj_id is None:
+                    obj_id = len(self.objects) + 1
+                    (name, groups) = get_name_and_groups()
+                    names = '\0'.join([name] + list(groups))
+                    self.__write_frame(kind_object, id_struct.pack(obj_id)
+                                       + names.encode('utf-8', 'replace'))
+                    self.objects[key] = obj_id
+        return obj_id
+
+    def log_type_id(self, name):
+        type_id = self.log_types.get(name)
+        if type_id is None:
+            with self.lock:
+                type_id = self.log_types.get(name)
+                if type_id is None:
+                    type_id = len(self.log_types) + 1
+                    self.__write_frame(kind_log_type, id_struct.pack(type_id)
+                                       + name.encode('utf-8', 'replace'))
+                    self.log_types[name] = type_id
+        return type_id
+
+    def write_message(self, obj_id, clock_id, type_id, level, group_mask,
+                      cycles, pc, ps, host_time_ns, is_trace, msg):
+        '''Write a message. level and pc may be None.'''
+        flags = ((flag_trace if is_trace else 0)
+                 | (0 if level is None else flag_has_level)
+                 | (0 if pc is None else flag_has_pc))
+        payload = message_header.pack(
+            obj_id, clock_id, type_id, level or 0, flags,
+            group_mask & 0xffffffffffffffff, cycles, pc or 0, ps,
+            host_time_ns) + msg.encode('utf-8', 'replace')
+        self.file.write(frame_header.pack(kind_message, len(payload))
+                        + payload)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class LogRecord:
+    '''A log message read from a binary log file. obj and clock are object
+    names, or None. level and pc are None if not recorded.'''
+    __slots__ = ('obj', 'log_groups', 'clock', 'log_type', 'level',
+                 'group_mask', 'cycles', 'pc', 'ps', 'host_time_ns',
+                 'is_trace', 'msg')
+
+    def __init__(self, obj, log_groups, clock, log_type, level, group_mask,
+                 cycles, pc, ps, host_time_ns, is_trace, msg):
+        self.obj = obj
+        self.log_groups = log_groups
+        self.clock = clock
+        self.log_type = log_type
+        self.level = level
+        self.group_mask = group_mask
+        self.cycles = cycles
+        self.pc = pc
+        self.ps = ps
+        self.host_time_ns = host_time_ns
+        self.is_trace = is_trace
+        self.msg = msg
+
+    def group_names(self):
+        names = []
+        mask = self.group_mask
+        idx = 0
+        while mask and idx < len(self.log_groups):
+            if mask & 1:
+                names.append(self.log_groups[idx])
+            idx += 1
+            mask >>= 1
+        return names
+
+class BinaryLogReader:
+    '''Iterates over the messages in a binary log file, as LogRecord
+    objects. A truncated last frame, as left by a simulation that was
+    killed, ends the iteration and sets the truncated attribute.'''
+    def __init__(self, filename):
+        self.filename = filename
+        self.truncated = False
+
+    def __iter__(self):
+        objects = {0: (None, [])}
+        log_types = {0: None}
+        with open(self.filename, 'rb') as f:
+            if f.read(len(magic)) != magic:
+                raise BinaryLogError(
+                    f"{self.filename} is not a binary log file")
+            read = f.read
+            while True:
+                header = read(frame_header.size)
+                if not header:
+                    return
+                if len(header) < frame_header.size:
+                    self.truncated = True
+                    return
+                (kind, length) = frame_header.unpack(header)
+                payload = read(length)
+                if len(payload) < length:
+                    self.truncated = True
+                    return
+                if kind == kind_message:
+                    (obj_id, clock_id, type_id, level, flags, group_mask,
+                     cycles, pc, ps, host_time_ns
+                     ) = message_header.unpack_from(payload)
+                    try:
+                        (obj, log_groups) = objects[obj_id]
+                        clock = objects[clock_id][0]
+                        log_type = log_types[type_id]
+                    except KeyError:
+                        raise BinaryLogError(
+                            f"{self.filename}: message refers to an"
+                            " undefined object or log type") from None
+                    yield LogRecord(
+                        obj, log_groups, clock, log_type,
+                        level if flags & flag_has_level else None,
+                        group_mask, cycles,
+                        pc if flags & flag_has_pc else None, ps,
+                        host_time_ns, bool(flags & flag_trace),
+                        payload[message_header.size:].decode('utf-8'))
+                elif kind == kind_object:
+                    (obj_id,) = id_struct.unpack_from(payload)
+                    names = payload[id_struct.size:].decode('utf-8').split(
+                        '\0')
+                    objects[obj_id] = (names[0], names[1:])
+                elif kind == kind_log_type:
+                    (type_id,) = id_struct.unpack_from(payload)
+                    log_types[type_id] = payload[id_struct.size:].decode(
+                        'utf-8')
+                # unknown frame kinds are skipped
+
+    def records(self, objects=None, log_types=None, max_level=None,
+                group_mask=None, substr=None, start_ps=None, end_ps=None):
+        '''Iterate over the messages matching all the given filters:
+        logged by one of the named objects, or by an object below one of
+        them; of one of the given log types; with a level of at most
+        max_level; in any of the log groups in group_mask; containing
+        substr; and logged at a picosecond time within
+        [start_ps, end_ps).'''
+        prefixes = tuple(o + '.' for o in objects) if objects else None
+        objects = set(objects) if objects else None
+        log_types = set(log_types) if log_types else None
+        for r in self:
+            if objects is not None and not (
+                    r.obj in objects
+                    or (r.obj and r.obj.startswith(prefixes))):
+                continue
+            if log_types is not None and r.log_type not in log_types:
+                continue
+            if (max_level is not None and r.level is not None
+                and r.level > max_level):
+                continue
+            if group_mask is not None and not r.group_mask & group_mask:
+                continue
+            if substr is not None and substr not in r.msg:
+                continue
+            if start_ps is not None and r.ps < start_ps:
+                continue
+            if end_ps is not None and r.ps >= end_ps:
+                continue
+            yield r
+
+_format_cache = {}
+
+def _compile_format(fmt):
+    # Split a log format, such as "[%o %t] %m", into literal strings and
+    # format characters
+    parts = _format_cache.get(fmt)
+    if parts is None:
+        parts = _format_cache[fmt] = re.split('%([a-z])', fmt)
+    return parts
+
+def format_record(record, fmt, decorate=True, number_str=str):
+    '''Render a LogRecord using a log format, with the same format
+    characters as log-setup, given as a string or as any object with an
+    fmt attribute, such as a log_commands.LogFormatString. The default
+    format decorates time stamps with brackets, as done by log-setup when
+    no custom format is used; set decorate to False for custom formats.
+    The disassembly (%d) is not recorded in binary logs and is always
+    empty. number_str is used to format cycle counts and picoseconds.'''
+    parts = _compile_format(getattr(fmt, 'fmt', fmt))
+    out = []
+    for (i, part) in enumerate(parts):
+        if not i & 1:
+            out.append(part)
+            continue
+        if part == 'm':
+            out.append(record.msg)
+        elif part == 'o':
+            out.append(record.obj or '')
+        elif part == 't':
+            out.append(record.log_type or '')
+        elif part == 'g':
+            out.append(', '.join(record.group_names()))
+        elif part == 'l':
+            out.append('' if record.level is None else str(record.level))
+        elif part == 'v':
+            if record.clock:
+                v = record.clock
+                if record.pc is not None:
+                    v += f" 0x{record.pc:x}"
+                v += f" {number_str(record.cycles)}"
+                out.append(f"{{{v}}}" if decorate else v)
+            else:
+                out.append('')
+        elif part == 'p':
+            if record.clock:
+                p = number_str(record.ps)
+                out.append(f"{{{p} ps}}" if decorate else p)
+            else:
+                out.append('')
+        elif part == 'r':
+            import datetime
+            r = datetime.datetime.fromtimestamp(
+                record.host_time_ns / 1e9).strftime("%H:%M:%S.%f")[:-2]
+            out.append(f"[{r}]" if decorate else r)
+        # %d (disassembly) is not recorded
+    return ''.join(out)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Filter and print a binary log file, as written by"
+        " log-setup binary-file=<file>.")
+    parser.add_argument('file')
+    parser.add_argument('-f', '--format', default="[%o %t] %v %m",
+                        help="log format, as for log-setup"
+                        " (default: %(default)s)")
+    parser.add_argument('-o', '--object', action='append',
+                        help="only messages from this object, or objects"
+                        " below it; may be repeated")
+    parser.add_argument('-t', '--type', action='append',
+                        help="only messages of this log type; may be"
+                        " repeated")
+    parser.add_argument('-l', '--level', type=int,
+                        help="only messages of at most this log level")
+    parser.add_argument('-s', '--substr',
+                        help="only messages containing this string")
+    parser.add_argument('--start-ps', type=int)
+    parser.add_argument('--end-ps', type=int)
+    args = parser.parse_args(argv)
+    reader = BinaryLogReader(args.file)
+    try:
+        for r in reader.records(args.object, args.type, args.level, None,
+                                args.substr, args.start_ps, args.end_ps):
+            print(format_record(r, args.format))
+    except BinaryLogError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        return 0
+    if reader.truncated:
+        print("warning: the log file is truncated", file=sys.stderr)
+    return 0
+
+# The unit tests live in test_binary_log.py, so that they are not compiled on
+# every Simics start. This hook lets unittest find them through this module.
+def load_tests(loader, tests, pattern):
+    import test_binary_log
+    return loader.loadTestsFromModule(test_binary_log)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,7 +28,7 @@ class Builder:
         if not issubclass(config, Config):
             raise BlueprintError(f"{config} is not a configuration state class")
         state = self.expose_state(name, config)
-        state._allow_write = True
+        self._builder.allow_config_write(state, True)
         return state
 
     def get_config(self, name: Namespace, config: type[ConfigT]) -> ConfigT:
@@ -36,7 +36,7 @@ class Builder:
         state = self._builder.read_state_data(
             name, config, allow_local=True, register_sub=False)
         if isinstance(state, Config):
-            state._allow_write = False
+            self._builder.allow_config_write(state, False)
         return state
 
     def expose_state(self, name: Namespace,
@@ -69,7 +69,7 @@ class Builder:
         s = self._builder.read_state_data(
             name, state, private=private, allow_local=allow_local)
         if isinstance(s, Config):
-            s._allow_write = False
+            self._builder.allow_config_write(s, False)
         return s
 
     def alias_state(self, src: Namespace, type: type[StateT],
@@ -9,12 +9,17 @@
 # This software and the related documents are provided as is, with no express or
 # implied warranties, other than those that are expressly stated in the License.
 
+import collections
+import functools
 import inspect
 import itertools
 import io
 import logging
 import re
+import sys
+import time
 import traceback
+import weakref
 
 from typing import Any, Iterable, NamedTuple, Callable, cast
 from types import GeneratorType, FunctionType
@@ -60,6 +65,71 @@ class _Value(NamedTuple):
     value: Any
     user: str|None
 
+# Parameters of blueprint functions which are filled in with state or config,
+# as (name, annotation) pairs
+_state_params: weakref.WeakKeyDictionary[
+    Callable, tuple[tuple[str, type], ...]] = weakref.WeakKeyDictionary()
+
+def _blueprint_state_params(func: Callable) -> tuple[tuple[str, type], ...]:
+    params = _state_params.get(func)
+    if params is None:
+        params = tuple(
+            (k, v.annotation)
+            for (k, v) in inspect.signature(func).parameters.items()
+            if (isinstance(v.annotation, type)
+                and v.default == inspect.Parameter.empty
+                and issubclass(v.annotation, (Config, State))))
+        _state_params[func] = params
+    return params
+
+# Value read from a state field that was never written nor has a default
+_MISSING = object()
+
+def _same(a: Any, b: Any) -> bool:
+    return a is b or (type(a) is type(b) and a == b)
+
+class _Run:
+    """Record of what a blueprint read and did when it was run in an
+    expansion iteration. If nothing it read has changed in the next
+    iteration, the recorded builder calls are replayed instead of running
+    the blueprint again."""
+    __slots__ = ("args", "reads", "ops", "replayable")
+    def __init__(self, args: dict[str, Any]):
+        self.args = args
+        # (kind, key) for each read of builder data. Since reads only see
+        # data from the previous iteration, the values read are not needed.
+        self.reads: set[tuple[str, Any]] = set()
+        # (method, args, keyword args) for each builder call
+        self.ops: list[tuple[Callable, tuple, dict]] = []
+        self.replayable = True
+
+def _recorded(method: Callable) -> Callable:
+    """Decorator for BlueprintBuilder methods that modify the builder
+    state. Calls made by a running blueprint are recorded, for replay.
+    Calls made from other recorded methods are not recorded, since they
+    are repeated by the replay."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwds):
+        run = self._run
+        if run is None or self._nested:
+            return method(self, *args, **kwds)
+        run.ops.append((method, args, kwds))
+        self._nested = True
+        try:
+            return method(self, *args, **kwds)
+        finally:
+            self._nested = False
+    return wrapper
+
+class _ExpansionStats:
+    __slots__ = ("iterations", "runs", "replays", "blueprints")
+    def __init__(self):
+        self.iterations = 0
+        self.runs = 0
+        self.replays = 0
+        # blueprint name -> [runs, replays, seconds]
+        self.blueprints: dict[str, list] = {}
+
 def _get_state_defaults(iface: State) -> tuple[tuple[ValueKey, Any], ...]:
     # Recursively bind sub-state
     def bind(k: tuple, v: Any) -> Any:
@@ -309,12 +379,15 @@ class BlueprintBuilder:
     __slots__ = ("_comps", "_obj", "_state", "_vals", "_new_vals",
                  "_defaults", "_accessed", "_errors", "_binds", "_new_binds",
                 "_seq", "_state_subs", "_post_instantiate", "_roots",
-                 "_presets", "_funcs", "_cur_obj", "_all_comps", "_logger")
+                 "_presets", "_funcs", "_cur_obj", "_all_comps", "_logger",
+                 "_runs", "_new_runs", "_run", "_nested", "_user", "_debug",
+                 "_stats", "_prev_vals", "_prev_binds", "_changed")
     def __init__(self, logger):
         self._seq: int = 0
 
         # Blueprint "output"
-        self._comps: list[tuple[Namespace, _Blueprint]] = []
+        self._comps: collections.deque[tuple[Namespace, _Blueprint]] = (
+            collections.deque())
         self._funcs: dict[Any, str] = {}
         self._obj: dict[str, _Obj] = {}
         self._errors: list[list] = []
@@ -351,18 +424,61 @@ class BlueprintBuilder:
         self._presets: list[Preset] = []
 
         self._logger: logging.Logger = logger
+        self._debug = False
+
+        # Blueprint runs of the previous and current iteration, keyed by
+        # (node, function, occurrence)
+        self._runs: dict[tuple[str, Callable, int], _Run] = {}
+        self._new_runs: dict[tuple[str, Callable, int], _Run] = {}
+
+        # Values and bindings of the previous iteration, which the recorded
+        # runs have read, and whether they have changed since
+        self._prev_vals: dict[ValueKey, list[_Value]] = {}
+        self._prev_binds: dict[StateKey, State] = {}
+        self._changed: dict[tuple[str, Any], bool] = {}
+
+        # Run of the currently running blueprint, if recorded
+        self._run: _Run|None = None
+        self._nested = False
+
+        # Blueprint writing values, when not found from the stack
+        self._user: str|None = None
+
+        self._stats = _ExpansionStats()
+
+    def _current_value(self, k: ValueKey, vals=None) -> Any:
+        if vals is None:
+            vals = self._vals
+        return (max(vals[k]).value if k in vals
+                else self._defaults.get(k, _MISSING))
+
+    def _read_values(self, k: tuple) -> list[_Value]:
+        """Return all values of a collection state (List, Dict, Set) or the
+        keys of a NSState, as written in the previous iteration."""
+        values = self._vals.get(k, [])
+        if self._run is not None:
+            self._run.reads.add(("values", k))
+        return values
 
     def _get_value(self, iface: State, key: str) -> Any:
         self._add_state(type(iface), iface._key)
         k = iface._key + (key,)
-        val = max(self._vals[k]).value if k in self._vals else self._defaults[k]
-        self._logger.debug('%s.%s -> %s', repr(iface), key, val)
+        val = self._current_value(k)
+        if self._run is not None:
+            self._run.reads.add(("value", k))
+        if val is _MISSING:
+            raise KeyError(k)
+        if self._debug:
+            self._logger.debug('%s.%s -> %s', repr(iface), key, val)
         if isinstance(val, _Alias):
             return getattr(val.iface, val.attr)
         else:
             return val
 
     def _get_next_value(self, iface: State, key: str) -> Any:
+        # Depends on values written in the current iteration
+        if self._run is not None:
+            self._run.replayable = False
         k = iface._key + (key,)
         if k in self._new_vals:
             val = max(self._new_vals[k]).value
@@ -375,12 +491,23 @@ class BlueprintBuilder:
 
     # Find current blueprint by looking at the stack frames
     def _find_user_blueprint(self) -> str|None:
-        for r in inspect.stack():
-            func = r.frame.f_code
-            if func in self._funcs:
-                return self._funcs[func]
+        if self._user is not None:
+            return self._user
+        frame = sys._getframe(1)
+        while frame is not None:
+            name = self._funcs.get(frame.f_code)
+            if name is not None:
+                return name
+            frame = frame.f_back
+        return None
 
     def _set_value(self, iface: State, key: str, val: Any, simplified=False):
+        self._write_value(iface, key, val, simplified,
+                          self._find_user_blueprint())
+
+    @_recorded
+    def _write_value(self, iface: State, key: str, val: Any, simplified: bool,
+                     user: str|None):
         self._add_state(type(iface), iface._key)
         prio = Priority.NORMAL
         k = iface._key + (key,)
@@ -391,13 +518,18 @@ class BlueprintBuilder:
                 prio = Priority.ALIAS
             cur = max(self._vals[k]).value if k in self._vals else None
             if isinstance(cur, _Alias) and not isinstance(val, _Alias):
-                setattr(cur.iface, cur.attr, val)
+                (prev_user, self._user) = (self._user, user)
+                try:
+                    setattr(cur.iface, cur.attr, val)
+                finally:
+                    self._user = prev_user
                 return
 
-        self._logger.debug('%s.%s <- %s', repr(iface), key, val)
+        if self._debug:
+            self._logger.debug('%s.%s <- %s', repr(iface), key, val)
         self._new_vals.setdefault(k, []).append(_Value(
             priority=prio, sequence=-self._seq,
-            value=val, user=self._find_user_blueprint()))
+            value=val, user=user))
 
         if not simplified:
             for g in itertools.groupby(sorted(
@@ -415,6 +547,7 @@ class BlueprintBuilder:
                                 f" From blueprints {users}."])
 
     # key is of the form (namespace, statename, field1, field2, ...)
+    @_recorded
     def _add_state(self, iface: type[StateT], key: StateKey) -> StateT:
         if not key in self._state:
             i = self._state[key] = iface()._bind(builder=self, key=key)
@@ -422,6 +555,7 @@ class BlueprintBuilder:
         self._accessed.add(key)
         return self._state[key] # type: ignore
 
+    @_recorded
     def add_state(self, ns: Namespace, iface: StateT|type[StateT]) -> StateT:
         if isinstance(iface, State):
             ret = iface
@@ -430,6 +564,7 @@ class BlueprintBuilder:
         self._new_binds[(ns._name, type(ret))] = ret
         return ret
 
+    @_recorded
     def read_state_data(self, ns: Namespace, iface: type[StateT], *,
                         private=False, allow_local=False,
                         register_sub=True, peek_binding=False) -> StateT:
@@ -437,6 +572,8 @@ class BlueprintBuilder:
             return self._add_state(iface, (ns._name, iface))
         else:
             ret = self._lookup(iface, ns)
+            if self._run is not None:
+                self._run.reads.add(("lookup", (iface, ns)))
             if not ret and not allow_local:
                 self.error([f"State {iface.__name__} not provided at"
                             f" node {ns}"])
@@ -453,12 +590,15 @@ class BlueprintBuilder:
     def _bound_state(self) -> dict[StateKey, State]:
         return {k: v for (k, v) in self._state.items() if v._key in self._binds}
 
-    def _lookup(self, iface: type[StateT], ns: Namespace) -> StateT|None:
+    def _lookup(self, iface: type[StateT], ns: Namespace,
+                binds=None) -> StateT|None:
+        if binds is None:
+            binds = self._binds
         name = ns._name
         while True:
             k = (name, iface)
-            if k in self._binds:
-                return cast(StateT, self._binds[k])
+            if k in binds:
+                return cast(StateT, binds[k])
             if not name:
                 break
             name = name.rpartition(".")[0]
@@ -469,9 +609,12 @@ class BlueprintBuilder:
                 and self._vals == self._new_vals)
 
     def _start(self, presets: Iterable[Preset]):
+        self._prev_vals = self._vals
         self._vals = self._new_vals
         self._new_vals = {}
+        self._prev_binds = self._binds
         self._binds = self._new_binds
+        self._changed.clear()
         self._new_binds = {}
         self._errors.clear()
         self._obj.clear()
@@ -479,6 +622,8 @@ class BlueprintBuilder:
         self._state_subs.clear()
         self._post_instantiate.clear()
         self._funcs.clear()
+        self._runs = self._new_runs
+        self._new_runs = {}
         self._seq = 0
         for (k, v) in presets:
             if isinstance(v, list):
@@ -492,6 +637,7 @@ class BlueprintBuilder:
             self._new_vals.setdefault(k, []).append(
                 _Value(Priority.OVERRIDE, 0, val, "__preset__"))
 
+    @_recorded
     def add(self, ns: Namespace,
             kind: str|Callable|BlueprintFun, **kwd) -> ConfObject|None:
         if callable(kind) or isinstance(kind, BlueprintFun):
@@ -511,6 +657,7 @@ class BlueprintBuilder:
             self._cur_obj.add(ns)
             return ConfObject(ns)
 
+    @_recorded
     def set(self, ns: Namespace, **kwd) -> ConfObject|None:
         if any(ns.is_descendant_of(o) for o in self._cur_obj):
             if ns._name in self._obj:
@@ -525,41 +672,126 @@ class BlueprintBuilder:
             self.error([f'Invalid bp.set: ancestor to "{ns}" must be added'
                         ' in the same blueprint.'])
 
+    @_recorded
     def error(self, args: list):
         self._errors.append(args)
 
+    @_recorded
+    def allow_config_write(self, state: Config, allow: bool):
+        state._allow_write = allow
+
+    @_recorded
     def at_post_instantiate(self, ns: Namespace, cb: Callable, kwds: dict):
         self._post_instantiate.append((ns, cb, kwds))
 
-    def _expand_iteration(self, num: int, comp: Builder, verbose: int) -> bool:
+    def _read_changed(self, kind: str, key: Any) -> bool:
+        """Return True if builder data read by a blueprint has changed since
+        the previous iteration"""
+        changed = self._changed.get((kind, key))
+        if changed is None:
+            try:
+                if kind == "value":
+                    changed = not _same(self._current_value(key),
+                                        self._current_value(key,
+                                                            self._prev_vals))
+                elif kind == "values":
+                    cur = self._vals.get(key, [])
+                    prev = self._prev_vals.get(key, [])
+                    changed = len(cur) != len(prev) or not all(
+                        _same(v.value, w.value) for (v, w) in zip(cur, prev))
+                else:
+                    changed = (self._lookup(*key)
+                               is not self._lookup(*key, self._prev_binds))
+            except Exception:
+                # Values that cannot be compared
+                changed = True
+            self._changed[(kind, key)] = changed
+        return changed
+
+    def _can_replay(self, run: _Run, args: dict[str, Any]) -> bool:
+        """Return True if a blueprint would do the same as in its
+        recorded run, if run again with the given arguments"""
+        if not run.replayable:
+            return False
+        try:
+            if run.args is not args and run.args != args:
+                return False
+        except Exception:
+            return False
+        return not any(self._read_changed(kind, key)
+                       for (kind, key) in run.reads)
+
+    def _replay(self, run: _Run):
+        for (method, args, kwds) in run.ops:
+            method(self, *args, **kwds)
+
+    def _run_blueprint(self, ns: Namespace, c: _Blueprint, comp: Builder):
+        comp_args = dict(c.args)
+        for (k, annotation) in _blueprint_state_params(c.func):
+            if k not in comp_args:
+                if issubclass(annotation, Config):
+                    comp_args[k] = comp.get_config(ns, annotation)
+                else:
+                    comp_args[k] = comp.read_state(ns, annotation)
+        c.func(comp, ns, **comp_args)
+
+    def _expand_iteration(self, num: int, comp: Builder, verbose: int,
+                          incremental: bool) -> bool:
         self._logger.info(f"Iteration start: {num}")
         self._start(self._presets)
+        self._debug = self._logger.isEnabledFor(logging.DEBUG)
         state = self._state if verbose >= 3 else self._bound_state()
-        buf = io.StringIO()
-        _print_state(_sorted_state(state), buf)
-        self._logger.info(buf.getvalue().strip())
+        if self._logger.isEnabledFor(logging.INFO):
+            buf = io.StringIO()
+            _print_state(_sorted_state(state), buf)
+            self._logger.info(buf.getvalue().strip())
+        else:
+            # Printing the state marks it as accessed
+            self._accessed.update(state)
         for (ns, c, kwd_args) in self._roots:
             self.add(ns, c, **kwd_args)
+        occurrences: dict[tuple[str, Callable], int] = {}
+        stats = self._stats
         while self._comps:
             self._seq += 1
-            (ns, c) = self._comps.pop(0)
+            (ns, c) = self._comps.popleft()
             self._cur_obj.clear()
-            comp_args = dict(c.args)
-            sig = inspect.signature(c.func)
-            for (k, v) in sig.parameters.items():
-                if (k not in comp_args
-                    and isinstance(v.annotation, type)
-                    and v.default == inspect.Parameter.empty):
-                    if issubclass(v.annotation, Config):
-                        comp_args[k] = comp.get_config(ns, v.annotation)
-                    elif issubclass(v.annotation, State):
-                        comp_args[k] = comp.read_state(ns, v.annotation)
-            c.func(comp, ns, **comp_args)
+            node = (ns._name, c.func)
+            occurrence = occurrences.get(node, 0)
+            occurrences[node] = occurrence + 1
+            key = (ns._name, c.func, occurrence)
+            start = time.perf_counter()
+            old = self._runs.get(key) if incremental else None
+            if old is not None and self._can_replay(old, c.args):
+                self._replay(old)
+                run = old
+                replayed = True
+            else:
+                run = _Run(c.args)
+                self._run = run
+                try:
+                    self._run_blueprint(ns, c, comp)
+                finally:
+                    self._run = None
+                replayed = False
+            self._new_runs[key] = run
+            bp_stats = stats.blueprints.setdefault(bp_name(c.func), [0, 0, 0])
+            bp_stats[1 if replayed else 0] += 1
+            bp_stats[2] += time.perf_counter() - start
+            if replayed:
+                stats.replays += 1
+            else:
+                stats.runs += 1
+        stats.iterations += 1
         self._logger.info(f"Iteration end: {num}")
         return self._stable()
 
     def expand(self, *args, presets: Iterable[Preset]=(),
-               max_iterations=10, ignore_errors=False, verbose=0, **kwds):
+               max_iterations=10, ignore_errors=False, verbose=0,
+               incremental=True, **kwds):
+        """Expand a blueprint. In each iteration after the first, blueprints
+        are only run again if the state they read has changed, unless
+        'incremental' is false."""
         if len(args) != 2:
             raise BlueprintError("Expansion requires two arguments:"
                                  " <namespace> <blueprint>")
@@ -571,6 +803,7 @@ class BlueprintBuilder:
         comp = Builder(self)
         self._presets += list(presets)
         self._roots.append((Namespace(root), cls, kwds))
+        self._stats = _ExpansionStats()
 
         roots = [(name, bp_name(func), data)
                  for (name, func, data) in self._roots]
@@ -579,10 +812,12 @@ class BlueprintBuilder:
 
         # For now, hard limit on the iteration count
         for x in range(max_iterations):
-            if self._expand_iteration(x, comp, verbose):
+            if self._expand_iteration(x, comp, verbose, incremental):
                 break
         else:
             raise BlueprintError("Max blueprints iteration count reached!")
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.info("%s", self.expansion_stats())
 
         for x in self._state.keys() - self._accessed:
             del self._state[x]
@@ -594,6 +829,23 @@ class BlueprintBuilder:
             if errors:
                 raise BlueprintError("Failed building blueprints")
 
+    def expansion_stats(self) -> str:
+        """Return a report of the most recent expansion: the number of
+        iterations and, for each blueprint function, how many times it was
+        run or replayed and the total time spent, slowest first."""
+        stats = self._stats
+        lines = [f"Expansion iterations: {stats.iterations}",
+                 f"Blueprints run: {stats.runs}, replayed: {stats.replays}"]
+        if stats.blueprints:
+            width = max(len(n) for n in stats.blueprints)
+            lines.append(f"{'Blueprint':{width}}  {'Runs':>6}  {'Replays':>7}"
+                         f"  {'Time (ms)':>9}")
+            for (name, (runs, replays, secs)) in sorted(
+                    stats.blueprints.items(), key=lambda x: -x[1][2]):
+                lines.append(f"{name:{width}}  {runs:6}  {replays:7}"
+                             f"  {secs * 1000:9.1f}")
+        return "\n".join(lines)
+
     def _make_config(self, prefix: str, drop_non_existing = True) -> tuple[list, list[list]]:
         refs = set()
         obj_list = [_obtain_attributes(path, o, refs, self._logger, prefix)
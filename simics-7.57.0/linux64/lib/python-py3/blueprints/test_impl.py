@@ -0,0 +1,91 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the blueprints.impl module
+
+import logging
+import unittest
+
+from .types import Binding, Default, State
+from .simtypes import Port
+from .top import expand
+
+
+class NodeInfo(State):
+    index = -1
+    ram_size = 0
+
+
+class Net(State):
+    ports = []
+    links = None
+
+
+class Irq(Binding):
+    target = None
+
+
+def pic(bp, name, node: NodeInfo):
+    irq = bp.expose_state(name, Irq)
+    irq.target = bp.obj(name, "pic", line=node.index)
+
+
+def nic(bp, name, node: NodeInfo, net: Net):
+    n = bp.obj(name, "nic", mac=f"00:11:22:00:00:{node.index:02x}")
+    net.ports.append(Port(n, "eth"))
+    irq = bp.read_state(name, Irq, allow_local=True)
+    bp.set(name, irq=irq.target)
+
+
+def node(bp, name, idx, net: Net):
+    info = bp.expose_state(name, NodeInfo)
+    info.index = idx
+    info.ram_size = Default(0x10000 * (len(net.ports) + 1))
+    bp.establish_binding(Irq, name.pic, name)
+    bp.obj(name, "node", ram_size=info.ram_size)
+    bp.expand(name, "pic", pic)
+    bp.expand(name, "nic", nic)
+
+
+def switch(bp, name, net: Net):
+    bp.obj(name, "switch", ports=list(net.ports))
+    net.links = len(net.ports)
+
+
+def rack(bp, name, nodes=4):
+    net = bp.expose_state(name, Net)
+    for i in range(nodes):
+        bp.expand(name, f"node[{i}]", node, idx=i)
+    bp.expand(name, "switch", switch)
+    bp.obj(name, "rack", links=net.links)
+
+
+def snapshot(builder):
+    objs = {str(k): (o.classname, repr(sorted(o.args.items(), key=str)))
+            for (k, o) in builder._obj.items()}
+    return (objs, sorted(map(repr, builder._state)),
+            repr(builder._errors))
+
+
+class TestIncrementalExpansion(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("blueprints-test")
+        self.logger.setLevel(logging.WARNING)
+
+    def test_same_result(self):
+        full = expand("rack", rack, logger=self.logger, incremental=False)
+        inc = expand("rack", rack, logger=self.logger)
+        self.assertGreater(inc._stats.iterations, 1)
+        self.assertGreater(inc._stats.replays, 0)
+        self.assertEqual(full._stats.replays, 0)
+        self.assertEqual(inc._stats.iterations, full._stats.iterations)
+        self.assertEqual(snapshot(inc), snapshot(full))
+        self.assertEqual(len(inc._obj), 1 + 4 * 3 + 1)
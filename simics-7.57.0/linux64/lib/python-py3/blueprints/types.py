@@ -156,7 +156,7 @@ class NSState(State, Generic[T]):
         else:
             return object.__setattr__(self, k, val)
     def __iter__(self) -> Iterator[str]:
-        vals = self._builder._vals.get(self._key + ("[keys]",), [])
+        vals = self._builder._read_values(self._key + ("[keys]",))
         keys = set(v.value for v in vals) | set(super().__iter__())
         return sorted(keys).__iter__()
 
@@ -168,7 +168,7 @@ class List(State, Generic[T], collections.abc.Sequence):
     def _get(self) -> list[T]:
         if not self._builder:
             return []
-        values = self._builder._vals.get(self._key + ("[list]",), [])
+        values = self._builder._read_values(self._key + ("[list]",))
         return [item for v in values for item in v.value]
     def extend(self, vals: Iterable[T]):
         self._builder._set_value(self, "[list]", list(vals), simplified=True)
@@ -193,7 +193,7 @@ class Dict(State, Generic[K, T], collections.abc.Mapping):
     def _get(self) -> dict[K, T]:
         if not self._builder:
             return {}
-        values = self._builder._vals.get(self._key + ("[dict]",), [])
+        values = self._builder._read_values(self._key + ("[dict]",))
         return {k: v for (k,v) in [x.value for x in reversed(values)]}
     def __setitem__(self, key: K, val: T):
         self._builder._set_value(self, "[dict]", (key, val), simplified=True)
@@ -211,7 +211,7 @@ class Set(State, Generic[T], collections.abc.Set):
     def _get(self) -> set[T]:
         if not self._builder:
             return set()
-        values = self._builder._vals.get(self._key + ("[set]",), [])
+        values = self._builder._read_values(self._key + ("[set]",))
         return set(x.value for x in values)
     def add(self, val: T):
         self._builder._set_value(self, "[set]", val, simplified=True)
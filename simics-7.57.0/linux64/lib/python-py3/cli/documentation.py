@@ -12,16 +12,32 @@
 import sys, inspect
 import os
 
-try:
-    import api_help_py
-except ImportError:
-    # may happen during build
-    api_help_py = None
-
+# The documentation strings of objects decorated with doc() are replaced
+# with the plain text version from the Python API help. This is postponed
+# until the documentation is asked for, see rewrite_doc_strings, so that the
+# API help does not have to be loaded at startup.
 _rewrite_doc_strings = (
-    api_help_py
-    and os.environ.get("SIMICS_DONT_REWRITE_PYDOC", None) is None
-)
+    os.environ.get("SIMICS_DONT_REWRITE_PYDOC", None) is None)
+
+# (object, API help topic) for the objects not yet rewritten
+_pending_doc_rewrites = []
+
+def rewrite_doc_strings():
+    """Replace the documentation strings of all objects decorated with
+    doc() since the last call with their plain text API help."""
+    if not _pending_doc_rewrites:
+        return
+    pending = list(_pending_doc_rewrites)
+    del _pending_doc_rewrites[:]
+    try:
+        import api_help
+    except ImportError:
+        # may happen during build
+        return
+    for (obj, topic) in pending:
+        doc = api_help.python_api_help(topic)
+        if doc:
+            obj.__doc__ = doc[1]
 
 string_types = (str, bytes)
 
@@ -138,13 +154,10 @@ def doc(short, *, module = None, namespace = '', name = None,
                 return_value, synopsis, real_doc_id, docu_suffix,
                 is_function, context))
 
-            if _rewrite_doc_strings:
-                doc = api_help_py.api_help_py.get('%s.%s' % (
-                        real_module, real_name))
-                if doc:
-                    setter('__doc__', doc[1])
-
             r = finish()
+            if _rewrite_doc_strings:
+                _pending_doc_rewrites.append(
+                    (r, '%s.%s' % (real_module, real_name)))
             _simics_doc_items.add(r)
             return r
 
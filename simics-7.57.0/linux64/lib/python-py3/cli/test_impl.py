@@ -0,0 +1,1091 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the cli.impl module
+
+import unittest
+import conf
+import inspect
+import os
+import re
+import simics
+import sys
+import traceback
+import types
+from .errors import CliCmdDefError, CliError
+from io import StringIO
+from . import tokenizer
+from .impl import (
+    ClassFunctionMap,
+    Command_list,
+    Just_Left,
+    addr_t,
+    arg,
+    bool_t,
+    boolean_t,
+    command_return,
+    common_prefix,
+    filename_t,
+    flag_t,
+    float_t,
+    get_format_string,
+    get_last_loaded_module,
+    get_shortest_unique_object_names,
+    int16_t,
+    int32_t,
+    int64_max,
+    int64_min,
+    int64_t,
+    int8_t,
+    int_t,
+    integer_t,
+    ip_port_t,
+    list_t,
+    nil_t,
+    obj_t,
+    poly_t,
+    poly_to_spec,
+    print_columns,
+    print_wrap_code,
+    print_wrap_code_line,
+    python_tab_complete,
+    range_t,
+    sint16_t,
+    sint32_t,
+    sint64_t,
+    simenv,
+    sint8_t,
+    stack_frame_limit,
+    stop_traceback,
+    str_t,
+    string_set_t,
+    uint16_t,
+    uint32_t,
+    uint64_max,
+    uint64_t,
+    uint8_t,
+    uint_t,
+    wrap_cli_cmd_impl,
+)
+
+
+class _test_get_shortest_unique_object_names(unittest.TestCase):
+    def test_unique(self):
+        from simics import SIM_create_object
+        o0 = SIM_create_object("namespace", "a")
+
+        self.assertEqual(get_shortest_unique_object_names([o0]), ["a"])
+
+        SIM_create_object("namespace", "a.b")
+        SIM_create_object("namespace", "a.b.c")
+        o1 = SIM_create_object("namespace", "a.b.c.d1")
+        o2 = SIM_create_object("namespace", "a.b.c.d2")
+
+        self.assertEqual(get_shortest_unique_object_names([o1, o2]),
+                         ["d1", "d2"])
+
+        SIM_create_object("namespace", "a.b.c2")
+        o3 = SIM_create_object("namespace", "a.b.c2.d2")
+
+        self.assertEqual(get_shortest_unique_object_names([o1, o2, o3]),
+                         ["d1", "c.d2", "c2.d2"])
+
+        SIM_create_object("namespace", "a2")
+        SIM_create_object("namespace", "a2.b")
+        SIM_create_object("namespace", "a2.b.c")
+        o4 = SIM_create_object("namespace", "a2.b.c.d1")
+
+        self.assertEqual(get_shortest_unique_object_names([o1, o4]),
+                         ["a.b.c.d1", "a2.b.c.d1"])
+
+
+class _test_get_format_string(unittest.TestCase):
+    def test_nested_list(self):
+        text = """\
+A list
+<ul>
+<li>Item 1 and lets make it long so it needs to be wrapped across lines</li>
+<li>Here is a nested list: <ul><li>Nested</li></ul>
+</li>
+And some text after"""
+
+        expected = """\
+A list
+* Item 1 and lets make it long so it needs to be
+  wrapped across lines
+* Here is a nested list:
+  * Nested
+And some text after"""
+        out = get_format_string(text, mode='text', width=50)
+        self.assertEqual(out, expected)
+
+
+class _test_new_command(unittest.TestCase):
+    def setUp(self):
+        self.commands = Command_list()
+        self.commands.allow_redefine = False
+
+    def cmdfun(self, *args):
+        self.args = args
+
+    def test_simple(self):
+        self.commands.new_command("cmd1", self.cmdfun,
+                                  [arg(int_t, "x")])
+        cmd = self.commands.get("cmd1")
+        self.assertEqual(cmd.name, "cmd1")
+
+    def test_dup_argname(self):
+        self.assertRaises(CliCmdDefError,
+                          self.commands.new_command,
+                          "cmd1", self.cmdfun,
+                          [arg(int_t, "x"),
+                           arg(int_t, "x")])
+
+    def test_doc_group(self):
+        cmd1 = self.commands.new_command("cmd1", self.cmdfun)
+        cmd2 = self.commands.new_command("cmd2", self.cmdfun,
+                                         doc_with = "cmd1")
+        d = self.commands.get_doc_group("cmd1")
+        self.assertEqual(d, set([cmd1, cmd2]))
+        self.assertRaises(KeyError, self.commands.get_doc_group, "cmd2")
+        self.assertRaises(CliCmdDefError,
+                          self.commands.new_command,
+                          "cmd3", self.cmdfun,
+                          doc_with = "unknown")
+
+    def test_redefine(self):
+        self.commands.new_command("cmd1", self.cmdfun)
+        self.assertRaises(CliCmdDefError,
+                          self.commands.new_command,
+                          "cmd1", self.cmdfun)
+
+    def test_alias(self):
+        cmd = self.commands.new_command("cmd1", self.cmdfun,
+                                        alias = "cmdalias")
+        # There should now be one command, with two names
+        self.assertEqual(list(self.commands), [cmd])
+        self.assertEqual(set(self.commands.get_command_names()),
+                         set(("cmd1", "cmdalias")))
+        self.assertEqual(self.commands.get("cmd1"), cmd)
+        self.assertEqual(self.commands.get("cmdalias"), cmd)
+
+    def test_for_forbidden_obj_alias(self):
+        self.assertRaises(CliCmdDefError,
+                          self.commands.new_command,
+                          "cmd1", self.cmdfun,
+                          [arg(int_t, "x"),
+                           arg(int_t, "x")], alias = "cpu")
+
+    def test_ns_alias(self):
+        cmd = self.commands.new_command("cmd1", self.cmdfun,
+                                        iface = "processor",
+                                        alias = "cmdalias")
+        # There should now be one command, with two names, both in the
+        # namespace
+        self.assertEqual(list(self.commands), [cmd])
+        self.assertEqual(set(self.commands.get_command_names()),
+                         set(("<processor>.cmd1", "<processor>.cmdalias")))
+        self.assertEqual(self.commands.get("<processor>.cmd1"), cmd)
+        self.assertEqual(self.commands.get("<processor>.cmdalias"), cmd)
+
+    def test_nsc_alias(self):
+        cmd = self.commands.new_command(
+            "cmd1", self.cmdfun,
+            namespace_copy = ("processor", self.cmdfun),
+            alias = "cmdalias")
+        # Have to get the namespace copy command separately
+        ncmd = self.commands.get("<processor>.cmd1")
+        # There should now be two commands, with two names each
+        self.assertEqual(set(self.commands.get_command_names()),
+                         set(("cmd1", "cmdalias",
+                              "<processor>.cmd1", "<processor>.cmdalias")))
+        self.assertTrue(ncmd)
+        self.assertEqual(set(self.commands), set([cmd, ncmd]))
+        self.assertEqual(self.commands.get("cmd1"), cmd)
+        self.assertEqual(self.commands.get("cmdalias"), cmd)
+        self.assertEqual(self.commands.get("<processor>.cmd1"), ncmd)
+        self.assertEqual(self.commands.get("<processor>.cmdalias"), ncmd)
+
+
+class _test_normalize_value(unittest.TestCase):
+    def test_str_t(self):
+        self.assertEqual(str_t.normalize_value('hello'), 'hello')
+        self.assertEqual(str_t.normalize_value('hello'), 'hello')
+        with self.assertRaises(ValueError):
+            str_t.normalize_value(5)
+    def test_int_t(self):
+        for v in [-1, 0, 1, 1000000000000000000000000,
+                  -1000000000000000000000000]:
+            self.assertEqual(int_t.normalize_value(int(v)), v)
+        with self.assertRaises(ValueError):
+            int_t.normalize_value('hello')
+    def test_uint_t(self):
+        for v in [0, 1, 1000000000000000000000000]:
+            self.assertEqual(int_t.normalize_value(int(v)), v)
+        for v in [-1, -1000000000000000000000000, 'hello']:
+            with self.assertRaises(ValueError):
+                uint_t.normalize_value(v)
+    def test_list_t(self):
+        # Lists of cli values are acceptable, including lists of lists
+        for v in [[], ['hello', 5], [5.0], [('v', 4711)], [None], [False],
+                  [conf.sim], [[]], [['hello']]]:
+            self.assertEqual(list_t.normalize_value(v), v)
+        for (v, e) in [('v:4711', ('v', 4711)), ('sim', 'sim'),
+                       (['v', 4711], ('v', 4711))]:
+            self.assertEqual(list_t.normalize_value([v]), [e])
+        # Non-list and lists of non-cli values are not acceptable
+        for v in [None, 5, False, 'hello', [object()], [()]]:
+            with self.assertRaises(ValueError):
+                list_t.normalize_value(v)
+    def test_range_t(self):
+        for (min, max) in [(0, 10), (int64_min, int64_max),
+                           (int64_min, uint64_max), (0, 0)]:
+            range = range_t(min, max, '%d-%d' % (min, max))
+            self.assertEqual(range.normalize_value(min), min)
+            self.assertEqual(range.normalize_value(max), max)
+            with self.assertRaises(ValueError):
+                range.normalize_value(min - 1)
+            with self.assertRaises(ValueError):
+                range.normalize_value(max + 1)
+            mod_range = range_t(min, max, '%d-%d' % (min, max), modulo=True)
+            self.assertEqual(mod_range.normalize_value(min), min)
+            self.assertEqual(mod_range.normalize_value(max), max)
+            self.assertEqual(mod_range.normalize_value(min - 1), max)
+            self.assertEqual(mod_range.normalize_value(max + 1), min)
+            with self.assertRaises(ValueError):
+                range.normalize_value('hello')
+    def test_sign_invariant_range_types(self):
+        # Test that the sign invariant fixed size argument has the full range
+        # of unsigned and signed combined.
+        def test_type(sign_invariant, other_type, limitation):
+            got = getattr(sign_invariant, limitation)
+            exp = getattr(other_type, limitation)
+            self.assertEqual(
+                got,
+                exp,
+                f"The type '{sign_invariant.name}' has {limitation}"
+                f" {got} but should have the same"
+                f" {limitation} as '{other_type.name}',"
+                f" {exp}.")
+        for (sign_invariant, signed, unsigned) in [
+                [int8_t, sint8_t, uint8_t],
+                [int16_t, sint16_t, uint16_t],
+                [int32_t, sint32_t, uint32_t],
+                [int64_t, sint64_t, uint64_t]]:
+            test_type(sign_invariant, signed, 'min')
+            test_type(sign_invariant, unsigned, 'max')
+
+    def test_float_t(self):
+        for v in [0, -1, 1, -1.0, 1.0, 0.0, sys.float_info.max,
+                  sys.float_info.min, float('inf'), float('-inf')]:
+            self.assertEqual(float_t.normalize_value(v), v)
+        with self.assertRaises(ValueError):
+            float_t.normalize_value('hello')
+    def test_flag_t(self):
+        for v in [True, False, 0, 1]:
+            self.assertEqual(flag_t.normalize_value(v), bool(v))
+        with self.assertRaises(ValueError):
+            flag_t.normalize_value('hello')
+    def test_addr_t(self):
+        self.assertEqual(addr_t.normalize_value(42), ('', 42))
+        self.assertEqual(addr_t.normalize_value(('', 42)), ('', 42))
+        self.assertEqual(addr_t.normalize_value(('v', 42)), ('v', 42))
+        self.assertEqual(addr_t.normalize_value(('v:42')), ('v', 42))
+        self.assertEqual(addr_t.normalize_value(('v:0x42')), ('v', 0x42))
+        for v in [(), 'ww:0x42', 'v:47:13', -10, (0, 42), (42, 'v'),
+                  ('v', '42')]:
+            with self.assertRaises(ValueError):
+                addr_t.normalize_value(v)
+    def test_ip_port_t(self):
+        for v in [0, 1, 65535, 4711]:
+            self.assertEqual(ip_port_t.normalize_value(v), v)
+            self.assertEqual(ip_port_t.normalize_value(int(v)), v)
+        for v in [-1, 65536, 'hello']:
+            with self.assertRaises(ValueError):
+                ip_port_t.normalize_value(v)
+    def test_filename_t(self):
+        filename = filename_t()
+        dir_filename = filename_t(dirs=True)
+        existing_filename = filename_t(exist=True)
+        existing_dir_filename = filename_t(exist=True, dirs=True)
+        sim_filename = filename_t(simpath=True)
+        sim_dir_filename = filename_t(simpath=True, dirs=True)
+        checkpoint_filename = filename_t(checkpoint=True)
+        existing_checkpoint_filename = filename_t(checkpoint=True, exist=True)
+
+        import tempfile
+        non_existing = 'non-existing-file'
+        sim_dir = '%simics%/bin'
+        sim_file = '%simics%/scripts/addon-manager.py'
+        missing_sim_file = '%simics%/missing-file.abc'
+        (fd, existing) = tempfile.mkstemp()
+        os.close(fd)
+        existing_dir = tempfile.mkdtemp()
+        existing_ckpt_dir = tempfile.mkdtemp()
+        with open(os.path.join(existing_ckpt_dir, "config"), "w") as f:
+            print("""# Test checkpoint
+            OBJECT default_cell0 TYPE cell {
+                   default_cell: TRUE
+            }""", file=f)
+
+        try:
+            # Just validating and matching
+            for (input, fn) in [
+                    (non_existing, filename),
+                    (non_existing, dir_filename),
+                    (non_existing, checkpoint_filename),
+                    (existing, filename),
+                    (existing, dir_filename),
+                    (existing_dir, dir_filename),
+                    (existing, checkpoint_filename),
+                    # TODO: Why is an existing dir accepted as a checkpoint?
+                    (existing_dir, checkpoint_filename),
+                    (existing_ckpt_dir, existing_checkpoint_filename),
+            ]:
+                self.assertEqual(fn.normalize_value(input), input)
+
+            # Simpath translation
+            for (input, fn) in [
+                    (sim_file, sim_filename),
+                    (sim_dir, sim_dir_filename),
+                    (sim_file, sim_dir_filename),
+                    ]:
+                self.assertEqual(fn.normalize_value(input),
+                                 simics.SIM_lookup_file(input))
+
+            # Failing simpath translation and non-existing files
+            for (input, fn) in [
+                    (non_existing, existing_filename),
+                    (non_existing, existing_dir_filename),
+                    (non_existing, sim_filename),
+                    (non_existing, sim_dir_filename),
+                    (non_existing, existing_checkpoint_filename),
+                    (sim_dir, sim_filename),
+                    (existing_dir, sim_filename),
+                    (existing_dir, existing_checkpoint_filename),
+                    (missing_sim_file, filename),
+                    (existing, existing_checkpoint_filename),
+            ]:
+                with self.assertRaises(ValueError):
+                    fn.normalize_value(input)
+        finally:
+            os.remove(existing)
+            os.rmdir(existing_dir)
+    def test_obj_t(self):
+        # Create an object of a particular class, with a particular
+        # interface and a particular port for testing
+        klass = simics.SIM_create_class(
+            'm_class', simics.class_info_t(kind=simics.Sim_Class_Kind_Pseudo))
+        simics.SIM_register_interface(klass, 'signal',
+                                      simics.signal_interface_t())
+        simics.SIM_register_port_interface(
+            klass, 'int_register', simics.int_register_interface_t(), 'regs',
+            'registers')
+        obj = simics.SIM_create_object(klass, 'earth')
+
+        try:
+            # Test various obj_t variants that should match the object
+            for t in [obj_t('any object'), obj_t('m_class', kind='m_class'),
+                      obj_t('signal', kind='signal')]:
+                ref_cli_val = t.value([tokenizer.string_token(obj.name)])[0]
+                self.assertEqual(t.normalize_value(obj), ref_cli_val)
+                self.assertEqual(t.normalize_value(obj.name), ref_cli_val)
+                with self.assertRaises(ValueError):
+                    t.normalize_value([obj, None])
+
+            # Create a signal_port obj_t and test it against obj
+            signal_port = obj_t('int-port', kind='signal', want_port=True)
+            ref_cli_val = signal_port.value([tokenizer.string_token(obj.name)])[0]
+            for v in [obj, [obj, None], (obj, None), obj.name]:
+                self.assertEqual(signal_port.normalize_value(v), ref_cli_val)
+
+            # Create an int_port and test both matches and misses against it
+            int_port = obj_t('int-port', kind='int_register', want_port=True)
+            ref_cli_val = int_port.value([tokenizer.string_token(f"{obj.name}:regs")])[0]
+            for v in [[obj, 'regs'], (obj, 'regs'), '%s:regs' % obj.name]:
+                self.assertEqual(int_port.normalize_value(v), ref_cli_val)
+            for v in [conf.sim, obj, 'hello', [obj, 'foobar'], [obj, 17],
+                      [obj], [obj.name, "regs"]]:
+                with self.assertRaises(ValueError):
+                    int_port.normalize_value(v)
+        finally:
+            simics.SIM_delete_object(obj)
+    def test_string_set_t(self):
+        d = {'hello': 42, 'world': False, 'eggs': 'eggs'}
+        string_set = string_set_t(d)
+        for (key, value) in list(d.items()):
+            self.assertEqual(string_set.normalize_value(key), value)
+        for v in [42, 'hi']:
+            with self.assertRaises(ValueError):
+                string_set.normalize_value(v)
+    def test_bool_t(self):
+        bools = bool_t('Hello', 'World')
+        for v in [True, 1, 'TRUE', 'Hello']:
+            self.assertTrue(bools.normalize_value(v))
+        for v in [False, 0, 'FALSE', 'World']:
+            self.assertFalse(bools.normalize_value(v))
+        for v in ['Yes', 'No', None, [], 'True', 'False', 3, -1, 1.0, 0.0]:
+            with self.assertRaises(ValueError):
+                bools.normalize_value(v)
+    def test_nil_t(self):
+        for v in [None, 0, '']:
+            self.assertEqual(nil_t.normalize_value(v), None)
+        for v in ['nil', 'None', False, True, [], 0.0]:
+            with self.assertRaises(ValueError):
+                nil_t.normalize_value(v)
+    def test_poly_t(self):
+        poly = poly_t('various', string_set_t({'hello': 42}), str_t, boolean_t,
+                      range_t(3, 5, '3-5'))
+        for (k, v) in [('hello', 42), ('world', 'world'), (False, False),
+                       (0, False), (3, 3), ('FALSE', 'FALSE')]:
+            self.assertEqual(poly.normalize_value(k), v)
+        for v in [conf.sim, [], 17]:
+            with self.assertRaises(ValueError):
+                poly.normalize_value(v)
+
+
+class _test_filename_t_value(unittest.TestCase):
+    def test_filename_t_tokens(self):
+        filename_t().value(tokenizer.tokenize('"%simics%/scripts/addon-manager.py"'))
+        token = tokenizer.tokenize('"%simics%/missing-file.abc"')
+        self.assertRaises(CliError, filename_t().value, token)
+
+
+class _test_wrap_cli_cmd_impl(unittest.TestCase):
+    def setUp(self):
+        self.commands = Command_list()
+        self.commands.allow_redefine = False
+        self.obj = types.SimpleNamespace(name = self.__class__.__name__)
+
+    def cmdfun(self, *args):
+        self.args = args
+
+    def wrap(self, name, args):
+        cmd = self.commands.new_command(name, self.cmdfun, args)
+        return wrap_cli_cmd_impl(name, cmd, self.obj)
+
+    def test_kw_arg_mapping(self):
+        fun = self.wrap('c', [arg(int_t, 'a'), arg(flag_t, '-flag'),
+                               arg((int_t, str_t), ('int', 'str'))])
+        fun(a=1, _flag=True, int=2)
+        self.assertEqual(self.args, (self.obj, 1, True, (int_t, 2, 'int')))
+        fun(a=1, _flag=True, str='hi')
+        self.assertEqual(self.args, (self.obj, 1, True, (str_t, 'hi', 'str')))
+
+    def test_flags(self):
+        fun = self.wrap('c', [arg(flag_t, '-a'), arg(flag_t, '-b')])
+        fun(_a=False)
+        self.assertEqual(self.args, (self.obj, False, False))
+        fun(_b=True)
+        self.assertEqual(self.args, (self.obj, False, True))
+
+    def test_list_spec(self):
+        fun = self.wrap('star', [arg(int_t, 'int', '*')])
+        fun()
+        self.assertEqual(self.args, (self.obj, []))
+        fun(int = [])
+        self.assertEqual(self.args, (self.obj, []))
+        fun(int = [1, 2, 3])
+        self.assertEqual(self.args, (self.obj, [1, 2, 3]))
+        with self.assertRaises(TypeError):
+            fun(int=1)
+
+        fun = self.wrap('plus', [arg(int_t, 'int', '+')])
+        with self.assertRaises(TypeError):
+            fun()
+        with self.assertRaises(TypeError):
+            fun(int = [])
+        fun(int = [1, 2, 3])
+        self.assertEqual(self.args, (self.obj, [1, 2, 3]))
+        with self.assertRaises(TypeError):
+            fun(int=1)
+
+    def test_poly_value(self):
+        req = self.wrap('req', [arg((int_t, str_t, flag_t),
+                                    ('int', 'str', '-flag'), '1')])
+        with self.assertRaises(TypeError):
+            req()
+        req(_flag=False)
+        self.assertEqual(self.args, (self.obj, (flag_t, False, '-flag')))
+        opt = self.wrap('opt', [arg((int_t, str_t, flag_t),
+                                    ('int', 'str', '-flag'), '?',
+                                    (flag_t, False, '-flag'))])
+        opt()
+        self.assertEqual(self.args, (self.obj, (flag_t, False, '-flag')))
+        opt(int=5)
+        self.assertEqual(self.args, (self.obj, (int_t, 5, 'int')))
+        with self.assertRaises(TypeError):
+            opt(int=5, str='hi')
+
+    def test_poly_list_spec(self):
+        req = self.wrap('req', [arg((int_t, str_t, flag_t),
+                                    ('int', 'str', '-flag'), '+')])
+        with self.assertRaises(TypeError):
+            req()
+        req(_flag=False)
+        self.assertEqual(self.args, (self.obj, [(flag_t, False, '-flag')]))
+        with self.assertRaises(TypeError):
+            req(int = 5, str = 'hi')
+
+        opt = self.wrap('opt', [arg((int_t, str_t, flag_t),
+                                    ('int', 'str', '-flag'), '*')])
+        opt()
+        self.assertEqual(self.args, (self.obj, []))
+        opt(int=5)
+        self.assertEqual(self.args, (self.obj, [(int_t, 5, 'int')]))
+        with self.assertRaises(TypeError):
+            opt(int=5, str='hi')
+
+    def test_is_validated(self):
+        fun = self.wrap('cmd', [arg(int_t, 'paramName')])
+        with self.assertRaisesRegex(ValueError, 'paramName'):
+            fun(paramName = 'hi')
+
+    def test_check_required(self):
+        fun = self.wrap('simple', [arg(int_t, 'a')])
+        with self.assertRaises(TypeError):
+            fun()
+        fun = self.wrap('poly', [arg((int_t, str_t), ('a', 'b'))])
+        with self.assertRaises(TypeError):
+            fun()
+
+    def test_check_required_keyword(self):
+        fun = self.wrap('simple', [arg(int_t, 'class')])
+        with self.assertRaisesRegex(
+                TypeError,
+                re.escape("simple() did not get required keyword argument"
+                          " 'class_'")):
+            fun()
+
+        fun = self.wrap('poly', [arg((int_t, str_t), ('class', 'b'))])
+        with self.assertRaisesRegex(
+                TypeError,
+                re.escape("poly() did not get required keyword argument"
+                          " ('class_', 'b')")):
+            fun()
+
+    def test_unanamed_arg(self):
+        fun = self.wrap('first', [arg(int_t)])
+        fun(5)
+        self.assertEqual(self.args, (self.obj, 5))
+        fun = self.wrap('second', [arg(str_t, 'named', '?', 'hi'), arg(int_t)])
+        fun(5)
+        self.assertEqual(self.args, (self.obj, 'hi', 5))
+
+    def test_unnamed_poly_arg(self):
+        fun = self.wrap('first', [arg((int_t, str_t))])
+        fun(5)
+        self.assertEqual(self.args, (self.obj, (int_t, 5, '')))
+        fun('hi')
+        self.assertEqual(self.args, (self.obj, (str_t, 'hi', '')))
+
+        fun = self.wrap('second', [arg(str_t, 'named', '?', 'hi'),
+                                   arg((int_t, str_t))])
+        fun(5)
+        self.assertEqual(self.args, (self.obj, 'hi', (int_t, 5, '')))
+        fun('hello')
+        self.assertEqual(self.args, (self.obj, 'hi', (str_t, 'hello', '')))
+
+    def test_some_unnamed_poly_arg(self):
+        fun = self.wrap('first', [arg((int_t, str_t), ('', 's'))])
+        fun(5)
+        self.assertEqual(self.args, (self.obj, (int_t, 5, '')))
+        fun(s='hi')
+        self.assertEqual(self.args, (self.obj, (str_t, 'hi', 's')))
+        with self.assertRaises(ValueError):
+            fun('hi')
+
+        fun = self.wrap('second', [arg(str_t, 'named', '?', 'hi'),
+                                   arg((int_t, str_t), ('', 's'))])
+        fun(5)
+        self.assertEqual(self.args, (self.obj, 'hi', (int_t, 5, '')))
+        fun(s = 'hello')
+        self.assertEqual(self.args, (self.obj, 'hi', (str_t, 'hello', 's')))
+
+    def test_unnamed_list_arg(self):
+        fun = self.wrap('star', [arg(int_t, spec='*')])
+        fun([1, 2, 3, 4])
+        self.assertEqual(self.args, (self.obj, [1, 2, 3, 4]))
+        fun()
+        self.assertEqual(self.args, (self.obj, []))
+        with self.assertRaises(TypeError):
+            fun(1, 2, 3, 4)
+
+        fun = self.wrap('plus', [arg(int_t, spec='+')])
+        fun([1, 2, 3, 4])
+        self.assertEqual(self.args, (self.obj, [1, 2, 3, 4]))
+        with self.assertRaises(TypeError):
+            fun()
+        with self.assertRaises(TypeError):
+            fun(1, 2, 3, 4)
+
+    def test_unnamed_poly_list(self):
+        req = self.wrap('req', [arg((int_t, str_t),
+                                    spec='+')])
+        with self.assertRaises(TypeError):
+            req()
+        req('hi')
+        self.assertEqual(self.args, (self.obj, [(str_t, 'hi', '')]))
+        with self.assertRaises(TypeError):
+            req(5, 'hi')
+
+        opt = self.wrap('opt', [arg((int_t, str_t), spec='*')])
+        opt()
+        self.assertEqual(self.args, (self.obj, []))
+        opt(5)
+        self.assertEqual(self.args, (self.obj, [(int_t, 5, '')]))
+        with self.assertRaises(TypeError):
+            opt(5, 'hi')
+
+    def test_mixed_named_unnamed_poly_list(self):
+        req = self.wrap('req', [arg((int_t, str_t), ('num', ''), spec='+')])
+        with self.assertRaises(TypeError):
+            req()
+        req('hi')
+        self.assertEqual(self.args, (self.obj, [(str_t, 'hi', '')]))
+        req(num=5)
+        self.assertEqual(self.args, (self.obj, [(int_t, 5, 'num')]))
+        with self.assertRaises(TypeError):
+            req('hi', num=5)
+
+        opt = self.wrap('opt', [arg((int_t, str_t), ('num', ''), spec='*')])
+        opt()
+        self.assertEqual(self.args, (self.obj, []))
+        opt('hi')
+        self.assertEqual(self.args, (self.obj, [(str_t, 'hi', '')]))
+        opt(num=5)
+        self.assertEqual(self.args, (self.obj, [(int_t, 5, 'num')]))
+        with self.assertRaises(TypeError):
+            opt('hi', num=5)
+
+    def test_command_return(self):
+        cmd_result = None
+        def impl(obj):
+            return cmd_result
+        cmd = self.commands.new_command('cmd', impl, [])
+        fun = wrap_cli_cmd_impl('cmd', cmd, self.obj)
+        cmd_result = None
+        self.assertEqual(fun(), None)
+        cmd_result = 5
+        self.assertEqual(fun(), 5)
+        cmd_result = command_return(value=7)
+        self.assertEqual(fun(), 7)
+        cmd_result = command_return(value=None)
+        self.assertEqual(fun(), None)
+        # Check an illegal return value for command (i.e. the value
+        # not supported by Simics CLI):
+        cmd_result = dict()
+        with self.assertRaises(CliError):
+            fun()
+
+    def test_nonstandard_handler(self):
+        class NonStandard:
+            def has_expander(self):
+                return False
+        fun = self.wrap('cmd', [arg(NonStandard())])
+        with self.assertRaises(TypeError):
+            fun()
+
+    def test_dont_validate_defaults(self):
+        fun = self.wrap('cmd',
+                        [arg(filename_t(), 'param-file', '?', 'autodetect'),
+                         arg(poly_t('node spec', str_t, uint_t), 'node', '?',
+                             None),
+                         arg(str_t, 'version-string', '?', None),
+                         arg(integer_t, 'base-address', '?', None),
+                         arg(filename_t(exist=True), 'symbol-file', '?', None)
+                         ])
+        fun()
+        self.assertEqual(self.args, (self.obj, 'autodetect', None, None, None,
+                                     None))
+
+    def test_flag_default(self):
+        fun = self.wrap('cmd', [arg(flag_t, '-a'), arg(flag_t, '-b', '?',
+                                                       'hello')])
+        fun()
+        self.assertEqual(self.args, (self.obj, 0, 0))
+
+    def test_arg_aliases(self):
+        fun = self.wrap('c', [arg(int_t, 'break')])
+        fun(**{'break': 1})
+        self.assertEqual(self.args, (self.obj, 1))
+        fun(break_=1)
+        self.assertEqual(self.args, (self.obj, 1))
+
+
+class _test_arg(unittest.TestCase):
+    def test_flags(self):
+        # flags get some special treatment
+        arg(flag_t, "-f")
+        self.assertRaises(CliCmdDefError, arg, flag_t, "f")
+        self.assertRaises(CliCmdDefError, arg, flag_t, "-f", "*")
+        self.assertEqual(arg(flag_t, "-f").spec, "?")
+        self.assertEqual(arg(flag_t, "-f", "1").spec, "?")
+
+    def test_spec(self):
+        self.assertEqual(arg(int_t, "x").spec, "1")
+        self.assertEqual(arg(int_t, "x", "1").spec, "1")
+        self.assertEqual(arg(int_t, "x", "?").spec, "?")
+        self.assertEqual(arg(int_t, "x", "*").spec, "*")
+        self.assertEqual(arg(int_t, "x", "+").spec, "+")
+        self.assertRaises(CliCmdDefError, arg, int_t, "x", "!")
+
+    def test_nonpolly(self):
+        a = arg(int_t, "x")
+        self.assertFalse(a.poly)
+        self.assertEqual(a.name, "x")
+
+    def test_polly1(self):
+        self.assertRaises(CliCmdDefError, arg, (int_t, int_t), "x")
+        self.assertRaises(CliCmdDefError, arg, int_t, ("x", "y"))
+        self.assertRaises(CliCmdDefError, arg, int_t, "x",
+                          expander = (None, None))
+
+    def test_polly2(self):
+        a = arg((int_t, int_t), ("x", "y"), expander = (None, None))
+        self.assertTrue(a.poly)
+        self.assertEqual(a.name, ("x", "y"))
+
+    def test_polly3(self):
+        a = arg((int_t, int_t), ("x", "y"))
+        self.assertTrue(a.poly)
+        self.assertEqual(a.expander, (None, None))
+
+    def test_polly_dup(self):
+        self.assertRaises(CliCmdDefError, arg, (int_t, str_t), ("x", "x"))
+
+    def test_completer(self):
+        a = arg(string_set_t(["aaaa", "aabb", "bbbb"]))
+        self.assertEqual(a.call_expander("", None),
+                         ["aaaa", "aabb", "bbbb"])
+        self.assertEqual(a.call_expander("a", None),
+                         ["aaaa", "aabb"])
+        self.assertEqual(a.call_expander("aaa", None),
+                         ["aaaa"])
+        self.assertEqual(a.call_expander("b", None),
+                         ["bbbb"])
+        self.assertEqual(a.call_expander("c", None),
+                         [])
+
+    def test_poly_completer(self):
+        a = arg((boolean_t, string_set_t(["foo", "bar"])), ('xx', 'yy'))
+        self.assertEqual(a.call_expander("", None),
+                         ["FALSE", "TRUE", "bar", "foo"])
+        self.assertEqual(a.call_expander("x", None),
+                         [])
+        self.assertEqual(a.call_expander("T", None),
+                         ["TRUE"])
+        self.assertEqual(a.call_expander("f", None),
+                         ["foo"])
+        a = poly_to_spec(a, "yy")
+        self.assertEqual(a.call_expander("", None),
+                         ["bar", "foo"])
+
+
+class _test_simenv(unittest.TestCase):
+    def test_attr_access(self):
+        orig_len = len(simenv)
+        simenv.abba = 1
+        self.assertEqual(simenv.abba, 1)
+        simenv.bebba = 2
+        self.assertEqual(len(simenv) - orig_len, 2)
+        del simenv.abba
+        del simenv.bebba
+        self.assertEqual(len(simenv), orig_len)
+
+    def test_indexed_access(self):
+        orig_len = len(simenv)
+        simenv['cebba'] = 3
+        self.assertEqual(simenv['cebba'], 3)
+        self.assertEqual(len(simenv) - orig_len, 1)
+        del simenv['cebba']
+        self.assertEqual(len(simenv), orig_len)
+
+    def test_access_both_methods(self):
+        # Test setting with attribute, but retrieve and delete indexed.
+        orig_len = len(simenv)
+        simenv.coco = 1
+        self.assertEqual(simenv['coco'], 1)
+        self.assertEqual(len(simenv) - orig_len, 1)
+        del simenv['coco']
+        self.assertEqual(len(simenv), orig_len)
+
+        # Test setting indexed, but retrieve and delete with attribute.
+        simenv['banan'] = 2
+        self.assertEqual(simenv.banan, 2)
+        self.assertEqual(len(simenv) - orig_len, 1)
+        del simenv.banan
+        self.assertEqual(len(simenv), orig_len)
+
+
+class _test_python_tab_complete(unittest.TestCase):
+    def gives(self, typed, expected):
+        for prefix in ('', '@'):
+            result = python_tab_complete(prefix + typed, prefix == '')
+            self.assertEqual(set(result), set(prefix + s for s in expected))
+
+    def test_keywords(self):
+        self.gives('whil', ['while'])
+
+    def test_builtin_functions(self):
+        self.gives('copyri', ['copyright', 'copyright(', 'copyright.'])
+        self.gives('copyright', ['copyright', 'copyright(', 'copyright.'])
+
+    def test_builtin_types(self):
+        pass
+
+    def test_builtin_constants(self):
+        self.gives('Tru', ['True', 'True.'])
+
+    def test_hierarchical(self):
+        import __main__, math
+        __main__.math = math
+        self.gives('math.pi', ['math.pi.'])
+        self.gives('math.asin', ['math.asin', 'math.asin(', 'math.asinh'])
+
+    def test_arrays(self):
+        import __main__
+        __main__.unittest_array = []
+        __main__.unittest_dict = {}
+        self.gives('unittest_arr', ['unittest_array',
+                                    'unittest_array.', 'unittest_array['])
+        self.gives('unittest_array', ['unittest_array.', 'unittest_array['])
+        self.gives('unittest_dict', ['unittest_dict.',
+                                     'unittest_dict['])
+
+    def test_empty_arrays(self):
+        import __main__
+        __main__.unittest_array = []
+        __main__.unittest_dict = {}
+        result = python_tab_complete("@unittest_array.", True)
+        self.assertGreater(len(result), 0)
+        result = python_tab_complete("@unittest_dict.", True)
+        self.assertGreater(len(result), 0)
+
+    def test_numbers(self):
+        import __main__
+        __main__.unittest_number = 3.14
+        self.gives('unittest_numb', ['unittest_number', 'unittest_number.'])
+        self.gives('unittest_number', ['unittest_number.'])
+
+
+class _test_stack_frame_limit(unittest.TestCase):
+    def test_stack_frame_limit(self):
+        def fun2():
+            frame = inspect.currentframe()
+            try:
+                limit, stop = stack_frame_limit(frame)
+                stack = "".join(traceback.format_stack(frame, limit))
+            finally:
+                del frame
+            self.assertTrue(stop)
+            self.assertTrue('fun2' in stack)
+            self.assertFalse('fun1' in stack)
+        @stop_traceback
+        def fun1():
+            fun2()
+        fun1()
+
+        @stop_traceback
+        def fun0():
+            frame = inspect.currentframe()
+            try:
+                limit, stop = stack_frame_limit(frame)
+                stack = "".join(traceback.format_stack(frame, limit))
+            finally:
+                del frame
+            self.assertTrue(stop)
+            self.assertTrue('fun0' in stack)
+            self.assertFalse('test_stack_frame_limit' in stack)
+        fun0()
+
+        self.assertTrue(stack_frame_limit(None) == (0, False))
+
+
+class _test_print_columns(unittest.TestCase):
+    def t(self, expect, *args, **kwargs):
+        ofile = StringIO()
+        print_columns(outfile = ofile, *args, **kwargs)
+        self.assertEqual(ofile.getvalue(), expect)
+
+    def test_empty(self):
+        self.t('', [], [])
+        self.t('', [], [], has_title = False)
+        for n in range(3):
+            self.t('', [Just_Left] * n, [])
+            self.t('', 'l' * n, [])
+            self.t('', [Just_Left] * n, [ [ 'title' ] * n ])
+
+    def test_one(self):
+        for t in False, True:
+            prefix = 'Title\n-----\n' if t else ''
+            title =  ['Title'] if t else []
+            self.t(prefix + 'a\n',    [Just_Left], title + ['a'],
+                   has_title = t)
+            self.t(prefix + '4711\n', [Just_Left], title + [[4711]],
+                   has_title = t)
+            self.t(prefix + 'a\n',    [Just_Left], title + [['a']],
+                   has_title = t)
+
+    def test_two(self):
+        self.t('T | T\n--+--\nx | y\n',     [ Just_Left ],
+               [ [ 'T' ], 'x', 'y' ])
+        self.t('T   | T\n----+--\napa | y\n', [ Just_Left ],
+               [ [ 'T' ], [ 'apa' ], [ 'y' ] ])
+
+        s50 = 'x' * 50
+        s10 = 'y' * 10
+        self.t(s50 + ' | ' + s10 + '\n',
+               [ Just_Left ], [ s50, s10 ], has_title = False)
+        self.t(s50 + '\nextra\n' + s10 + '\n',
+               'l', [ [ s50, 'extra' ], s10 ], has_title = False)
+
+
+class _test_print_wrap_code_line(unittest.TestCase):
+    def gives(self, code, width, indent, expect):
+        result = ['']
+        def output(str):
+            result[0] += str
+        print_wrap_code_line(code, width, output = output,
+                                continuation_indent = indent)
+        self.assertEqual(result[0], expect + '\n')
+
+    def test_nowrap(self):
+        self.gives('test ing this', 40, 'indent', 'test ing this')
+        self.gives('     ing this', 40, 'indent', '     ing this')
+        self.gives('test   ing   this', 40, 'indent', 'test   ing   this')
+        self.gives('test ing this', 13, 'indent', 'test ing this')
+        self.gives('     ing this', 13, 'indent', '     ing this')
+        self.gives('test ing this        ', 13, 'indent', 'test ing this')
+        self.gives('test ing       this', 19, 'indent',
+                   'test ing       this')
+
+    def test_wrap(self):
+        self.gives('test ing this', 12, 'INDENT', 'test ing\nINDENTthis')
+        self.gives('test ing this', 2, 'INDENT', 'test ing\nINDENTthis')
+        self.gives('test ing this', 2, 'X', 'test\nXing\nXthis')
+        self.gives('test ing this', 0, 'INDENT', 'test ing\nINDENTthis')
+        self.gives('test ing this', 0, 'X', 'test\nXing\nXthis')
+
+        self.gives('abc de fg hij kl mn op', 6, 'I',
+                   'abc de\nIfg\nIhij\nIkl mn\nIop')
+
+        self.gives('abcdefghi abcdefghi abcdefghi', 1, '12345678',
+                   'abcdefghi\n12345678abcdefghi\n12345678abcdefghi')
+
+        self.gives('a bc  a bc def ghij klmno', 6, 'XX',
+                   'a bc\nXXa bc\nXXdef\nXXghij\nXXklmno')
+
+    def test_indented(self):
+        self.gives('    test ing this', 12, 'INDENT',
+                   '    test ing\n    INDENTthis')
+
+    def test_empty(self):
+        self.gives('', 40, 'INDENT', '')
+        self.gives('', 0, 'INDENT', '')
+
+        self.gives('          ', 40, 'INDENT', '')
+        self.gives('          ', 0, 'INDENT', '')
+
+
+class _test_wrap_code(unittest.TestCase):
+    def gives(self, code, width, indent, expect):
+        result = ['']
+        def output(str):
+            result[0] += str
+        print_wrap_code(code, width, output = output,
+                        continuation_indent = indent)
+        self.assertEqual(result[0], expect)
+
+    def test_nowrap(self):
+        self.gives('test ing this', 40, 'indent', 'test ing this\n')
+        self.gives('     ing this', 40, 'indent', '     ing this\n')
+        self.gives('test ing this', 13, 'indent', 'test ing this\n')
+        self.gives('     ing this', 13, 'indent', '     ing this\n')
+
+    def test_multiline(self):
+        self.gives('testing\nthis', 100, '   ', 'testing\nthis\n')
+        self.gives('testing this\nthing here', 100, '   ',
+                   'testing this\nthing here\n')
+
+        self.gives('test ing\nthis thing', 8, 'XX',
+                   'test ing\nthis\nXXthing\n')
+
+        self.gives('test ing    \n    this     thing', 10, 'XX',
+                   'test ing\n    this\n    XXthing\n')
+
+    def test_wrap_no_indent(self):
+        self.gives('test ing this', 8, '', 'test ing\nthis\n')
+        self.gives('test ing this', 7, '', 'test\ning\nthis\n')
+        self.gives('testing a b thing', 7, '',
+                   'testing\na b\nthing\n')
+
+    def test_wrap_indent(self):
+        self.gives('test ing this', 8, 'INDENT', 'test ing\nINDENTthis\n')
+        self.gives('test ing this', 7, 'INDENT', 'test ing\nINDENTthis\n')
+        self.gives('test ing this', 7, 'X', 'test\nXing\nXthis\n')
+        self.gives('testing a b thing', 7, 'IND',
+              'testing\nINDa b\nINDthing\n')
+
+    def test_zero_width(self):
+        self.gives('test ing this', 0, 'INDENT', 'test ing\nINDENTthis\n')
+        self.gives('test ing this', 0, 'X', 'test\nXing\nXthis\n')
+
+    def test_empty(self):
+        self.gives('', 40, 'INDENT', '')
+        self.gives('', 0, 'INDENT', '')
+
+        # a bit quirky, but...
+        self.gives('          ', 40, 'INDENT', '          \n')
+        self.gives('          ', 0, 'INDENT', '\n')
+
+
+class _test_class_function_mape(unittest.TestCase):
+    def setUp(self):
+        self.map = ClassFunctionMap()
+
+    def test_simple(self):
+        self.map.add('fooclass', 'funnyfun', get_last_loaded_module)
+        self.assertEqual(self.map.get('fooclass', 'funnyfun'),
+                         get_last_loaded_module)
+        self.assertEqual(self.map.get('fooclass', 'notfunnyfun'),
+                         None)
+
+
+class _test_common_prefix(unittest.TestCase):
+    def cp(self, strings, expected_prefix, ignore_case):
+        actual = common_prefix(strings, ignore_case)
+        if ignore_case:
+            self.assertEqual(actual.lower(), expected_prefix.lower())
+        else:
+            self.assertEqual(actual, expected_prefix)
+
+    def common_cases(self, ignore_case):
+        self.cp(["abcd", "xyz", "abcd"], "", ignore_case)
+        self.cp(["abcd", "acbd", "abcd"], "a", ignore_case)
+        self.cp(["abcd", "abcd", "abcd"], "abcd", ignore_case)
+        self.cp(["R2D2", "R2E2", "R2D3"], "R2", ignore_case)
+        self.cp([], "", ignore_case)
+        self.cp(["smurf"], "smurf", ignore_case)
+        self.cp(["xy", "xyz", "xyz"], "xy", ignore_case)
+        self.cp(["ab", "", "ab"], "", ignore_case)
+
+    def test_case_sensitive(self):
+        self.common_cases(False)
+        self.cp(["ABCD", "AbCD", "ABcd"], "A", False)
+        self.cp(["AbCD", "ABce", "aBcd"], "", False)
+        self.cp(["XYZ"], "XYZ", False)
+
+    def test_case_insensitive(self):
+        self.common_cases(True)
+        self.cp(["ABCD", "AbCD", "ABcd"], "abcd", True)
+        self.cp(["AbCD", "ABce", "aBcd"], "abc", True)
+        self.cp(["XYZ"], "xyz", True)
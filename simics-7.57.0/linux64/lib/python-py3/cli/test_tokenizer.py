@@ -0,0 +1,166 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the cli.tokenizer module
+
+import unittest
+from .errors import CliSyntaxError
+from simicsutils.internal import ensure_binary
+from . import impl
+from .tokenizer import (
+    address_token,
+    exp_token,
+    flag_token,
+    float_token,
+    int_token,
+    list_token,
+    parse_cli_string,
+    quoted_token,
+    repr_cli_string,
+    separator_token,
+    tokenize,
+    unquoted_token,
+)
+
+
+class _test_str_token(unittest.TestCase):
+    achars = 'A\n\033\177"\\'
+    lchars = achars + '\200\377B'
+    uchars = lchars + '\u0100\uffff\u1234'
+    def test_parse(self):
+        def ec(u):
+            # skip b'
+            return repr(u.encode('utf-8'))[2:-1]
+        self.assertEqual(parse_cli_string(repr(self.achars)[1:-1]),
+                         ensure_binary(self.achars))
+        self.assertEqual(parse_cli_string(ec(self.lchars)),
+                         self.lchars.encode('utf-8'))
+        self.assertEqual(parse_cli_string(ec(self.uchars)),
+                         self.uchars.encode('utf-8'))
+    def test_repr(self):
+        def t(s):
+            from ast import literal_eval
+            a = repr_cli_string(s)
+            self.assertEqual(type(a), str)
+            assert all(c >= ' ' and c <= '\x7f' for c in a)
+            a = literal_eval(a)
+            b = ensure_binary(str(s))
+            self.assertEqual([ord(x) for x in a], list(b))
+
+            a = repr_cli_string(s, show_unicode = True)
+            self.assertTrue(isinstance(a, impl.string_types))
+            a = literal_eval('u' + a)
+            self.assertEqual(a, s)
+        t(self.achars)
+        t(self.lchars)
+        t(self.uchars)
+    def test_self(self):
+        for u in (False, True):
+            self.assertEqual(
+                parse_cli_string(repr_cli_string(self.achars, u)[1:-1]),
+                ensure_binary(self.achars))
+            self.assertEqual(
+                parse_cli_string(repr_cli_string(self.lchars, u)[1:-1]),
+                self.lchars.encode('utf-8'))
+            self.assertEqual(
+                parse_cli_string(repr_cli_string(self.uchars, u)[1:-1]),
+                self.uchars.encode('utf-8'))
+    def test_error(self):
+        for s in [ '\\x01', '\\u0123' ]:
+            for l in range(1, len(s)):
+                for a in [ s[:l], s[:l] + 'Q' ]:
+                    self.assertRaises(CliSyntaxError, parse_cli_string, a)
+
+
+class _test_tokenize(unittest.TestCase):
+    def test_tokenize(self):
+        def gives(s, t): self.assertEqual(tokenize(s), t)
+        gives('', [])
+        gives('abc 123 "xyz" 7.25 -f v:0x100',
+              [unquoted_token('abc'), int_token(123), quoted_token('xyz'),
+               float_token(7.25), flag_token('-f'), address_token('v'),
+               int_token(0x100)])
+        gives('a/b 3/b a-b 3-b a+b',
+              [unquoted_token('a/b'), int_token(3), unquoted_token('/'),
+               unquoted_token('b'), unquoted_token('a-b'), int_token(3),
+               unquoted_token('-'), unquoted_token('b'), unquoted_token('a'),
+               unquoted_token('+'), unquoted_token('b')])
+        gives('a(b)c',
+              [unquoted_token('a'), exp_token([unquoted_token('b')]),
+               unquoted_token('c')])
+        gives('@ x + y ', [unquoted_token('@'), unquoted_token('x + y\n')])
+        gives('! x + y ', [unquoted_token('!'), unquoted_token('x + y')])
+        gives('a;b\nc',
+              [unquoted_token('a'), separator_token(), unquoted_token('b'),
+               unquoted_token('c')])
+        gives('$var == 1',
+              [unquoted_token('$'), unquoted_token('var'),
+               unquoted_token('=='), int_token(1)])
+        gives('$var = 1', [unquoted_token('$var'), unquoted_token('='),
+                           int_token(1)])
+        gives('local $var = 1', [unquoted_token('$$var'),
+                                 unquoted_token('='), int_token(1)])
+        gives('%reg == 1',
+              [unquoted_token('%'), unquoted_token('reg'),
+               unquoted_token('=='), int_token(1)])
+        gives('%reg = 1', [unquoted_token('%reg'), unquoted_token('='),
+                           int_token(1)])
+        gives('%reg-4',
+              [unquoted_token('%'), unquoted_token('reg'),
+               unquoted_token('-'), int_token(4)])
+        gives('v: ds: :', [address_token('v'), address_token('ds'),
+                           unquoted_token(':')])
+        gives('"x / y\\nz"', [quoted_token('x / y\nz')])
+        gives('`x / y`', [exp_token([unquoted_token('python'),
+                                     unquoted_token('x / y')])])
+        gives('a_b.c-d', [unquoted_token('a_b.c-d')])
+        gives('1.25', [float_token(1.25)])
+        gives('1.', [float_token(1.0)])
+        gives('1.a', [unquoted_token('1.a')])
+        gives('1.5e3', [float_token(1.5e3)])
+        gives('1.e3', [float_token(1.e3)])
+        gives('1.2.3', [unquoted_token('1.2.3')])
+        gives('1.2.3.4', [unquoted_token('1.2.3.4')])
+        gives('a.b.c.d', [unquoted_token('a.b.c.d')])
+        gives('$foo[1]', [unquoted_token('$foo'), unquoted_token('['),
+                          exp_token([int_token(1)])])
+        gives('$foo [1]', [unquoted_token('$'), unquoted_token('foo'),
+                           list_token([exp_token([int_token(1)])])])
+        gives('$a.$b.$c.$d', [unquoted_token('$'), unquoted_token('a'),
+                              unquoted_token('.'),
+                              unquoted_token('$'), unquoted_token('b'),
+                              unquoted_token('.'),
+                              unquoted_token('$'), unquoted_token('c'),
+                              unquoted_token('.'),
+                              unquoted_token('$'), unquoted_token('d')])
+        gives('$a.$b.c', [unquoted_token('$'), unquoted_token('a'),
+                          unquoted_token('.'),
+                          unquoted_token('$'), unquoted_token('b'),
+                          unquoted_token('.c')])
+        gives('[\n]', [list_token([])])
+        # bug 13707
+        gives('x $y -z', [unquoted_token('x'), unquoted_token('$'),
+                          unquoted_token('y'), flag_token('-z')])
+        # bug 13707 related
+        gives('x %y -z', [unquoted_token('x'), unquoted_token('%'),
+                          unquoted_token('y'), flag_token('-z')])
+        gives('x==y=z+=y+z',
+              [unquoted_token('x'), unquoted_token('=='), unquoted_token('y'),
+               unquoted_token('='),
+               unquoted_token('z'), unquoted_token('+='), unquoted_token('y'),
+               unquoted_token('+'), unquoted_token('z')])
+        # some tests checking special "help"/"h" handling done by tokenizer:
+        gives('h #', [unquoted_token('h'), unquoted_token('#')])
+        gives('help #', [unquoted_token('help'), unquoted_token('#')])
+        gives('help !', [unquoted_token('help'), unquoted_token('!')])
+        gives('help !=', [unquoted_token('help'), unquoted_token('!=')])
+        gives('$h #', [unquoted_token('$'), unquoted_token('h')])
+        gives('$help #=', [unquoted_token('$'), unquoted_token('help')])
@@ -11,6 +11,7 @@
 
 
 import sys
+import time
 import cli
 import table
 import cmputil
@@ -443,9 +444,27 @@ def find_or_create_default_cell():
         default_cell.default_cell = True
         return (default_cell, True)
 
-# return all queues in component
-def queues_in_component(c):
-    if c.instantiated:
+# Objects grouped on their component attribute, collected on first use.
+# Used to find the objects of many instantiated components without scanning
+# all objects for each component.
+class _ObjectsByComponent:
+    def __init__(self, all_objects):
+        self._all_objects = all_objects
+        self._index = None
+
+    def get(self, c):
+        if self._index is None:
+            self._index = dict()
+            for o in self._all_objects():
+                self._index.setdefault(o.component, []).append(o)
+        return self._index.get(c, [])
+
+# return all queues in component, using the optional _ObjectsByComponent
+# index for instantiated components
+def queues_in_component(c, index = None):
+    if c.instantiated and index is not None:
+        queues = index.get(c)
+    elif c.instantiated:
         queues = [o for o in objects_implementing_iface('cycle')
                   if o.component == c]
     else:
@@ -456,8 +475,10 @@ def queues_in_component(c):
     return sorted(queues, key = sort_by_name)
 
 # return all cells in component
-def cells_in_component(c):
-    if c.instantiated:
+def cells_in_component(c, index = None):
+    if c.instantiated and index is not None:
+        cells = index.get(c)
+    elif c.instantiated:
         cells = [o for o in SIM_object_iterator_for_class("cell")
                  if o.component == c]
     else:
@@ -468,8 +489,10 @@ def cells_in_component(c):
     return sorted(cells, key = sort_by_name)
 
 # return all recorders in component
-def recorders_in_component(c):
-    if c.instantiated:
+def recorders_in_component(c, index = None):
+    if c.instantiated and index is not None:
+        recorders = index.get(c)
+    elif c.instantiated:
         recorders = [o for o in SIM_object_iterator_for_class("recorder")
                      if o.component == c]
     else:
@@ -490,7 +513,9 @@ class _QueueAssigner:
         self.cgc = cg.cache
         self.seq = cg.topological_sequence()
         self._worked = False
-        self.queues = dict((c, queues_in_component(c)) for c in self.seq)
+        index = _ObjectsByComponent(lambda: objects_implementing_iface('cycle'))
+        self.queues = dict((c, queues_in_component(c, index))
+                           for c in self.seq)
         self._created_objs = dict()
         self.default_cell = None
 
@@ -502,7 +527,7 @@ class _QueueAssigner:
             c.component_queue = queue
         # setting the queue could fail silently if there is a custom getter
         # for the component_queue attribute which returns None
-        self._worked = queue_of_comp(c) == queue
+        self._worked |= queue_of_comp(c) == queue
 
     # assign queues to pre-objects without an assigned queue
     def _set_pre_obj_queues(self, c):
@@ -524,6 +549,28 @@ class _QueueAssigner:
                 # do not touch conf objects since this will not work anyway
                 pass
 
+    # Propagate queue depth-first from comp to the components returned by
+    # children(c), recursively. The children are evaluated lazily, so that
+    # components which got a queue earlier in the traversal are skipped.
+    # enter(c) is called when c has been assigned the queue, before its
+    # children are visited, and leave(c) after they have been visited. An
+    # explicit stack is used since component chains can be deeper than the
+    # Python recursion limit.
+    def _propagate(self, comp, queue, children, enter = None, leave = None):
+        stack = [(comp, iter(children(comp)))]
+        while stack:
+            (c, it) = stack[-1]
+            for n in it:
+                self._assign(n, queue)
+                if enter:
+                    enter(n, queue)
+                stack.append((n, iter(children(n))))
+                break
+            else:
+                stack.pop()
+                if leave and stack:
+                    leave(c, queue)
+
     # propagate queue upwards using object hierarchy
     def _propagate_hier_up(self, comp, queue):
         while comp.component and not queue_of_comp(comp.component):
@@ -532,49 +579,47 @@ class _QueueAssigner:
 
     # propagate queue downwards using object hierarchy
     def _propagate_hier_down(self, comp, queue):
-        downs = (c for c in self.cgc.down(comp)
-                 if c.component == comp and not queue_of_comp(c))
-        for c in downs:
-            self._assign(c, queue)
-            self._propagate_hier_down(c, queue)
+        def downs(comp):
+            return (c for c in self.cgc.down(comp)
+                    if c.component == comp and not queue_of_comp(c))
+        self._propagate(comp, queue, downs)
 
     # propagate queue upwards using (true) up connectors and hierarchy
     def _propagate_conn_up(self, comp, queue):
         # mixed up connectors are not considered here
-        ups = (c.component for c in self.cgc.connectors(comp)
-               if c.iface.connector.direction() == Sim_Connector_Direction_Up
-               if not queue_of_comp(c.component))
-        for c in ups:
-            self._assign(c, queue)
+        def ups(comp):
+            return (c.component for c in self.cgc.connectors(comp)
+                    if (c.iface.connector.direction()
+                        == Sim_Connector_Direction_Up)
+                    if not queue_of_comp(c.component))
+        def enter(c, queue):
             self._propagate_hier_up(c, queue)
             self._propagate_hier_down(c, queue)
-            self._propagate_conn_up(c, queue)
+        self._propagate(comp, queue, ups, enter = enter)
 
     # propagate queues upwards using all up connections and hierarchy
     def _propagate_up(self, comp, queue):
-        ups = (c for c in self.cgc.up(comp) if not queue_of_comp(c))
-        for c in ups:
-            self._assign(c, queue)
-            self._propagate_up(c, queue)
+        def ups(comp):
+            return (c for c in self.cgc.up(comp) if not queue_of_comp(c))
+        self._propagate(comp, queue, ups)
 
     # propagate queue downwards using (true) down connectors and hierarchy
     def _propagate_conn_down(self, comp, queue):
-        downs = (c.component for c in self.cgc.connectors(comp)
-                 if (c.iface.connector.direction()
-                     == Sim_Connector_Direction_Down)
-                 if not queue_of_comp(c.component))
-        for c in downs:
-            self._assign(c, queue)
-            self._propagate_conn_down(c, queue)
+        def downs(comp):
+            return (c.component for c in self.cgc.connectors(comp)
+                    if (c.iface.connector.direction()
+                        == Sim_Connector_Direction_Down)
+                    if not queue_of_comp(c.component))
+        def leave(c, queue):
             self._propagate_hier_up(c, queue)
             self._propagate_hier_down(c, queue)
+        self._propagate(comp, queue, downs, leave = leave)
 
     # propagate queue downwards using down connectors and hierarchy
     def _propagate_down(self, comp, queue):
-        downs = (c for c in self.cgc.down(comp) if not queue_of_comp(c))
-        for c in downs:
-            self._assign(c, queue)
-            self._propagate_down(c, queue)
+        def downs(comp):
+            return (c for c in self.cgc.down(comp) if not queue_of_comp(c))
+        self._propagate(comp, queue, downs)
 
     # assign fallback queue to disconnected objects without up connectors
     def _assign_default_queues(self):
@@ -643,13 +688,19 @@ class _QueueAssigner:
         return []
 
     def _assign_queues_to_cells(self):
-        cells = dict((c, cells_in_component(c)) for c in self.seq)
+        index = _ObjectsByComponent(
+            lambda: SIM_object_iterator_for_class("cell"))
+        cells = dict((c, cells_in_component(c, index)) for c in self.seq)
+        found = dict()  # comp -> cell, to only look up each component once
         def lookup_cell(comp):
             if cells[comp]:
                 return cells[comp][0]
+            if comp in found:
+                return found[comp]
             for c in self.cgc.up(comp):
                 cell = lookup_cell(c)
                 if cell:
+                    found[comp] = cell
                     return cell
             # use default cell
             if self.default_cell:
@@ -690,8 +741,10 @@ class _QueueAssigner:
                         # ignore (manually created) recorders without queue
                         return r.queue.cell if r.queue else None
                     return r.queue.cell
+                index = _ObjectsByComponent(
+                    lambda: SIM_object_iterator_for_class("recorder"))
                 for comp in self.seq:
-                    for r in recorders_in_component(comp):
+                    for r in recorders_in_component(comp, index):
                         cellmap.setdefault(get_recorder_cell(r), r)
 
             for m in missing:
@@ -753,6 +806,9 @@ def instantiate_cmd(verbose, cmps):
 
 # assign top component field for all components
 def assign_top_component(cg):
+    # the components attribute of each top component is only set once,
+    # since setting it once per component is quadratic
+    added = dict()
     for c in cg.topological_sequence():
         # already set?
         if c.top_component:
@@ -760,7 +816,9 @@ def assign_top_component(cg):
         r = cg.component_root(c)
         if r.top_level:
             c.top_component = r
-            r.components += [c]
+            added.setdefault(r, []).append(c)
+    for (r, comps) in added.items():
+        r.components += comps
 
 # remove top_component references to the specified top component
 def remove_top_component(cg, top_component):
@@ -825,11 +883,40 @@ def components_to_instantiate(cmps):
 def _instantiate_log(msg):
     SIM_log_info(4, conf.sim, 0, "instantiate command: %s" % msg)
 
-def all_known_interfaces():
-    return set.union(*(set(VT_get_interfaces(c))
-                       for c in SIM_get_all_classes()))
+def any_class_implements(iface):
+    return any(iface in VT_get_interfaces(c) for c in SIM_get_all_classes())
+
+# Accumulated host time, in seconds, spent in each phase of the
+# instantiate-components command since Simics was started. Read by the
+# sim.instantiate_profile probe.
+instantiate_phase_times = dict()
+
+class _PhaseTimer:
+    def __init__(self):
+        self.phases = []
+        self.start = time.perf_counter()
+
+    # end the current phase, which started when the previous one ended
+    def done(self, phase):
+        now = time.perf_counter()
+        t = now - self.start
+        self.start = now
+        self.phases.append((phase, t))
+        instantiate_phase_times[phase] = (
+            instantiate_phase_times.get(phase, 0.0) + t)
+        _instantiate_log("%s done in %.3f s" % (phase, t))
+
+    def report(self):
+        total = sum(t for (_, t) in self.phases)
+        print("Instantiation time per phase:")
+        for (phase, t) in self.phases:
+            print("  %-24s %8.3f s  %5.1f%%"
+                  % (phase, t, 100 * t / total if total else 0))
+        print("  %-24s %8.3f s" % ("total", total))
 
 def _instantiate_cmd(verbose, cmp_objs):
+    timer = _PhaseTimer()
+
     # obtain the ComponentGraph object describing the graph to instantiate
     cg = components_to_instantiate(cmp_objs)
     cgc = cg.cache
@@ -851,14 +938,17 @@ def _instantiate_cmd(verbose, cmp_objs):
     if not_ready:
         raise CliError("The %s component has empty required connectors"
                        % not_ready.name)
+    timer.done("component graph")
 
     # set top_component for all components in the component graph
     assign_top_component(cg)
+    timer.done("top components")
 
     # keep track of what happens to connections in the tree of components we
     # want to instantiate
     cf = _ConnectionFinalizer()
     cf.finalize(cgc, seq)
+    timer.done("connections")
 
     all_uninstantiated = [o for o in seq if not o.instantiated]
     _instantiate_log("components to instantiate: %r" % all_uninstantiated)
@@ -873,15 +963,19 @@ def _instantiate_cmd(verbose, cmp_objs):
     # Calling verify_and_name_slot_objects has the side effect of loading
     # all classes so we can query Simics about those later.
     objs = verify_and_name_slot_objects(all_uninstantiated)
+    timer.done("pre-instantiate")
 
     qa = _QueueAssigner(cg)
     qa.assign_queues()
+    timer.done("queues")
 
     # create cells
     qa.create_cells()
+    timer.done("cells")
 
     # assign/create recorders
     qa.assign_recorders()
+    timer.done("recorders")
 
     # keep track of new pre-objects to be instantiated
     objs.update(qa.created_objects())
@@ -898,12 +992,13 @@ def _instantiate_cmd(verbose, cmp_objs):
                     SIM_get_class(o.classname)
                     objs[o.name] = o
         c.pending_cell_object_factories = []
+    timer.done("object factories")
 
     #
     # Set component and component_slot attribute
     #
     _instantiate_log("setting component and component_slot")
-    if 'cycle' not in all_known_interfaces():
+    if not any_class_implements('cycle'):
         raise CliError("No cycle queues defined, cannot set configuration.")
 
     try:
@@ -922,6 +1017,7 @@ def _instantiate_cmd(verbose, cmp_objs):
         finally:
             # make sure errors in SIM_delete_objects do not hide the original
             raise CliError('Failed setting configuration: %s' % ex)
+    timer.done("create objects")
 
     try:
         for cmp_obj in sorted(all_uninstantiated, key=lambda o: o.name):
@@ -948,16 +1044,18 @@ def _instantiate_cmd(verbose, cmp_objs):
             # mark component instantiated
             cmp_obj.instantiated = True
             # trigger hap
+        timer.done("post-instantiate")
 
         # Find the top-component for all newly added components (the top may
         # not be included in "all". Also trigger hap for components without
         # any top-component
         all_tops = set((x.top_component for x in all_uninstantiated
                         if x.top_component))
+        instantiated_now = set(all_uninstantiated)
         for comp in all_tops:
             # Only report top level components that are instantiated in this
             # call, not ones from earlier instantiations.
-            if comp in all_uninstantiated:
+            if comp in instantiated_now:
                 # For now the top-component class is how we track platform usage
                 VT_add_telemetry_data("core.platform", "top_level_classes+",
                                       comp.classname)
@@ -967,6 +1065,7 @@ def _instantiate_cmd(verbose, cmp_objs):
         no_tops = [x for x in all_uninstantiated if not x.top_component]
         if no_tops:
             trigger_hier_change(None)
+        timer.done("hierarchy change")
 
     except Exception as ex:
         import traceback
@@ -977,17 +1076,24 @@ def _instantiate_cmd(verbose, cmp_objs):
 
     # finalize now the delayed connections that we left for after instantiation
     cf.finalize_delayed_connections()
+    timer.done("delayed connections")
 
     VT_add_telemetry_data_int("core.platform", "num-components&",
                               len(all_uninstantiated))
 
-    # Friendly warning about components not instantiated
-    left = [x for x in objects_implementing_iface('component')
-            if not x.instantiated]
-    _instantiate_log("not instantiated components: %r" % left)
+    # Friendly warning about components not instantiated, only looked for
+    # when it will be shown
+    if verbose or SIM_log_level(conf.sim) >= 4:
+        left = [x for x in objects_implementing_iface('component')
+                if not x.instantiated]
+        _instantiate_log("not instantiated components: %r" % left)
+        if verbose:
+            for l in left:
+                print("Component not instantiated: %s" % l.name)
+        timer.done("not instantiated")
+
     if verbose:
-        for l in left:
-            print("Component not instantiated: %s" % l.name)
+        timer.report()
 
 def component_list(component, comp_class, top_only, all_flag, recursive):
     cmps = visible_objects(iface = 'component', all = all_flag,
@@ -140,7 +140,10 @@ class ComponentGraphCache:
         self._up_set = dict()    # comp -> {up_comp1, up_comp2, ...}
         # has required connectors
         self._ready = dict()     # comp -> bool
-        self._connectors = dict() # comp-> {cnt1, cnt2, ...}
+        self._connectors = dict() # comp-> (cnt1, cnt2, ...), sorted
+        # connectors and sub-components of all components, collected once
+        # so that caching a node does not scan all objects
+        self._children = None    # comp -> ([cnt1, ...], [sub_comp1, ...])
 
     # return component reached by following connector in specified direction
     def _follow_connector(self, src_cnt, d):
@@ -168,12 +171,8 @@ class ComponentGraphCache:
         self._ready[obj] = True
         connectors = set()
 
-        def obj_impl(iface):
-            return [o for o in
-                    simics.SIM_object_iterator_for_interface([iface])
-                    if o.component == obj]
-
-        for o in obj_impl("connector"):
+        (cnts, comps) = self._children_of(obj)
+        for o in cnts:
             connectors.add(o)
             if (o.iface.connector.required() and not
                 o.iface.connector.destination()):
@@ -181,19 +180,28 @@ class ComponentGraphCache:
             down.update(self._follow_connector_down(o))
             up.update(self._follow_connector_up(o))
 
-        for o in obj_impl("component"):
-            down.add(o)
+        down.update(comps)
 
         # keep sorted list to ensure determinism
-        self._connectors[obj] = connectors
+        self._connectors[obj] = tuple(sorted(connectors))
         self._up_set[obj] = up
         self._down_set[obj] = down
         self._up[obj] = list(sorted(up))
         self._down[obj] = list(sorted(down))
 
+    # return the connectors and sub-components of obj
+    def _children_of(self, obj):
+        if self._children is None:
+            children = dict()
+            for (i, iface) in enumerate(("connector", "component")):
+                for o in simics.SIM_object_iterator_for_interface([iface]):
+                    children.setdefault(o.component, ([], []))[i].append(o)
+            self._children = children
+        return self._children.get(obj, ((), ()))
+
     def connectors(self, comp):
         self._cache_node(comp)
-        return list(sorted(self._connectors[comp]))
+        return list(self._connectors[comp])
 
     # return all components (as a sorted list) reached by following
     # "up" connectors and object hierarchy (e.g. viper.mb -> viper)
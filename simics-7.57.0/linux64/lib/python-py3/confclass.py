@@ -12,7 +12,7 @@
 
 # Implementation of simics.confclass (a Python API for creating Simics classes)
 
-import cli, simics, collections, traceback
+import cli, simics, collections, traceback, types
 import pyclass_common
 
 def _wrap(f):
@@ -21,6 +21,11 @@ def _wrap(f):
             return f(simics.SIM_object_data(obj), *args)
         return wrap
 
+def _bind(f):
+    # Direct dispatch version of _wrap, for interface methods
+    return pyclass_common.bound_interface_method(
+        lambda obj: types.MethodType(f, simics.SIM_object_data(obj)))
+
 class _InterfaceMethod:
     __slots__ = ('_name', '_d')
     def __init__(self, d, name):
@@ -56,14 +61,15 @@ class _Interface:
             self._methods[k] = f
         self._methods.update(kwd)
 
-    def _register(self, cls, key):
+    def _register(self, cls, key, direct_dispatch = False):
         (iface, port) = key
         m = self._methods
         itype = simics.SIM_get_python_interface_type(iface)
         if not itype:
             raise TypeError("Interface %s is not available in Python"
                             % iface)
-        methods = itype(**{k: _wrap(m[k]) for k in m})
+        wrap = _bind if direct_dispatch else _wrap
+        methods = itype(**{k: wrap(m[k]) for k in m})
         if port:
             simics.SIM_register_port_interface(cls, iface, methods, port, None)
         else:
@@ -410,6 +416,12 @@ class confclass:
             kind = simics.Sim_Class_Kind_Pseudo
         self._class_kind = kind
 
+        # Bind interface methods to the Python object on the first call,
+        # instead of looking up the object data on each call. Inherited
+        # by port objects.
+        if 'direct_dispatch' in kwd:
+            self._config["direct_dispatch"] = kwd.pop('direct_dispatch')
+
         if 'doc' in kwd:
             self.doc = kwd.pop('doc')
         if 'short_doc' in kwd:
@@ -423,6 +435,11 @@ class confclass:
     def __repr__(self):
         return "<confclass %s>" % self.classname
 
+    def _direct_dispatch(self):
+        if "direct_dispatch" in self._config:
+            return self._config["direct_dispatch"]
+        return self._opar is not None and self._opar._direct_dispatch()
+
     def _objs_sharing_object_data(self):
         """Returns all confclass:es that share object_data."""
         parent_obj = self._opar if (self._opar is not None) else self
@@ -598,7 +615,7 @@ class confclass:
         for (cmd_name, cmd_obj) in self._command.items():
             cmd_obj._register(ccls, cmd_name)
         for (k, i) in self._iface.items():
-            i._register(ccls, k)
+            i._register(ccls, k, self._direct_dispatch())
 
         # Register class extensions
         for ext in self._extension:
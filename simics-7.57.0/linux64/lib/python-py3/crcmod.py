@@ -46,7 +46,7 @@ except ImportError:
     import _crcfunpy as _crcfun
     _usingExtension = False
 
-import sys, struct
+import binascii, functools, sys, struct, zlib
 
 #-----------------------------------------------------------------------------
 class Crc(object):
@@ -317,16 +317,32 @@ def _bytecrc_r(crc, poly, n):
 # have been checked for validity by the caller.
 
 def _mkTable(poly, n):
-    mask = (1<<n) - 1
-    poly = int(poly) & mask
-    table = [_bytecrc(int(i)<<(n-8),poly,n) for i in range(256)]
-    return table
+    return list(_mkTables(int(poly), n, False)[0])
 
 def _mkTable_r(poly, n):
+    return list(_mkTables(int(poly), n, True)[0])
+
+#-----------------------------------------------------------------------------
+# Compute the eight tables used by the slicing-by-8 functions, where table k
+# holds the CRC of each byte followed by k zero bytes.  Table 0 is the
+# ordinary table.  The tables are cached, since they are the same for all
+# functions using the same polynomial.
+
+@functools.lru_cache(maxsize=None)
+def _mkTables(poly, n, rev):
     mask = (1<<n) - 1
-    poly = _bitrev(int(poly) & mask, n)
-    table = [_bytecrc_r(int(i),poly,n) for i in range(256)]
-    return table
+    if rev:
+        poly = _bitrev(poly & mask, n)
+        t = tuple(_bytecrc_r(i,poly,n) for i in range(256))
+        step = lambda crc: t[crc & 0xFF] ^ (crc >> 8)
+    else:
+        poly = poly & mask
+        t = tuple(_bytecrc(i<<(n-8),poly,n) for i in range(256))
+        step = lambda crc: t[crc >> (n-8)] ^ ((crc << 8) & mask)
+    tables = [t]
+    for k in range(7):
+        tables.append(tuple(step(crc) for crc in tables[-1]))
+    return tuple(tables)
 
 #-----------------------------------------------------------------------------
 # Map the CRC size onto the functions that handle these sizes.
@@ -360,6 +376,32 @@ del typeCode, size
 # used.  In addition to this function, the size of the CRC, the initial CRC,
 # and a list containing the CRC table are returned.
 
+#
+# The standard CRC-32 and the CRC-CCITT (XModem) polynomials are computed by
+# zlib and binascii respectively.  Without the extension module, the other
+# polynomials are computed eight bytes at a time, except for the 8-bit and
+# bit reversed 16-bit CRCs where the byte at a time Python functions are
+# faster, as shown by _benchmark.
+
+def _zlibCrc32(data, crc):
+    return ~zlib.crc32(data, ~crc & 0xFFFFFFFF) & 0xFFFFFFFF
+
+def _binasciiCrcHqx(data, crc):
+    return binascii.crc_hqx(data, crc & 0xFFFF)
+
+# zlib, binascii and the sliced functions need a buffer, while the byte at
+# a time functions take any sequence of integers, such as the tuples
+# returned by Simics memory reads.
+def _asBuffer(data):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    return bytes(data)
+
+_nativeFuns = {
+    (0x04C11DB7, 32, True) : _zlibCrc32,
+    (0x1021, 16, False) : _binasciiCrcHqx,
+}
+
 def _mkCrcFun(poly, initCrc, rev):
     size = _verifyPoly(poly)
 
@@ -370,19 +412,26 @@ def _mkCrcFun(poly, initCrc, rev):
         initCrc = int(initCrc)
 
     if size in [8, 16, 32, 64]:
-        if rev:
-            tableList = _mkTable_r(poly, size)
-            _fun = _sizeMap[size][1]
-        else:
-            tableList = _mkTable(poly, size)
-            _fun = _sizeMap[size][0]
-
-        _table = tableList
-        if _usingExtension:
+        tables = _mkTables(int(poly), size, bool(rev))
+        tableList = list(tables[0])
+        native = _nativeFuns.get((int(poly) & mask, size, bool(rev)))
+        if native:
+            def crcfun(data, crc=initCrc, fun=native):
+                return fun(_asBuffer(data), crc)
+        elif _usingExtension:
+            _fun = _sizeMap[size][1 if rev else 0]
             _table = struct.pack(_sizeToTypeCode[size], *tableList)
-
-        def crcfun(data, crc=initCrc, table=_table, fun=_fun):
-            return fun(data, crc, table)
+            def crcfun(data, crc=initCrc, table=_table, fun=_fun):
+                return fun(data, crc, table)
+        elif size > 16 or (size == 16 and not rev):
+            _fun = _crcfun._crcSliced_r if rev else _crcfun._crcSliced
+            def crcfun(data, crc=initCrc, tables=tables, fun=_fun,
+                       width=size):
+                return fun(_asBuffer(data), crc, tables, width)
+        else:
+            _fun = _sizeMap[size][1 if rev else 0]
+            def crcfun(data, crc=initCrc, table=tableList, fun=_fun):
+                return fun(data, crc, table)
     else:
         # Fall back on generic function
         assert not rev # TODO: implement bit-reversal
@@ -406,6 +455,36 @@ def _mkCrcFun(poly, initCrc, rev):
 
     return crcfun, size, initCrc, tableList
 
+#-----------------------------------------------------------------------------
+# Print the throughput of the CRC functions for some common polynomials of
+# each size, comparing the byte at a time Python functions with the ones
+# returned by mkCrcFun.
+
+def _benchmark(size=1<<20):
+    import os, time
+    data = os.urandom(size)
+    def rate(fun, *args):
+        best = None
+        for i in range(3):
+            t = time.perf_counter()
+            fun(data, *args)
+            t = time.perf_counter() - t
+            best = t if best is None else min(best, t)
+        return size / max(best, 1e-9) / 1e6
+    polys = [('CRC-8', 0x107), ('CRC-16', 0x18005), ('CRC-CCITT', 0x11021),
+             ('CRC-32', 0x104C11DB7), ('CRC-32C', 0x11EDC6F41),
+             ('CRC-64', 0x1000000000000001B)]
+    print('%-10s %-5s %12s %12s' % ('poly', 'rev', 'byte MB/s',
+                                    'mkCrcFun MB/s'))
+    for (name, poly) in polys:
+        for rev in (True, False):
+            n = _verifyPoly(poly)
+            table = list(_mkTables(poly, n, rev)[0])
+            byte = _sizeMap[n][1 if rev else 0]
+            print('%-10s %-5s %12.1f %12.1f' % (
+                name, rev, rate(byte, 0, table),
+                rate(mkCrcFun(poly, rev=rev))))
+
 #-----------------------------------------------------------------------------
 _codeTemplate = '''// Automatically generated CRC function
 // %(poly)s
@@ -425,3 +504,11 @@ _codeTemplate = '''// Automatically generated CRC function
 }
 '''
 
+# The unit tests live in test_crcmod.py, so that they are not compiled on
+# every Simics start. This hook lets unittest find them through this module.
+def load_tests(loader, tests, pattern):
+    import test_crcmod
+    return loader.loadTestsFromModule(test_crcmod)
+
+if __name__ == '__main__':
+    _benchmark()
@@ -447,3 +447,107 @@ The command is not supported and may change at any time with notification.
 The optional <arg>verbosity</arg> parameter can sometimes be used to show
 additional debug information. Output from the command contains information when
 and how the parameter can be useful.""")
+
+#
+# -------------------- python-import-profile --------------------
+#
+
+def parse_import_times(lines):
+    '''Parse the output of Python's "-X importtime" option, returning a
+    list of (module, self time, cumulative time), with times in
+    microseconds, in the order the imports finished.'''
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            (self_us, cumulative_us) = (int(fields[0]), int(fields[1]))
+        except ValueError:
+            continue             # the header line
+        imports.append((fields[2].strip(), self_us, cumulative_us))
+    return imports
+
+def is_python_py3_module(name):
+    '''Tell if the module name is found in the Simics Python library
+    directory, i.e. the directory of this file.'''
+    base = os.path.join(os.path.dirname(__file__), *name.split("."))
+    return any(os.path.isfile(f) for f in (base + ".py", base + ".pyc",
+                                           os.path.join(base, "__init__.py")))
+
+def run_simics_import_profile():
+    import subprocess
+    import simicsutils.internal
+    from simicsutils.host import is_windows
+    launcher = os.path.join(simicsutils.internal.simics_base(), "bin",
+                            "simics.bat" if is_windows() else "simics")
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME="1")
+    try:
+        p = subprocess.run([launcher, "-batch-mode", "-no-settings"],
+                           env=env, stdin=subprocess.DEVNULL,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                           text=True, errors="replace")
+    except OSError as e:
+        raise cli.CliError(f"Failed running {launcher}: {e}")
+    return p.stderr.splitlines()
+
+def python_import_profile_cmd(log_file, maxmods, all_modules):
+    if log_file:
+        try:
+            with open(log_file, encoding="utf-8", errors="replace") as f:
+                imports = parse_import_times(f)
+        except OSError as e:
+            raise cli.CliError(f"Failed reading {log_file}: {e}")
+    else:
+        imports = parse_import_times(run_simics_import_profile())
+    if not imports:
+        raise cli.CliError("No import times found")
+
+    total = sum(s for (_, s, _) in imports)
+    lib = [(m, s, c) for (m, s, c) in imports if is_python_py3_module(m)]
+    shown = imports if all_modules else lib
+    max = maxmods if maxmods else None
+    shown = sorted(shown, key=lambda x: x[1], reverse=True)[:max]
+
+    names = ["Module", "Self (ms)", "Cumulative (ms)"]
+    if all_modules:
+        names.append("python-py3")
+    props = [(table.Table_Key_Columns,
+              [[(table.Column_Key_Name, n)] for n in names])]
+    data = [[m, s / 1000, c / 1000]
+            + ([is_python_py3_module(m)] if all_modules else [])
+            for (m, s, c) in shown]
+    tbl = table.Table(props, data)
+    msg = tbl.to_string(rows_printed=0, no_row_column=True)
+    msg += (f"\n{len(imports)} modules imported in {total / 1000:.1f} ms,"
+            f" {len(lib)} python-py3 modules in"
+            f" {sum(s for (_, s, _) in lib) / 1000:.1f} ms")
+    return cli.command_verbose_return(msg, data)
+
+cli.new_unsupported_command("python-import-profile", "internals",
+                        python_import_profile_cmd,
+                        args = [cli.arg(cli.filename_t(exist=True), "file",
+                                        "?", None),
+                                cli.arg(cli.int_t, "max", "?", 32),
+                                cli.arg(cli.flag_t, "-all")],
+                        type = ["Performance"],
+                        short = "show time spent importing Python modules",
+                        doc = """
+            Show which Python modules take the most time to import when
+            Simics starts, sorted on the time spent in each module itself,
+            not counting the modules it imports.
+
+            The import times are read from <arg>file</arg>, which should
+            contain the output of a Simics started with the
+            <tt>PYTHONPROFILEIMPORTTIME</tt> environment variable set, the
+            same as the <tt>-X importtime</tt> option of Python. Without
+            <arg>file</arg>, a new Simics in batch mode is started, and its
+            imports are profiled.
+
+            Only modules in the Simics Python library directory,
+            <file>lib/python-py3</file>, are listed unless the <tt>-all</tt>
+            flag is given. Limit the output using the <arg>max</arg>
+            argument, default is <tt>32</tt>, or use <tt>0</tt> to list all
+            modules.""")
@@ -10,7 +10,6 @@
 # implied warranties, other than those that are expressly stated in the License.
 
 import os
-import unittest
 import simics
 from functools import wraps
 from types import SimpleNamespace
@@ -297,48 +296,6 @@ class Bitfield_BE(Bitfield):
         Bitfield.__init__(self, fields, ones, little_endian=False,
                           bits=bits, **kwargs)
 
-class TestBitfield(unittest.TestCase):
-    def test_le(self):
-        bf = Bitfield_LE({'a': 0, 'b': (31, 24)}, ones=0x0f000f00)
-        self.assertEqual(bf.value(), 0x0f000f00)
-        # bits in 'ones' override explicitly given field values
-        self.assertEqual(bf.value(a=1, b=0xaa), 0xaf000f01)
-        with self.assertRaises(KeyError):
-            bf.value(c=0)
-        bf.value(b=255)
-        with self.assertRaises(RangeError):
-            bf.value(b=256)
-        bf.value(b=0)
-        with self.assertRaises(RangeError):
-            bf.value(b=-1)
-        # value from positional arg overrides bits not covered by explicit
-        # fields, but are overridden by bits in 'ones'.
-        self.assertEqual(bf.value(0x5555555555, b=0xaa), 0x55af555f55)
-
-    def test_be(self):
-        with self.assertRaises(AssertionError):
-            # missing 'bits'
-            Bitfield_BE({'a': 0, 'b': (24, 31)}, ones=0x00f000f0)
-        bf = Bitfield_BE({'a': 0, 'b': (24, 31)}, ones=0x00f000f0, bits=32)
-        self.assertEqual(bf.value(a=1, b=0xaa), 0x80f000fa)
-
-    def test_value_expansion(self):
-        bf = Bitfield_LE({'a[0][0]': (3, 0),
-                          'a[0][1]': (7, 4),
-                          'a[0][2]': (11, 8),
-                          'a[1][0]': (15, 12),
-                          'a[1][1]': (19, 16),
-                          'a[1][2]': (23, 20),
-                          'b.c':     (27, 24)})
-        self.assertEqual(bf.value(a={0: {0: 1, 2: 2},
-                                     1: {1: 3, 2: 4}}),
-                         0x0430201)
-        self.assertEqual(bf.value(a=[[1,2], [4,5,6]]),
-                         0x0654021)
-        self.assertEqual(bf.value(a=[{0: 1, 2: 2}, {1: 3, 2: 4}], b={'c': 5}),
-                         0x5430201)
-        self.assertEqual(bf.value(a={1: [4, 5]}),
-                         0x0054000)
 
 class LegacyField:
     '''Forward compatibility class for bank_regs-style access
@@ -542,107 +499,6 @@ class AbstractRegister:
         else:
             self.raw_write(val)
 
-class TestAbstractRegisterNonTuple(unittest.TestCase):
-    def testInvalidBitfield(self):
-        # Test that it is impossible to create a register with a bitfield name
-        # that clashes with internal variable names.
-        self.assertRaises(InvalidBitfieldException,
-                          AbstractRegister,
-                          size=4, bitfield=Bitfield_LE({'size' : 0}),
-                          little_endian=True)
-        # Test that it's impossible to create a register with a
-        # bitfield that doesn't fit in the register.
-        self.assertRaises(InvalidBitfieldException,
-                          AbstractRegister,
-                          size=4, bitfield=Bitfield_LE({'bad': 32}),
-                          little_endian=True)
-
-    class TestRegister(AbstractRegister):
-        tuple_based = False
-        writes = []
-        def raw_read(self):
-            return 0xdeadbeef
-        def raw_write(self, value):
-            self.writes.append(value)
-    def test_access(self):
-        def assert_and_pop(ls, value):
-            self.assertEqual(ls, value)
-            del ls[:]
-        self.assertEqual(self.TestRegister().read(), 0xdeadbeef)
-        self.TestRegister().write()
-        assert_and_pop(self.TestRegister.writes, [0xdeadbeef])
-        self.TestRegister().write(0x11223344)
-        assert_and_pop(self.TestRegister.writes, [0x11223344])
-        self.TestRegister(size=1).write()
-        assert_and_pop(self.TestRegister.writes, [0xef])
-        self.TestRegister(size=1).write(0x11223344)
-        assert_and_pop(self.TestRegister.writes, [0x44])
-        bf = Bitfield_LE({'a': 0, 'b': (31, 24)})
-        self.assertEqual(self.TestRegister(bitfield=bf).fields(),
-                         {'a': 1, 'b': 0xde})
-        self.TestRegister(bitfield=bf).write(a=0,b=0)
-        assert_and_pop(self.TestRegister.writes, [0xadbeee])
-        self.TestRegister(bitfield=bf).write(0xf0f0f0f0, a=1,b=0xcc)
-        assert_and_pop(self.TestRegister.writes, [0xccf0f0f1])
-        # convenience accessors
-        self.assertEqual(self.TestRegister(bitfield=bf).a, 1)
-        self.assertEqual(self.TestRegister(bitfield=bf).b, 0xde)
-        self.TestRegister(bitfield=bf).b = 0x11
-        assert_and_pop(self.TestRegister.writes, [0x11adbeef])
-        self.assertIn('a', dir(self.TestRegister(bitfield=bf)))
-        self.assertIn('b', dir(self.TestRegister(bitfield=bf)))
-
-        # bank_regs style read/write access works
-        farr = self.TestRegister(bitfield=Bitfield_LE(
-            {'a.b[0]': (7, 0), 'a.b[1]': (15, 8)}))
-        b0 = farr.field.a.b[0]
-        self.assertEqual(b0.read(), 0xef)
-        farr.write(READ, a={'b': [0x11, 0x22]})
-        self.assertEqual(self.TestRegister.writes, [0xdead2211])
-        del self.TestRegister.writes[:]
-        # bank_regs style val/set does not work
-        def nothing(x): pass
-        with self.assertRaises(AttributeError):
-            nothing(farr.set)
-        with self.assertRaises(AttributeError):
-            nothing(farr.val)
-        with self.assertRaises(AttributeError):
-            farr.val = 0
-        with self.assertRaises(Error):
-            farr.write(VAL)
-        with self.assertRaises(AttributeError):
-            nothing(b0.val)
-        with self.assertRaises(AttributeError):
-            b0.val = 0
-        with self.assertRaises(AttributeError):
-            nothing(b0.write)
-
-class TestAbstractRegister(unittest.TestCase):
-    class TestRegister(AbstractRegister):
-        writes = []
-        def raw_read(self):
-            return b'\xef\xbe\xad\xde'
-        def raw_write(self, value):
-            self.writes.append(value)
-    def test_access(self):
-        def assert_and_pop(ls, value):
-            self.assertEqual(ls, value)
-            del ls[:]
-
-        self.assertEqual(self.TestRegister().read(), 0xdeadbeef)
-        self.TestRegister().write()
-        # value is 0xdeadbeef, this is its little-endian representation
-        assert_and_pop(self.TestRegister.writes, [b'\xef\xbe\xad\xde'])
-        self.TestRegister(little_endian=False).write()
-        self.assertEqual(self.TestRegister(little_endian=False).read(),
-                         0xefbeadde)
-        # value is 0xefbeadde, this is its big-endian representation
-        assert_and_pop(self.TestRegister.writes, [b'\xef\xbe\xad\xde'])
-
-        self.TestRegister().write(0x11223344)
-        assert_and_pop(self.TestRegister.writes, [b'\x44\x33\x22\x11'])
-        self.TestRegister().write(-6)
-        assert_and_pop(self.TestRegister.writes, [b'\xfa\xff\xff\xff'])
 
 def wrap_register_init(init):
     '''Given a Register.__init__ function taking bank and offset args,
@@ -863,13 +719,6 @@ def split_name(name):
         ret.append((g, indices))
     return ret
 
-class TestSplitName(unittest.TestCase):
-    def test(self):
-        self.assertEqual(split_name('x'), [('x', ())])
-        self.assertEqual(split_name('x.y'), [('x', ()), ('y', ())])
-        self.assertEqual(split_name('x[1]'), [('x', (1,))])
-        self.assertEqual(split_name('aa[1].bb.c[2][3].d'),
-                         [('aa', (1,)), ('bb', ()), ('c', (2, 3)), ('d', ())])
 
 class Field:
     '''One field, as created by bank_regs()'''
@@ -1020,20 +869,6 @@ def _unflatten(flat):
         ret[group] = index_dict
     return SimpleNamespace(**ret)
 
-class TestUnflatten(unittest.TestCase):
-    def test(self):
-        self.assertEqual(_unflatten([((), b'x')]), b'x')
-        o = _unflatten([([('a', ())], b'0'),
-                            ([('b', ())], b'1')])
-        self.assertEqual((o.a, o.b), (b'0', b'1'))
-        o = _unflatten([([('a', (1, 2))], b'0'),
-                            ([('a', (0, 3))], b'1')])
-        self.assertEqual((o.a[1][2], o.a[0][3]), (b'0', b'1'))
-        o = _unflatten([
-            ([('g', (1, 2)), ('g', ()), ('r1', ())], b'1'),
-            ([('g', (1, 2)), ('g', ()), ('r2', ())], b'2')])
-        self.assertEqual(o.g[1][2].g.r1, b'1')
-        self.assertEqual(o.g[1][2].g.r2, b'2')
 
 # Extract the first name segment of a register name.
 # Carefully optimized for speed, since this is one of few operations
@@ -1050,14 +885,6 @@ def _find_stem(s):
     else:
         return s if i2 == -1 else s[:i2]
 
-class TestFindStem(unittest.TestCase):
-    def test(self):
-        self.assertEqual(_find_stem(''), '')
-        self.assertEqual(_find_stem('a'), 'a')
-        self.assertEqual(_find_stem('abc.def[3][4]'), 'abc')
-        self.assertEqual(_find_stem('abc[3].def[4]'), 'abc')
-        self.assertEqual(_find_stem('def.abc'), 'def')
-        self.assertEqual(_find_stem('abc[def]'), 'abc')
 
 class LazyNamespace(SimpleNamespace):
     def __init__(self, **kwargs):
@@ -1102,73 +929,6 @@ class LazyNamespace(SimpleNamespace):
         else:
             return NotImplemented
 
-class TestLazyNamespace(unittest.TestCase):
-    def return_five(self):
-        return 5
-
-    def test(self):
-        x = 0
-        def inc():
-            nonlocal x
-            x += 1
-            return x
-        ns = LazyNamespace(a=0, b=inc, c=lambda: inc)
-        self.assertEqual(ns.a, 0)
-        self.assertEqual(ns.b, 1)
-        # not called again
-        self.assertEqual(ns.__dict__['b'], 1)
-        self.assertEqual(ns.c, inc)
-        ns = LazyNamespace(a=inc, b=0)
-        self.assertEqual([k for k in dir(ns) if not k.startswith('_')],
-                         ['a', 'b'])
-        self.assertEqual(x, 2)
-        # not called again
-        self.assertEqual(ns.a, 2)
-
-        self.assertEqual(
-            dict(LazyNamespace(a=0, b=inc).__dict__.items()),
-            {'a': 0, 'b': 3})
-
-        ns = LazyNamespace(__repr__=lambda: "hello")
-        self.assertEqual(ns.__repr__, 'hello')
-
-        # The crude laziness mechanism sometimes shines through. This
-        # can possibly be useful for debugging, but I consider it
-        # mostly as an undocumented implementation detail rather than
-        # a feature.
-        ns = LazyNamespace(a=list, b=set, c=3)
-        self.assertEqual(
-            repr(ns),
-            "LazyNamespace(__lazy__={'a': <class 'list'>, 'b': <class 'set'>},"
-            " a=None, b=None, c=3)")
-        _ = ns.a
-        self.assertEqual(
-            repr(ns),
-            "LazyNamespace(__lazy__={'b': <class 'set'>}, a=[], b=None, c=3)")
-        _ = ns.b
-        self.assertEqual(
-            repr(ns), "LazyNamespace(a=[], b=set(), c=3)")
-        self.assertEqual(repr(LazyNamespace(a=1)), "LazyNamespace(a=1)")
-
-        # This is how equality happens to work in a bunch of weird
-        # corners. Equality is mainly intended for use within dev_util
-        # unit tests.
-        def one():
-            return 1
-        for (equal, different) in [(lambda a, b: self.assertTrue(a == b),
-                                    lambda a, b: self.assertFalse(a == b)),
-                                   (lambda a, b: self.assertFalse(a != b),
-                                    lambda a, b: self.assertTrue(a != b))]:
-            equal(LazyNamespace(a=one), LazyNamespace(a=one))
-            equal(LazyNamespace(a=1), LazyNamespace(a=one))
-            equal(LazyNamespace(a=one), LazyNamespace(a=1))
-            equal(LazyNamespace(a=1), SimpleNamespace(a=1))
-            equal(SimpleNamespace(a=1), LazyNamespace(a=1))
-            different(LazyNamespace(a=one), SimpleNamespace(a=1))
-            different(SimpleNamespace(a=1), LazyNamespace(a=one))
-            class SimpleNamespaceSubclass(SimpleNamespace): pass
-            equal(SimpleNamespaceSubclass(a=1), LazyNamespace(a=1))
-            equal(LazyNamespace(a=1), SimpleNamespaceSubclass(a=1))
 
 # <add id="dev_util.bank_regs">
 # Given a bank object, return a structure containing
@@ -1315,20 +1075,6 @@ def namespace_map(fun, ns):
     else:
         return fun(ns)
 
-class TestNamespaceMap(unittest.TestCase):
-    def test(self):
-        self.assertEqual(namespace_map(lambda x: (x,), None), (None,))
-        self.assertEqual(
-            namespace_map(
-                lambda x: (x,),
-                {1: LazyNamespace(a=lambda: 2), 3: SimpleNamespace(b=4)}),
-            {1: LazyNamespace(a=(2,)), 3: LazyNamespace(b=(4,))})
-        self.assertEqual(
-            namespace_map(
-                lambda x: (x,),
-                LazyNamespace(a=lambda: {1: 2}, b={3: 4})),
-            LazyNamespace(a={1: (2,)}, b={3: (4,)}))
-
 
 # <add id="dev_util.GRegister">
 # This class allows provides a standalone register.
@@ -1581,68 +1327,6 @@ class Layout:
             size, 'little' if self.little_endian else 'big', signed=value < 0))
 
 
-class TestLayout(unittest.TestCase):
-    def test_layout(self):
-        m = Memory()
-        l = Layout(m.obj, 3, {'foo': (4, 2)}, True)
-        l.foo = 0xabcd
-        self.assertEqual(m.mem, [(7, [0xcd, 0xab])])
-        self.assertEqual(l.foo, 0xabcd)
-
-        m = Memory()
-        l = Layout(m, 7, {'bar': (11, 2)}, False)
-        l.bar = 0xabcd
-        self.assertEqual(m.mem, [(18, [0xab, 0xcd])])
-        self.assertEqual(l.bar, 0xabcd)
-
-        m = Memory()
-        m.mem = [(0, [0x0c, 0x13])]
-        l = Layout(m, 0, {
-                'reg': (0, 2, Bitfield_LE({'field': (13, 12)}))}, True)
-        l.reg.field = 2
-        self.assertEqual(m.mem, [(0, [0x0c, 0x23])])
-        self.assertEqual(l.reg.field, 2)
-
-        m = Memory()
-        l = Layout(m, 0, {}, True)
-        l.write(1, 0xdead, 2)
-        self.assertEqual(m.mem, [(1, [0xad, 0xde])])
-        self.assertEqual(l.read(1, 2), 0xdead)
-        l.write(1, -2, 3)
-        self.assertEqual(m.mem, [(1, [0xfe, 0xff, 0xff])])
-
-        m = Memory()
-        l = Layout(m, 0, {}, False)
-        l.write(1, 0xdead, 2)
-        self.assertEqual(m.mem, [(1, [0xde, 0xad])])
-        self.assertEqual(l.read(1, 2), 0xdead)
-        l.write(1, -2, 3)
-        self.assertEqual(m.mem, [(1, [0xff, 0xff, 0xfe])])
-
-    def test_layout_ms(self):
-        img = simics.SIM_create_object("image", "img", size=0x1000)
-        ram = simics.SIM_create_object("ram", "ram", image=img)
-        ms = simics.SIM_create_object("memory-space", 'ms')
-        ms.default_target = [ram, 0, 0, None]
-
-        layout = Layout(ms, 3, {'foo': (4, 2)}, True)
-        layout.foo = 0xabcd
-        self.assertEqual(img.iface.image.get(7, 2), bytes([0xcd, 0xab]))
-        self.assertEqual(layout.foo, 0xabcd)
-
-        layout = Layout(ms, 7, {'bar': (11, 2)}, False)
-        layout.bar = 0xabcd
-        self.assertEqual(img.iface.image.get(18, 2), bytes([0xab, 0xcd]))
-        self.assertEqual(layout.bar, 0xabcd)
-
-        img.iface.image.set(0, bytes([0x0c, 0x13]))
-        layout = Layout(
-            ms, 0, {'reg': (0, 2, Bitfield_LE({'field': (13, 12)}))}, True)
-        layout.reg.field = 2
-        self.assertEqual(img.iface.image.get(0, 2), bytes([0x0c, 0x23]))
-        self.assertEqual(layout.reg.field, 2)
-
-
 # <add id="dev_util.Layout_LE">
 # Little-endian layout.
 # </add>
@@ -1695,23 +1379,6 @@ def tuple_to_value_le(t):
                "Use 'int.from_bytes(t, 'little')' instead.")
     return int.from_bytes(t, 'little')
 
-class Test_tuple_value_conversion(unittest.TestCase):
-    def test_tuple_value_conversion(self):
-        self.assertEqual(tuple_to_value_le((1, 2, 3, 4)), 0x04030201)
-        self.assertEqual(tuple_to_value_be((1, 2, 3, 4)), 0x01020304)
-        self.assertEqual(value_to_tuple_le(0x04030201, 4), (1, 2, 3, 4))
-        self.assertEqual(value_to_tuple_be(0x01020304, 4), (1, 2, 3, 4))
-        self.assertEqual(value_to_tuple_le(0x04030201, 3), (1, 2, 3))
-        self.assertEqual(value_to_tuple_be(0x01020304, 3), (2, 3, 4))
-        self.assertEqual(value_to_tuple_be(
-                0x0102030405060708090a0b0c0d0e0f101112131415, 21),
-                          tuple(range(1, 22)))
-        self.assertEqual(
-            tuple_to_value_be(range(1, 22)),
-            0x0102030405060708090a0b0c0d0e0f101112131415)
-        self.assertEqual(value_to_tuple_le(-2, 3), (0xfe, 0xff, 0xff))
-        self.assertEqual(value_to_tuple_be(-2, 3), (0xff, 0xff, 0xfe))
-
 
 # <add id="dev_util.Memory">
 # Deprecated.
@@ -1804,24 +1471,6 @@ class Memory:
         return False
 
 
-class TestMemory(unittest.TestCase):
-    def testMemory(self):
-        m = Memory()
-        self.assertEqual(m.read(42, 0), [])
-        m.write(5, (11, 22, 33))
-        self.assertEqual(m.mem, [(5, [11, 22, 33])])
-        m.write(6, (23,))
-        self.assertEqual(m.mem, [(5, [11, 23, 33])])
-        m.write(6, (24, 25, 26))
-        self.assertEqual(m.mem, [(5, [11, 24, 25, 26])])
-        m.write(2, (3, 4))
-        self.assertEqual(m.mem, [(2, [3, 4]), (5, [11, 24, 25, 26])])
-        m.write(4, (17,))
-        self.assertEqual(m.mem, [(2, [3, 4, 17, 11, 24, 25, 26])])
-        m.write(1, tuple(range(20)))
-        self.assertEqual(m.mem, [(1, list(range(20)))])
-        self.assertEqual(m.read(2, 3), [1, 2, 3])
-
 # <add id="dev_util.Dev">
 # Deprecated.
 # </add>
@@ -1875,3 +1524,9 @@ from dev_util_internal import (Dev,
                                ProcessorInfo,
                                Ppc,
                                Sata)
+
+# The unit tests live in test_dev_util.py, so that they are not compiled on every
+# Simics start. This hook lets unittest find them through this module.
+def load_tests(loader, tests, pattern):
+    import test_dev_util
+    return loader.loadTestsFromModule(test_dev_util)
@@ -9,6 +9,7 @@
 # This software and the related documents are provided as is, with no express or
 # implied warranties, other than those that are expressly stated in the License.
 
+import bisect
 import simics
 from deprecation import DEPRECATED
 
@@ -1137,7 +1138,18 @@ class Memory(Dev):
     # Clear the contents of the memory.
     # </add>
     def clear(self):
-        self.mem = []
+        # Non-empty, non-adjacent chunks of data, sorted by start
+        # address. _starts[i] is the start address of the bytearray
+        # _chunks[i]; the two lists are kept separate so that chunks can
+        # be looked up with bisect.
+        self._starts = []
+        self._chunks = []
+
+    @property
+    def mem(self):
+        '''The contents as a list of (start, list of bytes) pairs'''
+        return [(start, list(chunk))
+                for (start, chunk) in zip(self._starts, self._chunks)]
 
     # <add id="dev_util_internal.Memory.read">
     # Read bytes from this memory.
@@ -1158,11 +1170,12 @@ class Memory(Dev):
         if n == 0:
             return []
 
-        for (chunk_start, chunk) in self.mem:
-            chunk_size = len(chunk)
-            if (chunk_start <= addr < chunk_start + chunk_size
-                and addr + n <= chunk_start + chunk_size):
-                return chunk[addr - chunk_start : addr + n - chunk_start]
+        i = bisect.bisect_right(self._starts, addr) - 1
+        if i >= 0:
+            ofs = addr - self._starts[i]
+            chunk = self._chunks[i]
+            if ofs + n <= len(chunk):
+                return list(chunk[ofs : ofs + n])
         raise Memory.UninitializedException("read from uninitialised memory: "
                                             "0x%x, %d bytes" % (addr, n))
 
@@ -1181,47 +1194,47 @@ class Memory(Dev):
     # </add>
     def write(self, addr, bytes):
         '''Writes the data in the bytes tuple to addr'''
-        for b in bytes:
-            assert isinstance(b, int)
-            assert not (b >> 8)
-        for (i, (chunk_start, chunk)) in enumerate(self.mem):
-            chunk_size = len(chunk)
-            if chunk_start <= addr <= chunk_start + chunk_size:
-                ofs = addr - chunk_start
-                chunk[ofs : ofs + len(bytes)] = bytes
-                self._merge_chunks(i)
-                return
-
-            if chunk_start > addr:
-                break                   # insert new chunk here
+        # Raises an exception unless all elements are integers in 0..255
+        data = bytearray(iter(bytes))
+        if not data:
+            return
+        end = addr + len(data)
+        starts = self._starts
+        chunks = self._chunks
+        # The chunks [lo, hi) overlap or are adjacent to the written range
+        lo = bisect.bisect_right(starts, addr) - 1
+        if lo < 0 or starts[lo] + len(chunks[lo]) < addr:
+            lo += 1
+        hi = bisect.bisect_right(starts, end)
+        if lo == hi:
+            starts.insert(lo, addr)
+            chunks.insert(lo, data)
+        elif hi == lo + 1 and starts[lo] <= addr:
+            # Common case: update or extend a single chunk in place
+            ofs = addr - starts[lo]
+            chunks[lo][ofs : ofs + len(data)] = data
         else:
-            i = len(self.mem)
-        # create new chunk
-        self.mem[i : i] = [(addr, list(bytes))]
-        self._merge_chunks(i)
-
-    def _merge_chunks(self, index):
-        '''Merge a chunk with the following one if they overlap/are adjacent'''
-        (chunk_start, chunk) = self.mem[index]
-        chunk_end = chunk_start + len(chunk)
-        next = index + 1
-        while next < len(self.mem):
-            (next_start, next_chunk) = self.mem[next]
-            if next_start > chunk_end:
-                break
-            # this chunk subsumed by the one at index
-            if chunk_end < next_start + len(next_chunk):
-                chunk += next_chunk[chunk_end - next_start :]
-            del self.mem[next]
+            # Merge all touched chunks. Any gap between them is covered
+            # by the written range.
+            base = min(addr, starts[lo])
+            top = max(end, starts[hi - 1] + len(chunks[hi - 1]))
+            merged = bytearray(top - base)
+            for (start, chunk) in zip(starts[lo:hi], chunks[lo:hi]):
+                merged[start - base : start - base + len(chunk)] = chunk
+            merged[addr - base : end - base] = data
+            starts[lo:hi] = [base]
+            chunks[lo:hi] = [merged]
 
     # <add id="dev_util_internal.Memory.is_range_touched">
     # Return True if any of this memory's slots in the range contain data.
     # </add>
     def is_range_touched(self, start, length):
-        def overlaps(s1, l1, s2, l2):
-            return not (s1 + l1 <= s2) and not (s2 + l2 <= s1)
-
-        for chunk_start, chunk in self.mem:
-            if overlaps(chunk_start, len(chunk), start, length):
+        end = start + length
+        # Only the last chunk starting at or before start, and the first
+        # chunk starting after it, can overlap the range
+        i = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        for (chunk_start, chunk) in zip(self._starts[i : i + 2],
+                                        self._chunks[i : i + 2]):
+            if chunk_start < end and chunk_start + len(chunk) > start:
                 return True
         return False
@@ -0,0 +1,139 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Compact indexed help data files.
+#
+# A help index file holds JSON values keyed on topic, and is made so that
+# a single topic can be looked up without parsing the values of all other
+# topics. The file starts with a line identifying the format, followed by
+# a JSON encoded line with an optional stamp, which can be used to tell if
+# the file is up to date with the data it was generated from, and the
+# index, mapping each topic to the offset and length of its value in the
+# rest of the file. Each value is stored as zlib compressed JSON. JSON has
+# no tuples, so lists in the values are returned as tuples.
+#
+# The file is read on the first lookup, and values are decoded when asked
+# for, so nothing is done for help topics at Simics startup.
+
+import hashlib
+import json
+import time
+import zlib
+
+__all__ = ('HelpIndex', 'write_help_index', 'file_stamp')
+
+magic = b'simics-help-index 1\n'
+
+def write_help_index(path, entries, stamp = None):
+    '''Write the (topic, value) pairs in entries to the help index file
+    path. The values and the stamp must be JSON serializable.'''
+    index = {}
+    blobs = []
+    offset = 0
+    for (topic, value) in entries:
+        blob = zlib.compress(json.dumps(value).encode('utf-8'), 9)
+        index[topic] = (offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+    with open(path, 'wb') as f:
+        f.write(magic)
+        f.write(json.dumps({'stamp': stamp, 'index': index},
+                           sort_keys=True).encode('utf-8') + b'\n')
+        for blob in blobs:
+            f.write(blob)
+
+def file_stamp(path):
+    '''Return a stamp identifying the contents of the file path, for
+    telling if a help index is up to date with the file it was generated
+    from.'''
+    with open(path, 'rb') as f:
+        return 'sha256:' + hashlib.sha256(f.read()).hexdigest()
+
+def _tuples(value):
+    if isinstance(value, list):
+        return tuple(_tuples(v) for v in value)
+    return value
+
+class HelpIndex:
+    '''The topics of a help index file, with the dictionary methods needed
+    for looking up topics. The file is read on first use.'''
+    def __init__(self, path):
+        self.path = path
+        self._index = None
+        self._stamp = None
+        self._data = None
+
+    def _load(self):
+        if self._index is None:
+            with open(self.path, 'rb') as f:
+                if f.readline() != magic:
+                    raise ValueError(
+                        '%s: not a help index file' % (self.path,))
+                header = json.loads(f.readline())
+                self._data = f.read()
+            self._stamp = header['stamp']
+            self._index = header['index']
+        return self._index
+
+    def stamp(self):
+        self._load()
+        return self._stamp
+
+    def keys(self):
+        return self._load().keys()
+
+    def __contains__(self, topic):
+        return topic in self._load()
+
+    def __len__(self):
+        return len(self._load())
+
+    def get(self, topic, default = None):
+        entry = self._load().get(topic)
+        if entry is None:
+            return default
+        (offset, length) = entry
+        return _tuples(json.loads(
+            zlib.decompress(self._data[offset:offset + length])))
+
+def _benchmark(path, module):
+    # Compare the cost of looking up a topic in a help index with that of
+    # importing the same data as a Python module, which is what Simics
+    # startup used to pay whether help was used or not. Run inside Simics,
+    # with "simics -batch-mode -p help_index.py", it also shows that the
+    # help data was not loaded at startup.
+    import importlib
+    import sys
+    for m in ('api_help', module):
+        print("%-24s %s" % (m, "loaded" if m in sys.modules
+                            else "not loaded"))
+    t = time.perf_counter()
+    importlib.import_module(module)
+    t_import = time.perf_counter() - t
+    t = time.perf_counter()
+    index = HelpIndex(path)
+    t_open = time.perf_counter() - t
+    t = time.perf_counter()
+    topic = next(iter(index.keys()))
+    index.get(topic)
+    t_lookup = time.perf_counter() - t
+    for (what, t) in (("import " + module, t_import),
+                      ("open help index", t_open),
+                      ("first topic lookup", t_lookup)):
+        print("%-24s %8.2f ms" % (what, t * 1e3))
+    sys.modules.pop(module, None)
+
+if __name__ == '__main__':
+    import sys
+    import os
+    _benchmark(sys.argv[1] if len(sys.argv) > 1
+               else os.path.join(os.path.dirname(__file__), 'api_help_py.idx'),
+               sys.argv[2] if len(sys.argv) > 2 else 'api_help_py')
@@ -16,9 +16,12 @@ import enum
 import io
 import os
 import re
+import threading
+import time
 import unittest
 import pprint
 
+import binary_log
 import cli
 import simics
 import conf
@@ -63,7 +66,7 @@ class LogFormatType(enum.Enum):
     trace_obj = 2
 
 class LogFormatString:
-    __slots__ = ('fmt', 'used_chars', 'curly_fmt')
+    __slots__ = ('fmt', 'used_chars', 'curly_fmt', 'formatters')
     def __init__(self, fmt, used_chars):
         self.fmt = fmt
         self.used_chars = used_chars
@@ -71,6 +74,17 @@ class LogFormatString:
             return f'{{{grp[1]}}}'
         self.curly_fmt = re.sub(
             '[%]([a-z])', convert, self.fmt)
+        self.formatters = {}
+
+    def formatter(self, decorate):
+        '''Return a function formatting log messages according to this
+        format, taking the same arguments as format_log() after
+        log_format. The function is compiled on first use.'''
+        f = self.formatters.get(decorate)
+        if f is None:
+            f = self.formatters[decorate] = compile_log_format(
+                self.fmt, decorate)
+        return f
 
     def __str__(self):
         return pprint.pformat({
@@ -90,6 +104,9 @@ class Logger_info:
         '_pico_seconds',
         '_real_time',
         '_time_stamp',
+        'async_file',
+        'binary_file',
+        'binary_file_name',
         'console',
         'cached_default_formats',
         'file',
@@ -127,6 +144,9 @@ class Logger_info:
                 ('_pico_seconds', False),
                 ('_real_time', False),
                 ('_time_stamp', False),
+                ('async_file', False),
+                ('binary_file', None),
+                ('binary_file_name', None),
                 ('console', True),
                 ('file_name', None),
                 ('file', None)]:
@@ -326,71 +346,161 @@ class Logger_info:
     def __str__(self):
         return pprint.pformat({k: getattr(self, k) for k in self.__slots__})
 
+# Per-object caches used when formatting log messages: object names,
+# log groups with the group strings of the group masks used so far, and
+# the interfaces used for time stamps of clocks.
+log_object_names = {}
+log_object_groups = {}
+log_clock_info = {}
+
+def log_object_name(obj):
+    name = log_object_names.get(obj)
+    if name is None:
+        name = log_object_names[obj] = obj.name
+    return name
+
+def log_group_names(obj, group_ids):
+    if not obj:
+        return ''
+    info = log_object_groups.get(obj)
+    if info is None:
+        info = log_object_groups[obj] = (obj.log_groups, {})
+    (log_groups, masks) = info
+    g = masks.get(group_ids)
+    if g is None:
+        groups = []
+        idx = 0
+        mask = group_ids
+        while mask and idx < len(log_groups):
+            if mask & 1:
+                groups.append(log_groups[idx])
+            idx += 1
+            mask >>= 1
+        g = masks[group_ids] = ', '.join(groups)
+    return g
+
+def get_log_clock_info(cobj):
+    '''Return the name and the processor_info, cycle and processor_cli
+    interfaces of a clock. Interfaces not implemented are None.'''
+    info = log_clock_info.get(cobj)
+    if info is None:
+        iface = cobj.iface
+        info = log_clock_info[cobj] = (
+            cobj.name,
+            iface.processor_info if hasattr(iface, "processor_info") else None,
+            iface.cycle,
+            (iface.processor_cli if hasattr(iface, "processor_info_v2")
+             and iface.processor_cli.get_disassembly else None))
+    return info
+
+def forget_log_object(arg, obj):
+    for cache in (log_object_names, log_object_groups, log_clock_info):
+        cache.pop(obj, None)
+
+def forget_log_object_names(arg, obj, old_name):
+    # Renaming an object also renames its descendants
+    log_object_names.clear()
+    log_clock_info.clear()
+
+simics.SIM_hap_add_callback("Core_Conf_Object_Pre_Delete", forget_log_object,
+                            None)
+simics.SIM_hap_add_callback("Core_Conf_Object_Rename",
+                            forget_log_object_names, None)
+
+def log_disassembly(cobj, decorate):
+    if not cobj:
+        return ''
+    (_, _, _, proc_cli) = get_log_clock_info(cobj)
+    if not proc_cli:
+        return ''
+    (_, disas_str) = proc_cli.get_disassembly(
+        "v", cobj.iface.processor_info_v2.get_program_counter(), 0, None)
+    return f"({disas_str})" if decorate else disas_str
+
+def log_pico_seconds(cobj, decorate):
+    if not cobj:
+        return ''
+    p_seconds = simics.SIM_cycle_count(cobj.vtime.ps)
+    ps_str = f"{number_str(p_seconds, radix=10)}"
+    return f"{{{ps_str} ps}}" if decorate else ps_str
+
+def log_real_time(decorate):
+    if forced_real_time_value is not None:
+        r = forced_real_time_value
+    else:
+        now = datetime.datetime.now()
+        r = "{0}".format(now.strftime("%H:%M:%S.%f")[:-2])
+    return f"[{r}]" if decorate else r
+
+def log_time_stamp(cobj, decorate):
+    if not cobj:
+        return ''
+    (name, proc_info, cycle, _) = get_log_clock_info(cobj)
+    if proc_info:
+        time_stamp = f"{name} 0x{proc_info.get_program_counter():x}"
+    else:
+        time_stamp = name
+    time_stamp += f" {number_str(cycle.get_cycle_count(), radix=10)}"
+    return f"{{{time_stamp}}}" if decorate else time_stamp
+
+# Python expressions computing each format character, in the generated
+# formatter functions
+log_format_expressions = {
+    'd': 'log_disassembly(cobj, {decorate})',
+    'g': 'log_group_names(obj, group_ids)',
+    'l': "('' if log_level is None else str(log_level))",
+    'm': 'msg',
+    'o': "(log_object_name(obj) if obj else '')",
+    'p': 'log_pico_seconds(cobj, {decorate})',
+    'r': 'log_real_time({decorate})',
+    't': 'log_type',
+    'v': 'log_time_stamp(cobj, {decorate})',
+}
+
+def compile_log_format(fmt, decorate):
+    '''Return a function (obj, log_type, msg, log_level, group_ids)
+    formatting a log message according to the format string fmt, which
+    must be valid. The function only computes the fields used by the
+    format, and looks up the clock at most once.'''
+    pieces = re.split('%([a-z])', fmt)
+    parts = []
+    for (i, piece) in enumerate(pieces):
+        if i & 1:
+            parts.append(log_format_expressions[piece].format(
+                decorate=bool(decorate)))
+        elif piece:
+            parts.append(repr(piece))
+    lines = ["def formatter(obj, log_type, msg, log_level, group_ids):"]
+    if not set('dpv').isdisjoint(pieces[1::2]):
+        lines.append("    cobj = get_cycle_object_for_timestamps()")
+    lines.append(f"    return ''.join(({', '.join(parts)},))"
+                 if parts else "    return ''")
+    namespace = {}
+    exec(compile('\n'.join(lines), f'<log format {fmt!r}>', 'exec'),
+         globals(), namespace)
+    return namespace['formatter']
+
 def format_log(decorate, log_format, obj, log_type, msg, log_level, group_ids):
-    new_values = {}
-    cobj = None
-    if not set(['d', 'p', 'v']).isdisjoint(set(log_format.used_chars)):
-        cobj = get_cycle_object_for_timestamps()
-    for ch in log_format.used_chars:
-        if ch == 'd':
-            d = ''
-            if (cobj and hasattr(cobj.iface, "processor_info_v2")
-                and cobj.iface.processor_cli.get_disassembly):
-                (_, disas_str) = cobj.iface.processor_cli.get_disassembly(
-                    "v", cobj.iface.processor_info_v2.get_program_counter(),
-                    0, None)
-                d = f"({disas_str})" if decorate else disas_str
-            new_values['d'] = d
-        elif ch == 'g':
-            g = ''
-            if obj and obj.log_groups:
-                groups = []
-                idx = 0
-                while group_ids:
-                    if group_ids & 1:
-                        groups.append(obj.log_groups[idx])
-                    idx += 1
-                    group_ids >>= 1
-                g = ', '.join(groups)
-            new_values['g'] = g
-        elif ch == 'l':
-            new_values['l'] = '' if log_level is None else str(log_level)
-        elif ch == 'm':
-            new_values['m'] = msg
-        elif ch == 'o':
-            new_values['o'] = obj.name if obj else ''
-        elif ch == 'p':
-            p = ''
-            if cobj:
-                p_seconds = simics.SIM_cycle_count(cobj.vtime.ps)
-                ps_str = f"{number_str(p_seconds, radix=10)}"
-                p = f"{{{ps_str} ps}}" if decorate else ps_str
-            new_values['p'] = p
-        elif ch == 'r':
-            if forced_real_time_value is not None:
-                r = forced_real_time_value
-            else:
-                now = datetime.datetime.now()
-                r = "{0}".format(now.strftime("%H:%M:%S.%f")[:-2])
-            r = f"[{r}]" if decorate else r
-            new_values['r'] = r
-        elif ch == 't':
-            new_values['t'] = log_type
-        elif ch == 'v':
-            v = ''
-            if cobj:
-                time_stamp = f"{cobj.name}"
-                if hasattr(cobj.iface, "processor_info"):
-                    proc_iface = cobj.iface.processor_info
-                    pc = proc_iface.get_program_counter()
-                    time_stamp += f" 0x{pc:x}"
-                cycles = cobj.iface.cycle.get_cycle_count()
-                time_stamp += f" {number_str(cycles, radix=10)}"
-                v = f"{{{time_stamp}}}" if decorate else time_stamp
-            new_values['v'] = v
-
-    new_result = log_format.curly_fmt.format(**new_values)
-    return new_result
+    return log_format.formatter(decorate)(obj, log_type, msg, log_level,
+                                          group_ids)
+
+def write_binary_log(writer, obj, log_type, msg, log_level, group_ids,
+                     is_trace):
+    obj_id = writer.object_id(obj, lambda: (obj.name, obj.log_groups)) if (
+        obj) else 0
+    cobj = get_cycle_object_for_timestamps()
+    if cobj:
+        clock_id = writer.object_id(cobj,
+                                    lambda: (cobj.name, cobj.log_groups))
+        (_, proc_info, cycle, _) = get_log_clock_info(cobj)
+        pc = proc_info.get_program_counter() if proc_info else None
+        cycles = cycle.get_cycle_count()
+        ps = simics.SIM_cycle_count(cobj.vtime.ps)
+    else:
+        (clock_id, pc, cycles, ps) = (0, None, 0, 0)
+    writer.write_message(obj_id, clock_id, writer.log_type_id(log_type),
+                         log_level, group_ids, cycles, pc, ps,
+                         time.time_ns(), is_trace, msg)
 
 # Returns a cycle queue suitable for logging timestamps.
 def get_cycle_object_for_timestamps():
@@ -402,6 +512,104 @@ def get_cycle_object_for_timestamps():
         return conf.sim.current_cell.current_cycle_obj
     return None
 
+class AsyncLogFile:
+    '''Wrapper of a log file, where messages are written to the file by a
+    separate thread. Messages are queued by write(), and written and
+    flushed in batches, when at least batch_size characters are queued
+    or at least flush_interval seconds after the previous flush.
+
+    At most max_pending characters are kept in the queue. Messages
+    arriving when the queue is full are dropped and counted, and a line
+    telling how many messages were dropped is written to the file before
+    the next message that fits.'''
+    max_pending = 16 << 20
+    batch_size = 64 << 10
+    flush_interval = 1.0
+
+    def __init__(self, file):
+        self.file = file
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.queue = []
+        self.pending = 0
+        self.dropped = 0
+        self.unreported_drops = 0
+        self.flush_requests = 0   # incremented by flush()
+        self.flushed = 0          # flush_requests when last flushed
+        self.stopping = False
+        self.error = None
+        self.thread = threading.Thread(target=self.writer,
+                                       name='log file writer', daemon=True)
+        self.thread.start()
+
+    def write(self, s):
+        with self.lock:
+            if self.pending + len(s) > self.max_pending:
+                self.dropped += 1
+                self.unreported_drops += 1
+                return
+            if self.unreported_drops:
+                note = (f"*** {self.unreported_drops} log messages dropped:"
+                        " log file writing too slow ***\n")
+                self.queue.append(note)
+                self.pending += len(note)
+                self.unreported_drops = 0
+            self.queue.append(s)
+            self.pending += len(s)
+            if self.pending >= self.batch_size:
+                self.cond.notify()
+
+    def writer(self):
+        while True:
+            with self.lock:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self.stopping
+                           or self.pending >= self.batch_size
+                           or self.flush_requests != self.flushed):
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.cond.wait(timeout)
+                (batch, self.queue) = (self.queue, [])
+                request = self.flush_requests
+                stopping = self.stopping
+            try:
+                if batch:
+                    self.file.write(''.join(batch))
+                    self.file.flush()
+            except (OSError, ValueError) as ex:
+                self.error = ex
+            with self.lock:
+                self.pending -= sum(len(s) for s in batch)
+                self.flushed = request
+                self.cond.notify_all()
+                if stopping and not self.queue:
+                    return
+
+    def flush(self):
+        '''Wait until all messages written so far have been written to the
+        file and flushed.'''
+        with self.lock:
+            if not self.thread.is_alive():
+                return
+            self.flush_requests += 1
+            request = self.flush_requests
+            self.cond.notify_all()
+            while self.flushed - request < 0 and self.thread.is_alive():
+                self.cond.wait(0.1)
+
+    def detach(self):
+        '''Write all queued messages, stop the writer thread and return the
+        underlying file.'''
+        with self.lock:
+            self.stopping = True
+            self.cond.notify_all()
+        self.thread.join()
+        return self.file
+
+    def close(self):
+        self.detach().close()
+
 class Logger:
     def __init__(self):
         self.global_logger = Logger_info()
@@ -411,6 +619,7 @@ class Logger:
         self.active_filters = []
         self.log_types = conf.sim.log_types[:]
         self.default_info = Logger_info()
+        self.flush_hap_ids = None
 
     def get_logger_info(self, obj):
         return self.local_logger.get(obj, self.global_logger)
@@ -439,16 +648,23 @@ class Logger:
 
     def log_internal(self, obj, log_type, msg, log_level, group_ids,
                      is_trace=True):
+        l_obj = self.get_logger_info(obj)
+        if l_obj.binary_file:
+            write_binary_log(l_obj.binary_file, obj, log_type, msg,
+                             log_level, group_ids, is_trace)
+            if not (l_obj.console or l_obj.file):
+                return
         log_string = get_log_string(self, obj, log_type, msg, log_level,
                                     group_ids, is_trace)
 
         # add \n before printing string to ensure atomic output with MT
         log_string += "\n"
-        if self.get_logger_info(obj).console:
+        if l_obj.console:
             simics.CORE_python_write(log_string)
-        if self.get_logger_info(obj).file:
-            self.get_logger_info(obj).file.write(log_string)
-            self.get_logger_info(obj).file.flush()
+        if l_obj.file:
+            l_obj.file.write(log_string)
+            if not isinstance(l_obj.file, AsyncLogFile):
+                l_obj.file.flush()
 
     # generic output routine, also used for trace- commands.
     def log(self, obj, log_type, msg, is_trace=True):
@@ -463,10 +679,8 @@ class Logger:
                               group_ids, is_trace=False)
 
     def update_callback(self):
-        needs_filter = (self.global_logger.console
-                        or self.global_logger.file
-                        or any(val.console or val.file
-                               for val in self.local_logger.values()))
+        needs_filter = any(i.console or i.file or i.binary_file
+                           for i in self.all_logger_infos())
 
         if needs_filter:
             if self.hap_id:
@@ -492,11 +706,15 @@ class Logger:
                 ('custom_format', self.default_info.custom_format)]:
             self.field_update(obj, name, value)
 
+    def all_logger_infos(self):
+        return [self.global_logger] + list(self.local_logger.values())
+
     def set_log_file(self, obj, file_name, may_overwrite = False):
         '''Enable log file with specified name or disable if file_name is None.
            If not "may_overwrite", it is an error if the log file already
            exists.'''
 
+        old_files = {id(i.file): i.file for i in self.all_logger_infos()}
         if file_name:
             if not may_overwrite and os.path.exists(file_name):
                 raise CliError(f"File {file_name} already exists.")
@@ -504,6 +722,8 @@ class Logger:
                 new_log_file = codecs.open(file_name, "w", "utf-8")
             except OSError as ex:
                 raise CliError(f"Failed opening log file {file_name} : {ex}")
+            if self.get_logger_info(obj).async_file:
+                new_log_file = AsyncLogFile(new_log_file)
 
             self.field_update(obj, "file", new_log_file)
             self.field_update(obj, "file_name", file_name)
@@ -511,7 +731,91 @@ class Logger:
             self.field_update(obj, "file", self.default_info.file)
             self.field_update(obj, "file_name", self.default_info.file_name)
 
+        # Queued messages must be written to replaced asynchronous files
+        in_use = {id(i.file) for i in self.all_logger_infos()}
+        for (key, f) in old_files.items():
+            if key not in in_use and isinstance(f, AsyncLogFile):
+                f.close()
+        self.update_callback()
+        self.update_flush_haps()
+
+    def set_binary_file(self, obj, file_name, may_overwrite = False):
+        '''Enable binary log file with specified name or disable if
+           file_name is None.'''
+
+        old_files = {id(i.binary_file): i.binary_file
+                     for i in self.all_logger_infos()}
+        if file_name:
+            if not may_overwrite and os.path.exists(file_name):
+                raise CliError(f"File {file_name} already exists.")
+            try:
+                writer = binary_log.BinaryLogWriter(file_name)
+            except OSError as ex:
+                raise CliError(
+                    f"Failed opening binary log file {file_name} : {ex}")
+            self.field_update(obj, "binary_file", writer)
+            self.field_update(obj, "binary_file_name", file_name)
+        else:
+            self.field_update(obj, "binary_file", None)
+            self.field_update(obj, "binary_file_name", None)
+
+        in_use = {id(i.binary_file) for i in self.all_logger_infos()}
+        for (key, f) in old_files.items():
+            if f is not None and key not in in_use:
+                f.close()
         self.update_callback()
+        self.update_flush_haps()
+
+    def set_async_file(self, obj, enable):
+        '''Turn asynchronous writing of log files on or off. Log files
+        already opened are converted, for all objects sharing them.'''
+        self.field_update(obj, "async_file", enable)
+        infos = (self.all_logger_infos() if obj is None
+                 else [self.set_logger_info(obj)])
+        for info in infos:
+            f = info.file
+            if f is None or isinstance(f, AsyncLogFile) == enable:
+                continue
+            new_file = AsyncLogFile(f) if enable else f.detach()
+            for i in self.all_logger_infos():
+                if i.file is f:
+                    i.file = new_file
+        self.update_flush_haps()
+
+    def async_files(self):
+        return list({id(i.file): i.file for i in self.all_logger_infos()
+                     if isinstance(i.file, AsyncLogFile)}.values())
+
+    def binary_files(self):
+        return list({id(i.binary_file): i.binary_file
+                     for i in self.all_logger_infos()
+                     if i.binary_file is not None}.values())
+
+    def flush_log_files(self, *args):
+        for f in self.async_files() + self.binary_files():
+            f.flush()
+
+    def finish_log_files(self, *args):
+        for i in self.all_logger_infos():
+            if isinstance(i.file, AsyncLogFile):
+                i.file = i.file.detach()
+        for f in self.binary_files():
+            f.flush()
+
+    def update_flush_haps(self):
+        '''Flush asynchronous and binary log files when the simulation
+        stops, and write all pending messages before exiting'''
+        needed = bool(self.async_files() or self.binary_files())
+        if needed and not self.flush_hap_ids:
+            self.flush_hap_ids = [
+                (hap, simics.SIM_hap_add_callback(hap, fun, None))
+                for (hap, fun) in [
+                        ("Core_Simulation_Stopped", self.flush_log_files),
+                        ("Core_At_Exit", self.finish_log_files)]]
+        elif not needed and self.flush_hap_ids:
+            for (hap, hap_id) in self.flush_hap_ids:
+                simics.SIM_hap_delete_callback_id(hap, hap_id)
+            self.flush_hap_ids = None
 
     def field_update(self, obj, name, val):
         setattr(self.set_logger_info(obj), name, val)
@@ -521,18 +825,23 @@ class Logger:
 
     def setup_cmd(self, obj, ts, no_ts, ps, no_ps, real, no_real, co, no_co,
                   grp, no_grp, lvl, no_lvl, no_lf, disas, no_disas,
-                  ow, logfile, fmt):
-        if ow and not logfile:
+                  async_file, no_async_file, no_binary_file, ow, logfile,
+                  fmt, binary_file):
+        if ow and not (logfile or binary_file):
             raise CliError("-overwrite used without any file name")
 
         self.check_exclusive_args(ts, no_ts, ps, no_ps, real, no_real, co,
                                   no_co, grp, no_grp, lvl, no_lvl,
-                                  no_lf, disas, no_disas, logfile, fmt)
+                                  no_lf, disas, no_disas, async_file,
+                                  no_async_file, binary_file, no_binary_file,
+                                  logfile, fmt)
 
         def return_message():
             l_obj = self.get_logger_info(obj)
             log_file = f'"{l_obj.file_name}"' if (
                 l_obj.file is not None) else "disabled"
+            binary_file = f'"{l_obj.binary_file_name}"' if (
+                l_obj.binary_file is not None) else "disabled"
             fmt_str = f'"{l_obj.get_cli_format()}"'
             data = []
             if l_obj.custom_format is None:
@@ -547,7 +856,14 @@ class Logger:
                     enabled = getattr(l_obj, field)
                     data.append(f'{description}: {enabled_str(enabled)}')
             data.extend([f"Log file        : {log_file}",
+                         f"Async log file  : {enabled_str(l_obj.async_file)}",
+                         f"Binary log file : {binary_file}",
                          f'Format          : {fmt_str}'])
+            if isinstance(l_obj.file, AsyncLogFile):
+                if l_obj.file.dropped:
+                    data.append(f"Dropped messages: {l_obj.file.dropped}")
+                if l_obj.file.error:
+                    data.append(f"Write error     : {l_obj.file.error}")
             return '\n'.join(data)
 
         def return_value():
@@ -562,6 +878,10 @@ class Logger:
                 ["disassembly", bool(l_obj.disassembly)],
                 ["file_name", l_obj.file_name],
                 ["file", bool(l_obj.file)],
+                ["async_file", bool(l_obj.async_file)],
+                ["dropped", (l_obj.file.dropped
+                             if isinstance(l_obj.file, AsyncLogFile) else 0)],
+                ["binary_file_name", l_obj.binary_file_name],
                 ["format", l_obj.get_cli_format()]]
 
         def enabled_str(b): return "enabled" if b else "disabled"
@@ -576,8 +896,11 @@ class Logger:
         ]
         custom_fmt_arg = [fmt is not None]
         output_args = [co or no_co,
+                      async_file or no_async_file,
                       no_lf,
-                      logfile]
+                      logfile,
+                      no_binary_file,
+                      binary_file]
         mutating_args = default_fmt_args + custom_fmt_arg + output_args
         if not any(mutating_args):
             return command_return(message=return_message, value=return_value)
@@ -614,20 +937,33 @@ class Logger:
             self.field_update(obj, "console", co)
             self.update_callback()
 
+        if async_file or no_async_file:
+            self.set_async_file(obj, async_file)
+
         if logfile:
             self.set_log_file(obj, logfile, may_overwrite = ow)
         elif no_lf:
             self.set_log_file(obj, self.default_info.file_name)
+
+        if binary_file:
+            self.set_binary_file(obj, binary_file, may_overwrite = ow)
+        elif no_binary_file:
+            self.set_binary_file(obj, None)
         return command_quiet_return(value=return_value)
 
     def check_exclusive_args(self, ts, no_ts, ps, no_ps, real, no_real, co,
                             no_co, grp, no_grp, lvl, no_lvl, no_lf,
-                            disas, no_disas, logfile, fmt):
+                            disas, no_disas, async_file, no_async_file,
+                            binary_file, no_binary_file, logfile, fmt):
         def exclusive(a, b, a_name, b_name):
             if a and b:
                 raise CliError(f"{a_name} and {b_name} are mutually exclusive.")
 
-        for (args, names) in [((co, no_co), ("-console", "-no-console"))]:
+        for (args, names) in [((co, no_co), ("-console", "-no-console")),
+                              ((async_file, no_async_file),
+                               ("-async-file", "-no-async-file")),
+                              ((binary_file, no_binary_file),
+                               ("binary-file", "-no-binary-file"))]:
             exclusive(*args, *names)
 
         for (args, names) in [
@@ -679,9 +1015,13 @@ new_command("log-setup", logger.setup_cmd,
                      arg(flag_t, "-no-log-file"),
                      arg(flag_t, "-disassemble"),
                      arg(flag_t, "-no-disassemble"),
+                     arg(flag_t, "-async-file"),
+                     arg(flag_t, "-no-async-file"),
+                     arg(flag_t, "-no-binary-file"),
                      arg(flag_t, "-overwrite"),
                      arg(filename_t(), "logfile", "?", None),
-                     arg(str_t, "format", "?", None)],
+                     arg(str_t, "format", "?", None),
+                     arg(filename_t(), "binary-file", "?", None)],
             type  = ["Logging"],
             short = "configure log behavior",
             see_also = ["log", "<conf_object>.log-group", "log-size",
@@ -709,6 +1049,26 @@ A file that receives all log output can be specified with the <arg>logfile</arg>
 argument. <tt>-no-log-file</tt> disables an existing log file. To overwrite an
 existing file, the <tt>-overwrite</tt> flag has to be given.
 
+With <tt>-async-file</tt>, messages are written to the log file by a separate
+thread, in batches, instead of being written and flushed one at a time by the
+simulation. This makes verbose logging to file considerably faster. The file
+is flushed at least once per second, and when the simulation stops. To bound
+memory use, messages are dropped if more than 16 MiB of output is waiting to
+be written; the number of dropped messages is noted in the log file and shown
+by <cmd>log-setup</cmd>. It is disabled with <tt>-no-async-file</tt>, which
+is the default.
+
+A binary log file can be specified with the <arg>binary-file</arg> argument.
+Messages are stored unformatted in a compact binary format, with the logging
+object, log type, level, log groups, current clock, cycle count, program
+counter, time in picoseconds and real time, regardless of the format settings.
+This is considerably faster than writing formatted text. The file is flushed
+when the simulation stops. It can be filtered and printed later, with any log
+format, by running <file>binary_log.py</file> with Python, or from Python
+using the <tt>binary_log</tt> module. <tt>-no-binary-file</tt> disables an
+existing binary log file. The <tt>-overwrite</tt> flag applies to the binary
+log file too.
+
 The <tt>-console</tt> and <tt>-no-console</tt> flags turn output from the
 log system to the command line console on or off.
 
@@ -1551,3 +1911,49 @@ class _test_logger_info(unittest.TestCase):
                 ch not in missing)])
             got = getattr(info, field)
             self.assertTrue(got, exp)
+
+    def test_compiled_format(self):
+        class Obj:
+            name = "dev"
+            log_groups = ["Default_Log_Group", "Regs", "Irq"]
+        obj = Obj()
+        try:
+            fmt = "{%o} %t/%l (%g): %m"
+            f = compile_log_format(fmt, True)
+            self.assertEqual(f(obj, "info", "msg", 2, 6),
+                             "{dev} info/2 (Regs, Irq): msg")
+            self.assertEqual(f(None, "trace", "msg", None, 0),
+                             "{} trace/ (): msg")
+        finally:
+            forget_log_object(None, obj)
+
+class _test_async_log_file(unittest.TestCase):
+    class Slow(AsyncLogFile):
+        # only write when asked to
+        flush_interval = 3600
+        max_pending = 10
+
+    def test_write(self):
+        f = io.StringIO()
+        a = AsyncLogFile(f)
+        lines = [f"line {i}\n" for i in range(1000)]
+        for line in lines:
+            a.write(line)
+        a.flush()
+        self.assertEqual(f.getvalue(), ''.join(lines))
+        a.write("last\n")
+        self.assertIs(a.detach(), f)
+        self.assertTrue(f.getvalue().endswith("last\n"))
+
+    def test_dropped(self):
+        f = io.StringIO()
+        a = self.Slow(f)
+        a.write("abcdef\n")
+        a.write("ghijkl\n")
+        a.flush()
+        a.write("x\n")
+        a.detach()
+        self.assertEqual(a.dropped, 1)
+        self.assertEqual(f.getvalue().splitlines(),
+                         ["abcdef", "*** 1 log messages dropped:"
+                          " log file writing too slow ***", "x"])
@@ -15,6 +15,7 @@
 
 from dataclasses import dataclass
 from collections import namedtuple, defaultdict
+import bisect
 
 import cli
 import simics
@@ -211,6 +212,78 @@ def hits_to_table(addr_spec, paddr, route):
     return (msg, tgt.map_target_info.object if tgt.map_target_info else None)
 
 
+
+# Memory map snapshots
+#
+# What memory_map and probe_address find is remembered per map target, in
+# a MapSnapshot. The terminus regions found by memory_map are kept in a
+# RegionIndex, sorted on base address, so that any address range can be
+# looked up later without probing again. All snapshots are dropped when a
+# memory space map changes, when objects are created or deleted, and when
+# the simulation is started, since any of these can change the routing.
+# There is no notification when the internal state of a translator
+# changes, for example when one of its registers is written from the CLI
+# while the simulation is stopped, so the snapshots can be stale until the
+# next of these events. The command help says so.
+
+# A probed region. The probe covers the addresses from base up to, but not
+# including, next.
+Probe = namedtuple('Probe', 'base, top, device, offset, access, next, loop')
+
+class RegionIndex:
+    def __init__(self):
+        self.bases = []
+        self.probes = []
+
+    def lookup(self, addr, probe):
+        """Return the Probe for the region starting at addr, calling
+        probe(addr) to get it if addr has not been probed before."""
+        i = bisect.bisect_right(self.bases, addr) - 1
+        if i >= 0 and addr < self.probes[i].next:
+            p = self.probes[i]
+            if p.base == addr:
+                return p
+            # Same region, starting further in
+            offset = p.offset
+            if offset is not None:
+                offset += addr - p.base
+            return p._replace(base=addr, offset=offset)
+        p = probe(addr)
+        self.bases.insert(i + 1, addr)
+        self.probes.insert(i + 1, p)
+        return p
+
+class MapSnapshot:
+    def __init__(self):
+        # RegionIndex for each (flags, depth, atoms)
+        self.regions = {}
+        # probe_address hits for each (address, flags, inquiry, depth, atoms)
+        self.hits = {}
+
+_snapshots = {}
+
+def _map_target_key(mt):
+    if mt is None:
+        return None
+    return (mt.object, mt.port, mt.function, _map_target_key(mt.target))
+
+def map_snapshot(mt):
+    """Return the MapSnapshot for the map target mt"""
+    key = _map_target_key(mt)
+    snapshot = _snapshots.get(key)
+    if snapshot is None:
+        snapshot = _snapshots[key] = MapSnapshot()
+    return snapshot
+
+def drop_map_snapshots(*args):
+    _snapshots.clear()
+
+for hap in ("Core_Memory_Space_Map_Changed", "Core_Conf_Object_Create",
+            "Core_Conf_Object_Pre_Delete", "Core_Continuation"):
+    simics.SIM_hap_add_callback(hap, drop_map_snapshots, None)
+del hap
+
+
 def probe_address(mt, paddr, access=simics.Sim_Access_Read,
                   depth=None, inquiry=False, atoms={}):
     def map_target_info(mt):
@@ -315,6 +388,11 @@ def probe_address(mt, paddr, access=simics.Sim_Access_Read,
         raise cli.CliError(
             f"Invalid access '{access}', must be one of 'r', 'w' or 'x'")
 
+    key = (paddr, flags, inquiry, depth, frozenset(atoms.items()))
+    snapshot = map_snapshot(mt)
+    if key in snapshot.hits:
+        return list(snapshot.hits[key])
+
     hits = []
     trace_atom = simics.transaction_trace_atom_access_t(
             callback=atom_tracing_callback,
@@ -330,7 +408,8 @@ def probe_address(mt, paddr, access=simics.Sim_Access_Read,
     finally:
         simics.CORE_set_atom_tracing(pv)
 
-    return hits
+    snapshot.hits[key] = hits
+    return list(hits)
 
 
 def simple_atom_list():
@@ -479,6 +558,13 @@ that were inspected by the translator and possibly edited if the
 atom is a pointer.
 The <tt>Missed Atoms</tt> column displays transaction atoms
 that the translator tried to lookup but were absent in the transaction.
+
+The route found for an address is remembered until a memory map changes,
+objects are created or deleted, or the simulation is started. A change
+to the state of a translator while the simulation is stopped, for
+example a register written from the command line, is not noticed, and
+the command keeps reporting the earlier route until one of these events
+happens.
 """)
 
 
@@ -503,10 +589,7 @@ def memory_map(mt, cls=None, iface=None,
     else:
         flags = simics.Sim_Transaction_Fetch
 
-    memory_map = []
-    base = start
-    i = 0
-    while base < end and i < max_regions:
+    def probe(base):
         # We use probe_address to find the target of the address we're
         # currently looking at, which is the base of the region.
         #
@@ -530,17 +613,27 @@ def memory_map(mt, cls=None, iface=None,
         # caller has to decrement refcount and does it by calling
         # SIM_free_map_target()
         simics.SIM_free_map_target(tgt_info.terminus)
-        offset = tgt_info.offset
         size = 1 << 64 if tgt_info.size == 0 else tgt_info.size
-        access = tgt_info.access
-        port_space = device and tgt_info.in_port_space
-        top = base + size - 1
-        region = Region(base, top, device, offset, access)
-
-        if port_space:
-            base += 1  # port-spaces have strange behavior
+        if device and tgt_info.in_port_space:
+            next = base + 1  # port-spaces have strange behavior
         else:
-            base += size
+            next = base + size
+        return Probe(base, base + size - 1, device, tgt_info.offset,
+                     tgt_info.access, next, tgt_info.loop)
+
+    regions = map_snapshot(mt).regions
+    key = (flags, depth, frozenset(atoms.items()))
+    if key not in regions:
+        regions[key] = RegionIndex()
+    index = regions[key]
+
+    memory_map = []
+    base = start
+    i = 0
+    while base < end and i < max_regions:
+        p = index.lookup(base, probe)
+        region = Region(p.base, p.top, p.device, p.offset, p.access)
+        base = p.next
 
         i += 1
         if region.device is None:
@@ -551,7 +644,7 @@ def memory_map(mt, cls=None, iface=None,
             continue
         if substr and not obj_cls_name_match(substr, region.device.object.name):
             continue
-        if tgt_info.loop:
+        if p.loop:
             continue
         if cls and not region.device.object.classname == cls:
             continue
@@ -816,7 +909,13 @@ in future Simics versions, but the currently defined fields will not change.
 Please note that the command can in some cases take a long time to execute.
 Long execution times happen when there is a high occurrence of small map segments
 in a platform. The <cmd>memory-map</cmd> command has to iterate over all
-these segments.
+these segments. The segments found are remembered until a memory map
+changes, objects are created or deleted, or the simulation is started,
+so repeating the command, or viewing other parts of the same map, is
+faster. A change to the state of a translator while the simulation is
+stopped, for example a register written from the command line, is not
+noticed, and the command keeps reporting the earlier map until one of
+these events happens.
 """}
 
 def memory_map_cmd_local(obj, cls, iface, access_flags, recurse_flags,
@@ -12,7 +12,10 @@
 import contextlib
 from functools import partial
 import os
+import queue
 import re
+import threading
+import time
 from binascii import hexlify
 
 import cli
@@ -62,7 +65,10 @@ from cli import (
     sb_wait,
 )
 
-from sim_commands import physmem_source
+from sim_commands import (
+    abbrev_size,
+    physmem_source,
+)
 
 # This ensures that the integer string conversion length limitation in Python is
 # not hit, and it also avoids getting other memory-related exceptions.
@@ -1233,7 +1239,91 @@ def check_file_exists(filename, overwrite):
     if not overwrite and os.path.exists(filename):
         raise CliError("File %s already exists." % filename)
 
-def name_space_save_file_cmd(obj, filename, start, length, overwrite):
+# save-file reads memory spaces in aligned chunks of at most
+# SAVE_FILE_MAX_CHUNK bytes. A read that fails, e.g. because it reaches
+# an unmapped range, is retried with smaller chunks, down to
+# SAVE_FILE_MIN_CHUNK bytes, before giving up. Images are read a run of
+# allocated pages at a time, and pages that are not allocated are left as
+# holes in the file.
+SAVE_FILE_MAX_CHUNK = 1 << 20
+SAVE_FILE_MIN_CHUNK = 1 << 10
+IMAGE_PAGE_SIZE = 0x1000  # smallest image page size
+
+def space_chunks(obj, start, length):
+    chunk = SAVE_FILE_MAX_CHUNK
+    addr = start
+    final = start + length
+    while addr < final:
+        l = min(final - addr, chunk - (addr & (chunk - 1)))
+        try:
+            data = read_space_or_image(obj, addr, l)
+        except CliError:
+            if chunk == SAVE_FILE_MIN_CHUNK:
+                raise
+            chunk //= 4
+            continue
+        yield (addr, data)
+        addr += l
+        if chunk < SAVE_FILE_MAX_CHUNK and addr & (chunk * 4 - 1) == 0:
+            chunk *= 4
+
+def image_chunks(obj, start, length):
+    final = start + length
+    def next_page(addr):
+        return min((addr | (IMAGE_PAGE_SIZE - 1)) + 1, final)
+    addr = start
+    while addr < final:
+        if not simics.CORE_image_page_exists(obj, addr):
+            addr = next_page(addr)
+            continue
+        end = next_page(addr)
+        while (end < final and end - addr < SAVE_FILE_MAX_CHUNK
+               and simics.CORE_image_page_exists(obj, end)):
+            end = next_page(end)
+        yield (addr, read_space_or_image(obj, addr, end - addr))
+        addr = end
+
+def write_chunks(f, start, chunks):
+    for (addr, data) in chunks:
+        f.seek(addr - start)
+        f.write(data)
+
+def write_chunks_in_background(f, start, chunks):
+    # As write_chunks, but the file is written by a separate thread, so
+    # that reading the next chunk overlaps with writing the previous one
+    pending = queue.Queue(maxsize = 8)
+    errors = []
+    def writer():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if not errors:
+                try:
+                    write_chunks(f, start, [item])
+                except Exception as ex:
+                    errors.append(ex)
+    thread = threading.Thread(target = writer, name = 'save-file writer',
+                              daemon = True)
+    thread.start()
+    try:
+        for item in chunks:
+            if errors:
+                break
+            pending.put(item)
+    finally:
+        pending.put(None)
+        thread.join()
+    if errors:
+        raise errors[0]
+
+def transfer_stats(length, seconds):
+    return "%s in %.2f s, %s/s" % (abbrev_size(length), seconds,
+                                   abbrev_size(int(length / max(seconds,
+                                                                1e-6))))
+
+def name_space_save_file_cmd(obj, filename, start, length, overwrite,
+                             threaded = False, verbose = False):
     check_file_exists(filename, overwrite)
     obj_is_image = hasattr(obj.iface, 'image')
     check_outside_mem_space_or_image(obj, start, length, obj_is_image)
@@ -1241,22 +1331,36 @@ def name_space_save_file_cmd(obj, filename, start, length, overwrite):
         f = open(filename, 'wb')
     except Exception as ex:
         raise CliError("Failed to open file '%s': %s" % (filename, ex))
+    t = time.perf_counter()
     with f:
-        addr = start
-        while addr < start + length:
-            l = min(start + length - addr, 1024)
-            f.write(read_space_or_image(obj, addr, l))
-            addr += l
-    return command_return("Image contents saved to %s file." % filename)
-
-def save_file_cmd(mem, filename, start, length, overwrite):
+        if obj_is_image:
+            chunks = image_chunks(obj, start, length)
+        else:
+            chunks = space_chunks(obj, start, length)
+        try:
+            if threaded:
+                write_chunks_in_background(f, start, chunks)
+            else:
+                write_chunks(f, start, chunks)
+            # Extend the file over any trailing unallocated pages
+            f.truncate(length)
+        except OSError as ex:
+            raise CliError("Failed writing to file '%s': %s" % (filename, ex))
+    msg = "Image contents saved to %s file." % filename
+    if verbose:
+        msg += " (%s)" % transfer_stats(length, time.perf_counter() - t)
+    return command_return(msg)
+
+def save_file_cmd(mem, filename, start, length, overwrite, threaded = False,
+                  verbose = False):
     check_file_exists(filename, overwrite)
     if not mem or hasattr(mem.iface, 'processor_info'):
         cpu = mem if mem else current_cpu_obj()
         mem = cpu.iface.processor_info.get_physical_memory()
         if not mem:
             raise CliError(f"No physical memory associated with {cpu.name}")
-    return name_space_save_file_cmd(mem, filename, start, length, overwrite)
+    return name_space_save_file_cmd(mem, filename, start, length, overwrite,
+                                    threaded, verbose)
 
 new_command("save-file", save_file_cmd,
             [arg(obj_t('object', ('processor_info', 'memory_space', 'image')),
@@ -1264,7 +1368,9 @@ new_command("save-file", save_file_cmd,
              arg(filename_t(), "filename"),
              arg(uint64_t, "start"),
              arg(uint64_t, "length"),
-             arg(flag_t, "-overwrite")],
+             arg(flag_t, "-overwrite"),
+             arg(flag_t, "-threaded"),
+             arg(flag_t, "-v")],
             type = ["Memory"],
             short = "save memory contents to a binary file",
             see_also = ["load-file", "<image>.save", "save-image-contents"],
@@ -1275,6 +1381,13 @@ Saves the contents of a memory region, defined by <arg>start</arg> address and
 The command will fail if the destination file already exists, unless
 <tt>-overwrite</tt> is specified.
 
+Memory is read in large chunks. Pages that are not allocated in an
+image are not written, but left as holes in the file, which take no disk
+space on file systems supporting sparse files. With <tt>-threaded</tt>,
+the file is written by a separate thread, so that writing overlaps with
+reading memory. With <tt>-v</tt>, the amount of data saved and the
+throughput is reported.
+
 The non-namespace version of the command uses the specified
 <arg>object</arg>, with the default being the current frontend
 processor's physical memory space. The <cmd
@@ -1288,7 +1401,9 @@ for ns in ["memory_space", "image"]:
                 [arg(filename_t(), "filename"),
                  arg(uint64_t, "start"),
                  arg(uint64_t, "length"),
-                 arg(flag_t, "-overwrite")],
+                 arg(flag_t, "-overwrite"),
+                 arg(flag_t, "-threaded"),
+                 arg(flag_t, "-v")],
                 type = ["Memory", "Disks"],
                 iface = ns,
                 short = "save memory contents to a binary file",
@@ -1299,25 +1414,35 @@ for ns in ["memory_space", "image"]:
 # -------------------- load-file --------------------
 #
 
-def name_space_load_file_cmd(obj, the_file, base_address):
+def name_space_load_file_cmd(obj, the_file, base_address, verbose = False):
+    t = time.perf_counter()
     try:
         simics.SIM_load_file(obj, the_file, base_address, 0)
     except simics.SimExc_General as ex:
         raise CliError(str(ex))
-
-def load_file_cmd(mem, the_file, base_address):
+    if verbose:
+        try:
+            length = os.path.getsize(SIM_lookup_file(the_file) or the_file)
+        except OSError:
+            return
+        return command_return("Loaded %s into %s (%s)." % (
+            the_file, obj.name,
+            transfer_stats(length, time.perf_counter() - t)))
+
+def load_file_cmd(mem, the_file, base_address, verbose = False):
     if not mem or hasattr(mem.iface, 'processor_info'):
         cpu = mem if mem else current_cpu_obj()
         mem = cpu.iface.processor_info.get_physical_memory()
         if not mem:
             raise CliError(f"No physical memory associated with {cpu.name}")
-    name_space_load_file_cmd(mem, the_file, base_address)
+    return name_space_load_file_cmd(mem, the_file, base_address, verbose)
 
 new_command("load-file", load_file_cmd,
             [arg(obj_t('object', ('processor_info', 'memory_space', 'image')),
                  "object", "?"),
              arg(filename_t(exist = 1, simpath = 1), "filename"),
-             arg(uint64_t, "offset", "?", 0)],
+             arg(uint64_t, "offset", "?", 0),
+             arg(flag_t, "-v")],
             type  = ["Memory"],
             see_also = ["load-binary", "add-directory"],
             short = "load file into memory",
@@ -1328,7 +1453,8 @@ frontend processor's physical memory space), starting at physical
 address <arg>offset</arg>. Default offset is 0.
 
 The file specified by <arg>filename</arg> can be either a raw binary
-file or a file in the craff format.
+file or a file in the craff format. With <tt>-v</tt>, the size of the
+file and the throughput is reported.
 
 The name space versions of the <cmd>load-file</cmd> command can be used to
 load a file directly into a memory space or into an image object.
@@ -1341,14 +1467,16 @@ for more information on how Simics's Search Path is used to locate files.
 
 new_command("load-file", name_space_load_file_cmd,
             [arg(filename_t(exist = 1, simpath = 1), "filename"),
-             arg(uint64_t, "offset", "?", 0)],
+             arg(uint64_t, "offset", "?", 0),
+             arg(flag_t, "-v")],
             iface = "memory_space",
             short = "load file into memory",
             doc_with = "load-file")
 
 new_command("load-file", name_space_load_file_cmd,
             [arg(filename_t(exist = 1, simpath = 1), "filename"),
-             arg(uint64_t, "offset", "?", 0)],
+             arg(uint64_t, "offset", "?", 0),
+             arg(flag_t, "-v")],
             iface = "image",
             short = "load file into an image",
             doc_with = "load-file")
@@ -1532,10 +1660,10 @@ def write_space_or_image(obj, addr, byte_list,
             return obj.iface.transaction.issue(t, addr)
         elif hasattr(obj.iface, simics.MEMORY_SPACE_INTERFACE):
             return obj.iface.memory_space.write(initiator, addr,
-                                                byte_list, inquiry)
+                                                tuple(byte_list), inquiry)
         elif hasattr(obj.iface, simics.PORT_SPACE_INTERFACE):
-            return obj.iface.port_space.write(initiator, addr, byte_list,
-                                              inquiry)
+            return obj.iface.port_space.write(initiator, addr,
+                                              tuple(byte_list), inquiry)
         else:
             raise Exception(
                 f"{obj.name} ({obj.classname}) isn't 'image' or 'memory-space'")
@@ -1743,23 +1871,36 @@ def check_hex_byte_cnt(byte_count, expected, field, line_number):
         raise CliError('Byte count should be %d in %s record on line %d'
                        % (expected, field, line_number))
 
+def decode_record(filename, line, line_number, prefix):
+    # The bytes of a hex encoded record following prefix
+    try:
+        if line[:len(prefix)] in (prefix, prefix.lower()):
+            return bytes.fromhex(line[len(prefix):])
+    except ValueError:
+        pass
+    raise CliError('Malformed data in file %s on line %d.' %
+                   (filename, line_number))
+
 def parse_hex_file_line(filename, line, line_number):
-    if not re.match(':[0-9a-fA-F]{10,}', line):
+    record = decode_record(filename, line, line_number, ':')
+    if len(record) < 5:
         raise CliError('Malformed data in file %s on line %d.' %
                        (filename, line_number))
 
-    byte_count = int(line[1:3], 16)
-    address = int(line[3:7], 16)
-    record_type = int(line[7:9], 16)
-    checksum = int(line[-2:], 16)
-    data = line[9:-2]
+    byte_count = record[0]
+    address = int.from_bytes(record[1:3], 'big')
+    record_type = record[3]
+    checksum = record[-1]
+    data = record[4:-1]
 
-    line_checksum = hex_file_checksum(line)
-    if line_checksum != checksum:
+    if sum(record) & 0xff:
+        line_checksum = -sum(record[:-1]) & 0xff
         raise CliError("Incorrect checksum 0x%x on line %d (expected 0x%x)"
                        % (checksum, line_number, line_checksum))
 
-    if record_type == 1:
+    if record_type == 0:
+        pass
+    elif record_type == 1:
         check_hex_byte_cnt(byte_count, 0, "end of file", line_number)
     elif record_type == 2:
         check_hex_byte_cnt(byte_count, 2, "ext. segment address", line_number)
@@ -1772,13 +1913,103 @@ def parse_hex_file_line(filename, line, line_number):
     elif record_type != 0:
         raise CliError("Unsupported record type %d in file %s on line %d"
                        % (record_type, filename, line_number))
-    if len(data) != byte_count * 2:
+    if len(data) != byte_count:
         raise CliError("Incorrect data length in file %s on line %d"
                        % (filename, line_number))
 
     return (record_type, address, data)
 
-def name_space_load_intel_hex_cmd(obj, filename):
+def intel_hex_data(filename, lines):
+    """Yield (address, data) for the data records in the lines of an Intel
+    HEX file."""
+    got_eof = False
+    high_address = 0
+    low_address = 0
+    for (line_number, line) in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        (record_type, data_address, data) = parse_hex_file_line(
+            filename, line, line_number)
+        if record_type == 1:
+            got_eof = True
+        elif record_type == 2:
+            # extended segment address
+            low_address = int.from_bytes(data, 'big') << 4
+        elif record_type == 4:
+            # extended linear address
+            high_address = int.from_bytes(data, 'big') << 16
+        elif record_type == 0:
+            # data
+            yield (high_address | (low_address + data_address), data)
+    if not got_eof:
+        raise CliError("No end of file record found in %s" % filename)
+
+# Address length in bytes of each S-record type. S4 is reserved.
+srec_address_size = {0: 2, 1: 2, 2: 3, 3: 4, 5: 2, 6: 3, 7: 4, 8: 3, 9: 2}
+
+def parse_srec_line(filename, line, line_number):
+    record_type = int(line[1]) if line[1:2].isdigit() else None
+    if record_type not in srec_address_size:
+        raise CliError("Unsupported record type %s in file %s on line %d"
+                       % (line[:2], filename, line_number))
+    record = decode_record(filename, line, line_number, line[:2].upper())
+    address_size = srec_address_size[record_type]
+    if len(record) < address_size + 2:
+        raise CliError('Malformed data in file %s on line %d.' %
+                       (filename, line_number))
+    if record[0] != len(record) - 1:
+        raise CliError("Incorrect data length in file %s on line %d"
+                       % (filename, line_number))
+
+    checksum = record[-1]
+    if sum(record) & 0xff != 0xff:
+        line_checksum = ~sum(record[:-1]) & 0xff
+        raise CliError("Incorrect checksum 0x%x on line %d (expected 0x%x)"
+                       % (checksum, line_number, line_checksum))
+
+    address = int.from_bytes(record[1:1 + address_size], 'big')
+    return (record_type, address, record[1 + address_size:-1])
+
+def srec_data(filename, lines):
+    """Yield (address, data) for the data records (S1, S2 and S3) in the
+    lines of a Motorola S-record file."""
+    for (line_number, line) in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        (record_type, address, data) = parse_srec_line(
+            filename, line, line_number)
+        if record_type in (1, 2, 3):
+            yield (address, data)
+
+class CoalescingWriter:
+    """Collects data written to consecutive addresses, and writes it to
+    obj in blocks of up to max_size bytes."""
+    max_size = 1 << 20
+
+    def __init__(self, obj, write = write_space_or_image):
+        self.obj = obj
+        self.write = write
+        self.address = 0
+        self.data = bytearray()
+
+    def add(self, address, data):
+        if self.data and (address != self.address + len(self.data)
+                          or len(self.data) >= self.max_size):
+            self.flush()
+        if not self.data:
+            self.address = address
+        self.data += data
+
+    def flush(self):
+        if self.data:
+            (data, self.data) = (self.data, bytearray())
+            self.write(self.obj, self.address, bytes(data))
+
+def load_records_file(obj, filename, records):
     actual_file = SIM_lookup_file(filename)
     if not actual_file:
         raise CliError("File %s not found in search path" % filename)
@@ -1787,33 +2018,17 @@ def name_space_load_intel_hex_cmd(obj, filename):
     except Exception as ex:
         raise CliError("Failed to open file '%s': %s" % (filename, ex))
 
-    got_eof = False
-    high_address = 0
-    low_address = 0
-
+    writer = CoalescingWriter(obj)
     with f:
-        for (line_number, line) in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
+        try:
+            for (address, data) in records(filename, f):
+                writer.add(address, data)
+        finally:
+            # Data before a malformed line is still loaded
+            writer.flush()
 
-            (record_type, data_address, data) = parse_hex_file_line(
-                filename, line, line_number)
-            if record_type == 1:
-                got_eof = True
-            elif record_type == 2:
-                # extended segment address
-                low_address = int(data, 16) << 4
-            elif record_type == 4:
-                # extended linear address
-                high_address = int(data, 16) << 16
-            elif record_type == 0:
-                # data
-                addr = high_address | (low_address + data_address)
-                seq = [int(data[i:i+2], 16) for i in range(0, len(data), 2)]
-                write_space_or_image(obj, addr, tuple(seq))
-        if not got_eof:
-            raise CliError("No end of file record found in %s" % filename)
+def name_space_load_intel_hex_cmd(obj, filename):
+    load_records_file(obj, filename, intel_hex_data)
 
 def load_intel_hex_cmd(mem, filename):
     if not mem or hasattr(mem.iface, 'processor_info'):
@@ -1830,7 +2045,8 @@ new_command("load-intel-hex", load_intel_hex_cmd,
             type = ["Memory"],
             short = "load Intel HEX file into memory",
             see_also = ["load-binary", "load-file", "load-intel-obj",
-                        "<memory_space>.load-intel-hex", "add-directory"],
+                        "load-srec", "<memory_space>.load-intel-hex",
+                        "add-directory"],
             doc = """
 Loads the contents of the file named <arg>filename</arg> into the
 memory specified by <arg>object</arg> (defaulting to the current
@@ -1861,6 +2077,60 @@ new_command("load-intel-hex", name_space_load_intel_hex_cmd,
                         "load-intel-obj", "add-directory"],
             doc_with = "load-intel-hex")
 
+#
+# -------------------- load-srec --------------------
+#
+
+def name_space_load_srec_cmd(obj, filename):
+    load_records_file(obj, filename, srec_data)
+
+def load_srec_cmd(mem, filename):
+    if not mem or hasattr(mem.iface, 'processor_info'):
+        cpu = mem if mem else current_cpu_obj()
+        mem = cpu.iface.processor_info.get_physical_memory()
+        if not mem:
+            raise CliError(f"No physical memory associated with {cpu.name}")
+    name_space_load_srec_cmd(mem, filename)
+
+new_command("load-srec", load_srec_cmd,
+            [arg(obj_t('object', ('processor_info', 'memory_space', 'image')),
+                 "object", "?"),
+             arg(filename_t(exist = 1, simpath = 1), "filename")],
+            type = ["Memory"],
+            short = "load Motorola S-record file into memory",
+            see_also = ["load-binary", "load-file", "load-intel-hex",
+                        "add-directory"],
+            doc = """
+Loads the contents of the file named <arg>filename</arg> into the
+memory specified by <arg>object</arg> (defaulting to the current
+frontend processor's physical memory space). The file is assumed to be
+in the Motorola S-record format. Data in S1, S2 and S3 records is
+loaded; all other records are checked but otherwise ignored.
+
+<cmd>load-srec</cmd> uses Simics's Search Path and path markers (%simics%,
+%script%) to find the file to load. Refer to <cite>The Command Line
+Interface</cite> chapter of the <cite>Simics User's Guide</cite> manual
+for more information on how Simics's Search Path is used to locate files.
+""")
+
+new_command("load-srec", name_space_load_srec_cmd,
+            [arg(filename_t(exist = 1, simpath = 1), "filename")],
+            type = ["Memory"],
+            iface = "memory_space",
+            short = "load Motorola S-record file into memory",
+            see_also = ["load-binary", "load-file", "load-intel-hex",
+                        "load-srec", "add-directory"],
+            doc_with = "load-srec")
+
+new_command("load-srec", name_space_load_srec_cmd,
+            [arg(filename_t(exist = 1, simpath = 1), "filename")],
+            type = ["Image"],
+            iface = "image",
+            short = "load Motorola S-record file into an image",
+            see_also = ["load-binary", "load-file", "load-intel-hex",
+                        "load-srec", "add-directory"],
+            doc_with = "load-srec")
+
 def load_vmem_cmd(obj, filename, start, word_size, be):
     def parse_vmem_line(filename, line, line_number):
         match = re.match(r'(@(?P<address>[0-9a-fA-F]+))?'
@@ -2108,3 +2378,10 @@ anywhere between 1 and 8 inclusive.
 The <tt>-l</tt> and <tt>-b</tt> flags are used to select little-endian and
 big-endian byte order, respectively. If neither is given, the byte order of the
 currently selected processor is used.""")
+
+# The unit tests live in test_mem_commands.py, so that they are not compiled
+# on every Simics start. This hook lets unittest find them through this
+# module.
+def load_tests(loader, tests, pattern):
+    import test_mem_commands
+    return loader.loadTestsFromModule(test_mem_commands)
@@ -11,6 +11,10 @@
 
 import struct
 import binascii
+import bisect
+import json
+import mmap
+import os
 
 class PcapFileException(Exception): pass
 
@@ -39,6 +43,16 @@ class pcaprec_hdr:
         self.orig_len = orig_len
         self.has_nano_sec = has_nano_sec
 
+    @classmethod
+    def from_values(cls, ts_sec, ts_usec, incl_len, orig_len, has_nano_sec):
+        hdr = cls.__new__(cls)
+        hdr.ts_sec = ts_sec
+        hdr.ts_usec = ts_usec
+        hdr.incl_len = incl_len
+        hdr.orig_len = orig_len
+        hdr.has_nano_sec = has_nano_sec
+        return hdr
+
 class Packet:
     def __init__(self, header, data):
         self.header = header
@@ -68,49 +82,340 @@ class Packet:
     def has_nano_sec_resolution(self):
         return self.header.has_nano_sec
 
-def parse_pcap(filename):
-    def nextPacket(file, has_nano_sec):
-        header_data = file.read(pcaprec_hdr.size)
-        if not header_data:
-            return None
-        hdr = pcaprec_hdr(header_data, byte_order, has_nano_sec)
-        packet_data = file.read(hdr.incl_len)
-        if not packet_data:
-            raise PcapFileException("pcap file truncated")
-        return Packet(hdr, packet_data)
-
-    packets = []
-
-    try:
-        f = open(filename, 'rb')
-    except IOError:
-        raise PcapFileException("Failed to open %s" % filename)
-
-    ghdr_data = f.read(pcap_hdr.size)
-    if not ghdr_data:
-        raise PcapFileException("Failed reading global header from %s"
-                                % filename)
-    byte_order = "<"
-    global_header = pcap_hdr(ghdr_data, byte_order)
-    if (global_header.magic_number != 0xa1b2c3d4
-        # for nano-second support
-        and global_header.magic_number != 0xa1b23c4d):
-        byte_order = ">"
-        global_header = pcap_hdr(ghdr_data, byte_order)
-        if (global_header.magic_number != 0xa1b2c3d4
-            and global_header.magic_number != 0xa1b23c4d):
+class PacketView:
+    """A packet read by PcapReader. The data attribute is a memoryview into
+    the mapped file, which is only valid until the reader is closed. The
+    timestamp is ts_sec seconds plus ts_usec micro-seconds, or nano-seconds
+    if has_nano_sec is set. Packets read from pcapng files always have
+    nano-second resolution."""
+    __slots__ = ('ts_sec', 'ts_usec', 'has_nano_sec', 'orig_len', 'data',
+                 'interface', 'network')
+
+    def __init__(self, ts_sec, ts_usec, has_nano_sec, orig_len, data,
+                 interface, network):
+        self.ts_sec = ts_sec
+        self.ts_usec = ts_usec
+        self.has_nano_sec = has_nano_sec
+        self.orig_len = orig_len
+        self.data = data
+        self.interface = interface
+        self.network = network
+
+    def get_time(self):
+        return (float(self.ts_sec)
+                + ((float(self.ts_usec) / 1000000000.0) \
+                if self.has_nano_sec else \
+                   (float(self.ts_usec) / 1000000.0)))
+
+    def get_time_ns(self):
+        return self.ts_sec * 1000000000 + (
+            self.ts_usec if self.has_nano_sec else self.ts_usec * 1000)
+
+    def to_packet(self):
+        """Return a Packet with a copy of the data"""
+        return Packet(pcaprec_hdr.from_values(
+            self.ts_sec, self.ts_usec, len(self.data), self.orig_len,
+            self.has_nano_sec), bytes(self.data))
+
+# pcapng block types
+pcapng_shb = 0x0a0d0d0a
+pcapng_idb = 1
+pcapng_pb = 2
+pcapng_spb = 3
+pcapng_epb = 6
+
+# pcapng interface description option codes
+if_tsresol = 9
+if_tsoffset = 14
+
+class _PcapngInterface:
+    __slots__ = ('network', 'snaplen', 'tsresol', 'tsoffset')
+    def __init__(self, network, snaplen, tsresol = 6, tsoffset = 0):
+        self.network = network
+        self.snaplen = snaplen
+        self.tsresol = tsresol
+        self.tsoffset = tsoffset
+
+    def time_ns(self, ts):
+        if self.tsresol & 0x80:
+            ns = (ts * 1000000000) >> (self.tsresol & 0x7f)
+        elif self.tsresol <= 9:
+            ns = ts * 10 ** (9 - self.tsresol)
+        else:
+            ns = ts // 10 ** (self.tsresol - 9)
+        return ns + self.tsoffset * 1000000000
+
+class _PcapngSection:
+    __slots__ = ('offset', 'byte_order', 'interfaces')
+    def __init__(self, offset, byte_order, interfaces):
+        self.offset = offset
+        self.byte_order = byte_order
+        self.interfaces = interfaces
+
+class PcapReader:
+    """Lazily read packets from a pcap or pcapng file.
+
+    The file is memory mapped, and iterating over the reader yields
+    PacketView objects referring directly into the mapping, so memory use
+    does not depend on the size of the capture. Iteration starts at the
+    first packet, or at the position selected by the last call to seek.
+
+    Seeking scans the file from the start, unless a sidecar index has been
+    created with write_index. The index is stored next to the capture, in
+    a file with the same name and an .idx suffix, and is ignored if the
+    capture has been modified since it was created.
+
+    The reader should be closed, or used as a context manager, when
+    done. Packet data must not be used after that."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.index_filename = filename + '.idx'
+        try:
+            f = open(filename, 'rb')
+        except IOError:
+            raise PcapFileException("Failed to open %s" % filename)
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_size < pcap_hdr.size:
+                raise PcapFileException("Failed reading global header from %s"
+                                        % filename)
+            self.__map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        self.__stamp = [st.st_size, st.st_mtime_ns]
+        self.__view = memoryview(self.__map)
+        self.__index = None
+        if self.__map[:4] == b'\x0a\x0d\x0d\x0a':
+            self.is_pcapng = True
+            self.__first = (0, None)
+        else:
+            self.is_pcapng = False
+            self.__read_pcap_header()
+            self.__first = (pcap_hdr.size, None)
+        self.__start = self.__first
+
+    def __read_pcap_header(self):
+        for byte_order in '<>':
+            self.global_header = pcap_hdr(self.__map, byte_order)
+            if self.global_header.magic_number in (0xa1b2c3d4, 0xa1b23c4d):
+                break
+        else:
             raise PcapFileException("pcap magic mismatch")
+        self.__byte_order = byte_order
+        self.__has_nano_sec = self.global_header.magic_number == 0xa1b23c4d
+
+    def close(self):
+        if self.__map is None:
+            return
+        self.__view.release()
+        try:
+            self.__map.close()
+        except BufferError:
+            # Packet data is still referenced; the mapping is released
+            # when the last view is garbage collected
+            pass
+        self.__map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
-    if global_header.magic_number == 0xa1b2c3d4:
-        has_nano_sec = False
-    else: # global_header.magic_number == 0xa1b23c4d:
-        has_nano_sec = True
+    def __iter__(self):
+        for (_, _, packet) in self.__packets(*self.__start):
+            yield packet
 
-    while True:
-        packet = nextPacket(f, has_nano_sec)
-        if packet == None:
-            break
-        packets.append(packet)
+    def __packets(self, pos, section):
+        """Yield (offset, section, packet) tuples, starting with the packet
+        at offset pos. For pcapng files, section is the section that pos is
+        in, or None if pos is the start of a section."""
+        if self.is_pcapng:
+            return self.__pcapng_packets(pos, section)
+        else:
+            return self.__pcap_packets(pos)
 
-    f.close()
-    return packets
+    def __pcap_packets(self, pos):
+        m = self.__map
+        view = self.__view
+        size = len(m)
+        rec_fmt = struct.Struct(self.__byte_order + 'IIII')
+        has_nano_sec = self.__has_nano_sec
+        network = self.global_header.network
+        while pos < size:
+            if pos + pcaprec_hdr.size > size:
+                raise PcapFileException("pcap file truncated")
+            (ts_sec, ts_usec, incl_len, orig_len) = rec_fmt.unpack_from(m, pos)
+            data = pos + pcaprec_hdr.size
+            if data + incl_len > size:
+                raise PcapFileException("pcap file truncated")
+            yield (pos, None, PacketView(ts_sec, ts_usec, has_nano_sec,
+                                         orig_len, view[data:data + incl_len],
+                                         0, network))
+            pos = data + incl_len
+
+    def __pcapng_section(self, pos):
+        magic = self.__map[pos + 8:pos + 12]
+        if magic == b'\x4d\x3c\x2b\x1a':
+            byte_order = '<'
+        elif magic == b'\x1a\x2b\x3c\x4d':
+            byte_order = '>'
+        else:
+            raise PcapFileException("pcapng byte-order magic mismatch")
+        return _PcapngSection(pos, byte_order, [])
+
+    def __pcapng_interface(self, section, pos, end):
+        m = self.__map
+        byte_order = section.byte_order
+        (network, _, snaplen) = struct.unpack_from(byte_order + 'HHI', m, pos)
+        iface = _PcapngInterface(network, snaplen)
+        pos += 8
+        while pos + 4 <= end:
+            (code, length) = struct.unpack_from(byte_order + 'HH', m, pos)
+            if code == 0:
+                break
+            if code == if_tsresol and length >= 1:
+                iface.tsresol = m[pos + 4]
+            elif code == if_tsoffset and length >= 8:
+                (iface.tsoffset,) = struct.unpack_from(byte_order + 'q', m,
+                                                       pos + 4)
+            pos += 4 + ((length + 3) & ~3)
+        section.interfaces.append(iface)
+
+    def __pcapng_packets(self, pos, section):
+        m = self.__map
+        view = self.__view
+        size = len(m)
+        while pos < size:
+            if pos + 12 > size:
+                raise PcapFileException("pcapng file truncated")
+            if section is None or m[pos:pos + 4] == b'\x0a\x0d\x0d\x0a':
+                section = self.__pcapng_section(pos)
+            byte_order = section.byte_order
+            (block_type, block_len) = struct.unpack_from(byte_order + 'II',
+                                                         m, pos)
+            if block_len < 12 or block_len & 3:
+                raise PcapFileException("bad pcapng block at offset %d" % pos)
+            end = pos + block_len
+            if end > size:
+                raise PcapFileException("pcapng file truncated")
+            body = pos + 8
+            if block_type == pcapng_epb:
+                (iface, ts_high, ts_low, caplen,
+                 orig_len) = struct.unpack_from(byte_order + 'IIIII', m, body)
+                data = body + 20
+            elif block_type == pcapng_spb:
+                (orig_len,) = struct.unpack_from(byte_order + 'I', m, body)
+                iface = 0
+                data = body + 4
+                caplen = min(orig_len, end - 4 - data)
+                if section.interfaces and section.interfaces[0].snaplen:
+                    caplen = min(caplen, section.interfaces[0].snaplen)
+                ts_high = ts_low = 0
+            elif block_type == pcapng_pb:
+                (iface, _, ts_high, ts_low, caplen,
+                 orig_len) = struct.unpack_from(byte_order + 'HHIIII', m, body)
+                data = body + 20
+            else:
+                if block_type == pcapng_idb:
+                    self.__pcapng_interface(section, body, end - 4)
+                pos = end
+                continue
+            if iface >= len(section.interfaces):
+                raise PcapFileException(
+                    "pcapng packet at offset %d refers to undefined"
+                    " interface %d" % (pos, iface))
+            if data + caplen > end - 4:
+                raise PcapFileException("bad pcapng block at offset %d" % pos)
+            interface = section.interfaces[iface]
+            (ts_sec, ts_nsec) = divmod(
+                interface.time_ns((ts_high << 32) | ts_low), 1000000000)
+            yield (pos, section, PacketView(ts_sec, ts_nsec, True, orig_len,
+                                            view[data:data + caplen], iface,
+                                            interface.network))
+            pos = end
+
+    def seek(self, time):
+        """Make iteration start at the first packet with a timestamp not
+        before time, in seconds. Assumes that timestamps are non-decreasing
+        throughout the file. Returns False if there is no such packet, in
+        which case iteration yields nothing."""
+        target = round(time * 1000000000)
+        (pos, section) = self.__first
+        index = self.__load_index()
+        if index:
+            (times, entries, sections) = index
+            i = bisect.bisect_left(times, target) - 1
+            if i >= 0:
+                (pos, section_no, num_interfaces) = entries[i]
+                if self.is_pcapng:
+                    (offset, byte_order, interfaces) = sections[section_no]
+                    section = _PcapngSection(
+                        offset, byte_order,
+                        [_PcapngInterface(*iface)
+                         for iface in interfaces[:num_interfaces]])
+        for (pos, section, packet) in self.__packets(pos, section):
+            if packet.get_time_ns() >= target:
+                self.__start = (pos, section)
+                return True
+        self.__start = (len(self.__map), None)
+        return False
+
+    def rewind(self):
+        """Make iteration start at the first packet again"""
+        self.__start = self.__first
+
+    def __load_index(self):
+        if self.__index is None:
+            self.__index = False
+            try:
+                with open(self.index_filename) as f:
+                    index = json.load(f)
+                if index['capture'] == self.__stamp:
+                    entries = index['entries']
+                    self.__index = ([e[0] for e in entries],
+                                    [e[1:] for e in entries],
+                                    index['sections'])
+            except (OSError, ValueError, KeyError, TypeError, IndexError):
+                pass
+        return self.__index
+
+    def write_index(self, step = 1024):
+        """Scan the file and write a sidecar index with the position of
+        every step:th packet, which makes subsequent seeks fast."""
+        entries = []
+        sections = []
+        section_numbers = {}
+        for (i, (pos, section, packet)) in enumerate(
+                self.__packets(*self.__first)):
+            if i % step:
+                continue
+            if section is None:
+                entries.append([packet.get_time_ns(), pos, 0, 0])
+                continue
+            if id(section) not in section_numbers:
+                section_numbers[id(section)] = len(sections)
+                sections.append(section)
+            entries.append([packet.get_time_ns(), pos,
+                            section_numbers[id(section)],
+                            len(section.interfaces)])
+        index = {
+            'capture': self.__stamp,
+            'step': step,
+            'entries': entries,
+            # interfaces can be added anywhere in a section, so the index
+            # records all of them along with how many were known at each entry
+            'sections': [[s.offset, s.byte_order,
+                          [[i.network, i.snaplen, i.tsresol, i.tsoffset]
+                           for i in s.interfaces]] for s in sections],
+        }
+        with open(self.index_filename + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(self.index_filename + '.tmp', self.index_filename)
+        self.__index = None
+
+def parse_pcap(filename):
+    """Read all packets of a pcap or pcapng file into a list of Packet
+    objects. Use PcapReader to process large captures without reading them
+    into memory."""
+    with PcapReader(filename) as reader:
+        return [packet.to_packet() for packet in reader]
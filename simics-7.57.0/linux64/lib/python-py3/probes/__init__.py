@@ -46,6 +46,7 @@ from .probes import (
     CellFormatter)
 
 from .probe_cache import cached_probe_read  # Decorator class
+from .sampler import ProbeSampler
 
 # Define __all__ listing all names of identifiers you get with 'from table import *'
 # Also, having __all__ defined, makes help(table) produce lots of more info.
@@ -33,6 +33,7 @@ def create_probe_sketches():
         ("probe_image_mem",           "sim.probes.sim.image_mem"),
         ("probe_wallclock_time",      "sim.probes.sim.host_wallclock"),
         ("probe_module_profile",      "sim.probes.sim.module_profile"),
+        ("probe_instantiate_profile", "sim.probes.sim.instantiate_profile"),
         ("probe_mm_malloc",           "sim.probes.sim.malloc_debug"),
         ("probe_io_probes",           "sim.probes.sim.io_probes")]:
         objs += sketch.new(cls, obj)
@@ -398,6 +399,29 @@ class module_profile:
              (Probe_Key_Width, 40),
              (Probe_Key_Owner_Object, conf.sim)])
 
+class instantiate_profile:
+    cls = confclass("probe_instantiate_profile", pseudo = True,
+                    short_doc = "internal class",
+                    doc = "Probe class for component instantiation profiling.")
+
+    @cls.iface.probe
+    def value(self):
+        from component_commands import instantiate_phase_times
+        return [[p, t] for (p, t) in instantiate_phase_times.items()]
+
+    @cls.iface.probe
+    def properties(self):
+        return listify(
+            [(Probe_Key_Kind, "sim.instantiate_profile"),
+             (Probe_Key_Display_Name, "Instantiation profile"),
+             (Probe_Key_Type, "histogram"),
+             (Probe_Key_Description,
+              "Histogram of the host time in seconds spent in each phase of"
+              " component instantiation."),
+             (Probe_Key_Categories, ["performance", "components"]),
+             (Probe_Key_Width, 40),
+             (Probe_Key_Owner_Object, conf.sim)])
+
 
 # Helper classes implementing various mm- probes
 class mm_probe:
@@ -10,11 +10,12 @@
 # implied warranties, other than those that are expressly stated in the License.
 
 
+import functools
+import weakref
+
 from simics import *
 import conf
 
-import functools
-
 # Decorator for cached access of a probe. The method which used this
 # decorator, should only have a 'self' as an argument.
 #
@@ -29,7 +30,9 @@ import functools
 # This increments a generation id specific for this cached session.
 #
 # As long as the object has a cached value from the same generation
-# id, this cached value can be returned.
+# id, this cached value can be returned. Since a new sample always
+# starts a new generation, all cached values are invalidated at once
+# without touching them.
 #
 # When sampling is finished the probe_sampler_cache->disable()
 # will be called, causing the "not-cached" generation id of zero
@@ -38,33 +41,66 @@ import functools
 # If several probes should share the same cache, the method needs
 # to be put on a class with a singleton object, which is used to
 # share the probe value.
+#
+# The first time the method is looked up on an object, a reader holding
+# the cached value for that object is created and kept by the decorator,
+# keyed on the object's id. The reader only refers weakly to the object,
+# and is dropped when the object dies. Since the readers are kept per
+# decorator, a subclass overriding the method and calling super() gets
+# separate cached values for its own and the base class method. Like
+# ProbeArrayCache, the reader checks the generation id in the probes
+# object directly instead of calling the probe_sampler_cache interface.
+# Objects not supporting weak references are read without caching.
 class cached_probe_read:
-    __slots__ = ('read_func', 'cache', 'iface')
+    __slots__ = ('read_func', 'readers')
     def __init__(self, read_func):
         self.read_func = read_func
-        self.cache = {}         # {obj: (gen, value)}
-        # TODO: cache the interface here when the python code
-        # is loaded when enable-probes is executed.
-        self.iface = None
-
-    def generation_id(self):
-        if not self.iface:
-            self.iface = conf.probes.iface.probe_sampler_cache
-        return self.iface.get_generation()
+        self.readers = {}       # {id(obj): bound_cached_probe_read}
 
     def __call__(self, obj):
-        gen_ctr = self.generation_id()
-        if gen_ctr and obj in self.cache:
-            (cached_gen, cached_value) = self.cache[obj]
-            if gen_ctr == cached_gen:
-                return cached_value
-
-        value = self.read_func(obj)
-        if gen_ctr:
-            self.cache[obj] = (gen_ctr, value)
-        return value
+        # Called as a function on the class
+        return self.__get__(obj, type(obj))()
 
-    # Convert the instance to a method, which runs __call__
-    # and encapsulates the owning object as first argument.
+    # Convert the instance to a method, by returning the reader bound
+    # to the owning object
     def __get__(self, obj, cls):
-        return functools.partial(self.__call__, obj)
+        if obj is None:
+            return self
+        key = id(obj)
+        readers = self.readers
+        reader = readers.get(key)
+        if reader is not None and reader.obj_ref() is obj:
+            return reader
+        def forget(ref):
+            if key in readers and readers[key].obj_ref is ref:
+                del readers[key]
+        try:
+            obj_ref = weakref.ref(obj, forget)
+        except TypeError:
+            return functools.partial(self.read_func, obj)
+        reader = bound_cached_probe_read(self.read_func, obj_ref)
+        readers[key] = reader
+        return reader
+
+class bound_cached_probe_read:
+    __slots__ = ('read_func', 'obj_ref', 'controller', 'gen', 'value')
+    def __init__(self, read_func, obj_ref):
+        self.read_func = read_func
+        self.obj_ref = obj_ref
+        self.controller = None  # ProbesClass instance, looked up lazily
+        self.gen = 0
+        self.value = None
+
+    def __call__(self):
+        controller = self.controller
+        if controller is None:
+            controller = self.controller = conf.probes.object_data
+        if controller.cache_active:
+            gen_ctr = controller.cache_generation_id
+            if gen_ctr == self.gen:
+                return self.value
+            value = self.read_func(self.obj_ref())
+            self.gen = gen_ctr
+            self.value = value
+            return value
+        return self.read_func(self.obj_ref())
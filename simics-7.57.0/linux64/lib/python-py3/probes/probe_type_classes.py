@@ -112,6 +112,17 @@ class ProbeType(ABC):
             h[cls_str] += v
         return [[k, h[k]] for k in h]
 
+    @classmethod
+    def numeric_support(cls):
+        '''Returns True if numeric_value() can be used, False otherwise.'''
+        return False
+
+    @classmethod
+    def numeric_value(cls, value):
+        '''Returns the value as a float, used when storing probe values in
+        numeric arrays. Only called if numeric_support() returns True.'''
+        assert 0
+
 class IntValue(ProbeType):
     __slots__ = ()
 
@@ -149,6 +160,14 @@ class IntValue(ProbeType):
     def sorted(cls, value):
         assert 0
 
+    @classmethod
+    def numeric_support(cls):
+        return True
+
+    @classmethod
+    def numeric_value(cls, value):
+        return float(value)
+
     @classmethod
     def delta_support(cls):
         return True
@@ -221,6 +240,14 @@ class Int128Value(ProbeType):
     def sorted(cls, value):
         assert 0
 
+    @classmethod
+    def numeric_support(cls):
+        return True
+
+    @classmethod
+    def numeric_value(cls, value):
+        return float(cls._int128_attr_to_python(value))
+
     @classmethod
     def delta_support(cls):
         return True
@@ -312,6 +339,14 @@ class FloatValue(ProbeType):
     def sorted(cls, value):
         assert 0
 
+    @classmethod
+    def numeric_support(cls):
+        return True
+
+    @classmethod
+    def numeric_value(cls, value):
+        return float(value)
+
     @classmethod
     def delta_support(cls):
         return True
@@ -386,6 +421,16 @@ class FractionValue(ProbeType):
     def sorted(cls, value):
         assert 0
 
+    @classmethod
+    def numeric_support(cls):
+        return True
+
+    @classmethod
+    def numeric_value(cls, value):
+        if value[1]:
+            return float(value[0] / value[1])
+        return math.nan
+
     @classmethod
     def delta_support(cls):
         return True
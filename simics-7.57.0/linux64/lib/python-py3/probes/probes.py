@@ -30,6 +30,9 @@ from . import sketch
 from .probe_proxy import (IfaceProbeProxy, IndexIfaceProbeProxy,
                           ArrayIfaceProbeProxy, ProbeArrayCache)
 
+# The interfaces that provide probes
+probe_iface_names = ("probe", "probe_index", "probe_array")
+
 # This must exist outside the ProbesClass. The idea is that some
 # simics_start.py script could pre-register certain probes, before the
 # feature is enabled.
@@ -50,7 +53,8 @@ class ProbesClass:
     __slots__ = ('objects_impl_iface', 'objects_impl_idx_iface',
                  'objects_impl_array_iface', 'failed_probes',
                  'objects_created_hap_id', 'objects_deleted_hap_id',
-                 'objects_pre_delete_hap_id',
+                 'objects_pre_delete_hap_id', 'object_create_hap_id',
+                 'created_objects', 'probe_ifaces_by_class',
                  'probes_next_id', 'update_probes_count',
                  'hap_callback_count', 'probe_proxies',
                  'generation_id', 'probe_delete_callbacks',
@@ -84,6 +88,7 @@ class ProbesClass:
         self.objects_created_hap_id = None
         self.objects_deleted_hap_id = None
         self.objects_pre_delete_hap_id = None
+        self.object_create_hap_id = None
         self.probes_next_id = 0
         self.update_probes_count = 0
         self.hap_callback_count = 0
@@ -106,6 +111,10 @@ class ProbesClass:
         self.user_subscribed_probes = set()
         self.internal_probes = set()
 
+        # Objects created since the last update, dict used as ordered set
+        self.created_objects = {}
+        self.probe_ifaces_by_class = {} # classname : {iface : [port, ...]}
+
     def start(self):
         SIM_log_info(1, conf.probes, 0, "Enabling probes (could take a while)")
         self.add_default_probes()
@@ -130,12 +139,16 @@ class ProbesClass:
         sketch.create_configuration_objects(objs)
 
     def enable_object_changed_detection(self):
+        self.object_create_hap_id = SIM_hap_add_callback(
+            "Core_Conf_Object_Create", self.object_create_hap, None)
         self.objects_created_hap_id = SIM_hap_add_callback(
             "Core_Conf_Objects_Created", self.objects_created_hap, None)
         self.objects_pre_delete_hap_id = SIM_hap_add_callback(
             "Core_Conf_Object_Pre_Delete", self.object_pre_delete, None)
 
     def disable_object_changed_detection(self):
+        SIM_hap_delete_callback_id("Core_Conf_Object_Create",
+                                   self.object_create_hap_id)
         SIM_hap_delete_callback_id("Core_Conf_Objects_Created",
                                    self.objects_created_hap_id)
         SIM_hap_delete_callback_id("Core_Conf_Object_Pre_Delete",
@@ -244,6 +257,7 @@ class ProbesClass:
                 f" {p.obj.name}'s illegal keys: {p.get_pretty_props()}")
 
     def object_pre_delete(self, data, obj):
+        self.created_objects.pop(obj, None)
         self.log(f"Deleted {obj.name}, dependencies:"
                  f" {self.probe_dependencies.get(obj, [])}")
         if obj in self.probe_dependencies:
@@ -264,21 +278,74 @@ class ProbesClass:
                 self.delete_probe(p)
 
 
-    def objects_changed(self):
-        self.update_probes()  # Find possibly new objects with probe interfaces
+    def objects_changed(self, new_objects=None):
+        # Find possibly new objects with probe interfaces, among
+        # new_objects or all objects
+        self.update_probes(new_objects)
         templates.create_new_probe_objects()
 
+    # Hap call-back for each created object, which is handled when the
+    # whole batch of objects has been created
+    def object_create_hap(self, cb_data, obj):
+        self.created_objects[obj] = None
+
     # Hap call-back for created objects
     def objects_created_hap(self, cb_data, obj):
         self.hap_callback_count += 1
-        self.objects_changed()
+        created = self.created_objects
+        self.created_objects = {}
+        # Port objects and other descendants are created together with
+        # their parents, make sure they are included
+        new_objects = dict(created)
+        for o in created:
+            if SIM_object_parent(o) not in created:
+                new_objects.update(dict.fromkeys(SIM_object_iterator(o)))
+        self.objects_changed(list(new_objects))
 
     def log(self, msg):
         SIM_log_info(4, self.obj, 0, msg)
 
-    def update_probes(self):
+    def probe_ifaces_of_class(self, classname):
+        '''Return the probe interfaces implemented by a class, as a dict
+        mapping interface names to lists of ports, where None is used for
+        interfaces implemented directly by the class.'''
+        ifaces = self.probe_ifaces_by_class.get(classname)
+        if ifaces is None:
+            ifaces = {}
+            implemented = set(VT_get_interfaces(classname))
+            for iface in probe_iface_names:
+                if iface in implemented:
+                    ifaces.setdefault(iface, []).append(None)
+            for [port, _, iface] in VT_get_port_interfaces(classname):
+                if iface in probe_iface_names:
+                    ifaces.setdefault(iface, []).append(port)
+            self.probe_ifaces_by_class[classname] = ifaces
+        return ifaces
+
+    def find_ifaces(self, cmp_iface, new_objects, ignore_objs):
+        if new_objects is None:
+            return get_all_ifaces(cmp_iface, ignore_objs)
+        ifaces = []
+        for o in new_objects:
+            if o in ignore_objs:
+                continue
+            for port in self.probe_ifaces_of_class(o.classname).get(
+                    cmp_iface, ()):
+                if port is None:
+                    ifaces.append((o, None, SIM_get_interface(o, cmp_iface)))
+                else:
+                    ifaces.append((o, port, SIM_get_port_interface(
+                        o, cmp_iface, port)))
+        return ifaces
+
+    def update_probes(self, new_objects=None):
+        '''Create probe proxies for objects implementing the probe
+        interfaces. If new_objects is given, only these objects are
+        considered, otherwise all objects in the configuration.'''
         self.update_probes_count += 1
         self.log(f"update_probes({self.update_probes_count})")
+        if new_objects is None:
+            self.created_objects = {}
 
         def create_and_add_proxy(obj, port, probe_if, prop, proxy_constructor):
             try:
@@ -302,7 +369,8 @@ class ProbesClass:
             return proxy_constructor(obj, port, probe_if, prop, self.probes_next_id)
 
         # Handle new probes
-        new_ifaces = set(get_all_ifaces("probe", ignore_objs=self.objects_impl_iface))
+        new_ifaces = set(self.find_ifaces("probe", new_objects,
+                                          self.objects_impl_iface))
         self.log(f"new_ifaces {len(new_ifaces)}")
 
         for (obj, port, pr_if) in new_ifaces:
@@ -313,7 +381,8 @@ class ProbesClass:
         self.objects_impl_iface.update({o for (o, _, _) in new_ifaces})
 
         # Handle new index probes
-        new_idx_ifaces = set(get_all_ifaces("probe_index", ignore_objs=self.objects_impl_idx_iface))
+        new_idx_ifaces = set(self.find_ifaces("probe_index", new_objects,
+                                              self.objects_impl_idx_iface))
         self.log(f"new_idx_ifaces {len(new_idx_ifaces)}")
 
         for (obj, port, idx_pr_if) in new_idx_ifaces:
@@ -326,7 +395,8 @@ class ProbesClass:
         self.objects_impl_idx_iface.update({o for (o, _, _) in new_idx_ifaces})
 
         # Handle new array probes
-        new_array_ifaces = set(get_all_ifaces("probe_array", ignore_objs=self.objects_impl_array_iface))
+        new_array_ifaces = set(self.find_ifaces("probe_array", new_objects,
+                                                self.objects_impl_array_iface))
         self.log(f"new_array_ifaces {len(new_array_ifaces)}")
 
         for (obj, port, array_pr_if) in new_array_ifaces:
@@ -345,7 +415,11 @@ class ProbesClass:
 # rm core/linux64/lib/python-py3/api_help_py.py*
 # make core
 #
-# If not, Simics will not recreate the files correctly and use the old ones
+# If not, Simics will not recreate the files correctly and use the old ones.
+# Then regenerate the help index from the new module, by running
+# refmanual.DOC_write_python_help_index("api_help_py.idx", "api_help_py.py")
+# in core/linux64/lib/python-py3. Until then the index is ignored, since
+# its stamp does not match the module, and help is read from the module.
 
 # Exported
 class CellFormatter(
@@ -0,0 +1,176 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+
+import array
+import csv
+import math
+import time
+
+import cli
+import conf
+
+from . import probes
+from . import common
+
+# Exported
+class ProbeSampler(
+        metaclass=cli.doc(
+            'batched sampling of probes into in-memory time series',
+            module = 'probes',
+            doc_id = 'probes_python_api',
+            synopsis = False)):
+    '''Samples a set of numeric probes into ring buffers.
+
+    All probes are read in one pass for each call to sample(), with the
+    probe sampler cache enabled, so that probes sharing cached values
+    (such as probe array interfaces) are only computed once per sample.
+    The values are converted to floats and stored in preallocated
+    per-probe arrays holding the last <i>depth</i> samples, together with
+    the timestamp of each sample. Older samples are overwritten.
+
+    Fraction probes are stored as the quotient. Missing values, such as
+    fractions with a zero denominator, values that could not be converted
+    or values of probes that have been deleted, are stored as NaN.
+    Histogram and string probes cannot be sampled.
+
+    Probes that need subscription are subscribed to while the sampler is
+    open. The close() method must be called when the sampler is no
+    longer used.'''
+
+    __slots__ = ('depth', 'probes', '_columns', '_timestamps', '_readers',
+                 '_head', '_count', '_closed', '_subscribed')
+
+    def __init__(self, probe_list, depth = 10000):
+        if depth < 1:
+            raise common.ProbeException("sampler depth must be positive")
+        probe_list = list(probe_list)
+        for p in probe_list:
+            if not p.type_class.numeric_support():
+                raise common.ProbeException(
+                    f"probe {p.cli_id} of type {p.prop.type} cannot be"
+                    " sampled")
+        self.depth = depth
+        self.probes = probe_list
+        nan_row = array.array('d', [math.nan]) * depth
+        self._timestamps = array.array('d', nan_row)
+        self._columns = {p: array.array('d', nan_row) for p in probe_list}
+        # One (read, convert, column) triple per probe
+        self._readers = [(p.value, p.type_class.numeric_value,
+                          self._columns[p]) for p in probe_list]
+        self._head = 0          # index of the next sample to write
+        self._count = 0         # number of samples stored
+        self._closed = False
+        self._subscribed = [p for p in probe_list if p.subscribe()]
+        probes.register_probe_delete_cb(self._probe_deleted)
+
+    def _probe_deleted(self, p):
+        if p in self._columns:
+            column = self._columns[p]
+            self._readers = [r for r in self._readers if r[2] is not column]
+            if p in self._subscribed:
+                self._subscribed.remove(p)
+
+    def sample(self, timestamp = None):
+        '''Read all probes and store the values as a new sample. The
+        timestamp defaults to the current host time, in seconds.'''
+        assert not self._closed
+        i = self._head
+        self._timestamps[i] = time.time() if timestamp is None else timestamp
+        nan = math.nan
+        # Leave the cache to the caller if it is already enabled, such as
+        # when sampling from within another sampler
+        cache = (None if conf.probes.object_data.cache_active
+                 else conf.probes.iface.probe_sampler_cache)
+        if cache:
+            cache.enable()
+        try:
+            try:
+                for (read, convert, column) in self._readers:
+                    column[i] = convert(read())
+            except (TypeError, ValueError, IndexError, ZeroDivisionError):
+                # Invalid value from some probe; redo the sample one probe
+                # at a time so that only the bad values become NaN
+                for (read, convert, column) in self._readers:
+                    try:
+                        column[i] = convert(read())
+                    except (TypeError, ValueError, IndexError,
+                            ZeroDivisionError):
+                        column[i] = nan
+        finally:
+            if cache:
+                cache.disable()
+        if len(self._readers) < len(self._columns):
+            # columns of deleted probes
+            active = {id(c) for (_, _, c) in self._readers}
+            for column in self._columns.values():
+                if id(column) not in active:
+                    column[i] = nan
+        self._head = (i + 1) % self.depth
+        self._count = min(self._count + 1, self.depth)
+
+    def num_samples(self):
+        '''Return the number of stored samples, at most depth.'''
+        return self._count
+
+    def _ordered(self, data, start, stop):
+        # Return data[start:stop] with indices relative to the oldest
+        # stored sample
+        if self._count < self.depth:
+            ordered = data[:self._count]
+        else:
+            ordered = data[self._head:] + data[:self._head]
+        return ordered[start:stop]
+
+    def timestamps(self, start = None, stop = None):
+        '''Return an array with the timestamps of the stored samples, oldest
+        first. The optional <i>start</i> and <i>stop</i> arguments select a
+        slice of the samples, as for Python lists.'''
+        return self._ordered(self._timestamps, start, stop)
+
+    def values(self, probe, start = None, stop = None):
+        '''Return an array with the values of the stored samples of a
+        probe, given as a ProbeProxy or a probe name, oldest first. The
+        optional <i>start</i> and <i>stop</i> arguments select a slice of
+        the samples, as for Python lists.'''
+        if isinstance(probe, str):
+            matches = [p for p in self._columns if p.cli_id == probe]
+            if not matches:
+                raise KeyError(probe)
+            probe = matches[0]
+        return self._ordered(self._columns[probe], start, stop)
+
+    def clear(self):
+        '''Discard all stored samples.'''
+        self._head = 0
+        self._count = 0
+
+    def export_csv(self, filename, start = None, stop = None):
+        '''Write the stored samples to a CSV file, with one row per sample
+        and one column per probe, after a leading timestamp column.'''
+        columns = [self.timestamps(start, stop)] + [
+            self.values(p, start, stop) for p in self.probes]
+        with open(filename, 'w', newline = '') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp'] + [p.cli_id for p in self.probes])
+            writer.writerows(zip(*columns))
+
+    def close(self):
+        '''Unsubscribe from the probes and stop tracking probe deletion.
+        The stored samples can still be read.'''
+        if self._closed:
+            return
+        self._closed = True
+        probes.unregister_probe_delete_cb(self._probe_deleted)
+        for p in self._subscribed:
+            p.unsubscribe()
+        self._subscribed = []
+        self._readers = []
@@ -0,0 +1,171 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the probes.probe_cache module
+
+import functools
+import gc
+import time
+import types
+import unittest
+from unittest import mock
+
+from . import probe_cache
+from .probe_cache import cached_probe_read
+
+
+class Controller:
+    '''Stands in for the probes object and its probe_sampler_cache
+    interface. Shared with test_sampler.'''
+    def __init__(self):
+        self.cache_active = False
+        self.cache_generation_id = 0
+
+    def enable(self):
+        self.cache_generation_id += 1
+        self.cache_active = True
+
+    def disable(self):
+        self.cache_active = False
+
+    def get_generation(self):
+        return self.cache_generation_id if self.cache_active else 0
+
+
+class Base:
+    def __init__(self):
+        self.reads = 0
+
+    @cached_probe_read
+    def read(self):
+        self.reads += 1
+        return "A%d" % self.reads
+
+
+class Derived(Base):
+    @cached_probe_read
+    def read(self):
+        return "B+" + super().read()
+
+
+class TestCachedProbeRead(unittest.TestCase):
+    def setUp(self):
+        self.controller = Controller()
+        patcher = mock.patch.object(
+            probe_cache, 'conf',
+            types.SimpleNamespace(
+                probes=types.SimpleNamespace(object_data=self.controller)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_within_sample(self):
+        o = Base()
+        self.assertEqual(o.read(), "A1")
+        self.assertEqual(o.read(), "A2")
+        self.controller.enable()
+        self.assertEqual(o.read(), "A3")
+        self.assertEqual(o.read(), "A3")
+        self.assertEqual(Base.read(o), "A3")
+        self.controller.enable()
+        self.assertEqual(o.read(), "A4")
+
+    def test_subclass_override(self):
+        o = Derived()
+        self.assertEqual(o.read(), "B+A1")
+        self.assertEqual(o.read(), "B+A2")
+        self.assertEqual(Base.read(o), "A3")
+        self.controller.enable()
+        self.assertEqual(o.read(), "B+A4")
+        self.assertEqual(o.read(), "B+A4")
+        self.assertEqual(Base.read(o), "A4")
+        self.assertNotIn('read', vars(o))
+
+    def test_objects_not_kept_alive(self):
+        o = Base()
+        o.read()
+        self.assertEqual(len(Base.__dict__['read'].readers), 1)
+        del o
+        gc.collect()
+        self.assertEqual(len(Base.__dict__['read'].readers), 0)
+
+    def test_slots_object_not_cached(self):
+        class Slots:
+            __slots__ = ('reads',)
+            def __init__(self):
+                self.reads = 0
+            @cached_probe_read
+            def read(self):
+                self.reads += 1
+                return self.reads
+        o = Slots()
+        self.controller.enable()
+        self.assertEqual(o.read(), 1)
+        self.assertEqual(o.read(), 2)
+
+
+# The cached_probe_read before it bound readers per object, kept here as
+# the baseline for _benchmark.
+class _old_cached_probe_read:
+    def __init__(self, read_func):
+        self.read_func = read_func
+        self.cache = {}
+
+    def __call__(self, obj):
+        gen_ctr = probe_cache.conf.probes.iface.probe_sampler_cache.\
+            get_generation()
+        if gen_ctr and obj in self.cache:
+            (cached_gen, cached_value) = self.cache[obj]
+            if gen_ctr == cached_gen:
+                return cached_value
+        value = self.read_func(obj)
+        if gen_ctr:
+            self.cache[obj] = (gen_ctr, value)
+        return value
+
+    def __get__(self, obj, cls):
+        return functools.partial(self.__call__, obj)
+
+# Reports probe reads per second with the old and the current decorator,
+# with caching disabled and within a sample. Run it with
+# 'python -m probes.test_probe_cache'.
+def _benchmark(reads=200000):
+    controller = Controller()
+    probe_cache.conf = types.SimpleNamespace(probes=types.SimpleNamespace(
+        object_data=controller,
+        iface=types.SimpleNamespace(probe_sampler_cache=controller)))
+
+    class Old:
+        @_old_cached_probe_read
+        def read(self):
+            return 1
+    class New:
+        @cached_probe_read
+        def read(self):
+            return 1
+
+    def rate(obj):
+        best = None
+        for i in range(3):
+            t = time.perf_counter()
+            for j in range(reads):
+                obj.read()
+            t = time.perf_counter() - t
+            best = t if best is None else min(best, t)
+        return reads / max(best, 1e-9)
+
+    print('%-10s %14s %14s' % ('cache', 'old reads/s', 'new reads/s'))
+    for (name, start) in (('disabled', lambda: None),
+                          ('sample', controller.enable)):
+        start()
+        print('%-10s %14.0f %14.0f' % (name, rate(Old()), rate(New())))
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,99 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the probes.sampler module
+
+import math
+import types
+import unittest
+from unittest import mock
+
+from . import probe_cache
+from . import sampler
+from .probe_cache import cached_probe_read
+from .sampler import ProbeSampler
+from .test_probe_cache import Controller
+
+
+class Source:
+    def __init__(self):
+        self.reads = 0
+
+    @cached_probe_read
+    def read(self):
+        self.reads += 1
+        return self.reads
+
+
+class Probe:
+    def __init__(self, cli_id, read):
+        self.cli_id = cli_id
+        self.value = read
+        self.type_class = types.SimpleNamespace(
+            numeric_support=lambda: True, numeric_value=float)
+
+    def subscribe(self):
+        return False
+
+
+class TestProbeSampler(unittest.TestCase):
+    def setUp(self):
+        self.controller = Controller()
+        fake_conf = types.SimpleNamespace(probes=types.SimpleNamespace(
+            iface=types.SimpleNamespace(probe_sampler_cache=self.controller),
+            object_data=self.controller))
+        for patcher in (
+                mock.patch.object(sampler, 'conf', fake_conf),
+                mock.patch.object(probe_cache, 'conf', fake_conf),
+                mock.patch.object(sampler.probes,
+                                  'register_probe_delete_cb', create=True),
+                mock.patch.object(sampler.probes,
+                                  'unregister_probe_delete_cb', create=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_read_once_per_sample(self):
+        source = Source()
+        s = ProbeSampler([Probe('a', source.read), Probe('b', source.read)],
+                         depth = 2)
+        s.sample(1.0)
+        s.sample(2.0)
+        s.sample(3.0)
+        self.assertEqual(source.reads, 3)
+        self.assertEqual(list(s.timestamps()), [2.0, 3.0])
+        self.assertEqual(list(s.values('a')), [2.0, 3.0])
+        self.assertEqual(list(s.values('b')), [2.0, 3.0])
+        self.assertFalse(self.controller.cache_active)
+        s.close()
+
+    def test_nested_sample(self):
+        source = Source()
+        inner = ProbeSampler([Probe('a', source.read)])
+        def outer_read():
+            inner.sample(0.0)
+            return source.read()
+        outer = ProbeSampler([Probe('outer', outer_read),
+                              Probe('b', source.read)])
+        outer.sample(0.0)
+        # the inner sample must not turn off caching for the outer one
+        self.assertEqual(source.reads, 1)
+        self.assertEqual(list(outer.values('b')), [1.0])
+        self.assertEqual(list(inner.values('a')), [1.0])
+        self.assertFalse(self.controller.cache_active)
+        inner.close()
+        outer.close()
+
+    def test_invalid_value(self):
+        s = ProbeSampler([Probe('a', lambda: 1), Probe('b', lambda: None)])
+        s.sample(0.0)
+        self.assertEqual(list(s.values('a')), [1.0])
+        self.assertTrue(math.isnan(s.values('b')[0]))
+        s.close()
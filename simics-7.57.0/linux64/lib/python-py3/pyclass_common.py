@@ -12,6 +12,7 @@
 # This file contains code common for pyobj.py and confclass.py.
 
 __all__ = [
+    'bound_interface_method',
     'handle_attr_get_errors',
     'handle_attr_set_errors'
 ]
@@ -64,3 +65,31 @@ def handle_attr_set_errors(desc, sfun, py_obj, val):
                 ret, desc))
         return simics.Sim_Set_Illegal_Value
     return i
+
+# Tables of bound methods used by bound_interface_method, all indexed by
+# Simics object
+_bound_method_tables = []
+
+def _forget_bound_methods(arg, obj):
+    for table in _bound_method_tables:
+        table.pop(obj, None)
+
+def bound_interface_method(bind):
+    """Return an interface method implementation for direct dispatch. The
+    first call for each Simics object calls bind(obj) to get the Python
+    callable, typically a bound method of the Python instance, to use for
+    that object. Later calls find it in a per-object table, and call it
+    without any further Python frames. The table entry is removed when the
+    object is deleted."""
+    if not _bound_method_tables:
+        simics.SIM_hap_add_callback("Core_Conf_Object_Pre_Delete",
+                                    _forget_bound_methods, None)
+    table = {}
+    _bound_method_tables.append(table)
+    def method(obj, *args):
+        try:
+            f = table[obj]
+        except KeyError:
+            f = table[obj] = bind(obj)
+        return f(*args)
+    return method
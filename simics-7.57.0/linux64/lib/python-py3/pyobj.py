@@ -352,7 +352,16 @@ class Interface(
 
     To implement port interfaces instead of regular interfaces, place
     one or more <class>pyobj.Interface</class> subclasses inside a
-    <class>pyobj.Port</class> class.'''
+    <class>pyobj.Port</class> class.
+
+    If the <var>_direct_dispatch</var> member is set to <tt>True</tt>,
+    the interface methods of each object are bound once, on the first
+    call, and later calls go directly to the bound method of the
+    <class>pyobj.Interface</class> instance. This makes interface calls
+    cheaper, but methods replaced after the first call are not
+    noticed.'''
+
+    _direct_dispatch = False
 
     @classmethod
     def _register(cls, class_name):
@@ -367,7 +376,13 @@ class Interface(
             # 3 to determine if a class method is static since all methods
             # now are functions. Compare with the old mechanism while
             # we can.
-            return f if static else f2
+            if static:
+                return f
+            elif cls._direct_dispatch:
+                return pyclass_common.bound_interface_method(
+                    lambda obj: getattr(mapper(obj, cls), m))
+            else:
+                return f2
 
         ifc_class = simics.SIM_get_python_interface_type(cls.__name__)
         if ifc_class is None:
@@ -3711,6 +3711,9 @@ command.\n\n'''):
                 format_print(doc[0])
                 return
 
+        # pydoc also shows the documentation of members of obj
+        from cli.documentation import rewrite_doc_strings
+        rewrite_doc_strings()
         return pydoc.help(obj)
 
 builtins.help = _Helper()
@@ -3931,3 +3934,13 @@ def DOC_print_python_refmanual(ofile, jdocu_mode = False):
 
     o.print_end(ofile)
     ofile.close()
+
+def DOC_write_python_help_index(ofile, pyfile):
+    '''Write the help index used by api_help from pyfile, the api_help_py
+    module written by DOC_print_python_refmanual.'''
+    import help_index
+    import runpy
+    docs = runpy.run_path(pyfile)['api_help_py']
+    # api_help checks that the index is up to date using this stamp
+    help_index.write_help_index(ofile, sorted(docs.items()),
+                                stamp = help_index.file_stamp(pyfile))
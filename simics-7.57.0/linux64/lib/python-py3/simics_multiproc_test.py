@@ -0,0 +1,167 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+
+# Run a test script in several Simics processes at the same time, for
+# distributed link tests.
+#
+# All nodes run the same script and are told apart by the NODE_ID and
+# TOTAL_NODES environment variables. They are started together, and the
+# output of each node is written to stdout as it arrives, one line at a
+# time prefixed by the node id. As soon as a node fails, or the global
+# timeout expires, the remaining nodes are killed, since their peers are
+# gone and they would otherwise wait until their own timeout. When all
+# nodes are done, the exit status and run time of each node is printed.
+#
+# Each node's output pipe is read by a separate thread, which works the
+# same on all hosts, and the lines are passed to the main thread through
+# a queue.
+
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+__all__ = ['add_multiproc_test', 'run_multi_simics', 'NodeResult']
+
+class NodeResult:
+    '''The outcome of running one node'''
+    __slots__ = ('node_id', 'pid', 'returncode', 'start', 'end')
+    def __init__(self, node_id, pid, start):
+        self.node_id = node_id
+        self.pid = pid
+        self.returncode = None
+        self.start = start
+        self.end = None
+
+    @property
+    def elapsed(self):
+        return (self.end or time.monotonic()) - self.start
+
+class _Node:
+    def __init__(self, script, node_id, total_nodes, timeout, extra_args,
+                 lines):
+        import testparams
+        os.environ['TOTAL_NODES'] = str(total_nodes)
+        os.environ['NODE_ID'] = str(node_id)
+        if script.endswith('.py'):
+            args = extra_args + ["-p", script]
+        else:
+            args = extra_args + [script]
+        (r, w) = os.pipe()
+        with os.fdopen(w, 'wb') as out:
+            self.proc = testparams.run_simics(args, timeout,
+                                              asynchronous=True, outfile=out)
+        self.result = NodeResult(node_id, self.proc.pid, time.monotonic())
+        self.reader = threading.Thread(
+            target=self._read, args=(os.fdopen(r, 'rb'), lines), daemon=True)
+        self.reader.start()
+
+    def _read(self, pipe, lines):
+        node_id = self.result.node_id
+        with pipe:
+            for line in pipe:
+                lines.put((node_id, line.decode('utf-8', errors='replace')))
+        lines.put((node_id, None))
+
+    def finish(self, timeout):
+        self.result.returncode = self.proc.wait(timeout=max(timeout, 0))
+        self.result.end = time.monotonic()
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        elif self.result.end is None:
+            self.result.returncode = self.proc.returncode
+            self.result.end = time.monotonic()
+
+def _print_summary(results):
+    print("node  pid       status    time")
+    for r in results:
+        if r.returncode is None:
+            status = "killed"
+        else:
+            status = str(r.returncode)
+        print("%4d  %-8d  %-8s  %.1f s" % (r.node_id, r.pid, status,
+                                           r.elapsed))
+    sys.stdout.flush()
+
+def run_multi_simics(script, total_nodes, timeout, extra_args=[]):
+    '''Run script in total_nodes Simics processes at the same time. Raises
+    TestFailure if any node fails or if all nodes have not finished within
+    timeout seconds. Returns a list of NodeResult.'''
+    import testparams
+    lines = queue.Queue()
+    deadline = time.monotonic() + timeout
+    nodes = []
+    try:
+        for i in range(total_nodes):
+            nodes.append(_Node(script, i, total_nodes, timeout,
+                               list(extra_args), lines))
+    except BaseException:
+        for n in nodes:
+            n.kill()
+        raise
+    running = len(nodes)
+    failure = None
+    while running:
+        remaining = deadline - time.monotonic()
+        try:
+            (node_id, line) = lines.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            failure = f'timeout after {timeout} s'
+            break
+        if line is not None:
+            sys.stdout.write(f'={node_id}= {line}')
+            sys.stdout.flush()
+            continue
+        node = nodes[node_id]
+        running -= 1
+        try:
+            node.finish(deadline - time.monotonic())
+        except subprocess.TimeoutExpired:
+            failure = f'timeout after {timeout} s'
+            break
+        if node.result.returncode != 0:
+            failure = (f'node {node_id} failed with exit status'
+                       f' {node.result.returncode}')
+            break
+    for n in nodes:
+        n.kill()
+    for n in nodes:
+        if n.result.end is None:
+            n.proc.wait()
+            n.result.end = time.monotonic()
+            n.reader.join(timeout=1)
+    # Output written by killed nodes before they died
+    while not lines.empty():
+        (node_id, line) = lines.get()
+        if line is not None:
+            sys.stdout.write(f'={node_id}= {line}')
+    results = [n.result for n in nodes]
+    _print_summary(results)
+    if failure:
+        raise testparams.TestFailure(failure)
+    return results
+
+def add_multiproc_test(suite, script, total_nodes, name = None,
+                       timeout = 120, extra_args = []):
+    '''Add a test to suite that runs script in total_nodes Simics
+    processes at the same time.'''
+    import testparams
+    if not name:
+        name = testparams.script_to_name(script)
+    suite.add_test(
+            name,
+            lambda: run_multi_simics(script, total_nodes, timeout,
+                                     extra_args))
@@ -0,0 +1,407 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+
+# Run s-*.py test scripts in a pool of persistent Simics processes.
+#
+# Starting Simics and loading modules often takes longer than the test
+# scripts themselves. A suite can instead add its scripts with
+# add_simics_tests in this module, which works as suite.add_simics_tests
+# unless the SIMICS_TEST_POOL environment variable is set to the number of
+# worker processes to use. In that case each test is sent to a worker
+# Simics process, which runs many scripts after each other.
+#
+# Between tests the worker returns to the state it had when it started:
+# each script runs in a fresh __main__ namespace, and afterwards all
+# configuration objects and snapshots created by the test are deleted and
+# CLI variables, sys.path, sys.modules entries from the test directory,
+# the working directory, the environment and the stest log traps are
+# restored.
+#
+# Any test that does not pass in a worker is run again in a fresh Simics
+# process, whose result is the one reported. This covers tests failing
+# because of state left by earlier tests, as well as tests that quit
+# Simics, hang or leave objects that cannot be deleted; the worker is then
+# replaced.
+#
+# The runner and the workers communicate with JSON lines over a local TCP
+# connection, authenticated with a random token.
+
+import glob
+import json
+import os
+import secrets
+import socket
+import sys
+import tempfile
+import threading
+import types
+
+__all__ = ['add_simics_tests']
+
+# Number of workers, enables the pool when set
+pool_env = 'SIMICS_TEST_POOL'
+# Connection details passed to a worker
+worker_env = 'SIMICS_TEST_POOL_WORKER'
+
+# Tests run by a worker before it is replaced, bounding leaked state
+tests_per_worker = 50
+startup_timeout = 120
+
+#
+# Worker side, running inside Simics
+#
+
+class _Baseline:
+    '''The state of a worker before running any test.'''
+    def __init__(self):
+        import simics
+        import cli
+        self.objects = {o.name for o in simics.SIM_object_iterator(None)}
+        self.snapshots = set(simics.SIM_list_snapshots())
+        self.variables = {n: cli.simenv[n] for n in cli.simenv}
+        self.main = dict(sys.modules['__main__'].__dict__)
+        self.modules = set(sys.modules)
+        self.path = list(sys.path)
+        self.cwd = os.getcwd()
+        self.environ = dict(os.environ)
+        self.traps = self._stest_traps()
+
+    @staticmethod
+    def _stest_traps():
+        stest = sys.modules.get('stest')
+        if stest is None:
+            return None
+        import conf
+        return (dict(stest.trapper.trappers), list(stest.trapper.filter),
+                conf.sim.stop_on_error)
+
+    def fresh_main(self, script):
+        main = types.ModuleType('__main__')
+        main.__dict__.update(self.main)
+        main.__file__ = script
+        return main
+
+    def restore(self, script):
+        '''Return to the baseline state, raising an exception if that is
+        not possible.'''
+        import simics
+        import cli
+        import conf
+        if simics.SIM_simics_is_running():
+            raise Exception("simulation still running")
+
+        for name in set(simics.SIM_list_snapshots()) - self.snapshots:
+            simics.SIM_delete_snapshot(name)
+        created = [o for o in simics.SIM_object_iterator(None)
+                   if o.name not in self.objects]
+        if created:
+            simics.SIM_delete_objects(created)
+        left = {o.name for o in simics.SIM_object_iterator(None)}
+        if left != self.objects:
+            raise Exception("objects differ from baseline: %s"
+                            % sorted(left ^ self.objects))
+
+        for name in [n for n in cli.simenv if n not in self.variables]:
+            del cli.simenv[name]
+        for (name, value) in self.variables.items():
+            if name not in cli.simenv or cli.simenv[name] != value:
+                cli.simenv[name] = value
+
+        test_dir = os.path.dirname(script)
+        for name in set(sys.modules) - self.modules:
+            f = getattr(sys.modules[name], '__file__', None) or ''
+            if os.path.dirname(os.path.abspath(f)) == test_dir:
+                del sys.modules[name]
+        sys.path[:] = self.path
+        os.chdir(self.cwd)
+        if dict(os.environ) != self.environ:
+            os.environ.clear()
+            os.environ.update(self.environ)
+
+        stest = sys.modules.get('stest')
+        if stest is not None:
+            stest.collecting_failures = False
+            del stest.failures[:]
+            if self.traps is not None:
+                (trappers, filters, stop_on_error) = self.traps
+                for (obj, logtype) in list(stest.trapper.trappers):
+                    if (obj, logtype) in trappers:
+                        continue
+                    if obj is None:
+                        stest.trapper.disable(logtype)
+                    else:
+                        # The callback was removed with the object
+                        del stest.trapper.trappers[(obj, logtype)]
+                for (obj, logtype) in trappers:
+                    if (obj, logtype) not in stest.trapper.trappers:
+                        stest.trapper.enable(logtype, obj)
+                stest.trapper.filter[:] = filters
+                conf.sim.stop_on_error = stop_on_error
+
+def _run_test(baseline, script, commands):
+    import traceback
+    import cli
+    from commands import run_python_file
+    print(f"=== {script} ({os.getpid()})", flush=True)
+    reply = {'status': 'pass', 'message': ''}
+    old_main = sys.modules['__main__']
+    sys.modules['__main__'] = baseline.fresh_main(script)
+    try:
+        for cmd in commands:
+            cli.run_command(cmd)
+        run_python_file(script)
+    except SystemExit as ex:
+        reply = {'status': 'tainted', 'message': f"exit {ex.code}"}
+    except Exception as ex:
+        traceback.print_exc()
+        reply = {'status': 'fail', 'message': str(ex)}
+    finally:
+        sys.modules['__main__'] = old_main
+    try:
+        baseline.restore(script)
+    except Exception as ex:
+        reply = {'status': 'tainted',
+                 'message': f"could not reset after test: {ex}"}
+    sys.stdout.flush()
+    return reply
+
+def serve():
+    '''Run tests sent by the runner until the connection is closed.
+    Started in worker Simics processes by the runner.'''
+    import simics
+    (port, token) = os.environ.pop(worker_env).split(':')
+    baseline = _Baseline()
+    sock = socket.create_connection(('127.0.0.1', int(port)))
+    with sock, sock.makefile('rwb') as f:
+        _send(f, {'token': token, 'pid': os.getpid()})
+        for line in f:
+            request = json.loads(line)
+            reply = _run_test(baseline, request['script'],
+                              request['commands'])
+            _send(f, reply)
+            if reply['status'] == 'tainted':
+                break
+    simics.SIM_quit(0)
+
+def _send(f, msg):
+    f.write(json.dumps(msg).encode('utf-8') + b'\n')
+    f.flush()
+
+#
+# Runner side, running in the test framework
+#
+
+class WorkerError(Exception):
+    pass
+
+# The connection details reach a worker through the environment of the
+# runner, so only one worker at a time may be started
+_start_lock = threading.Lock()
+
+class _Worker:
+    def __init__(self):
+        import testparams
+        token = secrets.token_hex(16)
+        # Separate handles, so that reading does not move the position
+        # the worker writes at
+        (fd, self.output_name) = tempfile.mkstemp(prefix='simics-test-pool-')
+        os.close(fd)
+        self.output = open(self.output_name, 'wb')
+        self.output_reader = open(self.output_name, 'rb')
+        self.tests = 0
+        with socket.create_server(('127.0.0.1', 0)) as server:
+            server.settimeout(startup_timeout)
+            with _start_lock:
+                os.environ[worker_env] = (f'{server.getsockname()[1]}'
+                                          f':{token}')
+                try:
+                    self.proc = testparams.run_simics(
+                        ['-e', '@import simics_test_pool;'
+                         ' simics_test_pool.serve()'],
+                        startup_timeout + tests_per_worker * 3600,
+                        asynchronous=True, outfile=self.output)
+                finally:
+                    os.environ.pop(worker_env, None)
+            try:
+                (self.sock, _) = server.accept()
+            except OSError as ex:
+                self.proc.kill()
+                self.copy_output()
+                self.close()
+                raise WorkerError(f"worker did not start: {ex}")
+        self.file = self.sock.makefile('rwb')
+        hello = self._receive(startup_timeout)
+        if hello.get('token') != token:
+            self.close()
+            raise WorkerError("worker authentication failed")
+
+    def _receive(self, timeout):
+        self.sock.settimeout(timeout)
+        line = self.file.readline()
+        if not line:
+            raise WorkerError("worker exited")
+        return json.loads(line)
+
+    def run(self, script, commands, timeout):
+        self.tests += 1
+        _send(self.file, {'script': script, 'commands': commands})
+        return self._receive(timeout)
+
+    def copy_output(self):
+        '''Copy the worker output since the last call to stdout, where the
+        test framework collects the output of the current test.'''
+        data = self.output_reader.read()
+        sys.stdout.write(data.decode('utf-8', errors='replace'))
+        sys.stdout.flush()
+
+    def close(self):
+        for f in (self.file, self.sock):
+            try:
+                f.close()
+            except OSError:
+                pass
+        try:
+            self.proc.wait(timeout=30)
+        except Exception:
+            self.proc.kill()
+            self.proc.wait()
+        self.output.close()
+        self.output_reader.close()
+        try:
+            os.remove(self.output_name)
+        except OSError:
+            pass
+
+class _Pool:
+    def __init__(self, size):
+        self.size = size
+        self.idle = []
+        self.workers = 0
+        self.cond = threading.Condition()
+
+    def _acquire(self):
+        with self.cond:
+            while not self.idle and self.workers >= self.size:
+                self.cond.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.workers += 1
+        try:
+            return _Worker()
+        except BaseException:
+            with self.cond:
+                self.workers -= 1
+                self.cond.notify()
+            raise
+
+    def _release(self, worker, healthy):
+        if healthy and worker.tests < tests_per_worker:
+            with self.cond:
+                self.idle.append(worker)
+                self.cond.notify()
+        else:
+            if healthy:
+                worker.close()
+            else:
+                worker.proc.kill()
+                worker.close()
+            with self.cond:
+                self.workers -= 1
+                self.cond.notify()
+
+    def run(self, script, commands, timeout):
+        '''Run a test script in a worker, returning a dictionary with the
+        'status' ('pass', 'fail' or 'tainted') and a 'message'.'''
+        try:
+            worker = self._acquire()
+        except (OSError, ValueError, WorkerError) as ex:
+            return {'status': 'tainted', 'message': str(ex)}
+        healthy = False
+        try:
+            reply = worker.run(script, commands, timeout)
+            healthy = reply['status'] != 'tainted'
+            return reply
+        except (OSError, ValueError, WorkerError) as ex:
+            return {'status': 'tainted', 'message': str(ex) or repr(ex)}
+        finally:
+            worker.copy_output()
+            self._release(worker, healthy)
+
+    def close(self):
+        with self.cond:
+            (idle, self.idle) = (self.idle, [])
+            self.workers -= len(idle)
+        for worker in idle:
+            worker.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool(size):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import atexit
+            _pool = _Pool(size)
+            atexit.register(_pool.close)
+        return _pool
+
+def _run_fresh(script, extra_args, timeout):
+    import testparams
+    proc = testparams.run_simics(extra_args + ['-p', script], timeout,
+                                 asynchronous=True, outfile=sys.stdout)
+    if proc.wait() != 0:
+        raise testparams.TestFailure(f'{script} failed')
+
+def _run_pooled(pool, script, commands, extra_args, timeout):
+    reply = pool.run(script, commands, timeout)
+    if reply['status'] != 'pass':
+        print(f"*** {script} did not pass in a test pool worker"
+              f" ({reply['status']}: {reply['message']}),"
+              " running it in a fresh Simics process")
+        _run_fresh(script, extra_args, timeout)
+
+def _commands_from_args(extra_args):
+    # Commands given by -e arguments, or None if there are other arguments
+    if len(extra_args) % 2:
+        return None
+    pairs = list(zip(extra_args[::2], extra_args[1::2]))
+    if any(opt != '-e' for (opt, _) in pairs):
+        return None
+    return [cmd for (_, cmd) in pairs]
+
+def add_simics_tests(suite, pattern, extra_args=[], name_suffix='',
+                     timeout=600, workers=None):
+    '''Add the test scripts matching pattern, in the directory of the
+    calling suite, to suite. Uses a pool of persistent Simics processes if
+    workers is given or the SIMICS_TEST_POOL environment variable is set,
+    otherwise falls back to suite.add_simics_tests. The name_suffix is
+    appended to the test names in pool mode, to keep them unique when the
+    same scripts are added more than once.'''
+    if workers is None:
+        workers = int(os.environ.get(pool_env) or 0)
+    if workers <= 0:
+        suite.add_simics_tests(pattern, extra_args=extra_args)
+        return
+    import testparams
+    pool = _get_pool(workers)
+    commands = _commands_from_args(extra_args)
+    test_dir = os.path.dirname(os.path.abspath(
+        sys._getframe(1).f_code.co_filename))
+    for script in sorted(glob.glob(os.path.join(test_dir, pattern))):
+        name = testparams.script_to_name(os.path.basename(script)) + name_suffix
+        if commands is None:
+            suite.add_test(name, lambda script=script: _run_fresh(
+                script, list(extra_args), timeout))
+        else:
+            suite.add_test(name, lambda script=script: _run_pooled(
+                pool, script, commands, list(extra_args), timeout))
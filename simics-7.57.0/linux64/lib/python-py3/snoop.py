@@ -17,8 +17,6 @@ import traceback
 import functools
 import typing
 from typing import Callable, Optional
-import weakref
-import unittest
 
 import conf
 import simics
@@ -146,23 +144,6 @@ class ThreadedContext(ExecContext):
     '''Callback can be called in any context, Threaded, Global or Cell.'''
 
 
-class TestCellContext(unittest.TestCase):
-    def test(self):
-        self.assertEqual(GlobalContext(), GlobalContext())
-        self.assertEqual(CellContext(None), CellContext(None))
-        self.assertEqual(ThreadedContext(), ThreadedContext())
-        self.assertEqual(CellContext(None).cell, None)
-        self.assertEqual(CellContext(conf.sim).cell, None)
-        cell = simics.SIM_create_object('cell', 'mycell')
-        clk = simics.SIM_create_object('clock', 'clk', freq_mhz=1, cell=cell)
-        ms = simics.SIM_create_object('memory-space', 'ms', queue=clk)
-        try:
-            for obj in [cell, clk, ms]:
-                self.assertEqual(CellContext(obj).cell, cell)
-        finally:
-            simics.SIM_delete_objects([cell, clk, ms])
-
-
 T = typing.TypeVar('T')
 T1 = typing.TypeVar('T1')
 T2 = typing.TypeVar('T2')
@@ -230,47 +211,6 @@ class InvalidObjError(Error):
     constructor does not fulfil the requirements of this snooper'''
 
 
-class TestObjectHandle(unittest.TestCase):
-    calls = []
-    def make_handle(self, obj, cb):
-        return object_handle(
-            obj, lambda: self.calls.append(('cancel', cb)))
-    def test_orphan_cancellation(self):
-        '''Test that a callback on an object is cancelled
-        if the listened object is deleted'''
-        # arbitrary easy-to-instantiate class
-        cls = "memory-space"
-        obj = simics.SIM_create_object(cls, 'ms', [])
-        try:
-            def cb():
-                assert False
-            ref = weakref.ref(cb)
-            handle1 = self.make_handle(obj, cb)
-            handle1.cancel()
-            self.assertEqual(self.calls, [('cancel', cb)])
-            del self.calls[:]
-            # idempotent
-            handle1.cancel()
-            self.assertEqual(self.calls, [])
-            del handle1
-            assert ref() is cb
-            del cb
-            self.assertIsNone(ref())
-
-            def cb2():
-                assert False
-            ref2 = weakref.ref(cb2)
-            handle2 = self.make_handle(obj, cb2)
-        finally:
-            simics.SIM_delete_object(obj)
-        self.assertEqual(self.calls, [('cancel', cb2)])
-        del self.calls[:]
-        del handle2
-        assert ref2() is cb2
-        del cb2
-        self.assertIsNone(ref2())
-
-
 def catch_exceptions(exc_handler: Callable[[Exception], None]) -> Callable[
         [Callable[..., T]], Callable[..., T]]:
     '''Decorator to capture exceptions raised by a function by calling the
@@ -294,23 +234,6 @@ def catch_exceptions(exc_handler: Callable[[Exception], None]) -> Callable[
     return make_wrapper
 
 
-class TestCatchExceptions(unittest.TestCase):
-    def test_catch_exceptions(self):
-        calls = []
-        @catch_exceptions(lambda exc: calls.append(exc))
-        def f(*args, **kwargs):
-            calls.append((args, kwargs))
-            if 'exc' in kwargs:
-                raise kwargs['exc']
-            return kwargs.get('ret')
-        exc = Exception('hello')
-        self.assertEqual(f(3, a=4, ret=5), 5)
-        self.assertEqual(calls, [((3,), dict(a=4, ret=5))])
-        del calls[:]
-        self.assertIs(f(6, ret=7, exc=exc), None)
-        self.assertEqual(calls, [((6,), dict(exc=exc, ret=7)), exc])
-
-
 def add_callback_simple(
         snooper: Snooper[T], yield_value: Callable[[T], None],
         yield_exc: Optional[Callable[[Exception], None]]=None, *,
@@ -378,106 +301,6 @@ def add_callback_simple(
     return handle
 
 
-class TestSimpleCallback(unittest.TestCase):
-    def test_add_callback_simple(self):
-        calls = []
-        cbs = []
-        dummy_exc = Exception('dummy exc')
-        class DummyHandle(Handle):
-            def cancel(self): calls.append(self)
-        class MockSnooper(Snooper):
-            def add_callback(cb, exc_cb):
-                def inner_cb(value):
-                    if value:
-                        cb(value)
-                    else:
-                        exc_cb(dummy_exc)
-                cbs.append(inner_cb)
-                return DummyHandle()
-        handle = add_callback_simple(MockSnooper, lambda x: calls.append(x))
-        [inner_cb] = cbs
-        del cbs[:]
-        inner_cb(7)
-        self.assertEqual(calls, [7])
-        del calls[:]
-        prev = conf.sim.stop_on_error
-        conf.sim.stop_on_error = False
-        try:
-            with self.assertRaisesRegex(
-                    simics.CriticalErrors, "unhandled snooper exception"):
-                inner_cb(False)
-        finally:
-            conf.sim.stop_on_error = prev
-        handle.cancel()
-        self.assertEqual(calls, [handle])
-        del calls[:]
-
-        handle = add_callback_simple(MockSnooper, lambda x: calls.append(x),
-                                     yield_exc=lambda exc: calls.append(exc),
-                                     once=True)
-        [inner_cb] = cbs
-        del cbs[:]
-        inner_cb(False)
-        self.assertEqual(calls, [dummy_exc])
-        del calls[:]
-        inner_cb(11)
-        self.assertEqual(calls, [handle, 11])
-        del calls[:]
-        # a snooper *should* not call its callback after cancellation,
-        # but if it does then we suppress the extra call
-        inner_cb(11)
-        self.assertEqual(calls, [])
-
-        # An explicit exception handler does not forgive an exception in
-        # the callback
-        for once in [False, True]:
-            bad_exc = Exception('bad exception')
-            def bad_cb(_):
-                raise bad_exc
-            handle = add_callback_simple(
-                MockSnooper, bad_cb, yield_exc=lambda exc: calls.append(exc),
-                once=once)
-            [inner_cb] = cbs
-            del cbs[:]
-            prev = conf.sim.stop_on_error
-            conf.sim.stop_on_error = False
-            try:
-                with self.assertRaisesRegex(simics.CriticalErrors,
-                                            '1 critical error'):
-                    inner_cb(1)
-            finally:
-                conf.sim.stop_on_error = prev
-            self.assertEqual(calls, [handle] if once else [])
-
-
-def test_decref(tc, snooper):
-    '''Test that a snooper's `cancel` calls simics.VT_python_decref just the
-    right (non-zero) number of times to free the callback'''
-    def weakref_after_cancel(snooper):
-        def cb(_): pass
-        ref = weakref.ref(cb)
-        handle = snooper.add_callback(cb, cb)
-        handle.cancel()
-        del handle
-        assert ref() is not None
-        del cb
-        return ref()
-    tc.assertIsNone(weakref_after_cancel(snooper))
-    orig = simics.VT_python_decref
-    try:
-        first = True
-        def decref(obj):
-            nonlocal first
-            if first:
-                first = False
-            else:
-                orig(obj)
-        simics.VT_python_decref = decref
-        tc.assertIsNotNone(weakref_after_cancel(snooper))
-    finally:
-        simics.VT_python_decref = orig
-
-
 class Hap(Snooper):
     '''Yield a value when a hap occurs on a given object. The value
     is a tuple of the hap arguments, excluding the object.'''
@@ -509,36 +332,6 @@ class Hap(Snooper):
         return self._exec_context
 
 
-class TestHap(unittest.TestCase):
-    def test_hap(self):
-        hap_type = simics.SIM_hap_add_type('My_Hap', 'ii', 'x y', '', '', 0)
-        calls = []
-        def cb(args):
-            calls.append(args)
-        ref = weakref.ref(cb)
-        handle = add_callback_simple(Hap(conf.sim, 'My_Hap'), cb)
-        simics.SIM_hap_occurred_always(hap_type, conf.sim, 0, [1, 2])
-        simics.SIM_hap_occurred_always(hap_type, conf.sim, 0, [3, 4])
-        self.assertEqual(calls, [(1, 2), (3, 4)])
-        del calls[:]
-        handle.cancel()
-        assert ref() is cb
-        del cb
-        self.assertIsNone(ref())
-        simics.SIM_hap_occurred_always(hap_type, conf.sim, 0, [5, 6])
-        self.assertEqual(calls, [])
-
-        self.assertEqual(
-            Hap(conf.sim, 'My_Hap', GlobalContext()).exec_context(),
-            GlobalContext())
-        cell = simics.SIM_create_object('cell', 'mycell')
-        try:
-            self.assertEqual(
-                Hap(cell, 'My_Hap').exec_context(), CellContext(cell))
-        finally:
-            simics.SIM_delete_object(cell)
-
-
 @dataclass
 class LogData:
     kind: str
@@ -560,26 +353,6 @@ class Log(Hap):
         return super().add_callback(wrapped, yield_exc)
 
 
-class TestLog(unittest.TestCase):
-    def test_log(self):
-        calls = []
-        def cb(arg):
-            calls.append(arg)
-        ref = weakref.ref(cb)
-        handle = add_callback_simple(Log(conf.sim), cb)
-        simics.SIM_log_info(1, conf.sim, 0, 'cow')
-        simics.SIM_log_unimplemented(1, conf.sim, 0, 'horse')
-        self.assertEqual(calls, [LogData('info', 'cow'),
-                              LogData('unimpl', 'horse')])
-        del calls[:]
-        handle.cancel()
-        assert ref() is cb
-        del cb
-        self.assertIsNone(ref())
-        simics.SIM_log_info(1, conf.sim, 0, 'pig')
-        self.assertEqual(calls, [])
-
-
 class Notifier(Snooper[None]):
     '''Yield the value `None` when a notifier is notified on an object.'''
     def __init__(self, obj: simics.conf_object_t,
@@ -618,49 +391,6 @@ class Notifier(Snooper[None]):
         return self._exec_context
 
 
-class TestNotifier(unittest.TestCase):
-    def test_notifier(self):
-        with self.assertRaises(TypeError):
-            Notifier(conf.sim, 1 << 30)
-        not_type = simics.SIM_notifier_type('my-notifier')
-        with self.assertRaises(InvalidObjError):
-            Notifier(conf.sim, not_type)
-        simics.SIM_register_notifier('sim', not_type, '')
-        calls = []
-        def cb0(arg):
-            calls.append((0, arg))
-        def cb1(arg):
-            calls.append((1, arg))
-        ref0 = weakref.ref(cb0)
-        handle0 = add_callback_simple(Notifier(conf.sim, not_type), cb0)
-        handle1 = add_callback_simple(Notifier(conf.sim, 'my-notifier'), cb1)
-        simics.SIM_notify(conf.sim, not_type)
-        self.assertEqual(sorted(calls), [(0, None), (1, None)])
-        del calls[:]
-        simics.SIM_notify(conf.sim, not_type)
-        self.assertEqual(sorted(calls), [(0, None), (1, None)])
-        del calls[:]
-        handle0.cancel()
-        handle1.cancel()
-        del handle0
-        assert ref0() is cb0
-        del cb0
-        self.assertIsNone(ref0())
-        simics.SIM_notify(conf.sim, not_type)
-        self.assertEqual(calls, [])
-
-        self.assertEqual(
-            Notifier(conf.sim, not_type, GlobalContext()).exec_context(),
-            GlobalContext())
-        simics.SIM_register_notifier('cell', not_type, '')
-        cell = simics.SIM_create_object('cell', 'mycell')
-        try:
-            self.assertEqual(
-                Notifier(cell, not_type).exec_context(), CellContext(cell))
-        finally:
-            simics.SIM_delete_object(cell)
-
-
 @dataclass
 class Poll(Snooper[T]):
     '''Abstract snooper that yields the value returned by the method
@@ -727,60 +457,6 @@ class Poll(Snooper[T]):
         pass
 
 
-class TestPoll(unittest.TestCase):
-    def test_poll(self):
-        calls = []
-        test_exc = Exception('test')
-        class MockSnooper(Snooper):
-            class Handle(Handle):
-                def cancel(self): calls.append(('cancel', self))
-            def add_callback(self, cb, exc_cb):
-                handle = self.Handle()
-                calls.append((cb, exc_cb, handle))
-                return handle
-            def exec_context(self):
-                return ThreadedContext()
-        class MockPoll(Poll):
-            def poll(self):
-                calls.append('poll')
-                if isinstance(val, Exception):
-                    raise val
-                return val
-            def __init__(self):
-                super().__init__(MockSnooper())
-
-        self.assertEqual(MockPoll().exec_context(),
-                         ThreadedContext())
-        val =  3
-        handle = MockPoll().add_callback(
-            lambda arg: calls.append(('cb', arg)),
-            lambda exc: calls.append(('exc', exc)))
-        [get, (poll, exc_cb, inner_handle)] = calls
-        self.assertEqual(get, 'poll')
-        del calls[:]
-        exc_cb(test_exc)
-        self.assertEqual(calls, [('exc', test_exc)])
-        del calls[:]
-        poll(7)
-        poll(8)
-        val = 5
-        poll(9)
-        self.assertEqual(calls, ['poll', 'poll', 'poll', ('cb', 5)])
-        del calls[:]
-        poll(10)
-        val = 6
-        poll(11)
-        self.assertEqual(calls, ['poll', 'poll', ('cb', 6)])
-        del calls[:]
-        val = test_exc
-        poll(12)
-        self.assertEqual(calls, ['poll', ('exc', test_exc)])
-        del calls[:]
-        handle.cancel()
-        self.assertEqual(calls, [('cancel', inner_handle)])
-        del calls[:]
-
-
 state_change = simics.Sim_Notify_State_Change
 
 
@@ -829,57 +505,6 @@ class DeviceAttribute(Poll[int]):
         return simics.SIM_get_attribute(self._attr_obj, self._attr)
 
 
-class TestDeviceAttribute(unittest.TestCase):
-    def test_attribute(self):
-        with self.assertRaises(InvalidObjError):
-            # attribute exists, but not a DML dev
-            assert hasattr(conf.sim, 'version')
-            DeviceAttribute(conf.sim, 'version')
-        dev = simics.SIM_create_object('sample_device_dml', 'dev', [])
-        try:
-            with self.assertRaises(InvalidObjError):
-                # attribute doesn't exist
-                DeviceAttribute(dev, 'version')
-            dev.log_level = 0
-            calls = []
-            dev.int_attr = 4
-            handle1 = add_callback_simple(DeviceAttribute(dev, 'int_attr'),
-                lambda x: calls.append(('int_attr', x)))
-            handle2 = add_callback_simple(DeviceAttribute(dev.bank.regs, 'r1'),
-                lambda x: calls.append(('r1', x)))
-            dev.int_attr = 3
-            dev.int_attr = 4
-            dev.bank.regs.r1 = 2
-            dev.bank.regs.r1 = 2
-            dev.int_attr = 4
-            dev.int_attr = 3
-            dev.bank.regs.r1 = 3
-            self.assertEqual(calls, [('int_attr', 3), ('int_attr', 4),
-                                  ('r1', 2), ('int_attr', 3), ('r1', 3)])
-            del calls[:]
-            handle2.cancel()
-            dev.bank.regs.r1 = 4
-            self.assertEqual(calls, [])
-            handle1.cancel()
-
-            def cb(x):
-                pass
-            ref = weakref.ref(cb)
-            handle = add_callback_simple(DeviceAttribute(dev, 'int_attr'), cb)
-            handle.cancel()
-            del handle
-            assert ref() is cb
-            del cb
-            self.assertIsNone(ref())
-
-            self.assertEqual(
-                DeviceAttribute(dev.bank.regs, 'r1').exec_context(),
-                CellContext(dev.bank.regs))
-
-        finally:
-            simics.SIM_delete_object(dev)
-
-
 @dataclass
 class _c_RegisterValueStateChange(Snooper):
     notifier_obj: simics.conf_object_t
@@ -936,64 +561,6 @@ class RegisterValue(Poll[int]):
         return self._reg.val
 
 
-class TestRegisterValue(unittest.TestCase):
-    def test_register_value_dml(self):
-        obj = simics.SIM_create_object('sample_device_dml', 'dev')
-        try:
-            calls = []
-            obj.bank.regs.r1 = 0
-            handle = RegisterValue(
-                dev_util.bank_regs(obj.bank.regs).r1).add_callback(
-                calls.append, calls.append)
-            obj.bank.regs.r1 = 7
-            self.assertEqual(calls, [7])
-            del calls[:]
-            handle.cancel()
-            obj.bank.regs.r1 = 5
-            self.assertEqual(calls, [])
-
-            def cb(x):
-                pass
-            ref = weakref.ref(cb)
-            handle = add_callback_simple(RegisterValue(
-                dev_util.bank_regs(obj.bank.regs).r1), cb)
-            handle.cancel()
-            del handle
-            assert ref() is cb
-            del cb
-            self.assertIsNone(ref())
-        finally:
-            simics.SIM_delete_object(obj)
-
-    def test_register_value_cc(self):
-        obj = simics.SIM_create_object('test_field_array_via_data', 'dev')
-        try:
-            calls = []
-            obj.bank.b.r = 0
-            handle = RegisterValue(
-                dev_util.bank_regs(obj.bank.b).r).add_callback(
-                calls.append, calls.append)
-            obj.bank.b.r = 7
-            self.assertEqual(calls, [7])
-            del calls[:]
-            handle.cancel()
-            obj.bank.b.r = 0
-            self.assertEqual(calls, [])
-
-            def cb(x):
-                pass
-            ref = weakref.ref(cb)
-            handle = add_callback_simple(RegisterValue(
-                dev_util.bank_regs(obj.bank.b).r), cb)
-            handle.cancel()
-            del handle
-            assert ref() is cb
-            del cb
-            self.assertIsNone(ref())
-        finally:
-            simics.SIM_delete_object(obj)
-
-
 class FieldValue(RegisterValue):
     '''Yield the value of a field of a C++ or DML bank when
     it changes. Depends on the `bank-register-value-change` or
@@ -1011,31 +578,6 @@ class FieldValue(RegisterValue):
         return self._field.val
 
 
-class TestFieldValue(unittest.TestCase):
-    def test_register_value_cc(self):
-        obj = simics.SIM_create_object('test_field_array_via_data', 'dev')
-        try:
-            calls=[]
-            # f0[1] is bits 9:8, mask 0x300
-            handle = FieldValue(
-                dev_util.bank_regs(obj.bank.b).r.field.f0[1]).add_callback(
-                calls.append, calls.append)
-            obj.bank.b.r = 0xffcff
-            self.assertEqual(calls, [])
-            obj.bank.b.r = 0xffdff
-            obj.bank.b.r = 0xfffff
-            obj.bank.b.r = 0xffeff
-            self.assertEqual(calls, [1, 3, 2])
-            del calls[:]
-            obj.bank.b.r = 0x00200
-            self.assertEqual(calls, [])
-            handle.cancel()
-            obj.bank.b.r = 0
-            self.assertEqual(calls, [])
-        finally:
-            simics.SIM_delete_object(obj)
-
-
 @dataclass
 class Time(Snooper[None]):
     '''Common implementation between event based snoopers'''
@@ -1192,133 +734,6 @@ class Steps(Time):
         return handle
 
 
-class TestTime(unittest.TestCase):
-    def callback_tests(self, cls, clk, ktick, tick_count):
-        ns1 = simics.SIM_create_object('namespace', 'ns1', queue=clk)
-        ns2 = simics.SIM_create_object('namespace', 'ns2', queue=None)
-        try:
-            calls = []
-            simics.SIM_continue(1500)
-            def cb1(arg):
-                assert arg is None
-                calls.append(tick_count(clk))
-            ref1 = weakref.ref(cb1)
-            handle1 = add_callback_simple(
-                cls(clk, ktick), cb1)
-            simics.SIM_continue(1)
-            handle2 = add_callback_simple(
-                cls(ns1, ktick),
-                lambda _: calls.append(tick_count(clk)))
-            simics.SIM_continue(2501)
-            self.assertEqual(calls, [2500, 2501, 3500, 3501])
-            del calls[:]
-            handle1.cancel()
-            del handle1
-            assert ref1() is cb1
-            del cb1
-            self.assertIsNone(ref1())
-            simics.SIM_continue(1000)
-            self.assertEqual(calls, [4501])
-            handle2.cancel()
-            try:
-                cell = simics.SIM_create_object('cell', 'my_cell')
-                old = clk.cell
-                clk.cell = cell
-                self.assertEqual(cls(clk, 1).exec_context(),
-                                 CellContext(clk))
-            finally:
-                clk.cell = old
-                simics.SIM_delete_object(cell)
-            with self.assertRaises(Error):
-                cls(ns2, ktick)
-            test_decref(self, cls(clk, ktick))
-        finally:
-            simics.SIM_delete_object(ns1)
-            simics.SIM_delete_object(ns2)
-
-    def test_seconds(self):
-        time_clk = simics.SIM_create_object('clock', 'clk', freq_mhz=1)
-        try:
-            self.callback_tests(Seconds, time_clk, 0.001,
-                                simics.SIM_cycle_count)
-        finally:
-            simics.SIM_delete_object(time_clk)
-        time_clk = simics.SIM_create_object('clock', 'clk', freq_mhz=1)
-        try:
-            self.callback_tests(Cycles, time_clk, 1000, simics.SIM_cycle_count)
-        finally:
-            simics.SIM_delete_object(time_clk)
-        step_clk = simics.SIM_create_object('step_clock', 'sclk', freq_mhz=1)
-        try:
-            self.callback_tests(Steps, step_clk, 1000, simics.SIM_step_count)
-        finally:
-            simics.SIM_delete_object(step_clk)
-
-    def abelian_group_tests(self, cls, clk):
-        two = cls(clk, 2)
-        three = cls(clk, 3)
-        five = cls(clk, 5)
-        six = cls(clk, 6)
-        self.assertEqual(five, cls(clk, 5))
-        self.assertNotEqual(five, six)
-        ns = simics.SIM_create_object('namespace', 'ns', queue=clk)
-        try:
-            other_five = cls(ns, 5)
-            self.assertNotEqual(five, other_five)
-        finally:
-            simics.SIM_delete_object(ns)
-        self.assertEqual(two + three, five)
-        self.assertEqual(five - three, two)
-        self.assertEqual(three * 2, six)
-        self.assertEqual(3 * two, six)
-        self.assertEqual(two * 2.5, five)
-        with self.assertRaises(TypeError):
-            # fisketur[unused-value]
-            five + other_five
-        with self.assertRaises(TypeError):
-            # fisketur[unused-value]
-            five - other_five
-        with self.assertRaises(TypeError):
-            # fisketur[unused-value]
-            five + 5
-        with self.assertRaises(TypeError):
-            # fisketur[unused-value]
-            5 + five
-
-    def test_arithmetic(self):
-        time_clk = simics.SIM_create_object('clock', 'clk', freq_mhz=1)
-        step_clk = simics.SIM_create_object('step_clock', 'sclk', freq_mhz=1)
-        try:
-            # All time classes are abelian groups, meaning they support
-            # integer addition and multiplication.
-            self.abelian_group_tests(Seconds, time_clk)
-            self.abelian_group_tests(Cycles, time_clk)
-            self.abelian_group_tests(Steps, step_clk)
-            # Seconds also have vector space properties: supports
-            # floating-point numbers and division.
-            two_point_five = Seconds(time_clk, 2.5)
-            five = Seconds(time_clk, 5)
-            self.assertEqual(2 * two_point_five, five)
-            self.assertEqual(five / 2, two_point_five)
-            with self.assertRaises(TypeError):
-                # fisketur[unused-value]
-                5 / five
-
-            # Interval arg is optional only for Seconds.
-            self.assertEqual(Seconds(time_clk), Seconds(time_clk, 1))
-            with self.assertRaises(TypeError):
-                # fisketur[call-args]
-                Cycles(time_clk)
-            with self.assertRaises(TypeError):
-                # fisketur[call-args]
-                Steps(step_clk)
-            with self.assertRaises(Error):
-                Steps(time_clk, 1)
-        finally:
-            simics.SIM_delete_object(time_clk)
-            simics.SIM_delete_object(step_clk)
-
-
 @dataclass
 class ConsoleString(Snooper[None]):
     '''Yield `None` when a matching string appears on a console.'''
@@ -1358,52 +773,6 @@ class ConsoleString(Snooper[None]):
         return CellContext(self.con)
 
 
-class TestConsoleString(unittest.TestCase):
-    def test_console_string(self):
-        # TODO: test regexp
-        rec = simics.SIM_create_object('recorder', 'rec', [])
-        con = simics.SIM_create_object('textcon', 'con', [['recorder', rec],
-                                                          ['visible', False]])
-        calls = []
-        def cb(string):
-            calls.append(string)
-        with self.assertRaises(InvalidObjError):
-            ConsoleString(conf.sim, 'foo')
-        ref = weakref.ref(cb)
-        snooper = ConsoleString(con, 'foo')
-        self.assertEqual(snooper.exec_context(), CellContext(con))
-        handle = add_callback_simple(snooper, cb)
-        for char in b'ufo':
-            con.iface.serial_device.write(char)
-        self.assertEqual(calls, [])
-        con.iface.serial_device.write(ord('o'))
-        self.assertEqual(calls, [None])
-        del calls[:]
-        handle.cancel()
-        del handle
-        assert ref() is cb
-        del cb
-        self.assertIsNone(ref())
-        for c in b'foo':
-            con.iface.serial_device.write(c)
-        self.assertEqual(calls, [])
-
-        def cb2(string):
-            calls.append(string)
-        handle = add_callback_simple(ConsoleString(con, 'a.*b',
-                                                   regexp=True), cb2)
-        for c in b'acdefg':
-            con.iface.serial_device.write(c)
-        self.assertEqual(calls, [])
-        con.iface.serial_device.write(ord('b'))
-        self.assertEqual(calls, [None])
-        handle.cancel()
-
-        test_decref(self, ConsoleString(con, 'foo'))
-
-        simics.SIM_delete_object(con)
-        simics.SIM_delete_object(rec)
-
 class _MemoryAccess(Snooper):
     @abc.abstractproperty
     def access(self): pass
@@ -1511,101 +880,6 @@ class MemoryExecute(_MemoryAccess):
             size=simics.SIM_get_mem_op_size(memop))
 
 
-class TestMemoryAccess(unittest.TestCase):
-    def test_memory_access(self):
-        for cls in [MemoryRead, MemoryWrite, MemoryExecute]:
-            with self.assertRaises(InvalidObjError):
-                cls(conf.sim, 0, 4)
-        mem = simics.SIM_create_object('set-memory', 'mem', value=0xfe)
-        ms = simics.SIM_create_object('memory-space', 'ms',
-                                      map=[[0, mem, 0, 0, 100]])
-        try:
-            calls = []
-            def cb(data):
-                calls.append(data)
-            ref = weakref.ref(cb)
-            snooper = MemoryRead(ms, 90, 20)
-            self.assertEqual(snooper.exec_context(), CellContext(ms))
-            handle = add_callback_simple(snooper, cb)
-            self.assertEqual(calls, [])
-            # normal read included
-            ms.iface.memory_space.read(conf.sim, 90, 2, False)
-            # access outside breakpoint ignored
-            ms.iface.memory_space.read(None, 89, 1, False)
-            # overlapping access included
-            ms.iface.memory_space.read(None, 88, 4, False)
-            # inquiry access ignored
-            ms.iface.memory_space.read(None, 91, 2, True)
-            # write access ignored
-            ms.iface.memory_space.write(None, 92, (0x47, 0x11), False)
-            with self.assertRaises(simics.SimExc_Memory):
-                # miss included
-                ms.iface.memory_space.read(None, 100, 3, False)
-            with self.assertRaises(simics.SimExc_Memory):
-                # outside break interval excluded
-                ms.iface.memory_space.read(None, 110, 1, False)
-            self.assertEqual(calls, [
-                MemoryReadData(initiator=conf.sim, address=90, size=2),
-                MemoryReadData(initiator=None, address=88, size=4),
-                MemoryReadData(initiator=None, address=100, size=3)])
-            del calls[:]
-            handle.cancel()
-            del handle
-            # no reference leak
-            assert ref() is cb
-            del cb
-            self.assertIsNone(ref())
-            # cancel did cause unregistration
-            try:
-                ms.iface.memory_space.read(None, 90, 2, False)
-            except simics.SimExc_Memory: pass
-            self.assertEqual(calls, [])
-
-            # write works, and adds 'value' key to dict
-            snooper = MemoryWrite(ms, 90, 20)
-            def cb2(data):
-                calls.append(data)
-            handle = add_callback_simple(snooper, cb2)
-            ms.iface.memory_space.write(None, 90, (0x47, 0x11), False)
-            # read is ignored
-            ms.iface.memory_space.read(None, 91, 2, False)
-            with self.assertRaises(simics.SimExc_Memory):
-                # miss is included
-                ms.iface.memory_space.write(
-                    None, 100, (0xde, 0xad, 0xbe, 0xef), False)
-            self.assertEqual(calls, [
-                MemoryWriteData(initiator=None, address=90, value=b'\x47\x11'),
-                MemoryWriteData(initiator=None, address=100,
-                     value=b'\xde\xad\xbe\xef')])
-            del calls[:]
-            handle.cancel()
-
-            # execution triggered by sending a Fetch transaction
-            # (incidentally, this also covers that a pure transaction_t
-            # is captured)
-            snooper = MemoryExecute(ms, 90, 20)
-            handle = add_callback_simple(snooper, cb2)
-            # normal fetch included
-            t = simics.transaction_t(size=2, flags=simics.Sim_Transaction_Fetch)
-            self.assertEqual(simics.SIM_issue_transaction(ms, t, 90),
-                             simics.Sim_PE_No_Exception)
-            self.assertEqual(t.data, b'\xfe\xfe')
-            # non-fetch read ignored
-            ms.iface.memory_space.read(conf.sim, 90, 2, False)
-            # fetch miss included
-            t = simics.transaction_t(size=3, flags=simics.Sim_Transaction_Fetch)
-            self.assertEqual(simics.SIM_issue_transaction(ms, t, 100),
-                             simics.Sim_PE_IO_Not_Taken)
-            self.assertEqual(calls, [
-                MemoryExecuteData(initiator=None, address=90, size=2),
-                MemoryExecuteData(initiator=None, address=100, size=3)])
-            del calls[:]
-            handle.cancel()
-        finally:
-            simics.SIM_delete_object(ms)
-            simics.SIM_delete_object(mem)
-
-
 @dataclass
 class Global(Snooper):
     '''Wraps a snooper and raises its exec_context ta GlobalContext,
@@ -1628,53 +902,6 @@ class Global(Snooper):
         return GlobalContext()
 
 
-class TestGlobal(unittest.TestCase):
-    def test(self):
-        calls = []
-        class MockHandle(Handle):
-            def cancel(self):
-                calls.append(self)
-        @dataclass
-        class MockSnooper(Snooper):
-            exec_context: ExecContext
-            def add_callback(self, cb, ctx):
-                handle = MockHandle()
-                calls.append((cb, ctx, handle))
-                return handle
-            def exec_context(self): return self.exec_context
-        snooper = Global(MockSnooper(CellContext(None)))
-        self.assertEqual(snooper.exec_context(), GlobalContext())
-        class TestException(Exception): pass
-        exc = TestException()
-        def log(value):
-            calls.append((simics.VT_is_oec_thread(), value))
-        handle = add_callback_simple(snooper, log, yield_exc=log)
-        [(cb, exc_cb, inner_handle)] = calls
-        del calls[:]
-        cb(simics.VT_is_oec_thread())
-        exc_cb(exc)
-        self.assertEqual(calls, [(True, True), (True, exc)])
-        del calls[:]
-        clk = simics.SIM_create_object('clock', None, freq_mhz=1)
-        handles = []
-        try:
-            handles.append(add_callback_simple(
-                Seconds(clk, 1.1),
-                lambda _: cb(simics.VT_is_oec_thread())))
-            handles.append(add_callback_simple(
-                Seconds(clk, 1.2), lambda _: exc_cb(exc), yield_exc=log))
-            simics.SIM_continue(1200010)
-            self.assertEqual(calls, [(True, False), (True, exc)])
-            del calls[:]
-            handle.cancel()
-            self.assertEqual(calls, [inner_handle])
-            del calls[:]
-        finally:
-            for h in handles:
-                h.cancel()
-            simics.SIM_delete_object(clk)
-
-
 def run_alone_or_now(fun, *args):
     if simics.VT_is_oec_thread():
         fun(*args)
@@ -1725,48 +952,6 @@ class CompoundSnooper(Snooper):
         return self._exec_context
 
 
-class TestCompoundSnooper(unittest.TestCase):
-    def test(self):
-        [cell0, cell1] = [simics.SIM_create_object('cell', f'mycell{i}')
-                          for i in range(2)]
-        try:
-            class Comp(CompoundSnooper):
-                def add_callback(*args): assert False
-            @dataclass
-            class Snp(Snooper):
-                _exec_context: ExecContext
-                def add_callback(*args): assert False
-                def exec_context(self): return self._exec_context
-
-            # cross-cell is generally unsafe
-            with self.assertRaises(Error):
-                Comp([Snp(CellContext(cell1)), Snp(CellContext(cell0))])
-            # cell=None means we don't know from which cell calls happen,
-            # so generally unsafe to combine other than with GlobalContext
-            # snoopers
-            with self.assertRaises(Error):
-                Comp([Snp(CellContext(None)), Snp(CellContext(None))])
-            with self.assertRaises(Error):
-                Comp([Snp(CellContext(None)), Snp(CellContext(cell0))])
-            # we conservatively reject snoopers with threaded context:
-            # such snoopers are obscure and scary so we don't want to
-            # provide any guarantees.
-            with self.assertRaises(Error):
-                Comp([Snp(ThreadedContext())])
-            self.assertEqual(Comp([]).exec_context(), GlobalContext())
-            self.assertEqual(
-                Comp([Snp(GlobalContext()),
-                      Snp(CellContext(None))]).exec_context(),
-                CellContext(None))
-            self.assertEqual(
-                Comp([Snp(GlobalContext()),
-                      Snp(CellContext(cell1)),
-                      Snp(CellContext(cell1))]).exec_context(),
-                CellContext(cell1))
-        finally:
-            simics.SIM_delete_objects([cell0, cell1])
-
-
 class Sequence(CompoundSnooper):
     '''Deliver a callback when all the given snoopers deliver a callback
     in order. The delivered callback's argument is a tuple of the respective
@@ -1798,73 +983,6 @@ class Sequence(CompoundSnooper):
                 handle.cancel()
 
 
-class TestSequence(unittest.TestCase):
-    def test_sequence(self):
-        calls = []
-        # TODO test with nontrivial ctx
-        class MockSnooper(Snooper):
-            def __init__(self):
-                self.cbs = []
-                self.handles = []
-            class Handle(Handle):
-                cancelled = []
-                def cancel(self): self.cancelled.append(self)
-            def add_callback(self, cb, exc_cb):
-                self.cbs.append(cb)
-                handle = MockSnooper.Handle()
-                self.handles.append(handle)
-                return handle
-            def exec_context(self):
-                return GlobalContext()
-        snooper1 = MockSnooper()
-        snooper2 = MockSnooper()
-        snooper3 = MockSnooper()
-        snooper = Sequence([snooper1, snooper2, snooper3])
-        handle = snooper.add_callback(
-            lambda arg: calls.append(arg), None)
-        ([cb1], [cb2], [cb3]) = (snooper1.cbs, snooper2.cbs, snooper3.cbs)
-        ([handle1], [handle2], [handle3]) = (
-            snooper1.handles, snooper2.handles, snooper3.handles)
-        self.assertNotEqual(handle1, handle2)
-        cb2(4)
-        cb3(5)
-        cb2(6)
-        cb1(7)
-        cb2(8)
-        cb1(9)
-        self.assertEqual(calls, [])
-        cb3(10)
-        self.assertEqual(calls, [(7, 8, 10)])
-        del calls[:]
-        cb1(11)
-        cb2(12)
-        cb3(13)
-        self.assertEqual(calls, [(11, 12, 13)])
-        del calls[:]
-        # disposal propagates
-        handle.cancel()
-        self.assertEqual(set(snooper1.Handle.cancelled),
-                         {handle1, handle2, handle3})
-
-        # callback triggers subordinate snoopers
-        def cb(arg):
-            calls.append(arg)
-            cb1('rec1')
-            cb2('rec2')
-        (snooper1.cbs, snooper2.cbs, snooper3.cbs) = ([], [], [])
-        handle = snooper.add_callback(cb, None)
-        ([cb1], [cb2], [cb3]) = (snooper1.cbs, snooper2.cbs, snooper3.cbs)
-        cb1(14)
-        cb2(15)
-        cb3(16)
-        self.assertEqual(calls, [(14, 15, 16)])
-        del calls[:]
-        cb3(17)
-        self.assertEqual(calls, [('rec1', 'rec2', 17)])
-        del calls[:]
-        handle.cancel()
-
-
 class Filter(Snooper[T]):
     '''Wraps a snooper and selectively yields the values yielded by the
     wrapped snooper.'''
@@ -1888,59 +1006,6 @@ class Filter(Snooper[T]):
         return self.snooper.exec_context()
 
 
-class TestFilter(unittest.TestCase):
-    def test_filter(self):
-        calls = []
-        test_exc = Exception('test')
-        class MockSnooper(Snooper):
-            class Handle(Handle):
-                def cancel(self): calls.append(('cancel', self))
-            def add_callback(self, cb, exc_cb):
-                handle = self.Handle()
-                calls.append((cb, exc_cb, handle))
-                return handle
-            def exec_context(self):
-                return ThreadedContext()
-        def pred(arg):
-            calls.append(('filter', arg))
-            return cond
-
-        self.assertEqual(Filter(pred, MockSnooper()).exec_context(),
-                         ThreadedContext())
-        handle = Filter(pred, MockSnooper()).add_callback(
-            lambda arg: calls.append(('cb', arg)),
-            lambda exc: calls.append(('exc', exc)))
-        [(cb, exc_cb, inner_handle)] = calls
-        del calls[:]
-        cond = False
-        cb(1)
-        # emulate an exception signalled by the inner snooper
-        exc_cb(test_exc)
-        cond = True
-        cb(2)
-        exc_cb(test_exc)
-        self.assertEqual(
-            calls, [('filter', 1), ('exc', test_exc),
-                 ('filter', 2), ('cb', 2), ('exc', test_exc)])
-        del calls[:]
-        handle.cancel()
-        self.assertEqual(calls, [('cancel', inner_handle)])
-        del calls[:]
-
-        class Exc(Exception): pass
-        exc = Exc()
-        def bad_pred(arg):
-            raise exc
-        handle = Filter(bad_pred, MockSnooper()).add_callback(
-            lambda _: None, calls.append)
-        [(cb, exc_cb, inner_handle)] = calls
-        del calls[:]
-        cb(5)
-        self.assertEqual(calls, [exc])
-        del calls[:]
-        handle.cancel()
-
-
 class Map(Snooper[T2]):
     '''Snooper equivalent of `builtins.map`: Wraps a snooper and
     transform every yielded value. Exceptions remain unchanged.'''
@@ -1962,66 +1027,6 @@ class Map(Snooper[T2]):
         return self.snooper.exec_context()
 
 
-class TestMap(unittest.TestCase):
-    def test_map(self):
-        calls = []
-        test_exc = Exception('test')
-        @dataclass
-        class MockSnooper(Snooper):
-            class Handle(Handle):
-                def cancel(self): calls.append(('cancel', self))
-            handle: Handle
-            def add_callback(self, cb, exc_cb):
-                calls.append(('add_callback', cb, exc_cb))
-                return self.handle
-            def exec_context(self):
-                return ThreadedContext()
-        @dataclass
-        class Wrap:
-            sub: object
-        def fun(sub):
-            calls.append(('fun', sub))
-            return Wrap(sub)
-
-        self.assertEqual(Map(fun, MockSnooper(None)).exec_context(),
-                         ThreadedContext())
-        inner_handle = MockSnooper.Handle()
-        handle = Map(fun, MockSnooper(inner_handle)).add_callback(
-            lambda arg: calls.append(('cb', arg)),
-            lambda exc: calls.append(('exc', exc)))
-        [(tag, *args)] = calls
-        del calls[:]
-        self.assertEqual(tag, 'add_callback')
-        (cb, exc_cb) = args
-        cb(1)
-        # emulate an exception signalled by the inner snooper
-        exc_cb(test_exc)
-        cb(2)
-        exc_cb(test_exc)
-        self.assertEqual(
-            calls, [('fun', 1), ('cb', Wrap(1)), ('exc', test_exc),
-                    ('fun', 2), ('cb', Wrap(2)), ('exc', test_exc)])
-        del calls[:]
-        handle.cancel()
-        self.assertEqual(calls, [('cancel', inner_handle)])
-        del calls[:]
-
-        class Exc(Exception): pass
-        exc = Exc()
-        def bad_fun(arg):
-            raise exc
-        inner_handle = MockSnooper.Handle()
-        handle = Filter(bad_fun, MockSnooper(inner_handle)).add_callback(
-            lambda exc: None, calls.append)
-        [(tag, cb, exc_cb)] = calls
-        self.assertEqual(tag, 'add_callback')
-        del calls[:]
-        cb(5)
-        self.assertEqual(calls, [exc])
-        del calls[:]
-        handle.cancel()
-
-
 class Accumulate(Snooper[T]):
     '''Snooper equivalent of `itertools.accumulate`: Accumulate yielded
     values from one snooper by consecutively applying a binary function,
@@ -2051,71 +1056,6 @@ class Accumulate(Snooper[T]):
         return self.snooper.exec_context()
 
 
-class TestAccumulate(unittest.TestCase):
-    def test_accumulate(self):
-        calls = []
-        test_exc = Exception('test')
-        @dataclass
-        class MockSnooper(Snooper):
-            class Handle(Handle):
-                def cancel(self): calls.append(('cancel', self))
-            handle: Handle
-            def add_callback(self, cb, exc_cb):
-                calls.append(('add_callback', cb, exc_cb))
-                return self.handle
-            def exec_context(self):
-                return ThreadedContext()
-        @dataclass
-        class Binop:
-            lh: object
-            rh: object
-        def fun(lh, rh):
-            calls.append(('fun', lh, rh))
-            return Binop(lh, rh)
-
-        self.assertEqual(Accumulate(MockSnooper(None), fun).exec_context(),
-                         ThreadedContext())
-        inner_handle = MockSnooper.Handle()
-        handle = Accumulate(MockSnooper(inner_handle), fun).add_callback(
-            lambda arg: calls.append(('cb', arg)),
-            lambda exc: calls.append(('exc', exc)))
-        [(tag, *args)] = calls
-        del calls[:]
-        self.assertEqual(tag, 'add_callback')
-        (cb, exc_cb) = args
-        cb(1)
-        # emulate an exception signalled by the inner snooper
-        exc_cb(test_exc)
-        cb(2)
-        cb(3)
-        exc_cb(test_exc)
-        self.assertEqual(
-            calls, [('cb', 1), ('exc', test_exc),
-                    ('fun', 1, 2), ('cb', Binop(1, 2)),
-                    ('fun', Binop(1, 2), 3), ('cb', Binop(Binop(1, 2), 3)),
-                    ('exc', test_exc),])
-        del calls[:]
-        handle.cancel()
-        self.assertEqual(calls, [('cancel', inner_handle)])
-        del calls[:]
-
-        class Exc(Exception): pass
-        exc = Exc()
-        def bad_fun(arg):
-            raise exc
-        inner_handle = MockSnooper.Handle()
-        handle = Filter(bad_fun, MockSnooper(inner_handle)).add_callback(
-            lambda exc: None, calls.append)
-        [(tag, *args)] = calls
-        del calls[:]
-        self.assertEqual(tag, 'add_callback')
-        (cb, exc_cb) = args
-        cb(5)
-        self.assertEqual(calls, [exc])
-        del calls[:]
-        handle.cancel()
-
-
 class Any(CompoundSnooper):
     '''Deliver a callback when any of the given callbacks are
     delivered.  The delivered value is a pair, (triggered Snooper
@@ -2138,45 +1078,6 @@ class Any(CompoundSnooper):
                 handle.cancel()
 
 
-class TestAny(unittest.TestCase):
-    def test_any(self):
-        calls = []
-        test_exc = Exception('test')
-        class MockSnooper(Snooper):
-            def __init__(self):
-                self.cbs = []
-            class Handle(Handle):
-                cancelled = []
-                def cancel(self): self.cancelled.append(self)
-            def add_callback(self, cb, exc_cb):
-                handle = MockSnooper.Handle()
-                self.cbs.append((cb, exc_cb, handle))
-                return handle
-            def exec_context(self):
-                return GlobalContext()
-        snooper1 = MockSnooper()
-        snooper2 = MockSnooper()
-        handle = Any([snooper1, snooper2]).add_callback(
-            calls.append, calls.append)
-        [(cb1, exc_cb1, handle1)] = snooper1.cbs
-        [(cb2, exc_cb2, handle2)] = snooper2.cbs
-        self.assertNotEqual(handle1, handle2)
-        cb1(4)
-        self.assertEqual(calls, [(snooper1, 4)])
-        del calls[:]
-        cb2(5)
-        self.assertEqual(calls, [(snooper2, 5)])
-        del calls[:]
-        exc_cb1(test_exc)
-        self.assertEqual(calls, [test_exc])
-        del calls[:]
-        exc_cb2(test_exc)
-        self.assertEqual(calls, [test_exc])
-        del calls[:]
-        # disposal propagates
-        handle.cancel()
-        self.assertEqual(set(snooper1.Handle.cancelled), {handle1, handle2})
-
 class AnyObject(Any, Snooper[tuple[simics.conf_object_t, T]]):
     '''Applies a snooper recursively to a set of objects.
 
@@ -2227,74 +1128,6 @@ class AnyObject(Any, Snooper[tuple[simics.conf_object_t, T]]):
         return super().add_callback(wrapper, exc_cb)
 
 
-class TestAnyObject(unittest.TestCase):
-    def test_recursive(self):
-        calls = []
-        class MockSnooper(Snooper):
-            cbs = {}
-            handles = {}
-            class Handle(Handle):
-                cancelled = set()
-                def cancel(self):
-                    assert self not in self.cancelled
-                    self.cancelled.add(self)
-            def add_callback(self, cb, exc_cb):
-                handle = MockSnooper.Handle()
-                self.cbs.setdefault(self, []).append((cb, handle))
-                return handle
-            def exec_context(self): return GlobalContext()
-        names = ['barn', 'barn.cow', 'barn.horse']
-        objs = [simics.SIM_create_object('namespace', name, [])
-                for name in names]
-        try:
-            [barn, cow, horse] = objs
-            snoopers = {o: MockSnooper() for o in objs + [conf.sim]}
-            def f(obj):
-                '''a typical predicate would blindly instantiate a snooper
-                with some params; this emulates the same behaviour'''
-                if obj in {barn, horse, conf.sim}:
-                    return snoopers[obj]
-                else:
-                    raise InvalidObjError()
-            snooper = AnyObject(f)
-            handle = snooper.add_callback(
-                lambda arg: calls.append(arg), None)
-            self.assertEqual(
-                MockSnooper.cbs.keys(),
-                {snoopers[barn], snoopers[horse], snoopers[conf.sim]})
-            handle.cancel()
-            self.assertEqual(MockSnooper.Handle.cancelled,
-                             {handle for [(_, handle)]
-                              in MockSnooper.cbs.values()})
-            MockSnooper.cbs.clear()
-            MockSnooper.Handle.cancelled.clear()
-
-            snooper = AnyObject(f, objs=[horse, conf.sim])
-            snooper.add_callback(lambda arg: None, None)
-            self.assertEqual(MockSnooper.cbs.keys(),
-                             {snoopers[horse], snoopers[conf.sim]})
-            MockSnooper.cbs.clear()
-
-            snooper = AnyObject(f, root=barn)
-            handle = snooper.add_callback(lambda arg: calls.append(arg), None)
-            self.assertEqual(
-                MockSnooper.cbs.keys(), {snoopers[barn], snoopers[horse]})
-            [(barn_cb, barn_handle)] = MockSnooper.cbs[snoopers[barn]]
-            [(horse_cb, horse_handle)] = MockSnooper.cbs[snoopers[horse]]
-            horse_cb(4)
-            self.assertEqual(calls, [(horse, 4)])
-            del calls[:]
-            barn_cb(5)
-            self.assertEqual(calls, [(barn, 5)])
-            del calls[:]
-            # cancellation propagates
-            handle.cancel()
-            self.assertEqual(MockSnooper.Handle.cancelled,
-                             {barn_handle, horse_handle})
-        finally:
-            simics.SIM_delete_objects(objs)
-
-
 class Latest(CompoundSnooper):
     '''Given a set of named snoopers, keeps track of the latest
     produced value from each one. Whenever one of the snoopers yields
@@ -2357,95 +1190,11 @@ class Latest(CompoundSnooper):
             for (ident, snooper) in self.snoopers_dict.items()])
 
 
-class TestLatest(unittest.TestCase):
-    def test_latest(self):
-        calls = []
-        test_exc = Exception('test')
-        class MockSnooper(Snooper):
-            def __init__(self):
-                self.cbs = []
-            class Handle(Handle):
-                cancelled = []
-                def cancel(self): self.cancelled.append(self)
-            def add_callback(self, cb, exc_cb):
-                handle = MockSnooper.Handle()
-                self.cbs.append((cb, exc_cb, handle))
-                return handle
-            def exec_context(self):
-                return GlobalContext()
-        class MockPoll(Poll):
-            def __init__(self):
-                self.value = None
-                self.sub = MockSnooper()
-                super().__init__(self.sub)
-            def poll(self):
-                return self.value
-
-        snooper1 = MockSnooper()
-        snooper2 = MockSnooper()
-        snooper = Latest(s1=snooper1, s2=snooper2)
-        self.assertEqual(snooper.exec_context(), GlobalContext())
-        handle = snooper.add_callback(calls.append, calls.append)
-        [(cb1, exc_cb1, handle1)] = snooper1.cbs
-        [(cb2, exc_cb2, handle2)] = snooper2.cbs
-        del snooper1.cbs[:]
-        del snooper2.cbs[:]
-        self.assertNotEqual(handle1, handle2)
-        cb1(4)
-        [v] = calls
-        self.assertEqual((v.s1, v.s2), (4, None))
-        del calls[:]
-        cb2(5)
-        [v] = calls
-        self.assertEqual((v.s1, v.s2), (4, 5))
-        del calls[:]
-        exc_cb1(test_exc)
-        self.assertEqual(calls, [test_exc])
-        del calls[:]
-        exc_cb2(test_exc)
-        self.assertEqual(calls, [test_exc])
-        del calls[:]
-        # disposal propagates
-        handle.cancel()
-        self.assertEqual(set(snooper1.Handle.cancelled), {handle1, handle2})
-        del snooper1.Handle.cancelled[:]
-
-        poll1 = MockPoll()
-        poll1.value = 3
-        poll2 = MockPoll()
-        poll2.value = 4
-        snooper3 = MockSnooper()
-        latest = Latest(p1=poll1, p2=poll2, s=snooper3)
-        handle = latest.add_callback(calls.append, calls.append)
-        [(cb1, _, handle1)] = poll1.sub.cbs
-        [(cb2, _, handle2)] = poll2.sub.cbs
-        [(cb3, _, handle3)] = snooper3.cbs
-        poll1.value = 5
-        cb3(6)
-        [v] = calls
-        del calls[:]
-        # poll1 changed state without its subordinate snooper
-        # yielding, so not yet visible, but the initial values of both
-        # poll1 and poll2 are visible in the yielded value.
-        self.assertEqual((v.p1, v.p2, v.s), (3, 4, 6))
-        cb1(None)
-        [v] = calls
-        del calls[:]
-        # state is updated after a late yield from subordinate snooper
-        self.assertEqual((v.p1, v.p2, v.s), (5, 4, 6))
-        poll1.value = 7
-        poll2.value = 8
-        cb1(None)
-        # if two Poll snoopers change state simultaneously, both changes
-        # are captured when one of them yields.
-        [v] = calls
-        del calls[:]
-        self.assertEqual((v.p1, v.p2, v.s), (7, 8, 6))
-        cb2(None)
-        self.assertEqual(calls, [])
-        handle.cancel()
-        self.assertEqual(MockSnooper.Handle.cancelled,
-                         [handle1, handle2, handle3])
+# The unit tests live in test_snoop.py, so that they are not compiled on every
+# Simics start. This hook lets unittest find them through this module.
+def load_tests(loader, tests, pattern):
+    import test_snoop
+    return loader.loadTestsFromModule(test_snoop)
 
 
 print("Enabling Snoop Technology Preview.")
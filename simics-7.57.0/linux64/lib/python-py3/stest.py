@@ -18,7 +18,6 @@
 
 import os, os.path
 import traceback
-import unittest
 import simics
 from simics import *
 from cli import (
@@ -303,14 +302,6 @@ def _represent(item):
     else:
         return rep(item, False)
 
-class TestRepresent(unittest.TestCase):
-    def test_represent(self):
-        self.assertEqual(_represent(10), "10 = 0xa")
-        self.assertEqual(_represent([(0, 1), 2]),
-                         "[(0, 1), 2] = [(0x0, 0x1), 0x2]")
-        self.assertEqual(_represent((0.0, 1)), "(0.0, 1) = (0.0, 0x1)")
-        self.assertEqual(_represent("foo"), "'foo'")
-        self.assertEqual(_represent((None,)), "(None,)")
 
 # <add id="stest.expect_equal">
 # Checks if a value is equal to an expectation and cause a test failure if it
@@ -398,121 +389,6 @@ class _set_log_level(contextlib.AbstractContextManager):
                 o.log_level = lvl
         return False
 
-class TestUntrapLog(unittest.TestCase):
-    def local_fail(self, msg):
-        self.received_msgs.append(msg)
-
-    def setUp(self):
-        global fail
-        self.received_msgs = []
-        self.o = []
-        for i in range(3):
-            self.o.append(SIM_create_object('namespace', f'o{i}'))
-        self.stest_fail = fail
-        fail = self.local_fail
-
-    def tearDown(self):
-        global fail
-        simics.SIM_delete_objects(self.o)
-        fail = self.stest_fail
-
-
-    def test_untrap_log(self):
-        trap_log('info', self.o[1])
-
-        self.received_msgs.clear()
-        SIM_log_info(1, self.o[0], 0, "Should not trap!")
-        self.assertEqual(len(self.received_msgs), 0)
-
-        self.received_msgs.clear()
-        SIM_log_info(1, self.o[1], 0, "Trap me!")
-        self.assertEqual(len(self.received_msgs), 1)
-        self.assertEqual(self.received_msgs[0],
-                            "Trap on info log: <the namespace 'o1'> Trap me!")
-
-        untrap_log('error', self.o[2])
-
-        self.received_msgs.clear()
-        SIM_log_error(self.o[0], 0, "Should trap!")
-        self.assertEqual(len(self.received_msgs), 1)
-        self.assertEqual(self.received_msgs[0],
-                            "Trap on error log: <the namespace 'o0'> Should trap!")
-
-        self.received_msgs.clear()
-        SIM_log_error(self.o[2], 0, "Should not trap!")
-        self.assertEqual(len(self.received_msgs), 0)
-
-        trap_log('error', self.o[2])
-
-        self.received_msgs.clear()
-        SIM_log_error(self.o[2], 0, "Should trap now!")
-        # we will get two fails in a row, because we have the non-object global
-        # callback and the object specific callback
-        self.assertEqual(len(self.received_msgs), 2)
-        self.assertEqual(self.received_msgs[0],
-                            "Trap on error log: <the namespace 'o2'> Should trap now!")
-        self.assertEqual(self.received_msgs[1],
-                            "Trap on error log: <the namespace 'o2'> Should trap now!")
-
-        untrap_log('info', self.o[1])
-
-        self.received_msgs.clear()
-        SIM_log_info(1, self.o[1], 0, "Should no longer trap!")
-        self.assertEqual(len(self.received_msgs), 0)
-
-
-
-class TestSetLogLevel(unittest.TestCase):
-    def setUp(self):
-        cls = simics.SIM_create_class('foo321', simics.class_info_t())
-        simics.SIM_register_simple_port(cls, 'bank.regs', None)
-        simics.SIM_register_simple_port(cls, 'port.foo', None)
-        self.obj = simics.SIM_create_object(cls, 'dut')
-
-    def tearDown(self):
-        simics.SIM_delete_object(self.obj)
-
-    def assertLogLevels(self, expected):
-        actual = {o: o.log_level for o in simics.SIM_object_iterator(None)}
-        self.assertEqual(expected, actual)
-
-    def test_set_log_level(self):
-        original = {o: simics.SIM_log_level(o)
-                    for o in simics.SIM_object_iterator(None)}
-
-        with _set_log_level(3, [self.obj, self.obj.bank.regs]):
-            expected = dict(original)
-            expected.update({self.obj: 3, self.obj.bank.regs: 3})
-            self.assertLogLevels(expected)
-        self.assertLogLevels(original)
-
-        with _set_log_level(2):
-            expected = {o: 2 for o in simics.SIM_object_iterator(None)}
-            self.assertLogLevels(expected)
-        self.assertLogLevels(original)
-
-        cm = _set_log_level(4, self.obj)
-        self.assertLogLevels(original)
-        with cm:
-            expected = dict(original)
-            expected[self.obj] = 4
-            self.obj.bank.regs.log_level = 4  # should not be changed on exit
-            expected[self.obj.bank.regs] = 4
-            self.assertLogLevels(expected)
-        original[self.obj.bank.regs] = 4
-        self.assertLogLevels(original)
-
-        with cm:  # context can be reused
-            expected[self.obj] = 4
-            self.assertLogLevels(expected)
-        self.assertLogLevels(original)
-
-        # handles objects being deleted before enter and exit
-        cm = _set_log_level(1)
-        simics.SIM_delete_object(self.obj.port.foo)
-        with cm:
-            simics.SIM_delete_object(self.obj.bank.regs)
-
 
 # <add id="stest.expect_log_mgr">
 # Context manager, verifying that, on exit from the with-statement, a
@@ -586,67 +462,6 @@ def expect_log(fun, args=[], obj=None, log_type="error", msg=None, regex='',
     with expect_log_mgr(obj, log_type, msg, regex, with_log_level):
         return fun(*args)
 
-class TestExpectLog(unittest.TestCase):
-    def test_expect_log(self):
-        for obj in [conf.sim, conf.prefs, None]:
-            for fun in [SIM_log_info, SIM_log_unimplemented]:
-                for level in 1, 2:
-                    expect_success = (
-                        level < 2 and fun == SIM_log_info
-                        and obj != conf.prefs)
-                    try:
-                        expect_log(fun, (level, conf.sim, 0, "msg"),
-                                   obj = obj,
-                                   log_type = "info")
-                    except TestFailure:
-                        success = False
-                    else:
-                        success = True
-                    self.assertEqual(success, expect_success)
-
-        fem = conf.sim.stop_on_error
-        try:
-            conf.sim.stop_on_error = True
-            expect_log(lambda: SIM_log_error(conf.sim, 0, "err"))
-        finally:
-            conf.sim.stop_on_error = fem
-
-    def test_expect_regex(self):
-        with self.assertRaisesRegex(TestFailure, 'cow'):
-            with expect_log_mgr(conf.sim, 'error', regex='cow'):
-                simics.SIM_log_error(conf.sim, 0, 'a sheep goes baah')
-        with expect_log_mgr(conf.sim, 'error', regex='cow'):
-            simics.SIM_log_error(conf.sim, 0, 'a cow goes moo')
-
-        regex = re.compile('cow')
-        with self.assertRaisesRegex(TestFailure, 'cow'):
-            with expect_log_mgr(conf.sim, 'error', regex=regex):
-                simics.SIM_log_error(conf.sim, 0, 'a regex sheep goes baah')
-        with expect_log_mgr(conf.sim, 'error', regex=regex):
-            simics.SIM_log_error(conf.sim, 0, 'a regex cow goes moo')
-
-        regex = 'cow.*moo$'
-        with self.assertRaisesRegex(TestFailure, 'cow'):
-            with expect_log_mgr(conf.sim, 'error', regex=regex):
-                simics.SIM_log_error(conf.sim, 0, 'a regex cow goes moo!')
-        with expect_log_mgr(conf.sim, 'error', regex=regex):
-            simics.SIM_log_error(conf.sim, 0, 'a regex cow goes moo')
-
-
-    def test_nested(self):
-        with allow_log_mgr(conf.sim, 'error'):
-            with expect_log_mgr(conf.sim, 'error'):
-                SIM_log_error(conf.sim, 0, "err")
-            SIM_log_error(conf.sim, 0, "err")
-
-    def test_expect_log_level(self):
-        with self.assertRaisesRegex(TestFailure, 'log of spec-viol'):
-            with expect_log_mgr(conf.sim, 'spec-viol'):
-                simics.SIM_log_spec_violation(3, conf.sim, 0, 'viol3')
-        with expect_log_mgr(conf.sim, 'spec-viol', with_log_level=3):
-            simics.SIM_log_spec_violation(3, conf.sim, 0, 'viol3')
-        expect_log(simics.SIM_log_spec_violation, [3, conf.sim, 0, 'viol3'],
-                   conf.sim, 'spec-viol', with_log_level=3)
 
 # <add id="stest.expect_exception_mgr">
 # Context manager verifying that the body of with-statement throws an
@@ -696,28 +511,6 @@ def expect_exception(fun, args, exc, regex=''):
     with expect_exception_mgr(exc, regex):
         fun(*args)
 
-class TestExpectException(unittest.TestCase):
-    def test(self):
-        def raise_exc(e):
-            raise e
-        class A(Exception): pass
-        class B(A): pass
-        expect_exception(raise_exc, [B()], A)
-        self.assertRaises(TestFailure, expect_exception, raise_exc, [A()], B)
-        self.assertRaises(TestFailure, expect_exception,
-                          raise_exc, [TestFailure()], A)
-        self.assertRaises(TestFailure, expect_exception,
-                          lambda: None, [], A)
-        # None is not exception type - expect_exception is to throw TypeError:
-        self.assertRaises(TypeError, expect_exception,
-                          lambda: None, [], None)
-        expect_exception(raise_exc, [B('55 hello world')], A, r"[0-9]+.+world")
-        expect_exception(raise_exc, [B('55 hello world')], A, "hello")
-        self.assertRaises(TestFailure, expect_exception,
-                          raise_exc, [B('55 hello world')], A, "bye")
-        self.assertRaises(TestFailure, expect_exception,
-                          raise_exc, [B()], A, 'non empty regex')
-
 
 # <add id="stest.deprecation_level">
 # Context manager for temporarily setting a deprecation level and restore it
@@ -744,13 +537,6 @@ def deprecation_level(level):
     finally:
         conf.sim.deprecation_level = old
 
-class TestDeprecationLevel(unittest.TestCase):
-    def test(self):
-        org_lvl = conf.sim.deprecation_level
-        temp_lvl = (org_lvl + 1) % 3
-        with deprecation_level(temp_lvl):
-            self.assertEqual(conf.sim.deprecation_level, temp_lvl)
-        self.assertEqual(conf.sim.deprecation_level, org_lvl)
 
 # Sandbox
 
@@ -777,3 +563,9 @@ scratch_file.vt_internal = True
 # note: cpu_type is internal and currently unused in Simics repo
 def cpu_type():
     return os.environ.get('CPUCLASS')
+
+# The unit tests live in test_stest.py, so that they are not compiled on every
+# Simics start. This hook lets unittest find them through this module.
+def load_tests(loader, tests, pattern):
+    import test_stest
+    return loader.loadTestsFromModule(test_stest)
@@ -24,6 +24,7 @@ import sys
 import copy
 from typing import Dict, List, TextIO, Tuple, Optional, Union, Callable, Any
 from scriptdecl import parse_suffixed_int
+from . import target_cache
 
 # The public script parameter functions
 __all__ = [
@@ -284,11 +285,19 @@ def parse_yaml_string(fn: pathlib.Path, data: str) -> Tuple[Dict, str, int]:
 def parse_yaml_file(yaml_file: pathlib.Path) -> Tuple[Dict, str, int]:
     """ This does the same as <fun>parse_yaml_string</fun> but takes a file
     instead of a string."""
-    try:
-        return parse_yaml_string(yaml_file,
-                                 yaml_file.read_text(encoding='utf-8'))
-    except TargetParamError as ex:
-        raise TargetParamError(f"Error when parsing '{yaml_file}': {ex}")
+    stamp = note_dependency(yaml_file)
+    key = str(yaml_file.absolute())
+    parsed = target_cache.parsed_files.get(key, stamp) if stamp else None
+    if parsed is None:
+        try:
+            parsed = parse_yaml_string(yaml_file,
+                                       yaml_file.read_text(encoding='utf-8'))
+        except TargetParamError as ex:
+            raise TargetParamError(f"Error when parsing '{yaml_file}': {ex}")
+        if stamp:
+            target_cache.parsed_files.put(key, stamp, parsed)
+    # The parameter section is modified during parsing
+    return copy.deepcopy(parsed)
 
 def write_yaml(data: Dict, output_file: TextIO) -> Optional[str]:
     """ Encode <arg>data</arg> as YAML and write to the
@@ -833,7 +842,72 @@ def override_filenames(node: DeclNode, old: pathlib.Path, new: pathlib.Path):
     if str(node.fn) == str(old):
         node.fn = str(new)
 
-import_cache = {}
+# Cache of parse_script results. Each entry records the files read and the
+# file lookups done while parsing, and is only used if all files are
+# unchanged and all lookups give the same result.
+parse_cache = collections.OrderedDict()
+parse_cache_size = 256
+
+class ParseRecord:
+    __slots__ = ('files', 'lookups', 'cacheable')
+    def __init__(self):
+        self.files = {}
+        self.lookups = []
+        self.cacheable = True
+
+# Records of the parse_script calls in progress, innermost last
+parse_records = []
+
+def note_dependency(fn: Union[pathlib.Path, str]):
+    """Record that the script being parsed depends on the file
+    <arg>fn</arg>. Returns the current file stamp."""
+    stamp = target_cache.file_stamp(fn)
+    for r in parse_records:
+        r.files[str(fn)] = stamp
+    return stamp
+
+def recording_lookup(lookup: LookupFile, record: ParseRecord) -> LookupFile:
+    def lookup_file(f, **kwargs):
+        call = (f, tuple(sorted(kwargs.items())))
+        try:
+            found = lookup(f, **kwargs)
+        except ValueError as ex:
+            record.lookups.append((call, ('error', str(ex))))
+            raise
+        record.lookups.append((call, ('ok', found)))
+        return found
+    return lookup_file
+
+def lookup_outcome(lookup: LookupFile, f: str, kwargs: tuple) -> Tuple:
+    try:
+        return ('ok', lookup(f, **dict(kwargs)))
+    except ValueError as ex:
+        return ('error', str(ex))
+
+def cached_parse(key, lookup: LookupFile) -> Optional[Dict]:
+    entry = parse_cache.get(key)
+    if entry is None:
+        return None
+    (record, result) = entry
+    if any(target_cache.file_stamp(fn) != stamp
+           for (fn, stamp) in record.files.items()):
+        del parse_cache[key]
+        return None
+    if any(lookup_outcome(lookup, f, kwargs) != outcome
+           for ((f, kwargs), outcome) in record.lookups):
+        return None
+    parse_cache.move_to_end(key)
+    # The enclosing scripts depend on the same files. Lookups are
+    # recorded by their own lookup functions, called above.
+    for r in parse_records:
+        r.files.update(record.files)
+    return copy.deepcopy(result)
+
+def store_parse(key, record: ParseRecord, result: Optional[Dict]):
+    if record.cacheable and all(record.files.values()):
+        parse_cache[key] = (record, copy.deepcopy(result))
+        if len(parse_cache) > parse_cache_size:
+            parse_cache.popitem(last=False)
 
 def copy_parameters(tree: DeclTree|ArgTree) -> Dict:
     output = {}
@@ -865,17 +939,11 @@ def parse_import(fn: pathlib.Path, data: Dict, name: str, input_args: ArgTree,
 
     p = pathlib.Path(full_fn).absolute()
     import_lookup_file = lookup_file_from_path(p, lookup_file)
-    key = (str(p), json.dumps(targets, sort_keys=True, cls=PathJSONEncoder),
-           json.dumps(input_args, sort_keys=True, cls=PathJSONEncoder),
-           ignore_blueprints)
-    if key in import_cache:
-        import_data = import_cache[key]
-    else:
-        import_data = parse_script(p, import_lookup_file, targets,
-                                   input_args, ignore_blueprints)
-        import_cache[key] = import_data
-    imports = copy.deepcopy(import_data['params'])
-    args = copy_parameters(import_data['args'])
+    # parse_script returns a fresh copy of any cached result
+    import_data = parse_script(p, import_lookup_file, targets,
+                               input_args, ignore_blueprints)
+    imports = import_data['params']
+    args = import_data['args']
     script = ""
     blueprints = import_data['blueprints']
     if not imports:
@@ -905,6 +973,10 @@ def parse_blueprint_import(fn: pathlib.Path,
             f'Unknown keys "{unknown_keys}" in blueprint import'
             f' "{flatten_name(prefix, name)}" in target "{fn}"')
 
+    # The parameters depend on Python code, so do not cache the result
+    for r in parse_records:
+        r.cacheable = False
+
     # we need below import of simics to ensure later module imports work
     import simics as _
     import importlib
@@ -1441,6 +1513,7 @@ def parse_script_code(
                 if not p.is_absolute():
                     msg += f" Did you mean %script%/{script}?"
                 raise TargetParamError(msg)
+            note_dependency(script_file)
             code = pathlib.Path(script_file).read_text(encoding='utf-8')
             line = 0
             script = script_file
@@ -1585,8 +1658,37 @@ def parse_script(fn: Union[pathlib.Path, str],
     script. Throws <tt>Exception</tt> on error.
 
     The <arg>lookup_file</arg> function is used on all file
-    references (import/script/target)."""
+    references (import/script/target).
+
+    Results for files are cached, and reused as long as the parsed files
+    are unchanged and all file references resolve to the same files."""
+
+    if isinstance(fn, str):
+        return parse_script_uncached(fn, lookup, targets, cmdline_args,
+                                     ignore_blueprints)
+    key = (str(fn.absolute()),
+           json.dumps(targets, sort_keys=True, cls=PathJSONEncoder),
+           json.dumps(cmdline_args, sort_keys=True, cls=PathJSONEncoder),
+           ignore_blueprints)
+    result = cached_parse(key, lookup)
+    if result is not None:
+        return result
+    record = ParseRecord()
+    parse_records.append(record)
+    try:
+        result = parse_script_uncached(fn, recording_lookup(lookup, record),
+                                       targets, cmdline_args,
+                                       ignore_blueprints)
+    finally:
+        parse_records.pop()
+    store_parse(key, record, result)
+    return result
 
+def parse_script_uncached(fn: Union[pathlib.Path, str],
+                          lookup: LookupFile,
+                          targets: list,
+                          cmdline_args: ArgTree = None,
+                          ignore_blueprints: bool = False) -> Optional[Dict]:
     if cmdline_args is None:
         input_args = {}
     else:
@@ -0,0 +1,198 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# User-level cache of target files.
+#
+# Two caches are kept, each as a single pickled file in the cache directory:
+#
+# - The target index holds, for each "targets" directory, the names of the
+#   target and preset files in its sub-directories. An entry is valid as
+#   long as the modification times of the directory and all its
+#   sub-directories are unchanged, since adding, removing or renaming a
+#   file always updates the modification time of its directory.
+#
+# - The parsed file cache holds the result of parsing the YAML section of
+#   target and preset files, keyed by absolute file name and validated by
+#   file size and modification time.
+#
+# The cache location is taken from the SIMICS_TARGET_CACHE_DIR environment
+# variable, defaulting to $XDG_CACHE_HOME/simics (or ~/.cache/simics).
+# Setting SIMICS_TARGET_CACHE_DIR to the empty string disables the
+# persistent cache.
+#
+# All cache operations are best effort: any I/O or unpickling problem is
+# treated as a cache miss. Files are written atomically, so concurrent
+# Simics processes may share the same cache directory; the last writer
+# wins. Files or directories modified within the last few seconds are
+# never cached, since their modification time may not yet reflect all
+# changes.
+
+import atexit
+import os
+import pathlib
+import pickle
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+
+__all__ = ('file_stamp', 'target_files', 'parsed_files')
+
+format_version = 1
+
+# Suffixes of target and preset files, in order of precedence
+script_suffixes = ('.yml', '.simicsy', '.pyy')
+
+# Modification times more recent than this (in seconds) are not trusted
+racy_interval = 2
+
+def cache_dir() -> Optional[str]:
+    '''Return the cache directory, or None if caching is disabled'''
+    path = os.environ.get('SIMICS_TARGET_CACHE_DIR')
+    if path is not None:
+        return path or None
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'simics')
+
+def _trusted(mtime_ns: int) -> bool:
+    return mtime_ns < (time.time() - racy_interval) * 1e9
+
+class CacheFile:
+    '''A dictionary of (stamp, value) pairs, loaded from the cache
+    directory on first use and written back at exit when modified.'''
+    def __init__(self, name: str):
+        self.name = name
+        self.entries = None
+        self.dirty = False
+
+    def _load(self) -> dict:
+        if self.entries is None:
+            self.entries = {}
+            path = cache_dir()
+            if path:
+                try:
+                    with open(os.path.join(path, self.name), 'rb') as f:
+                        data = pickle.load(f)  # nosec: user-local cache
+                    if data.get('format') == format_version:
+                        self.entries = data['entries']
+                except Exception:
+                    pass
+        return self.entries
+
+    def get(self, key, stamp):
+        '''Return the value stored for key, or None if missing or stored
+        with a different stamp.'''
+        entry = self._load().get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        return None
+
+    def put(self, key, stamp, value):
+        self._load()[key] = (stamp, value)
+        if not self.dirty:
+            self.dirty = True
+            atexit.register(self.flush)
+
+    def flush(self):
+        '''Write the cache file if modified. Entries for files that no
+        longer exist are dropped.'''
+        if not self.dirty:
+            return
+        self.dirty = False
+        atexit.unregister(self.flush)
+        path = cache_dir()
+        if not path:
+            return
+        entries = {k: v for (k, v) in self.entries.items()
+                   if os.path.exists(k)}
+        tmp = None
+        try:
+            os.makedirs(path, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                    dir=path, prefix=self.name, delete=False) as f:
+                tmp = f.name
+                pickle.dump({'format': format_version, 'entries': entries},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, os.path.join(path, self.name))
+        except (OSError, pickle.PicklingError):
+            if tmp:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+index = CacheFile('target-index.pickle')
+parsed_files = CacheFile('target-files.pickle')
+
+def file_stamp(path: pathlib.Path) -> Optional[Tuple[int, int]]:
+    '''Return the size and modification time of a file, or None if the
+    file cannot be accessed or was modified too recently to be cached.'''
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not _trusted(st.st_mtime_ns):
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+def _dir_stamp(path: str) -> Optional[tuple]:
+    # Modification times of a targets directory and its sub-directories,
+    # or None if any of them is too recent to be trusted
+    root = os.stat(path).st_mtime_ns
+    if not _trusted(root):
+        return None
+    subdirs = []
+    with os.scandir(path) as it:
+        for e in it:
+            if not e.name.startswith('.') and e.is_dir():
+                mtime = e.stat().st_mtime_ns
+                if not _trusted(mtime):
+                    return None
+                subdirs.append((e.name, mtime))
+    return (root, tuple(sorted(subdirs)))
+
+def _scan(path: str, naming: Callable[[pathlib.Path], str]) -> List[tuple]:
+    # (target name, suffix index, "<directory>/<file>") for all target and
+    # preset files, sorted
+    files = []
+    with os.scandir(path) as it:
+        for d in it:
+            if d.name.startswith('.') or not d.is_dir():
+                continue
+            with os.scandir(d.path) as sub:
+                for f in sub:
+                    if f.name.startswith('.'):
+                        continue
+                    for (i, suffix) in enumerate(script_suffixes):
+                        if f.name.endswith(suffix):
+                            rel = f'{d.name}/{f.name}'
+                            files.append((naming(pathlib.Path(rel)), i, rel))
+    return sorted(files)
+
+def target_files(targets_path: pathlib.Path, name: str,
+                 naming: Callable[[pathlib.Path], str]) -> List[tuple]:
+    '''Return (target name, file) pairs for the files matching
+    targets_path/*/*.name.{yml,simicsy,pyy}, sorted on target name and
+    then on suffix, in the order above. The target name of a file is given
+    by the naming function, and stored in the index.'''
+    key = str(targets_path)
+    try:
+        stamp = _dir_stamp(key)
+        files = index.get(key, stamp) if stamp else None
+        if files is None:
+            files = _scan(key, naming)
+            if stamp:
+                index.put(key, stamp, files)
+    except OSError:
+        return []
+    ends = [f'.{name}{suffix}' for suffix in script_suffixes]
+    return [(t, targets_path / rel) for (t, i, rel) in files
+            if rel.endswith(ends[i])]
@@ -10,9 +10,9 @@
 # implied warranties, other than those that are expressly stated in the License.
 
 
-import itertools
 import pathlib
 from . import script_params
+from . import target_cache
 from typing import Dict, List, Tuple, Callable, Optional
 import re
 from pathlib import Path
@@ -78,14 +78,10 @@ def target_name(script_file: pathlib.Path) -> str:
 def get_targets_from_path(targets: Dict[str, Dict],
                           pkg_path: str, pkg_name: str,
                           name: str) -> None:
-    # Target naming convention
+    # Target naming convention, targets/*/*.{name}.{yml,simicsy,pyy}
     targets_path = pkg_path / 'targets'
-    scripts = itertools.chain(targets_path.glob(f'*/*.{name}.yml'),
-                              targets_path.glob(f'*/*.{name}.simicsy'),
-                              targets_path.glob(f'*/*.{name}.pyy'))
-    for s in sorted(scripts, key=target_name):
-        # Target name
-        t = target_name(s)
+    scripts = target_cache.target_files(targets_path, name, target_name)
+    for (t, s) in scripts:
         if t not in targets:
             targets[t] = {
                 'script': s,
@@ -0,0 +1,73 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the binary_log module
+
+import os
+import tempfile
+import unittest
+from binary_log import (
+    BinaryLogError,
+    BinaryLogReader,
+    BinaryLogWriter,
+    format_record,
+    frame_header,
+    kind_message,
+)
+
+
+class _test_binary_log(unittest.TestCase):
+    def test_round_trip(self):
+        (fd, name) = tempfile.mkstemp(suffix='.blog')
+        os.close(fd)
+        try:
+            w = BinaryLogWriter(name)
+            dev = w.object_id('dev', lambda: ('board.dev', ['Reg', 'Irq']))
+            cpu = w.object_id('cpu', lambda: ('board.cpu', []))
+            self.assertEqual(w.object_id('dev', None), dev)
+            w.write_message(dev, cpu, w.log_type_id('info'), 2, 2, 100,
+                            0x1000, 50000, 0, False, "hello \u00e5")
+            w.write_message(0, 0, w.log_type_id('trace'), None, 0, 0,
+                            None, 0, 0, True, "traced")
+            w.close()
+            with open(name, 'ab') as f:
+                # incomplete frame
+                f.write(frame_header.pack(kind_message, 100) + b'x')
+            reader = BinaryLogReader(name)
+            self.assertEqual(
+                [format_record(r, "[%o %t %l %g] %v %p %m") for r in reader],
+                ["[board.dev info 2 Irq] {board.cpu 0x1000 100}"
+                 " {50000 ps} hello \u00e5",
+                 "[ trace  ]   traced"])
+            self.assertTrue(reader.truncated)
+            self.assertEqual(
+                [r.msg for r in reader.records(objects=['board'])],
+                ["hello \u00e5"])
+            self.assertEqual(
+                [r.msg for r in reader.records(log_types=['trace'])],
+                ["traced"])
+            self.assertEqual(
+                [r.msg for r in reader.records(start_ps=1)], ["hello \u00e5"])
+        finally:
+            os.remove(name)
+
+    def test_undefined_id(self):
+        (fd, name) = tempfile.mkstemp(suffix='.blog')
+        os.close(fd)
+        try:
+            w = BinaryLogWriter(name)
+            w.write_message(7, 0, w.log_type_id('info'), 1, 0, 0, None, 0,
+                            0, False, "orphan")
+            w.close()
+            with self.assertRaises(BinaryLogError):
+                list(BinaryLogReader(name))
+        finally:
+            os.remove(name)
@@ -0,0 +1,67 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the crcmod module
+
+import unittest
+from crcmod import (
+    Crc,
+    _mkTable_r,
+    _mkTables,
+    _sizeMap,
+    _verifyPoly,
+    mkCrcFun,
+)
+
+
+class _test_crcmod(unittest.TestCase):
+    # Check values for the string '123456789', without final XOR
+    checks = [(0x107, 0, False, 0xF4),
+              (0x18005, 0, True, 0xBB3D),
+              (0x11021, 0, False, 0x31C3),
+              (0x104C11DB7, ~0, True, ~0xCBF43926 & 0xFFFFFFFF),
+              (0x11EDC6F41, ~0, True, ~0xE3069283 & 0xFFFFFFFF),
+              (0x142F0E1EBA9EA3693, ~0, True,
+               ~0x995DC9BBDF1939FA & 0xFFFFFFFFFFFFFFFF)]
+
+    def test_check_values(self):
+        for (poly, init, rev, check) in self.checks:
+            self.assertEqual(mkCrcFun(poly, init, rev)(b'123456789'), check)
+
+    def test_same_as_byte_functions(self):
+        data = bytes(range(256)) * 3 + b'tail'
+        for (poly, init, rev, check) in self.checks:
+            for r in (rev, not rev):
+                n = _verifyPoly(poly)
+                table = list(_mkTables(poly, n, r)[0])
+                byte = _sizeMap[n][1 if r else 0]
+                fun = mkCrcFun(poly, init, r)
+                for size in (0, 1, 8, 13, len(data)):
+                    self.assertEqual(fun(data[:size], 0x5A),
+                                     byte(data[:size], 0x5A, table))
+                    self.assertEqual(fun(bytearray(data[:size])),
+                                     fun(memoryview(data[:size])))
+
+    def test_sequences(self):
+        data = bytes(range(256)) + b'tail'
+        for (poly, init, rev, check) in self.checks:
+            for r in (rev, not rev):
+                fun = mkCrcFun(poly, init, r)
+                self.assertEqual(fun(tuple(b'123456789')),
+                                 fun(b'123456789'))
+                self.assertEqual(fun(list(data), 0x5A), fun(data, 0x5A))
+                self.assertEqual(Crc(poly, init, r).new(tuple(data)).crcValue,
+                                 fun(data))
+
+    def test_table_cache(self):
+        self.assertIs(_mkTables(0x18005, 16, True),
+                      _mkTables(0x18005, 16, True))
+        self.assertEqual(Crc(0x18005).table, _mkTable_r(0x18005, 16))
@@ -0,0 +1,125 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the mem_commands module
+
+import unittest
+from cli import CliError
+from mem_commands import (
+    CoalescingWriter,
+    intel_hex_data,
+    srec_address_size,
+    srec_data,
+)
+
+
+class _test_record_files(unittest.TestCase):
+    @staticmethod
+    def load(records, lines):
+        writes = []
+        writer = CoalescingWriter(
+            None, lambda obj, addr, data: writes.append((addr, data)))
+        for (addr, data) in records("test", lines):
+            writer.add(addr, data)
+        writer.flush()
+        return writes
+
+    @staticmethod
+    def hex_line(record_type, address, data):
+        record = bytes((len(data), address >> 8, address & 0xff,
+                        record_type)) + data
+        return ":%s%02X" % (record.hex().upper(), -sum(record) & 0xff)
+
+    @staticmethod
+    def srec_line(record_type, address, data):
+        size = srec_address_size[record_type]
+        record = (bytes((size + len(data) + 1,))
+                  + address.to_bytes(size, 'big') + data)
+        return "S%d%s%02X" % (record_type, record.hex().upper(),
+                              ~sum(record) & 0xff)
+
+    def test_intel_hex(self):
+        lines = [":020000040001F9",
+                 ":0400100001020304E2",
+                 ":0400140005060708CE",
+                 "",
+                 ":02002000AABB79",
+                 ":00000001FF"]
+        self.assertEqual(self.load(intel_hex_data, lines),
+                         [(0x10010, bytes(range(1, 9))),
+                          (0x10020, b"\xaa\xbb")])
+        with self.assertRaises(CliError):
+            self.load(intel_hex_data, lines[:-1])
+        with self.assertRaises(CliError):
+            self.load(intel_hex_data, [":0400100001020304E3"])
+        with self.assertRaises(CliError):
+            self.load(intel_hex_data, [":04001000010203G4E2"])
+
+    def test_srec(self):
+        lines = ["S00600004844521B",
+                 self.srec_line(1, 0x1000, b"\x01\x02"),
+                 self.srec_line(2, 0x1002, b"\x03\x04"),
+                 self.srec_line(3, 0x10000000, b"\x05"),
+                 self.srec_line(9, 0, b"").lower()]
+        self.assertEqual(self.load(srec_data, lines),
+                         [(0x1000, b"\x01\x02\x03\x04"),
+                          (0x10000000, b"\x05")])
+        with self.assertRaises(CliError):
+            self.load(srec_data, [lines[1][:-1] + "0"])
+        with self.assertRaises(CliError):
+            self.load(srec_data, ["S4030000FC"])
+
+    def test_large_file(self):
+        # 4 MiB in 16-byte records, loaded in a few large writes
+        size = 4 << 20
+        data = bytes(range(256)) * (size // 256)
+        lines = []
+        for addr in range(0, size, 16):
+            if addr & 0xffff == 0:
+                lines.append(self.hex_line(4, 0, (addr >> 16).to_bytes(2,
+                                                                     'big')))
+            lines.append(self.hex_line(0, addr & 0xffff,
+                                       data[addr:addr + 16]))
+        lines.append(self.hex_line(1, 0, b""))
+        writes = self.load(intel_hex_data, lines)
+        self.assertEqual(b"".join(d for (_, d) in writes), data)
+        self.assertEqual(len(writes), size // CoalescingWriter.max_size)
+
+
+# Reports how many MB/s of Intel HEX and S-record data the loaders parse
+# and coalesce. Run it with 'python test_mem_commands.py'.
+def _benchmark(size=16 << 20):
+    import time
+    t = _test_record_files
+    data = bytes(range(256)) * (size // 256)
+    hex_lines = []
+    srec_lines = []
+    for addr in range(0, size, 16):
+        if addr & 0xffff == 0:
+            hex_lines.append(t.hex_line(4, 0, (addr >> 16).to_bytes(2, 'big')))
+        hex_lines.append(t.hex_line(0, addr & 0xffff, data[addr:addr + 16]))
+        srec_lines.append(t.srec_line(3, addr, data[addr:addr + 16]))
+    hex_lines.append(t.hex_line(1, 0, b""))
+    srec_lines.append(t.srec_line(7, 0, b""))
+    def rate(records, lines):
+        best = None
+        for i in range(3):
+            start = time.perf_counter()
+            t.load(records, lines)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return size / max(best, 1e-9) / 1e6
+    print('%-10s %10s' % ('format', 'MB/s'))
+    print('%-10s %10.1f' % ('intel-hex', rate(intel_hex_data, hex_lines)))
+    print('%-10s %10.1f' % ('srec', rate(srec_data, srec_lines)))
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,1008 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Unit tests for the sloop module
+
+import unittest
+import asyncio
+import logging
+import random
+import simics
+import snoop
+import sys
+from asyncio import TaskGroup
+from simicsutils.host import is_windows
+from sloop import (
+    Break,
+    CallbackScope,
+    Error,
+    EventLoop,
+    Tracer,
+    call_soon,
+    create_task,
+    get_running_loop,
+    global_event_loop,
+    run_until_complete,
+    timeout,
+    trace,
+    wait,
+    wait_call,
+    wrap_future,
+)
+
+
+class TestLoop(unittest.TestCase):
+    def setUp(self):
+        self.clock = simics.SIM_create_object(
+            'clock', 'clock', [['freq_mhz', 1]])
+        self.loop = EventLoop()
+
+    def tearDown(self):
+        simics.SIM_delete_object(self.clock)
+        self.loop.asyncio_loop.close()
+
+    def delayed_call(self, seconds, fun):
+        def call_and_cancel(_):
+            try:
+                fun()
+            finally:
+                handle.cancel()
+        handle = snoop.add_callback_simple(
+            snoop.Seconds(self.clock, seconds),
+            lambda _: simics.SIM_run_alone(call_and_cancel, None))
+
+    def test_basic_coroutine(self):
+        loop = self.loop
+        result = []
+        cpl = loop.create_future()
+        async def coro(arg):
+            result.append(arg)
+            result.append(await cpl)
+            result.append(None)
+            result.append(await cpl)
+
+        task = loop.create_task(coro(3))
+        self.assertEqual(result, [])
+        simics.SIM_process_pending_work()
+        self.assertEqual(result, [3])
+        del result[:]
+        simics.SIM_process_pending_work()
+        self.assertEqual(result, [])
+        cpl.set_result(5)
+        loop.run_until_complete(task)
+        self.assertEqual(result, [5, None, 5])
+        del result[:]
+
+        loop.run_until_complete(coro(4))
+        self.assertEqual(result, [4, 5, None, 5])
+        del result[:]
+
+        assert loop.quiesced()
+
+    def test_create_task(self):
+        # The name= arg is exists in both method and global versions, is
+        # kw-only, and affects str
+        async def coro2():
+            pass
+        async def coro():
+            c = coro2()
+            with self.assertRaises(TypeError):
+                # fisketur[call-args]
+                create_task(c, 'whale')
+            t = create_task(c, name='whale')
+            assert 'whale' in str(t)
+            await t
+        c = coro()
+        with self.assertRaises(TypeError):
+            self.loop.create_task(c, 'whale')
+        t = self.loop.create_task(c, name='monkey')
+        self.loop.run_until_complete(t)
+        assert 'monkey' in str(t)
+
+        # global create_task may only be called from within a coroutine
+        async def coro3():
+            return 3
+        c = coro3()
+        with self.assertRaises(RuntimeError):
+            create_task(c)
+        async def coro1():
+            # await coro to avoid gc nag from event queue
+            return await create_task(c)
+        self.assertEqual(run_until_complete(coro1()), 3)
+
+        class Crash(Exception): pass
+        async def crash():
+            raise Crash('zebra')
+        async def coro4():
+            create_task(crash())
+        with self.assertRaisesRegex(Error, "zebra"):
+            self.loop.run_until_complete(coro4())
+
+    def test_cancel(self):
+        fut = self.loop.create_future()
+        x = []
+        async def coro():
+            x.append(0)
+            await fut
+            x.append(1)
+            return 4
+        t = self.loop.create_task(coro())
+        simics.SIM_process_pending_work()
+        self.assertEqual(x, [0])
+        fut.cancel()
+        simics.SIM_process_pending_work()
+        self.assertEqual(x, [0])
+        self.assertTrue(t.cancelled())
+
+    def test_call_soon(self):
+        ls = []
+        def fn(x, y):
+            x.append(y)
+        self.loop.call_soon(*([self.loop.call_soon] * 5 + [fn, ls, 4]))
+        simics.SIM_process_pending_work()
+        self.assertEqual(ls, [4])
+        del ls[:]
+        with self.assertRaises(RuntimeError):
+            call_soon(fn, ls, 5)
+        async def coro():
+            call_soon(fn, ls, 6)
+        run_until_complete(coro())
+        self.assertEqual(ls, [6])
+
+    def test_run_until_complete(self):
+        import concurrent
+        # non-asyncio futures are not accepted
+        fut = concurrent.futures.Future()
+        with self.assertRaises(Error):
+            self.loop.run_until_complete(fut)
+        # futures or tasks from plain asyncio are rejected cleanly
+        async def nothing(): pass
+        non_sloop_loop = asyncio.new_event_loop()
+        try:
+            alien_fut = non_sloop_loop.create_future()
+            alien_task = non_sloop_loop.create_task(nothing())
+            with self.assertRaises(Error):
+                self.loop.run_until_complete(alien_fut)
+            with self.assertRaises(Error):
+                self.loop.run_until_complete(alien_task)
+            with self.assertRaises(Error):
+                run_until_complete(alien_fut)
+            with self.assertRaises(Error):
+                run_until_complete(alien_task)
+        finally:
+            non_sloop_loop.run_until_complete(alien_task)
+            non_sloop_loop.close()
+        async def nothing2(): pass
+        # futures or tasks from a different event loop are rejected cleanly
+        try:
+            alien_task = global_event_loop().create_task(nothing2())
+            with self.assertRaises(Error):
+                self.loop.run_until_complete(
+                    global_event_loop().create_future())
+            with self.assertRaises(Error):
+                self.loop.run_until_complete(alien_task)
+        finally:
+            alien_task.cancel()
+
+        # futures are accepted
+        fut = self.loop.create_future()
+        self.delayed_call(1, lambda: fut.set_result(1))
+        self.assertEqual(self.loop.run_until_complete(fut), 1)
+        self.assertEqual(self.loop.run_until_complete(fut), 1)
+        self.assertEqual(run_until_complete(fut), 1)
+
+        # coroutine functions do not work, but coroutine objects do
+        fut2 = self.loop.create_future()
+        async def coro():
+            await fut2
+        self.delayed_call(1, lambda: fut2.set_result(1))
+        with self.assertRaisesRegex(
+                Error, r"Try passing 'coro\(\)' instead of 'coro'"):
+            self.loop.run_until_complete(coro)
+        self.loop.run_until_complete(coro())
+
+        # unexpected simulation break causes a Break exception
+        fut3 = self.loop.create_future()
+        async def coro2():
+            await fut3
+        self.delayed_call(1, lambda: simics.SIM_break_simulation("hello"))
+        with self.assertRaisesRegex(Break, "hello"):
+            self.loop.run_until_complete(coro2())
+        fut3.cancel()
+        self.loop.quiesce()
+
+    def test_uncaught_exceptions(self):
+        fut = self.loop.create_future()
+        class SheepException(Exception): pass
+        @fut.add_done_callback
+        def raise_sheep(fut):
+            raise SheepException('baah')
+        async def coro():
+            await fut
+        self.loop.create_task(coro())
+        self.loop.quiesce()
+        fut.set_result(None)
+        with self.assertLogs(
+                logging.getLogger('asyncio'), logging.WARNING) as captured:
+            with self.assertRaisesRegex(
+                    Error, "Uncaught exception.*SheepException[(]'baah'[)]"):
+                self.loop.quiesce()
+        self.assertEqual(len(captured.records), 1, captured.records)
+        self.assertIn('raise_sheep', captured.records[0].getMessage(),
+                      captured.records)
+
+        async def broken_coro():
+            raise SheepException('baah')
+        self.loop.create_task(broken_coro())
+        with self.assertLogs(
+                logging.getLogger('asyncio'), logging.WARNING) as captured:
+            with self.assertRaisesRegex(
+                    Error, "Uncaught exception.*SheepException[(]'baah'[)]"):
+                self.loop.quiesce()
+        self.assertEqual(len(captured.records), 1, captured.records)
+        self.assertIn('broken_coro', captured.records[0].getMessage(),
+                      captured.records)
+
+    def test_wrap_future(self):
+        import time
+        import concurrent
+
+        # a slow coroutine not wrapped in wrap_future gives a warning
+        self.loop.asyncio_loop.slow_callback_duration = 0.01
+        async def bad_sleep():
+            time.sleep(0.05)
+        with self.assertLogs(
+                logging.getLogger('asyncio'), logging.WARNING) as captured:
+            self.loop.run_until_complete(bad_sleep())
+        self.assertTrue(captured.records)
+        self.assertIn(
+            'bad_sleep',
+            ' '.join(record.getMessage() for record in captured.records),
+            captured.records)
+
+        self.loop.asyncio_loop.slow_callback_duration = 0.5
+        # Wrapping using sloop.wrap_future works fine.
+        fut2 = concurrent.futures.Future()
+        self.delayed_call(1, lambda: fut2.set_result(None))
+        async def good_sleep():
+            await self.loop.wrap_future(fut2)
+        with self.assertNoLogs():
+            self.loop.run_until_complete(good_sleep())
+
+        # Exceptions are propagated from the alien future
+        class SheepException(Exception): pass
+        fut3 = concurrent.futures.Future()
+        self.delayed_call(1, lambda: fut3.set_exception(SheepException()))
+        async def exceptional_sleep():
+            with self.assertRaises(SheepException):
+                await self.loop.wrap_future(fut3)
+            return 6
+        self.assertEqual(
+            self.loop.run_until_complete(exceptional_sleep()), 6)
+
+        # Cancellation is propagated from the alien future,
+        # but wakeup only happens after SIM_process_pending_work()
+        fut4 = concurrent.futures.Future()
+        async def cancelled_sleep():
+            await self.loop.wrap_future(fut4)
+        t = self.loop.create_task(cancelled_sleep())
+        self.loop.quiesce()
+        ok = fut4.cancel()
+        assert ok
+        simics.SIM_process_pending_work()
+        self.assertTrue(t.cancelled())
+
+        # Exercise the ret.done() check in wrap_future.copy_result
+        fut5 = concurrent.futures.Future()
+        wrapped = self.loop.wrap_future(fut5)
+        wrapped.cancel()
+        fut5.set_result(None)
+        async def nop():
+            pass
+        self.loop.run_until_complete(nop())
+
+        fut6 = concurrent.futures.Future()
+        with self.assertRaises(RuntimeError):
+            wrap_future(fut6)
+        async def coro():
+            return await wrap_future(fut6)
+        fut6.set_result(7)
+        self.assertEqual(self.loop.run_until_complete(coro()), 7)
+
+
+    def test_wait_call(self):
+        # asyncio complains when a callback exceeds
+        # slow_callback_duration, and wait_call silences that.
+        import time
+        timeout = 0.1 if is_windows() else 0.01
+        self.loop.asyncio_loop.slow_callback_duration = timeout
+        fut = self.loop.create_future()
+        fut.set_result(None)
+        async def slow():
+            time.sleep(timeout * 2)
+        with self.assertLogs(
+                logging.getLogger('asyncio'), logging.WARNING) as captured:
+            self.loop.run_until_complete(self.loop.create_task(slow()))
+        self.assertEqual(len(captured.records), 1, captured.records)
+        async def slow_wrapped():
+            await self.loop.wait_call(time.sleep, timeout * 2)
+        with self.assertLogs() as captured:
+            self.loop.run_until_complete(self.loop.create_task(slow_wrapped()))
+            # workaround for not having assertNoLogs
+            # (will be added in py 3.10)
+            logging.getLogger('asyncio').warning('')
+        self.assertEqual(len(captured.records), 1, captured.records)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(wait_call(lambda: 3))
+        async def coro():
+            return await wait_call(lambda: 4)
+        self.assertEqual(run_until_complete(coro()), 4)
+
+    def test_await_task(self):
+        fut = self.loop.create_future()
+        async def coro():
+            await fut
+        task = self.loop.create_task(coro())
+
+        self.delayed_call(1, lambda: fut.set_result(None))
+        async def main():
+            await task#loop.wrap_future(task)
+        self.loop.run_until_complete(main())
+
+
+class TestLoopNoClock(unittest.TestCase):
+    def test_run_until_complete_no_clock(self):
+        loop = global_event_loop()
+        fut = loop.create_future()
+        async def nothing(): pass
+        # it is ok to run without a clock as long as the loop quiesces
+        # immediately
+        run_until_complete(nothing())
+        # we refuse to run without a clock when when not quiesced
+        progress = []
+        async def coro():
+            nonlocal progress
+            progress.append(0)
+            try:
+                await fut
+                progress.append(1)
+            finally:
+                progress.append(3)
+            progress.append(4)
+        with self.assertRaises(simics.SimExc_General):
+            run_until_complete(coro())
+        # the coroutine was cancelled by the previous error, while
+        # waiting for the future
+        run_until_complete(nothing())
+        self.assertEqual(progress, [0, 3])
+
+
+class _SnooperTest(unittest.TestCase):
+    calls = []
+    def flush(self):
+        x = self.calls[:]
+        del self.calls[:]
+        return x
+
+    class Handle(snoop.Handle):
+        def cancel(self):
+            _SnooperTest.calls.append(('cancel', self))
+    class Snooper(snoop.Snooper):
+        cbs = []
+        def __init__(self, *args, **kwargs):
+            self.args = args
+            assert not kwargs
+        def add_callback(self, yield_value, yield_exc):
+            handle = _SnooperTest.Handle()
+            self.cbs.append((yield_value, yield_exc, self.args, handle))
+            return handle
+        def exec_context(self):
+            return snoop.GlobalContext()
+
+
+class TestWait(_SnooperTest):
+    def test_await(self):
+        async def coro():
+            self.calls.append(('await', await wait(self.Snooper(1))))
+        task = global_event_loop().create_task(coro())
+        assert self.calls == []
+        simics.SIM_process_pending_work()
+        [(cb, ctx, args, handle)] = self.Snooper.cbs
+        self.assertEqual(args, (1,))
+        del self.Snooper.cbs[:]
+        # works like a normal snoop when callback is called
+        cb(10)
+        simics.SIM_process_pending_work()
+        self.assertEqual(self.flush(), [('cancel', handle), ('await', 10)])
+        self.assertTrue(task.done())
+
+        done = False
+        class TestExc(Exception): pass
+        async def coro2():
+            try:
+                self.calls.append(('await', await wait(self.Snooper(2))))
+            except TestExc:
+                nonlocal done
+                done = True
+        task = global_event_loop().create_task(coro2())
+        simics.SIM_process_pending_work()
+        [(cb, exc_cb, args, handle)] = self.Snooper.cbs
+        self.assertEqual(args, (2,))
+        del self.Snooper.cbs[:]
+        # exception is propagated to the waiting coroutine
+        exc_cb(TestExc())
+        simics.SIM_process_pending_work()
+        self.assertEqual(self.flush(), [('cancel', handle)])
+        self.assertTrue(task.done())
+        self.assertTrue(done)
+
+    def test_run_until_complete_break(self):
+        clk = simics.SIM_create_object('clock', 'clk', freq_mhz=1)
+        try:
+            never = global_event_loop().create_future()
+            async def break_soon():
+                await wait(snoop.Seconds(clk, 0.01))
+                simics.SIM_break_simulation("hello")
+                await never
+            with self.assertRaisesRegex(Break, 'hello'):
+                run_until_complete(break_soon())
+        finally:
+            simics.SIM_delete_object(clk)
+
+    def test_seconds(self):
+        '''Test that await works on callbacks triggered in cell context'''
+        clk = simics.SIM_create_object('clock', 'clk', [['freq_mhz', 1]])
+        try:
+            # Basic await
+            x = []
+            ms = snoop.Seconds(clk) / 1000
+            async def m():
+                x.append(1)
+                await wait(ms)
+                x.append(2)
+            global_event_loop().create_task(m())
+            simics.SIM_process_pending_work()
+            self.assertEqual(x, [1])
+            del x[:]
+            simics.SIM_continue(15000)
+            self.assertEqual(x, [2])
+
+            # if a sequence of values are yielded rapidly, only the first
+            # one is reacted upon.
+            async def coro():
+                self.calls.append(await wait(self.Snooper()))
+                try:
+                    self.calls.append(await wait(self.Snooper()))
+                except Exception as e:
+                    self.calls.append(e)
+                else:
+                    self.calls.append('no exception')
+            global_event_loop().create_task(coro())
+            simics.SIM_process_pending_work()
+            [(cb, exc_cb, _, handle)] = self.Snooper.cbs
+            del self.Snooper.cbs[:]
+            e1 = Exception("1")
+            def tick1(_):
+                cb(3)
+                cb(4)
+                exc_cb(e1)
+                self.calls.append('tick1')
+            h = snoop.add_callback_simple(ms, tick1)
+            simics.SIM_continue(1005)
+            self.assertEqual(self.flush(), ['tick1', ('cancel', handle), 3])
+            # second wait started already
+            [(cb, exc_cb, _, handle)] = self.Snooper.cbs
+            del self.Snooper.cbs[:]
+            h.cancel()
+            # Similarly, if the first thing that happens is an exception,
+            # then it shadows subsequent values and exceptions.
+            e2 = Exception("2")
+            def tick2(_):
+                exc_cb(e2)
+                cb(5)
+                exc_cb(e1)
+                self.calls.append('tick2')
+            h = snoop.add_callback_simple(ms, tick2)
+            simics.SIM_continue(1005)
+            self.assertEqual(self.flush(), ['tick2', ('cancel', handle), e2])
+            h.cancel()
+        finally:
+            simics.SIM_delete_object(clk)
+
+
+class TestTrace(_SnooperTest):
+    def test_aiter(self):
+        class TestExc(Exception): pass
+        async def coro():
+            async with Tracer(self.Snooper(23)) as t:
+                while True:
+                    try:
+                        async for x in t:
+                            self.calls.append(x)
+                    except TestExc:
+                        self.calls.append(TestExc)
+                    else:
+                        return 5
+        t = global_event_loop().create_task(coro())
+        simics.SIM_process_pending_work()
+        [(cb, exc_cb, args, handle)] = self.Snooper.cbs
+        del self.Snooper.cbs[:]
+        self.assertEqual(args, (23,))
+        cb(1)
+        cb(2)
+        simics.SIM_process_pending_work()
+        self.assertEqual(self.flush(), [1, 2])
+        cb(3)
+        exc_cb(TestExc())
+        cb(4)
+        simics.SIM_process_pending_work()
+        self.assertEqual(self.flush(), [3, TestExc, 4])
+        exc_cb(TestExc())
+        simics.SIM_process_pending_work()
+        self.assertEqual(self.flush(), [TestExc])
+        exc_cb(StopAsyncIteration())
+        simics.SIM_process_pending_work()
+        self.assertEqual(self.flush(), [('cancel', handle)])
+        self.assertTrue(t.done())
+        self.assertEqual(t.result(), 5)
+        assert not self.Snooper.cbs
+
+    def test_tracer_until(self):
+        async def coro():
+            async with Tracer(self.Snooper(29), until=self.Snooper(31)) as t:
+                return [x async for x in t]
+        t = global_event_loop().create_task(coro())
+        simics.SIM_process_pending_work()
+        [(next, next_ctx, next_args, next_handle),
+         (until, until_ctx, until_args, until_handle)] = self.Snooper.cbs
+        del self.Snooper.cbs[:]
+        self.assertEqual((next_args, until_args), ((29,), (31,)))
+        next(1)
+        next(2)
+        simics.SIM_process_pending_work()
+        until(4)
+        next(3)   # silently discarded
+        until(5)  # silently discarded
+        self.assertFalse(t.done())
+        simics.SIM_process_pending_work()
+        self.assertTrue(t.done())
+        self.assertEqual(t.result(), [1, 2])
+        self.assertEqual(set(self.flush()), {('cancel', next_handle),
+                                             ('cancel', until_handle)})
+        assert not self.Snooper.cbs
+
+    def test_trace(self):
+        async def coro():
+            return await trace(self.Snooper(41), until=self.Snooper(43))
+        t = global_event_loop().create_task(coro())
+        simics.SIM_process_pending_work()
+        [(next, next_ctx, next_args, next_handle),
+         (until, until_ctx, until_args, until_handle)] = self.Snooper.cbs
+        del self.Snooper.cbs[:]
+        self.assertEqual((next_args, until_args), ((41,), (43,)))
+        next(1)
+        simics.SIM_process_pending_work()
+        next(2)
+        until(4)
+        next(3)   # silently discarded
+        until(5)  # silently discarded
+        self.assertFalse(t.done())
+        simics.SIM_process_pending_work()
+        self.assertTrue(t.done())
+        self.assertEqual(t.result(), [1, 2])
+        self.assertEqual(set(self.flush()), {('cancel', next_handle),
+                                             ('cancel', until_handle)})
+        assert not self.Snooper.cbs
+
+
+class TestCallbackScope(_SnooperTest):
+    def setUp(self):
+        self.loop = EventLoop()
+
+    def tearDown(self):
+        self.loop.asyncio_loop.close()
+
+    def test_callback_scope(self):
+        def callback(*args):
+            self.calls.append(args)
+        snp = self.Snooper(3)
+        inside = self.loop.create_future()
+        never = self.loop.create_future()
+        class TestExc(Exception): pass
+        async def coro():
+            with self.assertRaises(TestExc):
+                async with CallbackScope(snp, callback):
+                    inside.set_result(None)
+                    await never
+            return 17
+
+        task = self.loop.create_task(coro())
+        self.loop.run_until_complete(inside)
+        [(cb, exc_cb, args, handle)] = self.Snooper.cbs
+        del self.Snooper.cbs[:]
+        self.assertEqual(args, (3,))
+        cb(7)
+        self.assertEqual(self.flush(), [(7,)])
+        exc_cb(TestExc())
+        self.loop.quiesce()
+        self.assertEqual(self.loop.run_until_complete(task), 17)
+        self.assertEqual(self.flush(), [('cancel', handle)])
+
+    def test_nested_callback_scope(self):
+        '''when nesting callback scopes, an exception in the outer one's
+        snoop evades the inner scope, and is propagated to the exit
+        handler of the outer scope'''
+        class TestExc(Exception): pass
+        never = self.loop.create_future()
+        def callback(*args):
+            self.calls.append(args)
+        outer_snoop = self.Snooper(3)
+        inner_snoop = self.Snooper(5)
+        async def nested_coro():
+            try:
+                async with CallbackScope(outer_snoop, callback):
+                    try:
+                        async with CallbackScope(inner_snoop, callback):
+                            await never
+                    except TestExc:
+                        return 'inner'
+            except TestExc:
+                return 'outer'
+        task = self.loop.create_task(nested_coro())
+        self.loop.quiesce()
+        [(_, outer_exc_cb, outer_args, outer_handle),
+         (_, _, inner_args, inner_handle)] = self.Snooper.cbs
+        assert (outer_args, inner_args) == ((3,), (5,))
+        del self.Snooper.cbs[:]
+        outer_exc_cb(TestExc())
+        self.assertEqual(self.loop.run_until_complete(task), 'outer')
+        self.assertEqual(set(self.flush()),
+                         {('cancel', inner_handle), ('cancel', outer_handle)})
+
+    def test_callback_scope_exit_race(self):
+        def callback(*args):
+            self.calls.append(args)
+        snp = self.Snooper(3)
+        fut = None
+        class TestExc(Exception): pass
+        async def coro():
+            nonlocal fut
+            fut = self.loop.create_future()
+            try:
+                async with CallbackScope(snp, callback):
+                    await fut
+                    self.calls.append('fallthrough')
+            except TestExc:
+                self.calls.append('exception')
+                #assert futs.one.cancelled()
+            return 7
+
+        # raise just after resumption
+        task = self.loop.create_task(coro())
+        self.loop.quiesce()
+        [(cb, exc_cb, args, handle)] = self.Snooper.cbs
+        del self.Snooper.cbs[:]
+        fut.set_result(None)
+        self.loop.call_soon(exc_cb, TestExc())
+        self.loop.quiesce()
+        self.assertEqual(self.flush(), ['fallthrough', ('cancel', handle)])
+        self.assertEqual(self.loop.run_until_complete(task), 7)
+
+        # resume just after exception
+        task = self.loop.create_task(coro())
+        self.loop.quiesce()
+        [(cb, exc_cb, args, handle)] = self.Snooper.cbs
+        del self.Snooper.cbs[:]
+        fut.set_result(None)
+        exc_cb(TestExc())
+        self.loop.quiesce()
+        self.loop.run_until_complete(fut)
+        self.assertEqual(self.flush(), [('cancel', handle), 'exception'])
+        self.assertEqual(self.loop.run_until_complete(task), 7)
+
+    def test_timeout(self):
+        snp = self.Snooper()
+        never = self.loop.create_future()
+        async def coro():
+            try:
+                async with timeout(snp):
+                    await never
+            except TimeoutError:
+                return 53
+
+        t = self.loop.create_task(coro())
+        self.loop.quiesce()
+        [(cb, exc_cb, args, handle)] = self.Snooper.cbs
+        del self.Snooper.cbs[:]
+        cb()
+        self.assertEqual(self.loop.run_until_complete(t), 53)
+        self.assertEqual(self.flush(), [('cancel', handle)])
+
+
+class TestTaskGroup(unittest.TestCase):
+    def setUp(self):
+        self.loop = EventLoop()
+
+    def tearDown(self):
+        self.loop.asyncio_loop.close()
+
+    def test_task_group(self):
+        quiesce = self.loop.quiesce
+
+        async def fut_coro(fut):
+            return await fut
+        async def never():
+            await self.loop.create_future()
+        async def nothing(): pass
+
+        async def simple_fallthrough():
+            async with TaskGroup():
+                pass
+
+        self.loop.run_until_complete(simple_fallthrough())
+
+        class Exc(Exception): pass
+        exc = Exc('hello')
+        async def broken():
+            raise exc
+        async def early_failure():
+            async with TaskGroup() as tg:
+                tg.create_task(broken())
+        with self.assertRaises(ExceptionGroup) as cm:
+            self.loop.run_until_complete(early_failure())
+        self.assertEqual(cm.exception.exceptions, (exc,))
+
+        # Basic operation: started tasks are awaited before exiting scope,
+        # order is insignificant
+        futs = [self.loop.create_future() for _ in range(10)]
+        async def g1():
+            async with TaskGroup() as tg:
+                return [tg.create_task(fut_coro(f)) for f in futs]
+        task = self.loop.create_task(g1())
+        quiesce()
+        shuffled = list(enumerate(futs))
+        random.shuffle(shuffled)
+        for (i, f) in shuffled:
+            f.set_result(i)
+            self.assertFalse(task.done())
+            quiesce()
+        self.assertEqual([t.result() for t in task.result()], list(range(10)))
+
+        async def bad_usage():
+            tg = TaskGroup()
+            n = nothing()
+            with self.assertRaises(RuntimeError):
+                # tasks cannot be created before aenter
+                tg.create_task(n)
+            if sys.version_info[:2] in [(3, 10), (3, 11), (3, 12)]:
+                # avoid warning for unawaited coroutine.
+                # Counts as awaited in newer pythons
+                await n
+            async with tg:
+                pass
+            with self.assertRaises(RuntimeError):
+                # context manager is not reusable
+                async with tg:
+                    pass
+            n = nothing()
+            with self.assertRaises(RuntimeError):
+                # tasks cannot be created after aexit
+                tg.create_task(n)
+            if sys.version_info[:2] in [(3, 10), (3, 11), (3, 12)]:
+                # avoid warning for unawaited coroutine.
+                # Counts as awaited in newer pythons
+                await n
+        self.loop.run_until_complete(bad_usage())
+
+        async def named_subtask():
+            async with TaskGroup() as tg:
+                t = tg.create_task(nothing(), name='rotfrukt')
+                return t
+        t = self.loop.run_until_complete(named_subtask())
+        self.assertIn('rotfrukt', str(t))
+        self.assertIn('rotfrukt', repr(t))
+
+        exc = Exc('hello')
+        async def one_subtask_raises(futs):
+            async with TaskGroup() as tg:
+                for fut in futs[:-1]:
+                    tg.create_task(fut_coro(fut))
+                await fut_coro(futs[-1])
+        for i in range(3):
+            futs = [self.loop.create_future() for _ in range(3)]
+            task = self.loop.create_task(one_subtask_raises(futs))
+            quiesce()
+            futs[i].set_exception(exc)
+            quiesce()
+            self.assertEqual(task.exception().exceptions, (exc,))
+
+        async def one_subtask_raises_no_await(futs):
+            async with TaskGroup() as tg:
+                for fut in futs:
+                    tg.create_task(fut_coro(fut))
+        for i in range(3):
+            futs = [self.loop.create_future() for _ in range(3)]
+            task = self.loop.create_task(one_subtask_raises_no_await(futs))
+            quiesce()
+            futs[i].set_exception(exc)
+            quiesce()
+            self.assertEqual(task.exception().exceptions, (exc,))
+
+        subtask = None
+        cancelled = False
+        async def parent_cancelled_after_fallthrough():
+            nonlocal subtask
+            nonlocal cancelled
+            try:
+                async with TaskGroup() as tg:
+                    subtask = tg.create_task(never())
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+        task = self.loop.create_task(parent_cancelled_after_fallthrough())
+        quiesce()
+        task.cancel()
+        assert not cancelled
+        quiesce()
+        self.assertTrue(cancelled)
+        self.assertTrue(subtask.cancelled())
+
+        async def body_raises_after_creating_task():
+            async with TaskGroup() as tg:
+                tg.create_task(never())
+                raise exc
+        task = self.loop.create_task(body_raises_after_creating_task())
+        quiesce()
+        self.assertEqual(task.exception().exceptions, (exc,))
+
+        async def g4(futs, excs):
+            async def coro(fut):
+                try:
+                    await fut
+                finally:
+                    raise excs[fut]
+            async with TaskGroup() as tg:
+                for fut in futs[:-1]:
+                    tg.create_task(coro(fut))
+                await coro(futs[-1])
+        for i in range(4):
+            futs = [self.loop.create_future() for _ in range(4)]
+            excs = {f: Exception(i) for (i, f) in enumerate(futs)}
+            task = self.loop.create_task(g4(futs, excs))
+            quiesce()
+            random.shuffle(futs)
+            futs[i].set_exception(excs[futs[i]])
+            quiesce()
+            self.assertEqual(set(task.exception().exceptions),
+                             {excs[f] for f in futs})
+
+        calls = []
+        async def g5(fut):
+            async with TaskGroup() as tg:
+                tg.create_task(fut_coro(fut))
+                try:
+                    await never()
+                finally:
+                    n = nothing()
+                    # can't create new tasks while shutting down
+                    try:
+                        tg.create_task(n)
+                    except Exception as e:
+                        calls.append(e)
+                    if sys.version_info[:2] in [(3, 10), (3, 11), (3, 12)]:
+                        # avoid warning for unawaited coroutine.
+                        # Counts as awaited in newer pythons
+                        await n
+        fut = self.loop.create_future()
+        task = self.loop.create_task(g5(fut))
+        quiesce()
+        fut.set_exception(exc)
+        quiesce()
+        assert task.exception().exceptions == (exc,)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(isinstance(calls[0], RuntimeError))
+
+        async def g6(inner, outer):
+            async with TaskGroup() as tg:
+                return (tg.create_task(fut_coro(inner)), await fut_coro(outer))
+        (inner, outer) = (self.loop.create_future(), self.loop.create_future())
+        task = self.loop.create_task(g6(inner, outer))
+        quiesce()
+        inner.cancel()
+        outer.set_result(3)
+        quiesce()
+        assert task.done()
+        (t, res) = task.result()
+        self.assertEqual((t.cancelled(), res), (True, 3))
+
+        inner_task = None
+        async def g7(inner, outer):
+            async with TaskGroup() as tg:
+                nonlocal inner_task
+                inner_task = tg.create_task(fut_coro(inner))
+                await fut_coro(outer)
+        (inner, outer) = (self.loop.create_future(), self.loop.create_future())
+        task = self.loop.create_task(g7(inner, outer))
+        quiesce()
+        inner.set_result(3)
+        outer.cancel()
+        quiesce()
+        self.assertTrue(task.cancelled())
+        self.assertEqual(inner_task.result(), 3)
+
+        # Known upstream bug,
+        # see https://github.com/python/cpython/issues/102572
+        # Keeping an explicit list here rather than >=(3, 11) to ensure
+        # we remember to check if it's resolved on every new python version
+        if sys.version_info[:2] not in [(3, 11), (3, 12), (3, 13)]:
+            async def runner():
+                fut = self.loop.create_future()
+                async def coro():
+                    try:
+                        fut.set_exception(KeyboardInterrupt())
+                        await self.loop.create_future()
+                    except asyncio.CancelledError:
+                        raise Exception()
+                with self.assertRaises(KeyboardInterrupt):
+                    async with TaskGroup() as tg:
+                        tg.create_task(coro())
+                        await fut
+            self.loop.run_until_complete(runner())
+
+        # await during the cancellation induced by aexit works
+        calls = []
+        async def coro(fut):
+            try:
+                await never()
+            finally:
+                calls.append(await fut)
+        async def g8(fut):
+            async with TaskGroup() as tg:
+                tg.create_task(coro(fut))
+                await never()
+        fut = self.loop.create_future()
+        task = self.loop.create_task(g8(fut))
+        quiesce()
+        task.cancel()
+        quiesce()
+        fut.set_result(4)
+        quiesce()
+        self.assertTrue(task.cancelled())
+        self.assertEqual(calls, [4])
+        del calls[:]
+
+    def test_exc_group(self):
+        class Exc(Exception): pass
+        class BaseExc(BaseException): pass
+        async def coro():
+            async def raise_exc(i):
+                nonlocal num_raised
+                num_raised += 1
+                raise raised_exceptions[i]
+            async with TaskGroup() as tg:
+                tg.create_task(raise_exc(0))
+                tg.create_task(raise_exc(1))
+                await get_running_loop().create_future()
+        num_raised = 0
+        raised_exceptions = [Exc('0'), Exc('1')]
+        with self.assertRaises(ExceptionGroup) as cm:
+            self.loop.run_until_complete(coro())
+        self.assertEqual(num_raised, 2)
+        self.assertEqual(set(cm.exception.exceptions),
+                         set(raised_exceptions))
+        num_raised = 0
+        raised_exceptions = [BaseExc('0'), Exc('1')]
+        with self.assertRaises(BaseExceptionGroup) as cm:
+            self.loop.run_until_complete(coro())
+        self.assertEqual(num_raised, 2)
+        self.assertEqual(set(cm.exception.exceptions),
+                         set(raised_exceptions))
@@ -15,7 +15,6 @@
 
 import simics, cli, table
 from functools import reduce
-import unittest
 import vmp_constants
 
 # Control VMP acceleration on/off and its timing. Exported to
@@ -829,66 +828,8 @@ cli.new_unsupported_command("vmp-stats-clear", "internals", VmpStats.clear_cmd,
                             short="clear VMP performance statistics",
                             doc="Clear VMP/VMXMON statistics.")
 
-
-class TestVMPFeatureEnabler(unittest.TestCase):
-    def test_string_of_all_features_contains_classic_feature(self):
-        res = VMPFeatureEnabler.string_of_all_features()
-        self.assertIn(container=res, member="ept")
-
-    def test_string_of_all_features_separates_with_comma_space(self):
-        res = VMPFeatureEnabler.string_of_all_features()
-        self.assertIn(container=res, member=", ")
-
-    def test_string_of_all_features_mentions_5_level_paging(self):
-        res = VMPFeatureEnabler.string_of_all_features()
-        self.assertIn(container=res, member="five_level_paging")
-
-
-class TestVmpEventNames(unittest.TestCase):
-    def all_vm_return_symbols(self):
-        stats = VmpEventNames("vmret")
-        all_codes = stats.keys()
-        return tuple(stats[code] for code in all_codes)
-
-    def all_vm_exit_symbols(self):
-        stats = VmpEventNames("vmexit")
-        all_codes = stats.keys()
-        return tuple(stats[code] for code in all_codes)
-
-    def all_perfctr_symbols(self):
-        stats = VmpEventNames("pctr")
-        all_codes = stats.keys()
-        return tuple(stats[code] for code in all_codes)
-
-    def test_traditional_vmp_return_codes_are_present(self):
-        all_vmrets = self.all_vm_return_symbols()
-        self.assertIn("VMRET_NOP", all_vmrets)
-        self.assertIn("VMRET_CPUID", all_vmrets)
-        self.assertIn("VMRET_EXC", all_vmrets)
-
-    def test_range_markers_are_absent(self):
-        all_vmrets = self.all_vm_return_symbols()
-        self.assertNotIn("VMRET_INST_EXIT_RANGE_START", all_vmrets)
-        self.assertNotIn("VMRET_INST_EXIT_RANGE_END", all_vmrets)
-        self.assertNotIn("VMRET_COUNT", all_vmrets)
-
-    def test_vm_exit_codes_has_correct_mapping(self):
-        stats = VmpEventNames("vmexit")
-        self.assertEqual(stats[0], "VMEXIT_EXC")
-
-    def test_vm_exit_range_marker_is_absent(self):
-        all_symbols = self.all_vm_exit_symbols()
-        self.assertNotIn("VMEXIT_COUNT", all_symbols)
-
-    def test_traditional_perfctr_symbols_are_present(self):
-        all_symbols = self.all_perfctr_symbols()
-        self.assertIn("vmx switches", all_symbols)
-        self.assertIn("userspace switches", all_symbols)
-
-    def test_missed_perfctr_symbol_is_present(self):
-        all_symbols = self.all_perfctr_symbols()
-        self.assertIn("PERFCTR_TLB_CR3_CHANGE", all_symbols)
-
-    def test_perfctr_range_marker_is_absent(self):
-        all_symbols = self.all_perfctr_symbols()
-        self.assertNotIn("PERFCTR_COUNT", all_symbols)
+# The unit tests live in test_vmp_common.py, so that they are not compiled on every
+# Simics start. This hook lets unittest find them through this module.
+def load_tests(loader, tests, pattern):
+    import test_vmp_common
+    return loader.loadTestsFromModule(test_vmp_common)
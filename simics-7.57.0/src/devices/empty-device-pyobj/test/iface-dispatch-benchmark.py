@@ -0,0 +1,77 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Micro-benchmark of interface calls to Python devices. Not part of the
+# test suite; run with:
+#
+#   simics -batch-mode -no-win -p iface-dispatch-benchmark.py
+#
+# Prints the number of signal_raise calls per second for pyobj and
+# confclass devices, with and without direct dispatch.
+
+import time
+import pyobj
+import simics
+
+calls = 1000000
+
+class bench_pyobj(pyobj.ConfObject):
+    '''Interface dispatch benchmark device.'''
+    class signal(pyobj.Interface):
+        def signal_raise(self):
+            self._up.count.val += 1
+        def signal_lower(self):
+            pass
+    class count(pyobj.SimpleAttribute(0, 'i')):
+        '''Number of signal_raise calls.'''
+
+class bench_pyobj_direct(pyobj.ConfObject):
+    '''Interface dispatch benchmark device, direct dispatch.'''
+    class signal(pyobj.Interface):
+        _direct_dispatch = True
+        def signal_raise(self):
+            self._up.count.val += 1
+        def signal_lower(self):
+            pass
+    class count(pyobj.SimpleAttribute(0, 'i')):
+        '''Number of signal_raise calls.'''
+
+def confclass_device(name, **kwd):
+    class bench_confclass:
+        cls = simics.confclass(name, **kwd)
+        cls.attr.count('i', default = 0)
+
+        @cls.iface.signal.signal_raise
+        def signal_raise(self):
+            self.count += 1
+
+        @cls.iface.signal.signal_lower
+        def signal_lower(self):
+            pass
+    return bench_confclass
+
+confclass_device('bench_confclass')
+confclass_device('bench_confclass_direct', direct_dispatch = True)
+
+def bench(classname):
+    obj = simics.SIM_create_object(classname, classname)
+    signal_raise = simics.SIM_get_interface(obj, 'signal').signal_raise
+    t = time.perf_counter()
+    for _ in range(calls):
+        signal_raise()
+    t = time.perf_counter() - t
+    assert obj.count == calls
+    print("%-24s %12.0f calls/s" % (classname, calls / t))
+    simics.SIM_delete_object(obj)
+
+for classname in ('bench_pyobj', 'bench_pyobj_direct',
+                  'bench_confclass', 'bench_confclass_direct'):
+    bench(classname)
@@ -0,0 +1,48 @@
+# © 2026 Intel Corporation
+#
+# This software and the related documents are Intel copyrighted materials, and
+# your use of them is governed by the express license under which they were
+# provided to you ("License"). Unless the License provides otherwise, you may
+# not use, modify, copy, publish, distribute, disclose or transmit this software
+# or the related documents without Intel's prior written permission.
+#
+# This software and the related documents are provided as is, with no express or
+# implied warranties, other than those that are expressly stated in the License.
+
+# Micro-benchmark of log message formatting. Not part of the test suite;
+# run with:
+#
+#   simics -batch-mode -no-win -p log-format-benchmark.py
+#
+# Prints the number of messages per second that log_commands.format_log
+# formats for a device, with a clock for the time stamps, for a few
+# log-setup formats. format_log takes the same arguments before and after
+# log formats were compiled into functions, so running this with an older
+# Simics gives the numbers to compare with.
+
+import time
+import simics
+import log_commands
+
+messages = 200000
+
+clock = simics.SIM_create_object('clock', 'bench_clock', freq_mhz = 1)
+dev = simics.SIM_create_object('empty_device_python', 'bench_dev',
+                               queue = clock)
+
+def bench(fmt):
+    log_format = log_commands.LogFormatString(
+        fmt, log_commands.Logger_info.used_ch_in_format(fmt, True))
+    format_log = log_commands.format_log
+    t = time.perf_counter()
+    for _ in range(messages):
+        format_log(True, log_format, dev, 'info', 'message', 1, 1)
+    t = time.perf_counter() - t
+    print("%-32s %12.0f messages/s" % (fmt, messages / t))
+
+for fmt in ('[%o %t] %m',
+            '[%o %t %g %l] %m',
+            '[%o %t] %v %m',
+            '[%o %t %g %l] %v %r %p%d %m',
+            '%o: %m (%v)'):
+    bench(fmt)
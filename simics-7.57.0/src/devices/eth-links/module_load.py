@@ -12,6 +12,7 @@
 
 import cli, math, simics, struct, os, signal, threading
 import subprocess
+import table
 import errno
 import ipaddress
 import simicsutils.host
@@ -48,12 +49,14 @@ def link_info_status(cls):
                 return (obj.name, cellname)
             else:
                 return ('%s:%s' % (obj.name, port), cellname)
+        capture = ongoing_pcap_dumps.get(obj.component)
         return [(None,
                  [('Effective latency',
                    cli.format_seconds(obj.effective_latency))]),
                 (None,
                  [('Connected devices',
-                   sorted([fmt(ep.device) for ep in obj.endpoints]))])]
+                   sorted([fmt(ep.device) for ep in obj.endpoints]))])] + (
+                       [('Capture', capture[1].status())] if capture else [])
     cli.new_info_command(cls, info)
     cli.new_status_command(cls, status)
 
@@ -399,13 +402,58 @@ def kill_process(pid):
             pass
 
 class Pcap:
-    def __init__(self, fileobj, ns_resolution = False):
+    """Writes captured Ethernet frames in pcap format.
+
+    Frames are queued by write_frame, which is called from the simulation,
+    and written to the file by a separate writer thread, so that a slow
+    file or pipe does not stall the simulation. At most buffer_size bytes
+    are kept waiting in memory; frames arriving while the buffer is full
+    are dropped and counted.
+
+    If snaplen is given, frames are truncated to that many bytes. If
+    filename is given, the output is rotated to a new file, see
+    rotated_filename, when it would grow beyond rotate_size bytes or when
+    rotate_time seconds of simulated time have passed since the first frame
+    in the file."""
+    default_buffer_size = 16 << 20
+    default_snaplen = 2048
+
+    def __init__(self, fileobj, ns_resolution = False, snaplen = None,
+                 filename = None, rotate_size = None, rotate_time = None,
+                 buffer_size = default_buffer_size):
+        assert filename or not (rotate_size or rotate_time)
         self.__file = fileobj
         self.lock = threading.Lock()
+        self.__cond = threading.Condition(self.lock)
         self.ns_resolution = ns_resolution
-        self.__write_header(ns_resolution)
-    def __write_header(self, ns_resolution):
-        if ns_resolution:
+        self.snaplen = snaplen
+        self.filename = filename
+        self.rotate_size = rotate_size
+        self.rotate_time = rotate_time
+        self.buffer_size = buffer_size
+
+        # protected by lock
+        self.__queue = []
+        self.__pending = 0
+        self.__closing = False
+        self.__error = None
+        self.frames = 0
+        self.truncated = 0
+        self.dropped = 0
+
+        # updated by the writer thread only
+        self.written = 0
+        self.files = 1
+        self.__file_size = 0
+        self.__file_start = None
+
+        self.__write_header()
+        self.__thread = threading.Thread(target = self.__writer,
+                                         name = 'pcap writer', daemon = True)
+        self.__thread.start()
+
+    def __write_header(self):
+        if self.ns_resolution:
             magic = 0xa1b23c4d
         else:
             magic = 0xa1b2c3d4
@@ -413,21 +461,106 @@ class Pcap:
         minor = 4
         thiszone = 0
         sigfigs = 0
-        snaplen = 2048
+        snaplen = self.snaplen or self.default_snaplen
         linktype = 1
-        self.__file.write(struct.pack('IHHIIII', magic, major, minor, thiszone,
-                                      sigfigs, snaplen, linktype))
+        header = struct.pack('IHHIIII', magic, major, minor, thiszone,
+                             sigfigs, snaplen, linktype)
+        self.__file.write(header)
+        self.__file_size = len(header)
+        self.__file_start = None
+
     def write_frame(self, clock, frame):
+        now = simics.SIM_time(clock)
+        fsec, isec = math.modf(now)
+        caplen = len(frame)
+        if self.snaplen and caplen > self.snaplen:
+            caplen = self.snaplen
+        # the frame buffer is only valid during the snoop callback, so the
+        # record must be copied before it is queued
+        record = struct.pack('IIII', int(isec),
+                             int(1e9*fsec) if self.ns_resolution \
+                             else int(1e6*fsec), caplen,
+                             len(frame)) + bytes(frame[:caplen])
+        with self.lock:
+            if self.__error:
+                raise self.__error
+            self.frames += 1
+            if caplen < len(frame):
+                self.truncated += 1
+            if self.__pending + len(record) > self.buffer_size:
+                self.dropped += 1
+                return
+            self.__queue.append((now, record))
+            self.__pending += len(record)
+            self.__cond.notify()
+
+    def __rotate(self, now, size):
+        if self.__file_start is None:
+            self.__file_start = now
+            return
+        if ((self.rotate_size and self.__file_size + size > self.rotate_size)
+            or (self.rotate_time
+                and now - self.__file_start >= self.rotate_time)):
+            self.__file.close()
+            self.__file = open(rotated_filename(self.filename, self.files),
+                               'wb')
+            self.files += 1
+            self.__write_header()
+            self.__file_start = now
+
+    def __writer(self):
+        while True:
+            with self.lock:
+                while not self.__queue and not self.__closing:
+                    self.__cond.wait()
+                if not self.__queue:
+                    return
+                (records, self.__queue) = (self.__queue, [])
+            try:
+                size = 0
+                for (now, record) in records:
+                    if self.filename:
+                        self.__rotate(now, len(record))
+                    self.__file.write(record)
+                    self.__file_size += len(record)
+                    size += len(record)
+                self.__file.flush()
+            except OSError as e:
+                with self.lock:
+                    self.__error = e
+                    self.__queue = []
+                    self.__pending = 0
+                return
+            with self.lock:
+                self.written += len(records)
+                self.__pending -= size
+
+    def status(self):
         with self.lock:
-            fsec, isec = math.modf(simics.SIM_time(clock))
-            self.__file.write(struct.pack('IIII', int(isec),
-                                          int(1e9*fsec) if self.ns_resolution \
-                                          else int(1e6*fsec), len(frame),
-                                          len(frame)))
-            self.__file.write(frame)
+            return [('Frames captured', self.frames),
+                    ('Frames written', self.written),
+                    ('Frames truncated', self.truncated),
+                    ('Frames dropped', self.dropped),
+                    ('Buffered bytes', self.__pending)] + (
+                        [('Files', self.files)] if self.filename else [])
+
     def close(self):
+        with self.lock:
+            self.__closing = True
+            self.__cond.notify()
+        self.__thread.join()
         with self.lock:
             self.__file.close()
+            if self.__error:
+                raise self.__error
+
+def rotated_filename(filename, index):
+    """Name of the file number index (from 0) when rotating the capture to
+    filename, e.g. dump.pcap, dump-1.pcap, dump-2.pcap, ..."""
+    if index == 0:
+        return filename
+    (root, ext) = os.path.splitext(filename)
+    return '%s-%d%s' % (root, index, ext)
 
 ongoing_pcap_dumps = {}
 
@@ -468,6 +601,9 @@ def stop_capture(link_or_probe):
         except OSError:
             # if this was a pipe, it was probably already broken
             pass
+        if pcap.dropped:
+            print("%d of %d frames were dropped since the capture could not"
+                  " keep up with the simulation" % (pcap.dropped, pcap.frames))
 
 # register an exit callback to stop all on-going captures
 def stop_capture_callback(ignore1 = None, ignore2 = None):
@@ -499,11 +635,17 @@ def start_capture(pcap, link_or_probe, pid = None):
         ep = None
     ongoing_pcap_dumps[link_or_probe] = (ep, pcap, pid)
 
-def pcap_dump_start(links_or_probes, filename, ns_resolution):
+def pcap_dump_start(links_or_probes, filename, ns_resolution, snaplen = 0,
+                    rotate_size = 0, rotate_time = 0.0):
+    if rotate_size and rotate_size < 1024:
+        raise cli.CliError("The rotate size must be at least 1024 bytes")
+    if rotate_time < 0:
+        raise cli.CliError("The rotate time cannot be negative")
     for l in links_or_probes:
         stop_capture(l)
     try:
-        pcap = Pcap(open(filename, 'wb', 0), ns_resolution)
+        pcap = Pcap(open(filename, 'wb'), ns_resolution, snaplen,
+                    filename, rotate_size, rotate_time)
     except Exception as ex:
         raise cli.CliError("Failed starting pcap: %s" % ex)
     for l in links_or_probes:
@@ -513,28 +655,54 @@ def check_obj_instantiated(obj):
     if hasattr(obj.iface, 'component') and not obj.instantiated:
         raise cli.CliError("object '%s' is not instantiated" % obj)
 
-def pcap_dump_cmd(obj, filename, ns_resolution):
+def pcap_dump_cmd(obj, filename, ns_resolution, snaplen, rotate_size,
+                  rotate_time):
     check_obj_instantiated(obj)
-    pcap_dump_start([obj], filename, ns_resolution)
+    pcap_dump_start([obj], filename, ns_resolution, snaplen, rotate_size,
+                    rotate_time)
 
 def zero_or_one_set(args):
     return len([a for a in args if a]) <= 1
 
-def global_pcap_dump_cmd(link, probe, filename, ns_resolution):
+def global_pcap_dump_cmd(link, probe, filename, ns_resolution, snaplen,
+                         rotate_size, rotate_time):
     if not zero_or_one_set([link, probe]):
         raise cli.CliError("Capture should be enabled either a link"
                            " or a probe")
     if link and link.classname in new_ethernet_link_cmps:
         check_obj_instantiated(link)
-        pcap_dump_start([link], filename, ns_resolution)
+        links_or_probes = [link]
     elif probe:
-        pcap_dump_start([probe], filename, ns_resolution)
+        links_or_probes = [probe]
     else:
-        new_links = all_new_ethernet_links()
-        if new_links:
-            pcap_dump_start(new_links, filename, ns_resolution)
-        else:
+        links_or_probes = all_new_ethernet_links()
+        if not links_or_probes:
             raise cli.CliError("No Ethernet links can be found for the capture")
+    pcap_dump_start(links_or_probes, filename, ns_resolution, snaplen,
+                    rotate_size, rotate_time)
+
+def capture_status_cmd():
+    header = ['Capture on', 'Output', 'Captured', 'Written', 'Truncated',
+              'Dropped']
+    data = []
+    for (obj, (_, pcap, pid)) in sorted(ongoing_pcap_dumps.items(),
+                                        key = lambda x: x[0].name):
+        if pcap.filename:
+            output = pcap.filename
+            if pcap.files > 1:
+                output += ' (%d files)' % pcap.files
+        else:
+            output = 'process %d' % pid if pid else 'pipe'
+        data.append([obj.name, output, pcap.frames, pcap.written,
+                     pcap.truncated, pcap.dropped])
+    if not data:
+        return cli.command_return("No captures in progress", [])
+    props = [(table.Table_Key_Columns,
+              [[(table.Column_Key_Name, h),
+                (table.Column_Key_Int_Radix, 10)] for h in header])]
+    tbl = table.Table(props, data)
+    msg = tbl.to_string(rows_printed=0, no_row_column=True)
+    return cli.command_return(msg, data)
 
 def capture_stop_cmd(obj):
     stop_capture(obj)
@@ -675,18 +843,37 @@ def global_ethereal_cmd(link, probe, flags):
         else:
             raise cli.CliError("No Ethernet links can be found for the capture")
 
+pcap_dump_options_doc = """
+Frames are written to the file by a separate thread, with up to 16 MiB of
+captured traffic buffered in memory. If the file cannot be written as fast as
+frames arrive, frames are dropped rather than slowing down the simulation. Use
+<cmd>capture-status</cmd> to see how many frames were written and dropped.
+
+If <arg>snaplen</arg> is given, only that many bytes of each frame are saved.
+
+The capture can be split into several files, named like the first file with
+a number added before the extension. A new file is started before the current
+one would grow beyond <arg>rotate-size</arg> bytes, and when
+<arg>rotate-time</arg> seconds of simulated time have passed since the first
+frame in the current file."""
+
 def register_pcap_class_commands(cls):
     cli.new_command('pcap-dump', pcap_dump_cmd,
                     [cli.arg(cli.filename_t(), 'file'),
-                     cli.arg(cli.flag_t, '-ns'),],
+                     cli.arg(cli.flag_t, '-ns'),
+                     cli.arg(cli.uint_t, 'snaplen', '?', 0),
+                     cli.arg(cli.uint64_t, 'rotate-size', '?', 0),
+                     cli.arg(cli.float_t, 'rotate-time', '?', 0.0)],
                     cls = cls,
                     type = ["Networking"],
                     short = 'dump Ethernet traffic to a pcap file',
+                    see_also = ['capture-status'],
                     doc = """
 Dump all network traffic on the Ethernet link to the file <arg>file</arg> in
 pcap format. The optional <tt>-ns</tt> flag sets the timestamp resolution of
 the file in nano-seconds. The default timestamp resolution is in
-micro-seconds.""")
+micro-seconds.
+""" + pcap_dump_options_doc)
 
     cli.new_command('pcap-dump-stop', capture_stop_cmd,
                     [],
@@ -742,15 +929,36 @@ cli.new_command('pcap-dump', global_pcap_dump_cmd,
                  cli.arg(cli.obj_t('ethernet probe', 'eth-probe'),
                          'probe', '?'),
                  cli.arg(cli.filename_t(), 'filename'),
-                 cli.arg(cli.flag_t, "-ns"),],
+                 cli.arg(cli.flag_t, "-ns"),
+                 cli.arg(cli.uint_t, 'snaplen', '?', 0),
+                 cli.arg(cli.uint64_t, 'rotate-size', '?', 0),
+                 cli.arg(cli.float_t, 'rotate-time', '?', 0.0)],
                 type = ["Networking"],
                 alias = ['pcapdump'],
                 short = 'dump Ethernet traffic to file',
+                see_also = ['capture-status'],
                 doc = """
 Dump all Ethernet network traffic on the given <arg>link</arg> or
 <arg>probe</arg> to the given <arg>filename</arg> in pcap format.
 The optional <tt>-ns</tt> flag sets the timestamp resolution of the file in
-nano-seconds. The default timestamp resolution is in micro-seconds.""")
+nano-seconds. The default timestamp resolution is in micro-seconds.
+""" + pcap_dump_options_doc)
+
+cli.new_command('capture-status', capture_status_cmd,
+                [],
+                type = ["Networking"],
+                short = "show status of Ethernet traffic captures",
+                see_also = ['pcap-dump', 'tcpdump', 'wireshark'],
+                doc = """
+List all Ethernet traffic captures in progress, started with
+<cmd>pcap-dump</cmd>, <cmd>tcpdump</cmd> or <cmd>wireshark</cmd>. For each
+link or probe, the number of captured frames is shown, together with how many
+of them have been written to the output so far, how many were truncated to
+the snaplen of the capture, and how many were dropped because the output could
+not keep up with the simulation.
+
+Returns a list of [link or probe, output, captured, written, truncated,
+dropped] entries when used in an expression.""")
 
 cli.new_command('pcap-dump-stop', global_capture_stop_cmd,
                 [cli.arg(ethlink_t, 'link', '?'),
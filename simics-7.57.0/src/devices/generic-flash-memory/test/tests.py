@@ -10,6 +10,10 @@
 # implied warranties, other than those that are expressly stated in the License.
 
 
+import simics_test_pool
+
 def tests(suite):
-    suite.add_simics_tests("s-*.py")
-    suite.add_simics_tests("s-*.py", extra_args = ["-e", "$no_target=1"])
+    simics_test_pool.add_simics_tests(suite, "s-*.py")
+    simics_test_pool.add_simics_tests(suite, "s-*.py",
+                                      extra_args = ["-e", "$no_target=1"],
+                                      name_suffix = "-no-target")
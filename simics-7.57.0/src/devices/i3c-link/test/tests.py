@@ -10,9 +10,10 @@
 # implied warranties, other than those that are expressly stated in the License.
 
 
-import multiproc_test
+import simics_multiproc_test
 
 def tests(suite):
     suite.add_simics_tests('s-*.py')
-    multiproc_test.add_multiproc_test(suite, 'cable-on-multi-processes.py', 2)
-    multiproc_test.add_multiproc_test(suite, 'link-multiproc.py', 2)
+    simics_multiproc_test.add_multiproc_test(
+        suite, 'cable-on-multi-processes.py', 2)
+    simics_multiproc_test.add_multiproc_test(suite, 'link-multiproc.py', 2)